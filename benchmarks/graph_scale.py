@@ -0,0 +1,200 @@
+# benchmarks/graph_scale.py
+
+"""
+Graph-scale benchmark: grows a synthetic graph through several sizes and
+times each read path the pipes rely on at every size:
+- activation:     retrieve_context_with_activation (fast-pipe symbolic retrieval)
+- recent_facts:   get_recent_facts("User", user_id) (the logic-bomb lookup)
+- related_nodes:  get_related_nodes on hub and tail entities
+- dense_entities: find_dense_entities (global degree scan)
+- dirty_degrees:  entity_degrees for one user's 10 dirty entities (the dreamer's per-pass lookup)
+
+    python -m benchmarks.graph_scale --backend memory --sizes 1000,10000,100000
+    python -m benchmarks.graph_scale --backend sqlite --sizes 1000,10000,100000,1000000
+    python -m benchmarks.graph_scale --backend neo4j --wipe --sizes 100000,1000000,10000000
+
+The SQLite backend writes to a temporary database file. The Neo4j backend
+wipes the configured database first and refuses to run without --wipe. The growth exponent between sizes (~0 flat, ~1 linear) makes
+index or query regressions visible before they reach production.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_graph import generate_edges, load_edges
+
+PATHS = ("activation", "recent_facts", "related_nodes", "dense_entities", "dirty_degrees")
+
+
+def _time_calls(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": round(samples[len(samples) // 2], 3),
+        "p95": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "max": round(samples[-1], 3),
+    }
+
+
+def measure(store, users: int, repeats: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """Time every read path against the current graph."""
+    rng = random.Random(seed)
+    pick_user = lambda: f"user_{rng.randrange(min(users, 10))}"  # active (Zipf-head) users
+    pick_entity = lambda: rng.choice(["User", f"entity_{rng.randrange(10)}", f"entity_{rng.randrange(1000)}"])
+
+    return {
+        "activation": _time_calls(lambda: store.retrieve_context_with_activation(pick_user()), repeats),
+        "recent_facts": _time_calls(lambda: store.get_recent_facts("User", user_id=pick_user(), limit=3), repeats),
+        "related_nodes": _time_calls(lambda: store.get_related_nodes(pick_entity()), repeats),
+        # The degree scan touches the whole graph; a few samples are enough
+        "dense_entities": _time_calls(lambda: store.find_dense_entities(min_degree=4, limit=3), max(1, repeats // 10)),
+        "dirty_degrees": _time_calls(
+            lambda: store.entity_degrees(pick_user(), ["User"] + [f"entity_{rng.randrange(1000)}" for _ in range(9)]),
+            repeats,
+        ),
+    }
+
+
+def growth_exponents(curve: List[Dict]) -> Dict[str, float]:
+    """log-log slope of p50 latency vs edge count between the first and last size."""
+    if len(curve) < 2:
+        return {}
+    first, last = curve[0], curve[-1]
+    size_ratio = math.log(last["edges"] / first["edges"])
+    exponents = {}
+    for path in PATHS:
+        a, b = first["paths"][path]["p50"], last["paths"][path]["p50"]
+        if a > 0 and b > 0:
+            exponents[path] = round(math.log(b / a) / size_ratio, 3)
+    return exponents
+
+
+def run_scale(
+    store,
+    sizes: List[int],
+    users: int = 100,
+    entities_per_user: int = 200,
+    shared_entities: int = 1000,
+    alpha: float = 1.1,
+    repeats: int = 20,
+    seed: int = 0,
+    load_batch_size: int = 5000,
+) -> Dict:
+    """Grow the graph through `sizes` (edges generated, cumulative) and measure at each step."""
+    sizes = sorted(sizes)
+    batches = generate_edges(
+        sizes[-1],
+        users=users,
+        entities_per_user=entities_per_user,
+        shared_entities=shared_entities,
+        alpha=alpha,
+        seed=seed,
+        batch_size=load_batch_size,
+    )
+    edges = iter(itertools.chain.from_iterable(batches))
+
+    curve = []
+    loaded = 0
+    for size in sizes:
+        chunk = list(itertools.islice(edges, size - loaded))
+        load_started = time.perf_counter()
+        load_edges(store, [chunk[i:i + load_batch_size] for i in range(0, len(chunk), load_batch_size)], load_batch_size)
+        load_s = time.perf_counter() - load_started
+        loaded = size
+
+        curve.append({
+            "edges": size,
+            "load_edges_per_s": round(len(chunk) / load_s, 1) if load_s else None,
+            "paths": measure(store, users, repeats, seed),
+        })
+
+    return {
+        "config": {
+            "sizes": sizes,
+            "users": users,
+            "entities_per_user": entities_per_user,
+            "shared_entities": shared_entities,
+            "alpha": alpha,
+            "repeats": repeats,
+            "seed": seed,
+        },
+        "curve": curve,
+        "growth_exponent_p50": growth_exponents(curve),
+    }
+
+
+def _open_store(backend: str, wipe: bool):
+    if backend == "memory":
+        from benchmarks.stubs import InMemoryGraph, InMemoryGraphStore
+        return InMemoryGraphStore(InMemoryGraph())
+    if backend == "sqlite":
+        import tempfile
+        from memory.sqlite_store import SQLiteMemoryStore
+        return SQLiteMemoryStore(Path(tempfile.mkdtemp(prefix="graph_scale_")) / "graph.db")
+
+    if not wipe:
+        raise SystemExit("The neo4j backend wipes the configured database; pass --wipe to confirm.")
+    from memory.neo4j_store import Neo4jMemoryStore
+    store = Neo4jMemoryStore()
+    store.wipe_database()
+    return store
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Graph-scale benchmark")
+    parser.add_argument("--backend", choices=("memory", "sqlite", "neo4j"), default="memory")
+    parser.add_argument("--wipe", action="store_true", help="Required for neo4j: wipe the database first")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated edge counts")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--entities-per-user", type=int, default=200)
+    parser.add_argument("--shared-entities", type=int, default=1000)
+    parser.add_argument("--alpha", type=float, default=1.1, help="Zipf exponent for entity popularity")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(x)) for x in args.sizes.split(",") if x]
+    store = _open_store(args.backend, args.wipe)
+    try:
+        results = run_scale(
+            store,
+            sizes,
+            users=args.users,
+            entities_per_user=args.entities_per_user,
+            shared_entities=args.shared_entities,
+            alpha=args.alpha,
+            repeats=args.repeats,
+            seed=args.seed,
+        )
+    finally:
+        store.close()
+
+    results["backend"] = args.backend
+    print(f"{'edges':>10} {'load/s':>10} " + " ".join(f"{p + ' p50':>20}" for p in PATHS))
+    for point in results["curve"]:
+        print(f"{point['edges']:>10} {point['load_edges_per_s'] or 0:>10.0f} "
+              + " ".join(f"{point['paths'][p]['p50']:>20.2f}" for p in PATHS))
+    print(f"Growth exponent (p50): {results['growth_exponent_p50']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# benchmarks/pipeline_bench.py
+
+"""
+Offline end-to-end benchmark: replays a scripted workload through fast_pipe
+(and the slow pipe it queues) against the local stand-ins in benchmarks.stubs,
+then reports per-stage p50/p95/p99 from the tracing histograms plus throughput.
+
+    python -m benchmarks.pipeline_bench --turns 200 --output data/bench.json
+    python -m benchmarks.pipeline_bench --update-baseline
+
+Exits non-zero when a gated stage regresses against benchmarks/baseline.json.
+Set LOG_LEVEL=warning to keep per-turn events out of the output.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fast_pipe as fast_pipe_module
+import llm.client
+from llm.accounting import usage_ledger
+import slow_pipe as slow_pipe_module
+from benchmarks.stubs import (
+    FakeEmbedder,
+    InMemoryGraph,
+    InMemoryGraphStore,
+    InMemoryVectorStore,
+    MockOllamaServer,
+    make_reranker,
+)
+from config import RAM_CONTEXT_SIZE
+from diagnostics.tracing import metrics
+from memory.consolidation_state import ConsolidationState
+from memory.ram_context import RAMContext
+from memory.response_cache import response_cache
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Stages compared against the baseline. Queue wait is left out on purpose:
+# it measures scheduling, not the cost of any stage.
+GATED_STAGES = (
+    "fast_pipe",
+    "fast_pipe.extract",
+    "fast_pipe.logic_bomb",
+    "fast_pipe.retrieve_symbolic",
+    "fast_pipe.retrieve_vector",
+    "fast_pipe.rerank",
+    "fast_pipe.compress",
+    "fast_pipe.generate",
+    "slow_pipe",
+)
+
+_PLACES = ["Berlin", "Kerala", "Lisbon", "Osaka", "Toronto", "Nairobi"]
+_THINGS = ["ramen", "jazz", "chess", "hiking", "coffee", "tennis", "sushi", "poetry"]
+_NAMES = ["Alex", "Sam", "Priya", "Jordan", "Mina", "Kai"]
+_QUESTIONS = [
+    "Where do I live?",
+    "What do I like?",
+    "What is my name?",
+    "Where am I from?",
+    "What did I tell you about food?",
+]
+_CHATTER = ["hi", "thanks", "tell me a joke", "how is the weather"]
+
+
+def _turn(rng: random.Random, kind: str) -> str:
+    if kind == "fact":
+        template = rng.choice([
+            "I live in {place}.",
+            "I am from {place}.",
+            "I like {thing}.",
+            "I hate {thing}.",
+            "My name is {name}.",
+        ])
+        return template.format(place=rng.choice(_PLACES), thing=rng.choice(_THINGS), name=rng.choice(_NAMES))
+    if kind == "question":
+        return rng.choice(_QUESTIONS)
+    return rng.choice(_CHATTER)
+
+
+# name -> (fact, question, chatter) weights
+WORKLOADS: Dict[str, Tuple[float, float, float]] = {
+    "mixed": (0.4, 0.4, 0.2),
+    "write_heavy": (0.8, 0.1, 0.1),
+    "read_heavy": (0.1, 0.8, 0.1),
+}
+
+
+def build_script(workload: str, users: int, turns: int, seed: int) -> List[Tuple[int, str]]:
+    """Deterministic (user_index, text) sequence, users interleaved round-robin."""
+    rng = random.Random(seed)
+    weights = WORKLOADS[workload]
+    return [
+        (i % users, _turn(rng, rng.choices(("fact", "question", "chatter"), weights=weights)[0]))
+        for i in range(turns)
+    ]
+
+
+@contextmanager
+def offline_pipeline(latency_ms: float = 20.0, tokens_per_sec: float = 0.0):
+    """
+    Point fast_pipe/slow_pipe at fresh local stand-ins for the duration of the block.
+    Yields (mock Ollama server, in-memory graph, in-memory vector store).
+    """
+    graph = InMemoryGraph()
+    embedder = FakeEmbedder()
+    vectors = InMemoryVectorStore(embedder)
+    graph_store = lambda: InMemoryGraphStore(graph)
+    vector_store = lambda: vectors
+
+    with MockOllamaServer(latency_ms=latency_ms, tokens_per_sec=tokens_per_sec) as ollama, ExitStack() as stack:
+        stack.enter_context(patch.object(llm.client, "OLLAMA_BASE_URL", ollama.base_url))
+        stack.enter_context(patch.object(fast_pipe_module, "get_graph_store", graph_store))
+        stack.enter_context(patch.object(fast_pipe_module, "get_vector_store", vector_store))
+        stack.enter_context(patch.object(fast_pipe_module, "rerank_memories", make_reranker(embedder)))
+        stack.enter_context(patch.object(slow_pipe_module, "get_graph_store", graph_store))
+        stack.enter_context(patch.object(slow_pipe_module, "get_vector_store", vector_store))
+        stack.enter_context(patch.object(slow_pipe_module, "consolidation_state", ConsolidationState(":memory:")))
+        stack.enter_context(patch.object(response_cache, "_embed_fn", embedder))
+        try:
+            yield ollama, graph, vectors
+        finally:
+            # Don't let queued writes land after the stand-ins are gone
+            fast_pipe_module.wait_for_slow_pipe(timeout=120)
+
+
+def run_benchmark(
+    workload: str = "mixed",
+    users: int = 4,
+    turns: int = 100,
+    latency_ms: float = 20.0,
+    tokens_per_sec: float = 0.0,
+    seed: int = 7,
+) -> Dict:
+    """Replay one workload against fresh stand-ins and return the results dict."""
+    script = build_script(workload, users, turns, seed)
+    run_id = uuid.uuid4().hex[:8]
+    ram_context = RAMContext(maxlen=RAM_CONTEXT_SIZE)
+
+    with offline_pipeline(latency_ms=latency_ms, tokens_per_sec=tokens_per_sec) as (ollama, graph, _vectors):
+        metrics.reset()
+        usage_ledger.reset()
+        started = time.perf_counter()
+        for user_index, text in script:
+            session_id = f"bench-{run_id}-{user_index}"
+            ram_context.add(session_id, text)
+            fast_pipe_module.fast_pipe(text, session_id, ram_context)
+        fast_elapsed = time.perf_counter() - started
+
+        fast_pipe_module.wait_for_slow_pipe(timeout=120)
+        total_elapsed = time.perf_counter() - started
+        llm_calls = ollama.calls
+
+    return {
+        "workload": workload,
+        "config": {
+            "users": users,
+            "turns": turns,
+            "latency_ms": latency_ms,
+            "tokens_per_sec": tokens_per_sec,
+            "seed": seed,
+        },
+        "throughput": {
+            "fast_pipe_turns_per_s": round(turns / fast_elapsed, 3),
+            "end_to_end_turns_per_s": round(turns / total_elapsed, 3),
+        },
+        "wall_s": round(total_elapsed, 3),
+        "llm_calls": llm_calls,
+        "llm_usage": usage_ledger.snapshot(),
+        "graph_edges": len(graph.edges),
+        "stages": metrics.snapshot(),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.25, slack_ms: float = 5.0) -> List[str]:
+    """
+    Regressions of `results` against `baseline`: a gated stage's p50/p95 above
+    baseline * (1 + tolerance) + slack_ms, or throughput below baseline * (1 - tolerance).
+    """
+    regressions = []
+    for stage in GATED_STAGES:
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            continue
+        current = results["stages"].get(stage)
+        if current is None:
+            regressions.append(f"{stage}: missing from results")
+            continue
+        for key in ("p50", "p95"):
+            limit = base[key] * (1 + tolerance) + slack_ms
+            if current[key] > limit:
+                regressions.append(f"{stage} {key}: {current[key]:.1f} ms > {limit:.1f} ms (baseline {base[key]:.1f})")
+
+    for key, base_value in baseline.get("throughput", {}).items():
+        floor = base_value * (1 - tolerance)
+        value = results["throughput"].get(key, 0.0)
+        if value < floor:
+            regressions.append(f"{key}: {value:.2f}/s < {floor:.2f}/s (baseline {base_value:.2f})")
+
+    return regressions
+
+
+def _print_report(results: Dict) -> None:
+    print(f"\nWorkload: {results['workload']}  {results['config']}")
+    print(f"{'stage':<32}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, stats in sorted(results["stages"].items()):
+        print(f"{stage:<32}{stats['count']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}")
+    print(f"Throughput: {results['throughput']}  LLM calls: {results['llm_calls']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock Ollama per-call latency")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Mock decode rate (0 = instant)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        workload=args.workload,
+        users=args.users,
+        turns=args.turns,
+        latency_ms=args.latency_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        seed=args.seed,
+    )
+    _print_report(results)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("No baseline to compare against.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != results["config"] or baseline.get("workload") != results["workload"]:
+        print("Baseline was recorded with different settings; skipping regression check.")
+        return 0
+
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print("OK: no regressions" if not regressions else f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,479 @@
+# benchmarks/stubs.py
+
+"""
+Local stand-ins for the external services, so pipeline benchmarks are
+deterministic and run on any box without Neo4j, Ollama or model downloads:
+- MockOllamaServer: HTTP server speaking /api/chat and /api/generate with
+  configurable latency and token rate
+- InMemoryGraphStore: the graph-store surface (Neo4j/SQLite) used by the pipes
+- InMemoryVectorStore + FakeEmbedder: the VectorMemoryStore surface with
+  deterministic hashed bag-of-words embeddings
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from memory import lifecycle
+from memory.neo4j_store import sanitize_relation
+
+# Rule-based stand-in for the extraction model: enough to drive the logic bomb,
+# the pending-writes overlay and the slow pipe with realistic graph deltas.
+_FACT_PATTERNS = [
+    (re.compile(r"\bmy name is (\w+)", re.I), "NAME_IS"),
+    (re.compile(r"\bi(?: am|'m) from ([\w ]+?)[.!]?$", re.I), "ORIGIN_FROM"),
+    (re.compile(r"\bi live in ([\w ]+?)[.!]?$", re.I), "LIVES_IN"),
+    (re.compile(r"\bi (?:like|love) ([\w ]+?)[.!]?$", re.I), "LIKES"),
+    (re.compile(r"\bi (?:hate|dislike) ([\w ]+?)[.!]?$", re.I), "DISLIKES"),
+]
+
+# Single-valued relations the mock contradiction model flags when the object changes
+_EXCLUSIVE_RELATIONS = {"NAME_IS", "ORIGIN_FROM", "LIVES_IN"}
+
+
+def fake_extract(text: str) -> Dict:
+    for pattern, relation in _FACT_PATTERNS:
+        match = pattern.search(text.strip())
+        if match:
+            dst = match.group(1).strip().title()
+            return {
+                "nodes": [{"id": "User", "type": "Person"}, {"id": dst, "type": "Entity"}],
+                "edges": [{"id": "e1", "src": "User", "dst": dst, "relation": relation, "confidence": 1.0}],
+            }
+    return {"nodes": [], "edges": []}
+
+
+def fake_contradiction(prompt: str) -> bool:
+    statements = re.findall(r'Statement [AB] \([^)]*\): "([^"]*)"', prompt)
+    if len(statements) != 2:
+        return False
+    old, new = (s.split(" ", 2) for s in statements)
+    if len(old) < 3 or len(new) < 3:
+        return False
+    return old[1] == new[1] and old[1] in _EXCLUSIVE_RELATIONS and old[2] != new[2]
+
+
+class _MockOllamaHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+
+        if self.path == "/api/generate":
+            prompt = body.get("prompt", "")
+            content = json.dumps({"contradiction": fake_contradiction(prompt)})
+            prompt_text = prompt
+        else:
+            messages = body.get("messages") or []
+            prompt_text = "\n".join(m.get("content", "") for m in messages)
+            if body.get("format") == "json":
+                user_text = messages[-1]["content"] if messages else ""
+                content = json.dumps(fake_extract(user_text))
+            else:
+                content = " ".join(["ok"] * server.response_tokens)
+
+        eval_count = max(1, len(content) // 4)
+        server.record(self.path, body)
+        time.sleep(server.latency_ms / 1000 + (eval_count / server.tokens_per_sec if server.tokens_per_sec else 0))
+
+        key = "response" if self.path == "/api/generate" else "message"
+        value = content if key == "response" else {"role": "assistant", "content": content}
+        payload = json.dumps({
+            key: value,
+            "done": True,
+            "prompt_eval_count": max(1, len(prompt_text) // 4),
+            "eval_count": eval_count,
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockOllamaServer:
+    """
+    In-process Ollama stand-in. Every call costs `latency_ms` plus
+    eval_count / `tokens_per_sec`; generation replies are `response_tokens` long.
+    Use as a context manager; `base_url` is valid once started.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, tokens_per_sec: float = 0.0, response_tokens: int = 24):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _MockOllamaHandler)
+        self._server.daemon_threads = True
+        self._server.latency_ms = latency_ms
+        self._server.tokens_per_sec = tokens_per_sec
+        self._server.response_tokens = response_tokens
+        self._server.calls = {}
+        self._lock = threading.Lock()
+        self._server.record = self._record
+        self._thread: Optional[threading.Thread] = None
+
+    def _record(self, path: str, body: Dict) -> None:
+        with self._lock:
+            self._server.calls[path] = self._server.calls.get(path, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def calls(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._server.calls)
+
+    def start(self) -> "MockOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class InMemoryGraph:
+    """Shared edge table behind every InMemoryGraphStore (the pipes open a store per call)."""
+
+    def __init__(self):
+        self.nodes: Dict[str, str] = {}
+        self.edges: Dict[tuple, Dict] = {}  # (src, relation, dst, user_id) -> edge
+        self.lock = threading.Lock()
+        self._clock = 0
+
+    def tick(self) -> int:
+        # Epoch ms, strictly increasing (like the SQLite store): recency order is never a tie, decay sees real ages
+        self._clock = max(int(time.time() * 1000), self._clock + 1)
+        return self._clock
+
+
+class InMemoryGraphStore:
+    """Neo4jMemoryStore stand-in with the same method signatures and result shapes."""
+
+    def __init__(self, graph: InMemoryGraph):
+        self.graph = graph
+
+    def close(self):
+        pass
+
+    def upsert_node(self, node_id: str, node_type: str):
+        with self.graph.lock:
+            self.graph.nodes[node_id] = node_type
+
+    def bulk_upsert_nodes(self, nodes: list, batch_size: int = 5000) -> int:
+        with self.graph.lock:
+            for node in nodes:
+                self.graph.nodes[node["id"]] = node.get("type", "unknown")
+        return len(nodes)
+
+    def insert_edge(self, edge: dict, idempotent: bool = False):
+        key = (edge["src"], sanitize_relation(edge["relation"]), edge["dst"], edge.get("user_id") or "unknown")
+        with self.graph.lock:
+            now = edge.get("last_updated") or self.graph.tick()
+            existing = self.graph.edges.get(key)
+            if existing is None:
+                self.graph.edges[key] = {
+                    "src": key[0],
+                    "relation": key[1],
+                    "dst": key[2],
+                    "confidence": edge.get("confidence", 0.75),
+                    "turn_id": edge.get("turn_id"),
+                    "user_id": key[3],
+                    "source_text": edge.get("source_text"),
+                    "last_updated": now,
+                }
+            elif not (idempotent and edge.get("turn_id") is not None and existing["turn_id"] == edge["turn_id"]):
+                existing["confidence"] += (1.0 - existing["confidence"]) * 0.2
+                existing["turn_id"] = edge.get("turn_id")
+                existing["last_updated"] = now
+
+    def bulk_insert_edges(self, edges: list, batch_size: int = 5000, idempotent: bool = False) -> int:
+        for edge in edges:
+            self.insert_edge(edge, idempotent)
+        return len(edges)
+
+    def retrieve_context_with_activation(self, user_id: str, limit: int = 15) -> list:
+        with self.graph.lock:
+            edges = list(self.graph.edges.values())
+
+        now = lifecycle.now_ms()
+        decayed = {id(e): lifecycle.decayed_confidence(e["confidence"], e["last_updated"], now) for e in edges}
+        direct = sorted((e for e in edges if e["user_id"] == user_id), key=lambda e: e["last_updated"], reverse=True)[:5]
+        results = [self._row(e, e["src"], e["dst"], decayed[id(e)], 0) for e in direct]
+
+        anchors = {e["src"] for e in direct} | {e["dst"] for e in direct}
+        spread = []
+        for e in edges:
+            if e["user_id"] != user_id:
+                continue
+            for anchor, neighbor in ((e["src"], e["dst"]), (e["dst"], e["src"])):
+                if anchor in anchors and neighbor not in anchors:
+                    spread.append(self._row(e, anchor, neighbor, decayed[id(e)] * 0.5, 1))
+        spread.sort(key=lambda r: r["score"], reverse=True)
+        return (results + spread[:10])[:limit]
+
+    def retrieve_context(self, user_id: str, limit: int = 10) -> list:
+        return self.retrieve_context_with_activation(user_id, limit)
+
+    def get_related_nodes(self, entity_id: str) -> list:
+        with self.graph.lock:
+            edges = list(self.graph.edges.values())
+        related = [
+            {"neighbor": e["dst"] if e["src"] == entity_id else e["src"], "relation": e["relation"]}
+            for e in edges if entity_id in (e["src"], e["dst"])
+        ]
+        return related[:20]
+
+    def get_recent_facts(self, src: str, user_id: str = None, limit: int = 3) -> list:
+        with self.graph.lock:
+            edges = [
+                e for e in self.graph.edges.values()
+                if src in (e["src"], e["dst"]) and (user_id is None or e["user_id"] == user_id)
+            ]
+        edges.sort(key=lambda e: e["last_updated"], reverse=True)
+        return [
+            {"src": src, "relation": e["relation"], "dst": e["dst"] if e["src"] == src else e["src"]}
+            for e in edges[:limit]
+        ]
+
+    def find_dense_entities(self, min_degree: int = 4, limit: int = 3) -> list:
+        degree: Dict[str, int] = {}
+        with self.graph.lock:
+            for e in self.graph.edges.values():
+                degree[e["src"]] = degree.get(e["src"], 0) + 1
+                degree[e["dst"]] = degree.get(e["dst"], 0) + 1
+        dense = sorted(((n, d) for n, d in degree.items() if d >= min_degree), key=lambda x: x[1], reverse=True)
+        return [{"entity": n, "degree": d} for n, d in dense[:limit]]
+
+    def entity_degrees(self, user_id: str, entity_ids: list) -> dict:
+        wanted = set(entity_ids)
+        degrees: Dict[str, int] = {}
+        with self.graph.lock:
+            for e in self.graph.edges.values():
+                if e["user_id"] != user_id:
+                    continue
+                for n in (e["src"], e["dst"]):
+                    if n in wanted:
+                        degrees[n] = degrees.get(n, 0) + 1
+        return degrees
+
+    def get_entity_facts(self, entity_id: str, limit: int = 10, user_id: str = None) -> list:
+        with self.graph.lock:
+            items = [(k, e) for k, e in self.graph.edges.items() if user_id is None or e["user_id"] == user_id]
+        return [
+            {
+                "rel": e["relation"],
+                "neighbor": e["dst"] if e["src"] == entity_id else e["src"],
+                "text": e["source_text"],
+                "edge_id": key,
+                "user_id": e["user_id"],
+            }
+            for key, e in items if entity_id in (e["src"], e["dst"])
+        ][:limit]
+
+    def delete_edges(self, edge_ids: list) -> int:
+        with self.graph.lock:
+            return sum(self.graph.edges.pop(key, None) is not None for key in edge_ids)
+
+    def user_ids(self) -> list:
+        with self.graph.lock:
+            return sorted({e["user_id"] for e in self.graph.edges.values()})
+
+    def collectable_edges(self, user_id: str, min_confidence: float, max_edges: int, now: int, limit: int = None) -> list:
+        with self.graph.lock:
+            rows = [
+                dict(e, edge_id=key, first_seen=None, decayed=lifecycle.decayed_confidence(e["confidence"], e["last_updated"], now))
+                for key, e in self.graph.edges.items() if e["user_id"] == user_id
+            ]
+        doomed = [{k: v for k, v in r.items() if k != "reason"} for r in lifecycle.rank_memories(rows, min_confidence, max_edges)]
+        return doomed if limit is None else doomed[:limit]
+
+    def apply_consolidation(self, new_edges: list, delete_edge_ids: list) -> dict:
+        deleted = self.delete_edges(set(delete_edge_ids))
+        for edge in new_edges:
+            self.insert_edge(edge)
+        return {"inserted": len(new_edges), "deleted": deleted}
+
+    def export_graph(self) -> dict:
+        with self.graph.lock:
+            nodes = set(self.graph.nodes) | {n for e in self.graph.edges.values() for n in (e["src"], e["dst"])}
+            links = [{"source": e["src"], "target": e["dst"], "label": e["relation"]} for e in self.graph.edges.values()]
+        return {"nodes": [{"id": n, "group": 1} for n in sorted(nodes)], "links": links}
+
+    def dump_graph(self, user_ids: list = None) -> dict:
+        with self.graph.lock:
+            edges = [dict(e) for e in self.graph.edges.values() if user_ids is None or e["user_id"] in user_ids]
+            ids = set(self.graph.nodes) if user_ids is None else {n for e in edges for n in (e["src"], e["dst"])}
+            nodes = [{"id": n, "type": self.graph.nodes.get(n), "last_seen": None} for n in sorted(ids)]
+        return {"nodes": nodes, "edges": edges}
+
+    def restore_graph(self, nodes: list, edges: list, user_ids: list = None, batch_size: int = 5000) -> int:
+        with self.graph.lock:
+            if user_ids is None:
+                self.graph.nodes.clear()
+                self.graph.edges.clear()
+            else:
+                for key in [k for k, e in self.graph.edges.items() if e["user_id"] in user_ids]:
+                    del self.graph.edges[key]
+            for node in nodes:
+                self.graph.nodes[node["id"]] = node.get("type")
+            for edge in edges:
+                key = (edge["src"], edge["relation"], edge["dst"], edge["user_id"])
+                self.graph.edges[key] = {k: v for k, v in edge.items() if k != "first_seen"}
+        return len(edges)
+
+    def wipe_database(self):
+        with self.graph.lock:
+            self.graph.nodes.clear()
+            self.graph.edges.clear()
+
+    @staticmethod
+    def _row(edge: Dict, src: str, dst: str, score: float, depth: int) -> Dict:
+        return {
+            "src": src,
+            "relation": edge["relation"],
+            "dst": dst,
+            "score": score,
+            "depth": depth,
+            "turn_id": edge["turn_id"],
+            "last_updated": edge["last_updated"],
+        }
+
+
+class FakeEmbedder:
+    """
+    Deterministic embedding function (Chroma's callable signature):
+    hashed bag of words, L2-normalised. Similar wording -> high cosine.
+    """
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in input]
+
+    def embed_query(self, input: List[str]) -> List[List[float]]:
+        return self(input)
+
+    @staticmethod
+    def name() -> str:
+        return "fake"
+
+    def _embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode()).digest()
+            vec[digest[0] % self.dim] += 1.0 if digest[1] % 2 else -1.0
+        norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+        return [x / norm for x in vec]
+
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class InMemoryVectorStore:
+    """VectorMemoryStore stand-in: exact cosine search ranked by decayed confidence, Chroma-shaped results."""
+
+    def __init__(self, embedder: FakeEmbedder):
+        self.embedder = embedder
+        self.docs: Dict[str, Dict] = {}  # doc_id -> {"text", "metadata", "embedding"}
+        self.lock = threading.Lock()
+
+    def add_memory(self, text: str, metadata: dict):
+        self.add_memories([text], [metadata])
+
+    def add_memories(self, texts: List[str], metadatas: List[dict], batch_size: int = None) -> int:
+        doc_ids = [hashlib.md5(f"{m.get('user_id', 'unknown')}:{t.strip()}".encode()).hexdigest() for t, m in zip(texts, metadatas)]
+        embeddings = self.embedder(texts)
+        with self.lock:
+            for doc_id, text, metadata, embedding in zip(doc_ids, texts, metadatas, embeddings):
+                self.docs[doc_id] = {"text": text, "metadata": dict(metadata), "embedding": embedding}
+        return len(set(doc_ids))
+
+    def dump_vectors(self, user_ids: list = None) -> dict:
+        with self.lock:
+            items = [(k, d) for k, d in self.docs.items() if user_ids is None or d["metadata"].get("user_id") in user_ids]
+        return {
+            "ids": [k for k, _ in items],
+            "documents": [d["text"] for _, d in items],
+            "metadatas": [d["metadata"] for _, d in items],
+            "embeddings": [d["embedding"] for _, d in items],
+        }
+
+    def restore_vectors(self, dump: dict, user_ids: list = None) -> int:
+        with self.lock:
+            if user_ids is None:
+                self.docs.clear()
+            else:
+                self.docs = {k: d for k, d in self.docs.items() if d["metadata"].get("user_id") not in user_ids}
+            for doc_id, text, metadata, embedding in zip(dump["ids"], dump["documents"], dump["metadatas"], dump["embeddings"]):
+                self.docs[doc_id] = {"text": text, "metadata": dict(metadata), "embedding": list(embedding)}
+        return len(dump["ids"])
+
+    def user_ids(self) -> list:
+        with self.lock:
+            return sorted({d["metadata"].get("user_id", "unknown") for d in self.docs.values()})
+
+    def list_memories(self, user_id: str) -> dict:
+        with self.lock:
+            items = [(k, d) for k, d in self.docs.items() if d["metadata"].get("user_id", "unknown") == user_id]
+        return {
+            "ids": [k for k, _ in items],
+            "documents": [d["text"] for _, d in items],
+            "metadatas": [d["metadata"] for _, d in items],
+        }
+
+    def delete_memories(self, ids: list, user_id: str) -> int:
+        with self.lock:
+            return sum(self.docs.pop(doc_id, None) is not None for doc_id in ids)
+
+    def search(self, query_text: str, n_results: int = 5, user_id: str = None) -> dict:
+        query = self.embedder([query_text])[0]
+        with self.lock:
+            docs = [d for d in self.docs.values() if not user_id or d["metadata"].get("user_id") == user_id]
+        now = lifecycle.now_ms()
+        # Ranked like NumpyVectorStore: cosine times decayed confidence
+        scored = sorted(docs, key=lambda d: _dot(query, d["embedding"]) * lifecycle.decayed_confidence(
+            d["metadata"].get("confidence", 1.0), d["metadata"].get("last_updated"), now
+        ), reverse=True)[:n_results]
+        return {
+            "documents": [[d["text"] for d in scored]],
+            "metadatas": [[d["metadata"] for d in scored]],
+            "distances": [[1.0 - _dot(query, d["embedding"]) for d in scored]],
+        }
+
+
+def make_reranker(embedder: FakeEmbedder):
+    """rerank_memories stand-in scoring every candidate by embedding cosine."""
+
+    def rerank(query: str, symbolic_memories: List[Dict], neural_memories: List[Dict], top_k: int = 3) -> List[Dict]:
+        candidates = symbolic_memories + neural_memories
+        if not candidates:
+            return []
+        texts = [
+            f"{c.get('src', 'User')} {c.get('relation', '')} {c.get('dst', '')}" if "relation" in c else c.get("content", "")
+            for c in candidates
+        ]
+        query_vec = embedder([query])[0]
+        for cand, vec in zip(candidates, embedder(texts)):
+            cand["score"] = _dot(query_vec, vec)
+        return sorted(candidates, key=lambda c: c["score"], reverse=True)[:top_k]
+
+    return rerank
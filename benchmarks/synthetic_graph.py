@@ -0,0 +1,99 @@
+# benchmarks/synthetic_graph.py
+
+"""
+Synthetic knowledge-graph generator for scale benchmarks.
+
+Shape mirrors what the extractor produces:
+- most facts hang off the shared "User" hub node (hub_fraction)
+- the rest connect a user's private entities to each other or to shared
+  entities (cities, foods, companies ...)
+- user activity and entity popularity are both Zipf-distributed, so a few
+  users and entities carry most of the edges (power-law degree)
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+DEFAULT_RELATION_MIX = {
+    "LIKES": 0.30,
+    "KNOWS": 0.20,
+    "VISITED": 0.20,
+    "DISLIKES": 0.10,
+    "LIVES_IN": 0.10,
+    "WORKS_AT": 0.10,
+}
+
+
+def _zipf_probs(n: int, alpha: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** alpha
+    return weights / weights.sum()
+
+
+def generate_edges(
+    n_edges: int,
+    users: int = 100,
+    entities_per_user: int = 200,
+    shared_entities: int = 1000,
+    alpha: float = 1.1,
+    user_alpha: float = 1.0,
+    hub_fraction: float = 0.5,
+    shared_fraction: float = 0.5,
+    relation_mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+    batch_size: int = 10000,
+    start_ms: int = 1_700_000_000_000,
+) -> Iterator[List[Dict]]:
+    """
+    Yield `n_edges` edge dicts (insert_edge shape, plus `last_updated`) in batches.
+    Deterministic for a given seed; timestamps increase with edge index so
+    "most recent" queries have a stable answer.
+    """
+    rng = np.random.default_rng(seed)
+    relation_mix = relation_mix or DEFAULT_RELATION_MIX
+    relations = list(relation_mix)
+    relation_p = np.array([relation_mix[r] for r in relations], dtype=float)
+    relation_p /= relation_p.sum()
+
+    user_p = _zipf_probs(users, user_alpha)
+    private_p = _zipf_probs(entities_per_user, alpha)
+    shared_p = _zipf_probs(shared_entities, alpha)
+
+    produced = 0
+    while produced < n_edges:
+        size = min(batch_size, n_edges - produced)
+        user_idx = rng.choice(users, size=size, p=user_p)
+        rel_idx = rng.choice(len(relations), size=size, p=relation_p)
+        from_hub = rng.random(size) < hub_fraction
+        src_private = rng.choice(entities_per_user, size=size, p=private_p)
+        to_shared = rng.random(size) < shared_fraction
+        dst_shared = rng.choice(shared_entities, size=size, p=shared_p)
+        dst_private = rng.choice(entities_per_user, size=size, p=private_p)
+        confidence = rng.uniform(0.5, 1.0, size=size)
+
+        batch = []
+        for i in range(size):
+            user = f"user_{user_idx[i]}"
+            src = "User" if from_hub[i] else f"{user}_entity_{src_private[i]}"
+            dst = f"entity_{dst_shared[i]}" if to_shared[i] else f"{user}_entity_{dst_private[i]}"
+            index = produced + i
+            batch.append({
+                "src": src,
+                "dst": dst,
+                "relation": relations[rel_idx[i]],
+                "confidence": round(float(confidence[i]), 3),
+                "user_id": user,
+                "turn_id": index,
+                "source_text": None,
+                "last_updated": start_ms + index * 10,
+            })
+        produced += size
+        yield batch
+
+
+def load_edges(store, batches, batch_size: int = 5000) -> int:
+    """Bulk-load batches into a graph store; returns the number of edges written."""
+    written = 0
+    for batch in batches:
+        written += store.bulk_insert_edges(batch, batch_size=batch_size)
+    return written
@@ -0,0 +1,230 @@
+# benchmarks/vector_bench.py
+
+"""
+Vector-store benchmark: grows every user's collection through several sizes
+on each backend and measures, at every size:
+- add:    add_memory latency (one call per memory, as the slow pipe does),
+          or with --bulk one add_memories call per user and size step
+- load:   memories written per second
+- search: user-filtered search latency (the fast-pipe vector retrieval)
+- recall: recall@k against exact cosine search over the same vectors
+- rss:    resident memory of the process
+
+    python -m benchmarks.vector_bench --sizes 100,1000,5000 --users 10
+    python -m benchmarks.vector_bench --backend numpy --sizes 1000,10000,50000 --users 4
+    python -m benchmarks.vector_bench --bulk --sizes 1000,5000 --users 4
+
+Embeddings come from a lookup table of clustered random vectors, so the
+numbers are the store's own cost, not the embedding model's. Each backend
+runs in its own subprocess on a temporary directory so RSS is not shared.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BACKENDS = ("chroma", "numpy")
+
+
+class TableEmbedder:
+    """Embedding function (Chroma's callable signature) returning precomputed vectors by text."""
+
+    def __init__(self):
+        self.table: Dict[str, object] = {}  # text -> float32 vector
+
+    def __call__(self, input: List[str]) -> List:
+        return [self.table[text] for text in input]
+
+    def embed_query(self, input: List[str]) -> List:
+        return self(input)
+
+    @staticmethod
+    def name() -> str:
+        return "table"
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux /proc), falling back to the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "p50": round(samples[len(samples) // 2], 3),
+        "p95": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+    }
+
+
+def _open_store(backend: str, embedder: TableEmbedder, workdir: Path):
+    if backend == "numpy":
+        from memory.numpy_vector_store import NumpyVectorStore
+        return NumpyVectorStore(workdir / "vectors", embedding_function=embedder)
+    from memory.vector_store import VectorMemoryStore
+    return VectorMemoryStore("vector_bench", embedding_function=embedder)
+
+
+def run_backend(
+    backend: str,
+    sizes: List[int],
+    users: int = 10,
+    dim: int = 384,
+    clusters: int = 32,
+    queries: int = 100,
+    k: int = 10,
+    seed: int = 0,
+    workdir: Path = None,
+    bulk: bool = False,
+) -> Dict:
+    """Grow `users` collections to each size in turn (vectors per user) and measure."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    pick = random.Random(seed)
+    embedder = TableEmbedder()
+    rss_before = _rss_mb()
+    store = _open_store(backend, embedder, workdir or Path(tempfile.mkdtemp(prefix="vector_bench_")))
+
+    # Clustered unit vectors: topical memories, so an approximate index has structure to use
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = {f"user_{u}": np.empty((0, dim), dtype=np.float32) for u in range(users)}
+
+    curve = []
+    loaded = 0
+    for size in sorted(sizes):
+        add_ms = []
+        load_s = 0.0
+        for user_id in vectors:
+            fresh = centers[rng.integers(clusters, size=size - loaded)]
+            fresh = fresh + 0.5 * rng.standard_normal(fresh.shape).astype(np.float32)
+            fresh /= np.linalg.norm(fresh, axis=1, keepdims=True)
+            texts, metadatas = [], []
+            for i, vec in enumerate(fresh, start=len(vectors[user_id])):
+                texts.append(f"{user_id} memory {i}")
+                metadatas.append({"user_id": user_id, "turn_id": i})
+                embedder.table[texts[-1]] = vec
+            if bulk:
+                started = time.perf_counter()
+                store.add_memories(texts, metadatas)
+                add_ms.append((time.perf_counter() - started) * 1000)
+            else:
+                for text, metadata in zip(texts, metadatas):
+                    started = time.perf_counter()
+                    store.add_memory(text, metadata)
+                    add_ms.append((time.perf_counter() - started) * 1000)
+            load_s += sum(add_ms[-1:] if bulk else add_ms[-len(texts):]) / 1000
+            vectors[user_id] = np.vstack([vectors[user_id], fresh])
+        added = (size - loaded) * users
+        loaded = size
+
+        search_ms, recalls = [], []
+        for q in range(queries):
+            user_id = pick.choice(list(vectors))
+            matrix = vectors[user_id]
+            query = matrix[pick.randrange(len(matrix))] + 0.1 * rng.standard_normal(dim).astype(np.float32)
+            query /= np.linalg.norm(query)
+            text = f"query {size} {q}"
+            embedder.table[text] = query
+
+            started = time.perf_counter()
+            result = store.search(text, n_results=k, user_id=user_id)
+            search_ms.append((time.perf_counter() - started) * 1000)
+
+            exact = {f"{user_id} memory {i}" for i in np.argsort(-(matrix @ query))[:k]}
+            recalls.append(len(exact & set(result["documents"][0])) / min(k, len(matrix)))
+
+        curve.append({
+            "vectors_per_user": size,
+            "total_vectors": size * users,
+            "add_ms": None if bulk else _percentiles(add_ms),
+            "load_per_s": round(added / load_s, 1) if load_s else None,
+            "search_ms": _percentiles(search_ms),
+            f"recall_at_{k}": round(sum(recalls) / len(recalls), 4),
+            "rss_mb": _rss_mb(),
+        })
+
+    return {
+        "backend": backend,
+        "config": {"sizes": sorted(sizes), "users": users, "dim": dim, "clusters": clusters, "queries": queries, "k": k, "seed": seed, "bulk": bulk},
+        "rss_baseline_mb": rss_before,
+        "curve": curve,
+    }
+
+
+def _run_isolated(backend: str, args) -> Dict:
+    """Run one backend in a fresh interpreter, with its data in a temporary directory."""
+    with tempfile.TemporaryDirectory(prefix="vector_bench_") as tmp:
+        output = Path(tmp) / "result.json"
+        env = {**os.environ, "CHROMA_DIR": str(Path(tmp) / "chroma"), "VECTOR_INDEX_DIR": str(Path(tmp) / "vectors")}
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.vector_bench", "--backend", backend, "--sizes", args.sizes,
+             "--users", str(args.users), "--dim", str(args.dim), "--clusters", str(args.clusters),
+             "--queries", str(args.queries), "--k", str(args.k), "--seed", str(args.seed),
+             "--workdir", tmp, "--output", str(output)] + (["--bulk"] if args.bulk else []),
+            check=True,
+            env=env,
+            cwd=str(Path(__file__).resolve().parent.parent),
+        )
+        return json.loads(output.read_text())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vector-store benchmark (Chroma vs NumPy index)")
+    parser.add_argument("--backend", choices=BACKENDS + ("both",), default="both")
+    parser.add_argument("--sizes", default="100,1000", help="Comma-separated vectors per user")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding width (bge-small: 384)")
+    parser.add_argument("--clusters", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bulk", action="store_true", help="Load through add_memories instead of add_memory")
+    parser.add_argument("--workdir", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.backend == "both" or args.workdir is None:
+        backends = BACKENDS if args.backend == "both" else (args.backend,)
+        runs = [_run_isolated(backend, args) for backend in backends]
+    else:
+        sizes = [int(float(x)) for x in args.sizes.split(",") if x]
+        runs = [run_backend(
+            args.backend, sizes, users=args.users, dim=args.dim, clusters=args.clusters,
+            queries=args.queries, k=args.k, seed=args.seed, workdir=args.workdir, bulk=args.bulk,
+        )]
+        if args.output:
+            args.output.write_text(json.dumps(runs[0], indent=2))
+        return 0
+
+    print(f"{'backend':>8} {'per user':>9} {'total':>9} {'add p50':>9} {'load/s':>9} {'search p50':>11} {'search p95':>11} "
+          f"{'recall@' + str(args.k):>10} {'rss MB':>8}")
+    for run in runs:
+        for point in run["curve"]:
+            print(f"{run['backend']:>8} {point['vectors_per_user']:>9} {point['total_vectors']:>9} "
+                  f"{(point['add_ms'] or {}).get('p50', 0):>9.3f} {point['load_per_s'] or 0:>9.0f} "
+                  f"{point['search_ms']['p50']:>11.3f} {point['search_ms']['p95']:>11.3f} "
+                  f"{point['recall_at_' + str(args.k)]:>10.3f} {point['rss_mb']:>8.1f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"runs": runs}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,6 +30,50 @@ if os.path.basename(CHROMA_DIR_NAME) == CHROMA_DIR_NAME:
 else:
     CHROMA_DIR = Path(CHROMA_DIR_NAME)
 
+VECTOR_INDEX_DIR_NAME = os.getenv("VECTOR_INDEX_DIR", "vectors")
+if os.path.basename(VECTOR_INDEX_DIR_NAME) == VECTOR_INDEX_DIR_NAME:
+    VECTOR_INDEX_DIR = DATA_DIR / VECTOR_INDEX_DIR_NAME
+else:
+    VECTOR_INDEX_DIR = Path(VECTOR_INDEX_DIR_NAME)
+
+DREAM_STATE_NAME = os.getenv("DREAM_STATE_PATH", "dream_state.db")
+if os.path.basename(DREAM_STATE_NAME) == DREAM_STATE_NAME:
+    DREAM_STATE_PATH = DATA_DIR / DREAM_STATE_NAME
+else:
+    DREAM_STATE_PATH = Path(DREAM_STATE_NAME)
+
+SNAPSHOT_DIR_NAME = os.getenv("SNAPSHOT_DIR", "snapshots")
+if os.path.basename(SNAPSHOT_DIR_NAME) == SNAPSHOT_DIR_NAME:
+    SNAPSHOT_DIR = DATA_DIR / SNAPSHOT_DIR_NAME
+else:
+    SNAPSHOT_DIR = Path(SNAPSHOT_DIR_NAME)
+
+MEMORY_ARCHIVE_DIR_NAME = os.getenv("MEMORY_ARCHIVE_DIR", "archive")
+if os.path.basename(MEMORY_ARCHIVE_DIR_NAME) == MEMORY_ARCHIVE_DIR_NAME:
+    MEMORY_ARCHIVE_DIR = DATA_DIR / MEMORY_ARCHIVE_DIR_NAME
+else:
+    MEMORY_ARCHIVE_DIR = Path(MEMORY_ARCHIVE_DIR_NAME)
+
+
+# -------------------------
+# Graph store: "neo4j" (server) or "sqlite" (in-process, file at SQLITE_DB_PATH)
+# -------------------------
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "neo4j").lower()
+
+
+# -------------------------
+# Vector store: "chroma" or "numpy" (in-process, memory-mapped file in VECTOR_INDEX_DIR)
+# -------------------------
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+VECTOR_ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", 2048))   # per-user vectors before IVF search; 0 = always exact
+VECTOR_ANN_NPROBE = int(os.getenv("VECTOR_ANN_NPROBE", 8))            # IVF lists scanned per query
+# numpy: deleted rows are rewritten away (after a memory GC pass) once they are this fraction of the file
+VECTOR_COMPACT_MIN_DEAD_FRACTION = float(os.getenv("VECTOR_COMPACT_MIN_DEAD_FRACTION", 0.3))
+# Chroma: one collection per user, so a search never touches other tenants' vectors
+VECTOR_PARTITIONING = os.getenv("VECTOR_PARTITIONING", "true").lower() == "true"
+VECTOR_PARTITION_HANDLES = int(os.getenv("VECTOR_PARTITION_HANDLES", 256))  # open per-user collections kept (LRU)
+VECTOR_BATCH_SIZE = int(os.getenv("VECTOR_BATCH_SIZE", 64))   # texts per embedding call / upsert in add_memories
+
 
 # -------------------------
 # Neo4j Configuration
@@ -43,9 +87,62 @@ NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
 # Runtime parameters
 # -------------------------
 RAM_CONTEXT_SIZE = int(os.getenv("RAM_CONTEXT_SIZE", 8))
+# Session bounds for the shared RAM context (0 disables a limit)
+RAM_CONTEXT_MAX_SESSIONS = int(os.getenv("RAM_CONTEXT_MAX_SESSIONS", 10000))
+RAM_CONTEXT_TTL_SECONDS = int(os.getenv("RAM_CONTEXT_TTL_SECONDS", 3600))
+RAM_CONTEXT_MAX_BYTES = int(os.getenv("RAM_CONTEXT_MAX_BYTES", 64 * 1024 * 1024))
+# Optional external session store (e.g. redis://localhost:6379/0); needs the 'redis' package
+RAM_CONTEXT_REDIS_URL = os.getenv("RAM_CONTEXT_REDIS_URL")
 TOP_K_MEMORIES = int(os.getenv("TOP_K_MEMORIES", 3))
+# Slow-pipe worker threads (>1 persists different sessions in parallel; one session's turns stay in order)
 ASYNC_WORKERS = int(os.getenv("ASYNC_WORKERS", 1))
 
+# -------------------------
+# Bulk transcript ingestion (ingest.py)
+# -------------------------
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 4))         # concurrent extraction calls against the LLM server
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))  # turns per graph/vector write and checkpoint
+
+# -------------------------
+# Memory consolidation (reasoning/dreamer.py): only entities written since the last pass are considered
+# -------------------------
+DREAM_MIN_DEGREE = int(os.getenv("DREAM_MIN_DEGREE", 4))         # a user's edges on an entity before it is a cluster
+DREAM_MIN_NEW_EDGES = int(os.getenv("DREAM_MIN_NEW_EDGES", 2))   # growth needed before an examined entity is re-examined
+DREAM_BATCH_CLUSTERS = int(os.getenv("DREAM_BATCH_CLUSTERS", 4))  # clusters packed into one LLM prompt
+DREAM_CONCURRENCY = int(os.getenv("DREAM_CONCURRENCY", 2))        # dream prompts in flight at once (whole process)
+# Background scheduler (reasoning/dream_scheduler.py): dreams only while no interactive turn is using the LLM
+DREAM_SCHEDULER_ENABLED = os.getenv("DREAM_SCHEDULER_ENABLED", "true").lower() == "true"
+DREAM_POLL_SECONDS = float(os.getenv("DREAM_POLL_SECONDS", 5))
+DREAM_IDLE_SECONDS = float(os.getenv("DREAM_IDLE_SECONDS", 120))          # a user this quiet gets a pass...
+DREAM_BACKLOG_ENTITIES = int(os.getenv("DREAM_BACKLOG_ENTITIES", 50))      # ...or one with this many dirty entities
+DREAM_QUIET_SECONDS = float(os.getenv("DREAM_QUIET_SECONDS", 2))           # no interactive turn for this long (any user)
+DREAM_MAX_LOAD = float(os.getenv("DREAM_MAX_LOAD", 0.8))                   # 1-min load average per CPU; 0 = ignore
+DREAM_MAX_CONCURRENT = int(os.getenv("DREAM_MAX_CONCURRENT", 1))           # dream passes at once, all users
+DREAM_RUN_BUDGET_SECONDS = float(os.getenv("DREAM_RUN_BUDGET_SECONDS", 60))  # per pass; unfinished clusters stay dirty
+DREAM_USER_COOLDOWN_SECONDS = float(os.getenv("DREAM_USER_COOLDOWN_SECONDS", 300))  # between passes of one user
+
+# -------------------------
+# Memory lifecycle (memory/lifecycle.py): confidence decays with age, a collector keeps every user bounded
+# -------------------------
+MEMORY_HALF_LIFE_DAYS = float(os.getenv("MEMORY_HALF_LIFE_DAYS", 30))     # since last_updated; 0 = no decay
+MEMORY_MIN_CONFIDENCE = float(os.getenv("MEMORY_MIN_CONFIDENCE", 0.1))    # decayed below this, a memory is collected
+MEMORY_MAX_EDGES_PER_USER = int(os.getenv("MEMORY_MAX_EDGES_PER_USER", 20000))      # lowest decayed go first; 0 = no cap
+MEMORY_MAX_VECTORS_PER_USER = int(os.getenv("MEMORY_MAX_VECTORS_PER_USER", 20000))  # likewise for vector chunks
+MEMORY_GC_ENABLED = os.getenv("MEMORY_GC_ENABLED", "true").lower() == "true"
+MEMORY_GC_INTERVAL_SECONDS = float(os.getenv("MEMORY_GC_INTERVAL_SECONDS", 3600))
+MEMORY_GC_BATCH_SIZE = int(os.getenv("MEMORY_GC_BATCH_SIZE", 500))       # rows per delete (one transaction each)
+MEMORY_GC_MODE = os.getenv("MEMORY_GC_MODE", "archive")                  # "archive" (JSONL in MEMORY_ARCHIVE_DIR) or "delete"
+# Cached spreading-activation scores are recomputed after this, so they keep decaying for idle users; 0 = only on writes
+ACTIVATION_CACHE_TTL_SECONDS = float(os.getenv("ACTIVATION_CACHE_TTL_SECONDS", 300))
+
+# -------------------------
+# Response cache (answers reused while a user's memory is unchanged)
+# -------------------------
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 64))  # entries per user
+# Cosine similarity for a near-match hit; 1.0 disables embedding lookups (exact only)
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0.95))
+
 # -------------------------
 # Confidence thresholds
 # -------------------------
@@ -80,10 +177,58 @@ TRIVIAL_RELATIONS = {
     "action", "ACTION"
 }
 
+# -------------------------
+# Logging (diagnostics.logger)
+# -------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()          # debug | info | warning | error
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()        # json (JSON lines) | text
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")                # e.g. "PROMPT_PREFIX_REUSE=0.1,FAST_PIPE_OK=0.5"
+LOG_FILE = os.getenv("LOG_FILE", "")                        # empty -> stdout
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# -------------------------
+# Tracing (diagnostics.tracing)
+# -------------------------
+TRACE_RESERVOIR_SIZE = int(os.getenv("TRACE_RESERVOIR_SIZE", 1024))  # recent samples kept per stage
+TRACE_STAGES_IN_RESULT = os.getenv("TRACE_STAGES_IN_RESULT", "false").lower() == "true"
+
+# -------------------------
+# Profiling (diagnostics.profiling)
+# -------------------------
+PROFILE_DIR = DATA_DIR / "profiles"
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "").lower()        # main.py: "" (off) | sample | cprofile
+PROFILE_SLOW_PIPE = os.getenv("PROFILE_SLOW_PIPE", "false").lower() == "true"
+PROFILE_HTTP_ENABLED = os.getenv("PROFILE_HTTP_ENABLED", "false").lower() == "true"  # X-Profile / ?profile= on /api/chat
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))          # oldest profiles are deleted beyond this
+
+# -------------------------
+# Server warmup (warmup.py, /ready)
+# -------------------------
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Dependencies preloaded at startup: embedder, reranker, vectors (VECTOR_BACKEND), graph (GRAPH_BACKEND), ollama (both models)
+WARMUP_COMPONENTS = [c.strip() for c in os.getenv("WARMUP_COMPONENTS", "embedder,reranker,vectors,graph,ollama").split(",") if c.strip()]
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 10))   # retry failed dependencies; 0 = single pass
+WARMUP_LLM_TIMEOUT = float(os.getenv("WARMUP_LLM_TIMEOUT", 300))      # first model load from disk can be slow
+
+# -------------------------
+# LLM budgets (llm.accounting); 0 disables a limit
+# -------------------------
+# A turn normally needs <= 7 calls (3 extraction attempts, 3 contradiction checks, 1 reply);
+# over budget, extraction stores nothing, contradiction checks are skipped and the reply falls back.
+LLM_MAX_CALLS_PER_TURN = int(os.getenv("LLM_MAX_CALLS_PER_TURN", 8))
+LLM_MAX_TOKENS_PER_TURN = int(os.getenv("LLM_MAX_TOKENS_PER_TURN", 0))
+LLM_MAX_CALLS_PER_DREAM = int(os.getenv("LLM_MAX_CALLS_PER_DREAM", 10))   # one call per DREAM_BATCH_CLUSTERS clusters
+
 # -------------------------
 # LLM API (if using Ollama / local server)
 # -------------------------
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# How long Ollama keeps a model (and its KV cache) resident after a call.
+# -1 pins the model; durations like "30m" are also accepted.
+_KEEP_ALIVE_RAW = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+OLLAMA_KEEP_ALIVE = int(_KEEP_ALIVE_RAW) if _KEEP_ALIVE_RAW.lstrip("-").isdigit() else _KEEP_ALIVE_RAW
 
 # -------------------------
 # External APIs
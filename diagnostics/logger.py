@@ -1,19 +1,150 @@
 # diagnostics/logger.py
 
+import atexit
+import json
+import queue
+import random
+import sys
+import threading
 import time
-from typing import Any
+from typing import Any, Dict, Optional
 
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLING, LOG_FILE, LOG_ASYNC, LOG_QUEUE_SIZE
 
-def log_event(event: str, **kwargs: Any) -> None:
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+# Chatty per-turn events that are only useful when debugging
+EVENT_LEVELS = {
+    "LOGIC_BOMB_COMPARING": "debug",
+    "LOGIC_BOMB_SKIP": "debug",
+}
+
+
+def _default_level(event: str) -> str:
+    if "ERROR" in event or "FAIL" in event:
+        return "error"
+    if "WARN" in event or "RETRY" in event:
+        return "warning"
+    return EVENT_LEVELS.get(event, "info")
+
+
+def _parse_sampling(spec: str) -> Dict[str, float]:
+    """"EVENT_A=0.1,EVENT_B=0.5" -> {"EVENT_A": 0.1, "EVENT_B": 0.5}"""
+    rates = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, rate = part.split("=", 1)
+            try:
+                rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+            except ValueError:
+                pass
+    return rates
+
+
+def _format(record: Dict[str, Any]) -> str:
+    if LOG_FORMAT == "json":
+        return json.dumps(record, default=str, ensure_ascii=False)
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["ts"]))
+    details = " ".join(f"{k}={v}" for k, v in record.items() if k not in ("ts", "event", "level"))
+    return f"[{timestamp}] {record['event']} {details}"
+
+
+class _LogWriter:
+    """
+    Background writer: the request thread only enqueues a record;
+    formatting and I/O happen on a daemon thread. When the queue is
+    full, records are dropped (and counted) rather than blocking.
+    """
+
+    def __init__(self, path: Optional[str], maxsize: int):
+        self._path = path
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def _stream(self):
+        if self._path:
+            return open(self._path, "a", encoding="utf-8")
+        return sys.stdout
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stream = self._stream()
+        while True:
+            record = self._queue.get()
+            try:
+                stream.write(_format(record) + "\n")
+                if self._queue.empty():
+                    stream.flush()
+            except Exception:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait (bounded) until queued records are written."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.005)
+
+
+_min_level = LEVELS.get(LOG_LEVEL, LEVELS["info"])
+_sampling = _parse_sampling(LOG_SAMPLING)
+_writer = _LogWriter(LOG_FILE or None, LOG_QUEUE_SIZE)
+atexit.register(_writer.flush)
+
+
+def is_enabled(event: str, level: Optional[str] = None) -> bool:
+    """Cheap check callers can use before building expensive fields themselves."""
+    return LEVELS.get(level or _default_level(event), LEVELS["info"]) >= _min_level
+
+
+def log_event(event: str, level: Optional[str] = None, **kwargs: Any) -> None:
     """
     Lightweight structured logger.
+    - Level defaults from the event name (…_ERROR/…_FAIL, …_WARN/…_RETRY, EVENT_LEVELS)
+    - Per-event sampling via LOG_SAMPLING
+    - Callable field values are evaluated only if the event is emitted
+    - Formatting and I/O happen on a background thread (LOG_ASYNC)
     Never raises. Safe to call anywhere.
     """
 
     try:
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        details = " ".join(f"{k}={v}" for k, v in kwargs.items())
-        print(f"[{timestamp}] {event} {details}")
+        level = level or _default_level(event)
+        if LEVELS.get(level, LEVELS["info"]) < _min_level:
+            return
+
+        rate = _sampling.get(event)
+        if rate is not None and random.random() >= rate:
+            return
+
+        record = {"ts": time.time(), "event": event, "level": level}
+        for k, v in kwargs.items():
+            record[k] = v() if callable(v) else v
+
+        if LOG_ASYNC:
+            _writer.submit(record)
+        else:
+            print(_format(record))
     except Exception:
         # Logging must never crash the system
         pass
+
+
+def flush_logs(timeout: float = 2.0) -> None:
+    """Block until queued log records have been written (tests, shutdown)."""
+    _writer.flush(timeout)
@@ -0,0 +1,148 @@
+# diagnostics/profiling.py
+
+import contextvars
+import cProfile
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_FILES
+from diagnostics.logger import log_event
+
+MODES = ("sample", "cprofile")
+_EXTENSIONS = {"sample": ".folded", "cprofile": ".prof"}
+
+
+def parse_mode(value: Optional[str]) -> Optional[str]:
+    """Header/query/env value -> profiler mode. "1"/"true" mean the sampling profiler."""
+    value = (value or "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return "sample"
+    return value if value in MODES else None
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class _Sampler:
+    """
+    Wall-clock sampling profiler for one thread: a daemon thread reads the
+    target's stack via sys._current_frames() every interval and counts
+    folded stacks (root;...;leaf), the input format of flamegraph.pl/speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: Path) -> int:
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.items()), encoding="utf-8")
+        return sum(self.stacks.values())
+
+
+class Profile:
+    """One profiled block; `path` is known up front so callers can report it immediately."""
+
+    def __init__(self, label: str, mode: str, include_slow_pipe: bool = False):
+        self.label = re.sub(r"[^A-Za-z0-9_.-]", "_", label)[:80]
+        self.mode = mode
+        self.include_slow_pipe = include_slow_pipe
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.path = PROFILE_DIR / f"{self.id}_{self.label}{_EXTENSIONS[mode]}"
+
+    def followup(self, fn: Callable) -> Callable:
+        """Wrap work handed to another thread (the slow pipe) so it is profiled too, into its own file."""
+        label = f"{self.label}.{getattr(fn, '__name__', 'followup')}"
+        mode = self.mode
+
+        def wrapper(*args, **kwargs):
+            with profile(label, mode):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("profile", default=None)
+
+
+def current_profile() -> Optional[Profile]:
+    return _current_profile.get()
+
+
+def _prune_old_profiles() -> None:
+    if not PROFILE_MAX_FILES:
+        return
+    files = sorted((p for p in PROFILE_DIR.iterdir() if p.suffix in _EXTENSIONS.values()), key=lambda p: p.stat().st_mtime)
+    for old in files[:-PROFILE_MAX_FILES]:
+        old.unlink(missing_ok=True)
+
+
+@contextmanager
+def profile(label: str, mode: Optional[str], include_slow_pipe: bool = False):
+    """
+    Profile the enclosed block on the current thread and write the result to
+    PROFILE_DIR (folded stacks for "sample", pstats for "cprofile").
+    With mode=None this is a no-op that yields None, so call sites can wrap
+    unconditionally.
+    """
+    if mode is None:
+        yield None
+        return
+
+    prof = Profile(label, mode, include_slow_pipe)
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    token = _current_profile.set(prof)
+    started = time.perf_counter()
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = _Sampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        profiler.start()
+
+    try:
+        yield prof
+    finally:
+        _current_profile.reset(token)
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        try:
+            if mode == "cprofile":
+                profiler.disable()
+                profiler.dump_stats(str(prof.path))
+                samples = None
+            else:
+                profiler.stop()
+                samples = profiler.write(prof.path)
+            _prune_old_profiles()
+            log_event("PROFILE_WRITTEN", label=prof.label, mode=mode, path=str(prof.path), elapsed_ms=elapsed_ms, samples=samples)
+        except Exception as e:
+            # Profiling must never break the request it observes
+            log_event("PROFILE_ERROR", label=prof.label, error=str(e))
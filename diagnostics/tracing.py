@@ -0,0 +1,152 @@
+# diagnostics/tracing.py
+
+import contextvars
+import functools
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import TRACE_RESERVOIR_SIZE
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+class MetricsRegistry:
+    """
+    Process-wide latency histograms per stage (bounded reservoir of recent
+    samples for p50/p95/p99, plus exact count/sum) and pull-style gauges.
+    """
+
+    def __init__(self, reservoir_size: int = 1024):
+        self.reservoir_size = reservoir_size
+        self._samples: Dict[str, deque] = {}
+        self._totals: Dict[str, Tuple[int, float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.reservoir_size)
+            samples.append(ms)
+            count, total = self._totals.get(stage, (0, 0.0))
+            self._totals[stage] = (count + 1, total + ms)
+
+    def register_gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Gauge read at scrape time (e.g. queue depth)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            items = [(stage, sorted(samples), self._totals[stage]) for stage, samples in self._samples.items()]
+        return {
+            stage: {
+                "count": count,
+                "sum_ms": round(total, 3),
+                **{f"p{int(q * 100)}": round(_quantile(values, q), 3) for q in QUANTILES},
+            }
+            for stage, values, (count, total) in items
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def render_prometheus(self, prefix: str = "nsm") -> str:
+        """Prometheus text exposition: one summary for stage latency plus gauges."""
+        lines = [
+            f"# HELP {prefix}_stage_latency_ms Pipeline stage latency in milliseconds.",
+            f"# TYPE {prefix}_stage_latency_ms summary",
+        ]
+        for stage, stats in sorted(self.snapshot().items()):
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_latency_ms{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]}')
+            lines.append(f'{prefix}_stage_latency_ms_sum{{stage="{stage}"}} {stats["sum_ms"]}')
+            lines.append(f'{prefix}_stage_latency_ms_count{{stage="{stage}"}} {stats["count"]}')
+
+        with self._lock:
+            gauges = list(self._gauges.items())
+        for name, fn in sorted(gauges):
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Stages recorded during one request, in completion order."""
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+
+    def add(self, stage: str, ms: float) -> None:
+        self.spans.append((stage, ms))
+
+    def breakdown(self) -> Dict[str, float]:
+        """Total milliseconds per stage (repeated stages, e.g. several LLM calls, are summed)."""
+        totals: Dict[str, float] = {}
+        for stage, ms in self.spans:
+            totals[stage] = round(totals.get(stage, 0.0) + ms, 3)
+        return totals
+
+
+metrics = MetricsRegistry(reservoir_size=TRACE_RESERVOIR_SIZE)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+
+@contextmanager
+def start_trace():
+    """Collect every span opened in this context (thread/task) into a Trace."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block: feeds the global histogram and the active trace, if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        metrics.observe(stage, ms)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, ms)
+
+
+def traced(stage: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,368 @@
+# evaluation/load_test.py
+
+"""
+Concurrent multi-session load generator for the web API (/api/chat).
+
+Arrival models:
+- closed: one worker per session; send, wait for the reply, think, repeat.
+  Sweeping --concurrency gives the latency-vs-concurrency curve.
+- open: Poisson arrivals at --rate requests/s regardless of how fast the
+  server answers. Latency is measured from the scheduled send time, so
+  queueing in the client counts too (no coordinated omission).
+
+Slow-pipe lag is read from the server's /metrics while the test runs
+(slow_pipe_inflight gauge, slow_pipe.queue_wait quantiles).
+
+    python evaluation/load_test.py --mode closed --concurrency 1,4,16 --duration 30
+    python evaluation/load_test.py --mode open --rate 5 --sessions 50 --source dataset
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+DATASET_PATH = Path(__file__).parent / "dataset.json"
+
+KINDS = ("statement", "question", "chitchat", "contradiction")
+DEFAULT_MIX = {"statement": 0.35, "question": 0.35, "chitchat": 0.2, "contradiction": 0.1}
+
+_FACTS = {
+    "LIVES_IN": ("I live in {}.", "Where do I live?", ["Berlin", "Lisbon", "Osaka", "Toronto", "Nairobi"]),
+    "ORIGIN_FROM": ("I am from {}.", "Where am I from?", ["Kerala", "Texas", "Bavaria", "Sicily", "Punjab"]),
+    "NAME_IS": ("My name is {}.", "What is my name?", ["Alex", "Sam", "Priya", "Jordan", "Mina"]),
+    "LIKES": ("I like {}.", "What do I like?", ["ramen", "jazz", "chess", "hiking", "coffee"]),
+}
+_CHITCHAT = ["hi", "thanks!", "tell me a joke", "how are you today", "that's interesting"]
+
+
+class SyntheticSession:
+    """Per-session turn generator that remembers what it said, so contradictions are real."""
+
+    def __init__(self, rng: random.Random, mix: Dict[str, float]):
+        self.rng = rng
+        self.kinds = list(mix)
+        self.weights = [mix[k] for k in self.kinds]
+        self.facts: Dict[str, str] = {}
+
+    def next_turn(self) -> Dict[str, str]:
+        kind = self.rng.choices(self.kinds, weights=self.weights)[0]
+        if kind == "question" and not self.facts:
+            kind = "statement"
+        if kind == "contradiction" and not self.facts:
+            kind = "statement"
+
+        if kind == "statement":
+            relation = self.rng.choice(list(_FACTS))
+            template, _, values = _FACTS[relation]
+            self.facts[relation] = self.rng.choice(values)
+            return {"kind": kind, "text": template.format(self.facts[relation])}
+        if kind == "question":
+            relation = self.rng.choice(list(self.facts))
+            return {"kind": kind, "text": _FACTS[relation][1]}
+        if kind == "contradiction":
+            relation = self.rng.choice(list(self.facts))
+            template, _, values = _FACTS[relation]
+            other = self.rng.choice([v for v in values if v != self.facts[relation]])
+            return {"kind": kind, "text": template.format(other)}
+        return {"kind": kind, "text": self.rng.choice(_CHITCHAT)}
+
+
+class DatasetSession:
+    """Replays the evaluation dataset's conversations in order, cycling."""
+
+    _EVAL_KINDS = {"store": "statement", "retrieve": "question", "none": "chitchat"}
+
+    def __init__(self, rng: random.Random, conversations: List[Dict]):
+        turns = list(rng.choice(conversations)["turns"])
+        self._turns = turns
+        self._index = 0
+
+    def next_turn(self) -> Dict[str, str]:
+        turn = self._turns[self._index % len(self._turns)]
+        self._index += 1
+        kind = self._EVAL_KINDS.get((turn.get("eval") or {}).get("type"), "statement")
+        return {"kind": kind, "text": turn["user_input"]}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def parse_prometheus(text: str) -> Dict[str, float]:
+    """Flatten exposition lines into {'name{labels}': value}."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = re.match(r"^(\S+?(?:\{[^}]*\})?)\s+(\S+)$", line)
+        if match:
+            try:
+                samples[match.group(1)] = float(match.group(2))
+            except ValueError:
+                pass
+    return samples
+
+
+class MetricsSampler:
+    """Polls /metrics in the background and keeps the slow-pipe backlog over time."""
+
+    def __init__(self, base_url: str, interval: float = 1.0, prefix: str = "nsm"):
+        self.url = f"{base_url}/metrics"
+        self.interval = interval
+        self.prefix = prefix
+        self.inflight: List[float] = []
+        self.last: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scrape(self) -> Optional[Dict[str, float]]:
+        try:
+            response = requests.get(self.url, timeout=5)
+            response.raise_for_status()
+        except requests.RequestException:
+            return None
+        self.last = parse_prometheus(response.text)
+        return self.last
+
+    def backlog(self) -> Optional[float]:
+        samples = self.scrape()
+        if samples is None:
+            return None
+        return samples.get(f"{self.prefix}_slow_pipe_inflight")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            value = self.backlog()
+            if value is not None:
+                self.inflight.append(value)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def queue_wait(self) -> Dict[str, float]:
+        name = f"{self.prefix}_stage_latency_ms"
+        return {
+            f"p{int(q * 100)}": self.last.get(f'{name}{{stage="slow_pipe.queue_wait",quantile="{q}"}}', 0.0)
+            for q in (0.5, 0.95, 0.99)
+        }
+
+
+class LoadTest:
+    """Shared bookkeeping for one load level; thread-safe result recording."""
+
+    def __init__(self, base_url: str, sessions: int, source: str, mix: Dict[str, float], seed: int, timeout: float):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        rng = random.Random(seed)
+        conversations = json.loads(DATASET_PATH.read_text(encoding="utf-8")) if source == "dataset" else None
+        self.sessions = [
+            DatasetSession(random.Random(rng.random()), conversations) if conversations
+            else SyntheticSession(random.Random(rng.random()), mix)
+            for _ in range(sessions)
+        ]
+        self.results: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _http(self) -> requests.Session:
+        # One connection pool per worker thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def send(self, session_index: int, scheduled_at: Optional[float] = None) -> None:
+        with self._lock:
+            turn = self.sessions[session_index].next_turn()
+        started = time.perf_counter()
+        error = None
+        try:
+            response = self._http().post(
+                f"{self.base_url}/api/chat",
+                json={"session_id": f"load-{self.run_id}-{session_index}", "user_input": turn["text"]},
+                timeout=self.timeout,
+            )
+            if response.status_code != 200:
+                error = f"http_{response.status_code}"
+        except requests.RequestException as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+
+        with self._lock:
+            self.results.append({
+                "kind": turn["kind"],
+                "latency_ms": (finished - (scheduled_at or started)) * 1000,
+                "service_ms": (finished - started) * 1000,
+                "error": error,
+                "finished": finished,
+            })
+
+    def run_closed(self, concurrency: int, duration: float, think_time: float) -> float:
+        """`concurrency` workers, each driving its own session back to back."""
+        deadline = time.perf_counter() + duration
+
+        def worker(index: int):
+            rng = random.Random(index)
+            while time.perf_counter() < deadline:
+                self.send(index % len(self.sessions))
+                if think_time:
+                    time.sleep(rng.expovariate(1.0 / think_time))
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started
+
+    def run_open(self, rate: float, duration: float, max_outstanding: int, seed: int) -> float:
+        """Poisson arrivals at `rate`/s spread over random sessions."""
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        next_at = started
+        with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+            while True:
+                next_at += rng.expovariate(rate)
+                if next_at - started >= duration:
+                    break
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+                pool.submit(self.send, rng.randrange(len(self.sessions)), next_at)
+        return time.perf_counter() - started
+
+    def summary(self, elapsed: float) -> Dict:
+        with self._lock:
+            results = list(self.results)
+        ok = [r for r in results if r["error"] is None]
+        errors: Dict[str, int] = {}
+        for r in results:
+            if r["error"]:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+        def latency(rows):
+            values = [r["latency_ms"] for r in rows]
+            return {f"p{int(q * 100)}": round(_percentile(values, q), 1) for q in (0.5, 0.95, 0.99)}
+
+        return {
+            "requests": len(results),
+            "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+            "error_rate": round(len(results) and (len(results) - len(ok)) / len(results), 4),
+            "errors": errors,
+            "latency_ms": latency(ok),
+            "latency_by_kind_ms": {k: latency([r for r in ok if r["kind"] == k]) for k in KINDS if any(r["kind"] == k for r in ok)},
+        }
+
+
+def _drain(sampler: MetricsSampler, timeout: float) -> Optional[float]:
+    """Seconds until the server's slow-pipe backlog reaches zero (None if unknown/timed out)."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        backlog = sampler.backlog()
+        if backlog is None:
+            return None
+        if backlog <= 0:
+            return round(time.perf_counter() - started, 2)
+        time.sleep(0.5)
+    return None
+
+
+def run_level(args, level: float) -> Dict:
+    test = LoadTest(args.url, args.sessions, args.source, args.mix, args.seed, args.timeout)
+    sampler = MetricsSampler(args.url, interval=args.sample_interval)
+    sampler.start()
+    try:
+        if args.mode == "closed":
+            elapsed = test.run_closed(int(level), args.duration, args.think_time)
+        else:
+            elapsed = test.run_open(level, args.duration, args.max_outstanding, args.seed)
+    finally:
+        sampler.stop()
+
+    summary = test.summary(elapsed)
+    summary["slow_pipe"] = {
+        "max_inflight": max(sampler.inflight, default=None),
+        "mean_inflight": round(sum(sampler.inflight) / len(sampler.inflight), 2) if sampler.inflight else None,
+        "drain_s": _drain(sampler, args.drain_timeout),
+        "queue_wait_ms": sampler.queue_wait(),
+    }
+    summary["level"] = level
+    return summary
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    """'statement=0.5,question=0.5' -> weights (unlisted kinds get 0)."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {k: 0.0 for k in KINDS}
+    for part in spec.split(","):
+        name, weight = part.split("=", 1)
+        if name.strip() not in mix:
+            raise argparse.ArgumentTypeError(f"unknown turn kind: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test for /api/chat")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Closed loop: comma-separated worker counts to sweep")
+    parser.add_argument("--rate", default="1,2,4", help="Open loop: comma-separated arrival rates (req/s) to sweep")
+    parser.add_argument("--sessions", type=int, default=16, help="Distinct sessions (closed loop: at least --concurrency)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per load level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop: mean think time between turns (s)")
+    parser.add_argument("--max-outstanding", type=int, default=256, help="Open loop: client-side concurrency cap")
+    parser.add_argument("--source", choices=("synthetic", "dataset"), default="synthetic")
+    parser.add_argument("--mix", type=_parse_mix, default=dict(DEFAULT_MIX), help="e.g. statement=0.4,question=0.4,chitchat=0.2")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    levels = [float(x) for x in (args.concurrency if args.mode == "closed" else args.rate).split(",") if x]
+    if args.mode == "closed":
+        args.sessions = max(args.sessions, int(max(levels)))
+
+    label = "conc" if args.mode == "closed" else "rate"
+    print(f"{label:>6} {'req':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'lag':>5} {'drain':>6}")
+    curve = []
+    for level in levels:
+        result = run_level(args, level)
+        curve.append(result)
+        lat, lag = result["latency_ms"], result["slow_pipe"]
+        print(
+            f"{level:>6g} {result['requests']:>6} {result['throughput_rps']:>8.2f} "
+            f"{lat['p50']:>8.0f} {lat['p95']:>8.0f} {lat['p99']:>8.0f} {result['error_rate'] * 100:>6.1f} "
+            f"{lag['max_inflight'] if lag['max_inflight'] is not None else '-':>5} "
+            f"{lag['drain_s'] if lag['drain_s'] is not None else '-':>6}"
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"mode": args.mode, "source": args.source, "curve": curve}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
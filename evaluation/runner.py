@@ -6,17 +6,23 @@ This script runs a series of simulated conversations from a dataset
 and evaluates the agent's performance on fact extraction and retrieval.
 """
 
+import argparse
 import json
 import sys
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
 from tqdm import tqdm
 
 # Add project root to path to allow imports
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from config import DATA_DIR
 from memory.ram_context import RAMContext
-from fast_pipe import fast_pipe
+from fast_pipe import fast_pipe, wait_for_slow_pipe
 from memory.reset import wipe_all_memory
 from evaluation.metrics import (
     evaluate_store_turn,
@@ -25,6 +31,7 @@ from evaluation.metrics import (
 )
 
 DATASET_PATH = Path(__file__).parent / "dataset.json"
+RESULTS_DIR = DATA_DIR / "eval"
 
 def _print_graph_visualization(graph_delta: dict):
     """Prints a simple ASCII visualization of the extracted knowledge graph."""
@@ -45,78 +52,140 @@ def _print_graph_visualization(graph_delta: dict):
             print(f"      ({edge.get('src', '?')}) --[{edge.get('relation', '...')}]--> ({edge.get('dst', '?')})")
     print() # Add a newline for spacing
 
-def run_evaluation():
-    """Main function to run the evaluation suite."""
+def _evaluate_turn(eval_spec: dict, agent_output: dict) -> dict:
+    eval_type = eval_spec.get("type", "none")
+    if eval_type == "store":
+        return evaluate_store_turn(eval_spec, agent_output)
+    if eval_type == "retrieve":
+        return evaluate_retrieve_turn(eval_spec, agent_output)
+    if eval_type == "none":
+        return evaluate_none_turn(eval_spec, agent_output)
+    return {"passed": True, "reason": "Unknown eval type, skipping."}
+
+
+def run_conversation(conversation: dict, namespace: str, turn_timeout: float = 120.0, verbose: bool = False, on_turn=None) -> dict:
+    """
+    Run one conversation in its own namespaced session.
+    Memory is isolated by session_id (graph edges, vectors and caches are all
+    keyed by user), so conversations can run side by side without wipes.
+    After each turn we wait for that session's slow pipe instead of sleeping.
+    """
+    conv_id = conversation.get("conversation_id", "unknown_convo")
+    session_id = f"eval_{namespace}_{conv_id}"
+    ram_context = RAMContext()
+    turns = []
+    started = time.perf_counter()
+
+    for turn in conversation.get("turns", []):
+        user_input = turn["user_input"]
+        eval_spec = turn.get("eval", {})
+
+        ram_context.add(session_id, user_input)
+
+        turn_started = time.perf_counter()
+        agent_output = fast_pipe(
+            user_input=user_input,
+            session_id=session_id,
+            ram_context=ram_context,
+        )
+        fast_ms = (time.perf_counter() - turn_started) * 1000
+
+        # The next turn must see this turn's writes
+        wait_started = time.perf_counter()
+        settled = wait_for_slow_pipe(session_id, timeout=turn_timeout)
+        slow_wait_ms = (time.perf_counter() - wait_started) * 1000
+
+        if verbose:
+            # Visualize the extracted graph for this turn
+            _print_graph_visualization(agent_output.get("newly_extracted_graph"))
+
+        result = _evaluate_turn(eval_spec, agent_output)
+        turns.append({
+            "turn_id": turn.get("turn_id"),
+            "eval_type": eval_spec.get("type", "none"),
+            "user_input": user_input,
+            "agent_response": agent_output.get("response"),
+            "passed": result["passed"],
+            "reason": result["reason"],
+            "details": result.get("details", {}),
+            "fast_pipe_ms": round(fast_ms, 1),
+            "slow_pipe_wait_ms": round(slow_wait_ms, 1),
+            "slow_pipe_settled": settled,
+        })
+        if on_turn is not None:
+            on_turn()
+
+    return {
+        "conversation_id": conv_id,
+        "session_id": session_id,
+        "wall_s": round(time.perf_counter() - started, 3),
+        "passed": sum(1 for t in turns if t["passed"]),
+        "turns": turns,
+    }
+
+
+def run_evaluation(
+    workers: int = 4,
+    dataset_path: Path = DATASET_PATH,
+    output_path: Path = None,
+    wipe: bool = False,
+    turn_timeout: float = 120.0,
+    restore: str = None,
+) -> dict:
+    """Main function to run the evaluation suite. Returns the results dict (also written as JSON)."""
     
     print("=" * 80)
     print("Neuro-Symbolic Memory Agent - Evaluation Suite")
     print("=" * 80)
 
     # 1. Load Dataset
-    if not DATASET_PATH.exists():
-        print(f"ERROR: Dataset not found at {DATASET_PATH}")
+    if not dataset_path.exists():
+        print(f"ERROR: Dataset not found at {dataset_path}")
         sys.exit(1)
     
-    with open(DATASET_PATH, 'r', encoding='utf-8') as f:
+    with open(dataset_path, 'r', encoding='utf-8') as f:
         dataset = json.load(f)
     print(f"✓ Loaded dataset with {len(dataset)} conversations.\n")
 
-    total_turns = 0
-    passed_turns = 0
-    failed_turns_details = []
-
-    # 2. Run evaluation for each conversation
-    for conversation in dataset:
-        conv_id = conversation.get("conversation_id", "unknown_convo")
-        print(f"\n--- Running Conversation: {conv_id} ---")
-        print(f"Description: {conversation.get('description', 'N/A')}")
-        
-        # Reset memory for each new conversation
+    # Optional one-off clean slate; isolation itself comes from the namespace
+    if wipe:
         wipe_all_memory()
-        session_id = f"eval_{conv_id}"
-        ram_context = RAMContext()
-        
-        # Use tqdm for a progress bar over the turns
-        for turn in tqdm(conversation.get("turns", []), desc=f"  {conv_id}"):
-            total_turns += 1
-            user_input = turn["user_input"]
-            eval_spec = turn.get("eval", {})
-            eval_type = eval_spec.get("type", "none")
-
-            ram_context.add(session_id, user_input)
-
-            agent_output = fast_pipe(
-                user_input=user_input,
-                session_id=session_id,
-                ram_context=ram_context,
-            )
-            
-            # Visualize the extracted graph for this turn
-            _print_graph_visualization(agent_output.get("newly_extracted_graph"))
-
-            result = {}
-            if eval_type == "store":
-                result = evaluate_store_turn(eval_spec, agent_output)
-            elif eval_type == "retrieve":
-                result = evaluate_retrieve_turn(eval_spec, agent_output)
-            elif eval_type == "none":
-                result = evaluate_none_turn(eval_spec, agent_output)
-            else:
-                result = {"passed": True, "reason": "Unknown eval type, skipping."}
-
-            if result["passed"]:
-                passed_turns += 1
-            else:
-                failed_turns_details.append({
-                    "conversation_id": conv_id,
-                    "turn_id": turn.get("turn_id"),
-                    "user_input": user_input,
-                    "agent_response": agent_output.get("response"),
-                    "failure_reason": result["reason"],
-                    "details": result.get("details", {})
-                })
-            
-            time.sleep(1)
+    # Or start from a saved known state (python -m memory.snapshot save <name>)
+    if restore:
+        from memory.snapshot import restore_snapshot
+        stats = restore_snapshot(restore)
+        print(f"✓ Restored snapshot {stats['path']} ({stats['edges']} edges, {stats['vectors']} vectors) in {stats['elapsed_ms']:.0f}ms\n")
+
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "_" + uuid.uuid4().hex[:6]
+    total = sum(len(c.get("turns", [])) for c in dataset)
+    started = time.perf_counter()
+
+    # 2. Run conversations concurrently, each in its own namespace
+    conversations = []
+    progress_lock = threading.Lock()
+    with tqdm(total=total, desc="  turns") as bar:
+        def on_turn():
+            with progress_lock:
+                bar.update(1)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(run_conversation, c, run_id, turn_timeout, workers == 1, on_turn)
+                for c in dataset
+            ]
+            for future in as_completed(futures):
+                conversations.append(future.result())
+
+    conversations.sort(key=lambda c: c["conversation_id"])
+    wall_s = time.perf_counter() - started
+
+    total_turns = sum(len(c["turns"]) for c in conversations)
+    passed_turns = sum(c["passed"] for c in conversations)
+    failed_turns_details = [
+        {"conversation_id": c["conversation_id"], **t}
+        for c in conversations for t in c["turns"] if not t["passed"]
+    ]
+    fast_ms = sorted(t["fast_pipe_ms"] for c in conversations for t in c["turns"])
 
     # 3. Print Summary Report
     print("\n\n" + "=" * 80)
@@ -127,16 +196,56 @@ def run_evaluation():
     
     print(f"Total Turns: {total_turns}, Passed: {passed_turns}, Failed: {len(failed_turns_details)}")
     print(f"Success Rate: {pass_rate:.2f}%")
+    print(f"Wall time: {wall_s:.1f}s with {workers} worker(s)")
 
     if failed_turns_details:
         print("\n--- Failed Turns Details ---")
         for i, failure in enumerate(failed_turns_details, 1):
             print(f"\n{i}. Conv: {failure['conversation_id']} (Turn {failure['turn_id']}) | Input: '{failure['user_input']}'")
-            print(f"   Reason: {failure['failure_reason']}")
+            print(f"   Reason: {failure['reason']}")
             if failure['details']:
                 print(f"   Details: {json.dumps(failure['details'], indent=2)}")
     
     print("\n" + "=" * 80)
 
+    results = {
+        "run_id": run_id,
+        "dataset": str(dataset_path),
+        "workers": workers,
+        "wall_s": round(wall_s, 3),
+        "total_turns": total_turns,
+        "passed_turns": passed_turns,
+        "pass_rate": round(pass_rate, 2),
+        "fast_pipe_ms": {
+            "p50": fast_ms[len(fast_ms) // 2] if fast_ms else 0.0,
+            "max": fast_ms[-1] if fast_ms else 0.0,
+        },
+        "conversations": conversations,
+    }
+
+    output_path = output_path or RESULTS_DIR / f"results_{run_id}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Results written to {output_path}")
+
+    return results
+
+
 if __name__ == "__main__":
-    run_evaluation()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the evaluation dataset against the agent")
+    parser.add_argument("--workers", type=int, default=4, help="Conversations run concurrently")
+    parser.add_argument("--dataset", type=Path, default=DATASET_PATH)
+    parser.add_argument("--output", type=Path, help="Results JSON (default: data/eval/results_<run_id>.json)")
+    parser.add_argument("--wipe", action="store_true", help="Wipe all memory once before the run")
+    parser.add_argument("--restore", help="Restore this memory snapshot (file or name in data/snapshots) before the run")
+    parser.add_argument("--turn-timeout", type=float, default=120.0, help="Max seconds to wait for a turn's slow pipe")
+    args = parser.parse_args()
+
+    run_evaluation(
+        workers=args.workers,
+        dataset_path=args.dataset,
+        output_path=args.output,
+        wipe=args.wipe,
+        turn_timeout=args.turn_timeout,
+        restore=args.restore,
+    )
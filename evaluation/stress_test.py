@@ -4,7 +4,7 @@ import time
 
 from memory.ram_context import RAMContext
 from fast_pipe import fast_pipe
-from memory.sqlite_store import SQLiteMemoryStore
+from memory.factory import get_graph_store
 
 
 def run_stress_test(
@@ -15,7 +15,7 @@ def run_stress_test(
 
     session_id = "stress_user"
     ram_context = RAMContext()
-    store = SQLiteMemoryStore()
+    store = get_graph_store()
 
     latencies = []
     errors = 0
@@ -38,7 +38,7 @@ def run_stress_test(
 
         latencies.append((time.time() - start) * 1000)
 
-    rows = store.retrieve_candidates(session_id, ["item"])
+    rows = store.get_recent_facts("User", user_id=session_id, limit=turns)
 
     print(f"Turns executed      : {turns}")
     print(f"Errors              : {errors}")
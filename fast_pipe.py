@@ -1,28 +1,121 @@
 # fast_pipe.py
 
 import time
+import threading
 import requests
 from requests.exceptions import ConnectionError
 
 from diagnostics.logger import log_event
-from llm.generator import generate_response
-from memory.neo4j_store import Neo4jMemoryStore
-from memory.vector_store import VectorMemoryStore
+from diagnostics.tracing import span, start_trace, metrics
+from diagnostics.profiling import current_profile
+from llm.accounting import current_usage, start_turn
+from llm.generator import generate_response, DEFAULT_FALLBACK
+from llm.prompt import prompt_assembler
+from memory.factory import get_graph_store, get_vector_store
+from memory.pending_writes import pending_writes
+from memory.response_cache import response_cache
+from memory.versioning import memory_versions, EpochCache
+from reasoning.confidence import compute_confidence
 from reasoning.extractor import extract_graph_delta
 from reasoning.reranker import rerank_memories
 from slow_pipe import slow_pipe
-from config import OLLAMA_BASE_URL, GENERATION_MODEL
+from config import OLLAMA_BASE_URL, GENERATION_MODEL, ASYNC_WORKERS, RESPONSE_CACHE_ENABLED, MIN_CONFIDENCE_TO_STORE, TRACE_STAGES_IN_RESULT, ACTIVATION_CACHE_TTL_SECONDS
 
+import collections
 import concurrent.futures
+import functools
 
 # Thread pool for background tasks (slow pipe)
-_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=ASYNC_WORKERS)
+
+# Slow pipes submitted but not finished yet (queued + running), per session
+_slow_pipe_inflight = {}
+_inflight_cond = threading.Condition()
+# Per session, the slow pipes waiting for the running one to finish: a session's
+# turns are persisted one at a time and in order, other sessions use the free workers
+_session_backlog = {}
+metrics.register_gauge("slow_pipe_inflight", lambda: sum(_slow_pipe_inflight.values()))
+metrics.register_gauge("pending_writes", lambda: pending_writes.count())
+
+
+def _submit_slow_pipe(user_input, session_id, *args, **kwargs) -> None:
+    # A profiled turn can ask for its background write to be profiled as well
+    target = slow_pipe
+    active_profile = current_profile()
+    if active_profile is not None and active_profile.include_slow_pipe:
+        target = active_profile.followup(slow_pipe)
+    # LLM calls in the background write count against the same turn budget
+    usage = current_usage()
+    if usage is not None:
+        target = usage.followup(target)
+    job = functools.partial(target, user_input, session_id, *args, enqueued_at=time.perf_counter(), **kwargs)
+
+    with _inflight_cond:
+        running = _slow_pipe_inflight.get(session_id, 0)
+        _slow_pipe_inflight[session_id] = running + 1
+        if running:
+            _session_backlog.setdefault(session_id, collections.deque()).append(job)
+            return
+    _start_slow_pipe(session_id, job)
+
+
+def _start_slow_pipe(session_id, job) -> None:
+    future = _executor.submit(job)
+    future.add_done_callback(lambda _future: _finish_slow_pipe(session_id))
+
+
+def _finish_slow_pipe(session_id) -> None:
+    """Done callback: count the job off and start the session's next queued one."""
+    next_job = None
+    with _inflight_cond:
+        remaining = _slow_pipe_inflight.get(session_id, 0) - 1
+        if remaining > 0:
+            _slow_pipe_inflight[session_id] = remaining
+            backlog = _session_backlog.get(session_id)
+            if backlog:
+                next_job = backlog.popleft()
+                if not backlog:
+                    del _session_backlog[session_id]
+        else:
+            _slow_pipe_inflight.pop(session_id, None)
+            _session_backlog.pop(session_id, None)
+        _inflight_cond.notify_all()
+    if next_job is not None:
+        _start_slow_pipe(session_id, next_job)
+
+
+def wait_for_slow_pipe(session_id: str = None, timeout: float = None) -> bool:
+    """
+    Block until every slow pipe queued so far (for one session, or all) has finished.
+    Returns False on timeout. Used by evaluation/benchmarks instead of sleeping.
+    """
+    with _inflight_cond:
+        return _inflight_cond.wait_for(
+            lambda: not (_slow_pipe_inflight.get(session_id) if session_id else _slow_pipe_inflight),
+            timeout=timeout,
+        )
+
+# Spreading-activation results change when the user's memory epoch moves, and their
+# decayed scores with time: recomputed after ACTIVATION_CACHE_TTL_SECONDS even if nobody writes
+_activation_cache = EpochCache("activation", ttl_seconds=ACTIVATION_CACHE_TTL_SECONDS)
+
+
+def _retrieve_symbolic(session_id: str) -> list:
+    graph_store = get_graph_store()
+    try:
+        return graph_store.retrieve_context(user_id=session_id)
+    finally:
+        graph_store.close()
 
 
 def _is_question(text: str) -> bool:
     """Simple heuristic to check if text is a question."""
     return text.strip().endswith("?") or any(w in text.lower() for w in ["who", "what", "where", "when", "why", "how"])
 
+def _is_cacheable_question(text: str) -> bool:
+    """Only explicit questions are answered from the response cache."""
+    return text.strip().endswith("?")
+
 def _requires_memory(user_input: str) -> bool:
     """
     Fast semantic gate (Heuristic based).
@@ -40,78 +133,135 @@ def _requires_memory(user_input: str) -> bool:
     return False
 
 
-def fast_pipe(user_input: str, session_id: str, ram_context):
+def _logic_bomb(first_edge: dict, session_id: str) -> bool:
+    """
+    Synchronous contradiction check against the most recent facts about the
+    same subject (pending overlay first, then the graph store). True if the new fact
+    contradicts one of them.
+    """
+    from reasoning.omniscience import detect_contradiction
+    from config import TRIVIAL_RELATIONS
+
+    log_event("LOGIC_BOMB_CHECK_START", edge=first_edge)
+    # Facts still queued for the slow pipe count too (read-your-writes)
+    pending_facts = [
+        {"src": e["src"], "relation": e["relation"], "dst": e["dst"]}
+        for e in pending_writes.edges(session_id, src=first_edge['src'])
+    ]
+
+    store_check = get_graph_store()
+    try:
+        # OPTIMIZATION: Limit to 3 most recent facts (was 5) to reduce latency
+        stored_facts = store_check.get_recent_facts(first_edge['src'], user_id=session_id, limit=3)
+    finally:
+        store_check.close()
+
+    fact_count = 0
+    for existing_fact in (pending_facts + stored_facts)[:3]:
+        fact_count += 1
+        
+        log_event("LOGIC_BOMB_COMPARING", new_fact=first_edge, existing_fact=existing_fact)
+        
+        # Skip if existing fact is trivial
+        if existing_fact['relation'] in TRIVIAL_RELATIONS:
+            log_event("LOGIC_BOMB_SKIP", reason="trivial_relation", fact=existing_fact)
+            continue
+        
+        if detect_contradiction(first_edge, existing_fact):
+            log_event("LOGIC_BOMB", reason="contradiction_blocked_before_response")
+            return True
+    
+    log_event("LOGIC_BOMB_CHECK_COMPLETE", facts_checked=fact_count, contradiction_found=False)
+    return False
+
+
+def fast_pipe(user_input: str, session_id: str, ram_context, include_stages: bool = None):
+    """
+    Traced entry point for the fast pipe.
+    Every stage, LLM and DB call is timed into the /metrics histograms; with
+    include_stages (or TRACE_STAGES_IN_RESULT) the per-stage breakdown in ms
+    is also returned under "stages", and the LLM usage of the read path under "llm".
+    LLM calls of the whole turn (including its slow pipe) share one budget.
+    """
+    if include_stages is None:
+        include_stages = TRACE_STAGES_IN_RESULT
+
+    with start_trace() as trace, start_turn(session_id) as usage:
+        with span("fast_pipe"):
+            result = _fast_pipe(user_input, session_id, ram_context)
+
+    if include_stages:
+        result["stages"] = trace.breakdown()
+        result["llm"] = usage.summary()
+    return result
+
+
+def _fast_pipe(user_input: str, session_id: str, ram_context):
     """
     FAST PIPE (READ PATH) - OPTIMIZED
     - No synchronous extraction (moved to slow pipe)
     - Fast heuristic memory gating
-    - Retrieving from Neo4j + Chroma
+    - Retrieving from the graph store (Neo4j/SQLite) + Chroma
     """
 
     start_time = time.time()
     memories = []
+    generated = False
+
+    # -------------------------
+    # Step -1: Response cache
+    # -------------------------
+    # Same question + unchanged memory version -> same answer, no retrieval or LLM call.
+    # A cached question never changed memory the first time (a write would have
+    # bumped the version), so there is nothing for the slow pipe to persist either.
+    # Skipped while this session has writes in flight (a pending overlay or a queued or
+    # running slow pipe, which may still store facts): the epoch hasn't moved yet.
+    # Keyed on the recent conversation too: the prompt includes it, and it moves
+    # every turn without touching the memory version ("why?", "what did I just ask?").
+    memory_version = memory_versions.get(session_id)
+    history = prompt_assembler.history_block(ram_context.get(session_id)[-5:], user_input)
+    cacheable = (
+        RESPONSE_CACHE_ENABLED
+        and _is_cacheable_question(user_input)
+        and pending_writes.count(session_id) == 0
+        and not _slow_pipe_inflight.get(session_id)
+    )
+    if cacheable:
+        with span("fast_pipe.response_cache"):
+            cached = response_cache.get(session_id, user_input, memory_version, context=history)
+        if cached is not None:
+            cached["latency_ms"] = int((time.time() - start_time) * 1000)
+            log_event("FAST_PIPE_OK", latency_ms=cached["latency_ms"], memories_used=len(cached.get("memories_used", [])), cached=True)
+            return cached
     
     # -------------------------
     # Step 0: FAST extraction + contradiction check (OPTIMIZED)
     # -------------------------
     # We need to extract early to check for contradictions BEFORE generating response
     # Optimizations: Limit fact checks to 3, reuse connection, skip on empty extraction
-    graph_delta = extract_graph_delta(user_input)
+    with span("fast_pipe.extract"):
+        graph_delta = extract_graph_delta(user_input)
     
     if graph_delta and graph_delta.get("edges"):
-        from reasoning.omniscience import detect_contradiction
         from config import TRIVIAL_RELATIONS
         
         first_edge = graph_delta["edges"][0]
         
         # Only check meaningful facts for contradictions
         if first_edge['relation'] not in TRIVIAL_RELATIONS:
-            log_event("LOGIC_BOMB_CHECK_START", edge=first_edge)
-            store_check = Neo4jMemoryStore()
-            try:
-                # OPTIMIZATION: Limit to 3 most recent facts (was 5) to reduce latency
-                related_facts = store_check.driver.session().run(
-                    """
-                    MATCH (s:Entity {id: $src})-[r]-(o)
-                    RETURN s.id as src, type(r) as relation, o.id as dst
-                    ORDER BY r.last_updated DESC
-                    LIMIT 3
-                    """,
-                    src=first_edge['src']
-                )
-                
-                fact_count = 0
-                for record in related_facts:
-                    fact_count += 1
-                    existing_fact = {
-                        "src": record["src"],
-                        "relation": record["relation"],
-                        "dst": record["dst"]
-                    }
-                    
-                    log_event("LOGIC_BOMB_COMPARING", new_fact=first_edge, existing_fact=existing_fact)
-                    
-                    # Skip if existing fact is trivial
-                    if existing_fact['relation'] in TRIVIAL_RELATIONS:
-                        log_event("LOGIC_BOMB_SKIP", reason="trivial_relation", fact=existing_fact)
-                        continue
-                    
-                    is_contradiction = detect_contradiction(first_edge, existing_fact)
-                    if is_contradiction:
-                        log_event("LOGIC_BOMB", reason="contradiction_blocked_before_response")
-                        # Return early with user-friendly message - NO storage happens
-                        response = "That contradicts what you told me earlier. I'll keep the original fact."
-                        
-                        return {
-                            "response": response,
-                            "memories_used": [],
-                            "newly_extracted_graph": None,
-                            "latency_ms": int((time.time() - start_time) * 1000)
-                        }
+            with span("fast_pipe.logic_bomb"):
+                is_contradiction = _logic_bomb(first_edge, session_id)
+
+            if is_contradiction:
+                # Return early with user-friendly message - NO storage happens
+                response = "That contradicts what you told me earlier. I'll keep the original fact."
                 
-                log_event("LOGIC_BOMB_CHECK_COMPLETE", facts_checked=fact_count, contradiction_found=False)
-            finally:
-                store_check.close()
+                return {
+                    "response": response,
+                    "memories_used": [],
+                    "newly_extracted_graph": None,
+                    "latency_ms": int((time.time() - start_time) * 1000)
+                }
         else:
             log_event("LOGIC_BOMB_SKIP", reason="trivial_new_relation", relation=first_edge['relation'])
     else:
@@ -129,16 +279,23 @@ def fast_pipe(user_input: str, session_id: str, ram_context):
         # -------------------------
         if _requires_memory(user_input):
             
-            # A. Symbolic Retrieval (Neo4j)
-            neo4j_store = Neo4jMemoryStore()
-            symbolic_context = neo4j_store.retrieve_context(user_id=session_id)
-            neo4j_store.close()
+            # A. Symbolic Retrieval (graph store), cached per memory epoch
+            # Copies, because the reranker writes scores into the dicts
+            with span("fast_pipe.retrieve_symbolic"):
+                symbolic_context = [
+                    dict(edge) for edge in _activation_cache.get_or_compute(
+                        session_id, lambda: _retrieve_symbolic(session_id)
+                    )
+                ]
             # Note: symbolic_context is a list of dicts (edges)
+            # Read-your-writes: facts the slow pipe hasn't persisted yet
+            symbolic_context = pending_writes.edges(session_id) + symbolic_context
             
             # B. Neural Retrieval (Vector)
-            vector_store = VectorMemoryStore()
-            # Fetch more candidates for reranking (n=10)
-            vector_results = vector_store.search(user_input, n_results=10, user_id=session_id)
+            with span("fast_pipe.retrieve_vector"):
+                vector_store = get_vector_store()
+                # Fetch more candidates for reranking (n=10)
+                vector_results = vector_store.search(user_input, n_results=10, user_id=session_id)
             
             neural_memories = []
             if vector_results.get("documents"):
@@ -152,10 +309,17 @@ def fast_pipe(user_input: str, session_id: str, ram_context):
                         **meta
                     })
 
+            # Read-your-writes: raw turns the slow pipe hasn't embedded yet
+            known_docs = {m["content"] for m in neural_memories}
+            for text in pending_writes.texts(session_id):
+                if text not in known_docs:
+                    neural_memories.append({"content": text, "type": "vector", "user_id": session_id, "pending": True})
+
             # C. Hybrid Fusion & Cohere Reranking
             # We pass ALL candidates to the reranker
             # The reranker will use the API to find the absolute best matches
-            memories = rerank_memories(user_input, symbolic_context, neural_memories, top_k=5)
+            with span("fast_pipe.rerank"):
+                memories = rerank_memories(user_input, symbolic_context, neural_memories, top_k=5)
 
         # -------------------------
         # Step 3: Context Compression
@@ -163,17 +327,20 @@ def fast_pipe(user_input: str, session_id: str, ram_context):
         from reasoning.compressor import ContextCompressor
         compressor = ContextCompressor(max_chars=2000)
         # Convert the list of best memories into a single optimized string
-        memory_context_str = compressor.compress(memories)
+        with span("fast_pipe.compress"):
+            memory_context_str = compressor.compress(memories)
         
         # -------------------------
         # Step 4: Generate response
         # -------------------------
-        response = generate_response(
-            user_input=user_input,
-            recent_turns=recent_turns,
-            memories=[memory_context_str], # Pass as single item list to fit generator signature
-            session_id=session_id,
-        )
+        with span("fast_pipe.generate"):
+            response = generate_response(
+                user_input=user_input,
+                recent_turns=recent_turns,
+                memories=[memory_context_str], # Pass as single item list to fit generator signature
+                session_id=session_id,
+            )
+        generated = response != DEFAULT_FALLBACK
 
     except Exception as e:
         import traceback
@@ -190,7 +357,16 @@ def fast_pipe(user_input: str, session_id: str, ram_context):
     # -------------------------
     # Step 4: Fire slow pipe for persistence ONLY (extraction already done)
     # -------------------------
-    _executor.submit(slow_pipe, user_input, session_id, ram_context, graph_delta=graph_delta)
+    # Register the extracted facts in the overlay first so the next turn can see them
+    pending_token = None
+    if graph_delta and compute_confidence(graph_delta) >= MIN_CONFIDENCE_TO_STORE:
+        pending_token = pending_writes.add(
+            session_id,
+            graph_delta["edges"],
+            text=user_input,
+            turn_id=len(ram_context.get(session_id) or []),
+        )
+    _submit_slow_pipe(user_input, session_id, ram_context, graph_delta=graph_delta, pending_token=pending_token)
 
     # Return structured dictionary matching Hackathon Spec
     formatted_memories = []
@@ -211,9 +387,14 @@ def fast_pipe(user_input: str, session_id: str, ram_context):
                 "last_used_turn": int(time.time())   # Current access
             })
 
-    return {
+    result = {
         "response": response,
         "memories_used": formatted_memories,
         "newly_extracted_graph": None,
         "latency_ms": int((time.time() - start_time) * 1000)
     }
+
+    if cacheable and generated and graph_delta is None:
+        response_cache.put(session_id, user_input, memory_version, result, context=history)
+
+    return result
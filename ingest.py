@@ -0,0 +1,377 @@
+# ingest.py
+
+"""
+Bulk transcript ingestion: backfills memory from JSONL conversation logs
+through the write path only (extraction -> confidence -> graph + vectors),
+never the generation path.
+
+    python ingest.py history/*.jsonl
+    python ingest.py history/ --workers 8 --batch-size 512
+    python ingest.py history/ --restart        # ignore the checkpoint, start over
+
+Each line is one turn:
+    {"session_id": "alice", "text": "I moved to Berlin.", "turn_id": 12, "timestamp": 1718000000}
+("user_id" is accepted for "session_id", "user_input"/"content" for "text";
+lines with a "role" other than "user" are skipped). Extraction runs
+`--workers` calls in parallel against the LLM server; every `--batch-size`
+turns the facts and texts are written in bulk and the checkpoint records how
+far each file got, so a crashed or interrupted run resumes from there.
+A turn whose extraction fails (LLM server down or erroring) ends the run:
+the turns before it are written, and the checkpoint stays in front of it.
+The logic-bomb contradiction check is not run on backfilled turns.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import DATA_DIR, INGEST_BATCH_SIZE, INGEST_WORKERS, MIN_CONFIDENCE_TO_STORE
+from diagnostics.logger import log_event
+
+_TEXT_KEYS = ("text", "user_input", "content")
+_USER_KEYS = ("session_id", "user_id")
+
+
+def _timestamp_ms(value) -> Optional[int]:
+    """Epoch seconds, epoch ms or an ISO-8601 string -> epoch ms (None if absent or unparseable)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value if value > 1e12 else value * 1000)
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def parse_turn(line: bytes, line_no: int) -> Optional[Dict]:
+    """One transcript line -> {"user_id", "text", "turn_id", "timestamp_ms"}, or None to skip it."""
+    try:
+        record = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(record, dict) or record.get("role", "user") != "user":
+        return None
+    text = next((record[k] for k in _TEXT_KEYS if isinstance(record.get(k), str)), "").strip()
+    user_id = next((str(record[k]) for k in _USER_KEYS if record.get(k) is not None), None)
+    if not text or not user_id:
+        return None
+    return {
+        "user_id": user_id,
+        "text": text,
+        "turn_id": record.get("turn_id", line_no),
+        "timestamp_ms": _timestamp_ms(record.get("timestamp")),
+    }
+
+
+def _count_lines(f, offset: int, chunk_size: int = 1 << 20) -> int:
+    """Newlines in the first `offset` bytes, read a chunk at a time."""
+    f.seek(0)
+    lines = 0
+    while offset > 0:
+        chunk = f.read(min(chunk_size, offset))
+        if not chunk:
+            break
+        lines += chunk.count(b"\n")
+        offset -= len(chunk)
+    return lines
+
+
+def read_turns(path: Path, offset: int = 0, lines: Optional[int] = None) -> Iterator[Tuple[Optional[Dict], int, int]]:
+    """
+    (turn or None, byte offset just past the line, lines read up to there) for
+    every line from `offset` on. Line numbers are the default turn_id: pass the
+    number of lines before `offset` (the checkpoint keeps it), or it is counted.
+    """
+    with open(path, "rb") as f:
+        if lines is None:
+            lines = _count_lines(f, offset)
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.endswith(b"\n"):
+                # A partial last line may still be being written: leave it for the next run
+                return
+            yield (parse_turn(line, lines) if line.strip() else None), f.tell(), lines + 1
+            lines += 1
+
+
+class Checkpoint:
+    """
+    Per-file byte offset (and line count) up to which every turn has been
+    written; saved atomically after each batch.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.state = {"files": {}}
+        if path.exists():
+            self.state = json.loads(path.read_text())
+
+    def position(self, file: Path) -> Tuple[int, Optional[int]]:
+        """(byte offset, lines before it); the line count is None in checkpoints written without one."""
+        entry = self.state["files"].get(str(file.resolve()), {})
+        offset = entry.get("offset", 0)
+        return offset, entry.get("lines", 0 if offset == 0 else None)
+
+    def advance(self, positions: Dict[Path, Tuple[int, int]], totals: Dict) -> None:
+        """Record the new (offset, lines) positions (and this run's stats so far) and persist."""
+        for file, (offset, lines) in positions.items():
+            self.state["files"][str(file.resolve())] = {"offset": offset, "lines": lines, "updated_at": time.time()}
+        self.state["last_run"] = totals
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp, self.path)
+
+
+class Ingester:
+    """
+    Streams turns through a bounded window of parallel extractions and
+    writes the results in order, one bulk graph/vector write per batch.
+    """
+
+    def __init__(
+        self,
+        graph_store=None,
+        vector_store=None,
+        extract: Callable[[str], Optional[Dict]] = None,   # raises if the turn could not be extracted
+        workers: int = INGEST_WORKERS,
+        batch_size: int = INGEST_BATCH_SIZE,
+        checkpoint: Checkpoint = None,
+        report_every: float = 10.0,
+    ):
+        if graph_store is None:
+            from memory.factory import get_graph_store
+            graph_store = get_graph_store()
+        if vector_store is None:
+            from memory.factory import get_vector_store
+            vector_store = get_vector_store()
+        if extract is None:
+            from reasoning.extractor import extract_graph_delta
+            extract = functools.partial(extract_graph_delta, raise_on_error=True)
+        self.graph_store = graph_store
+        self.vector_store = vector_store
+        self.extract = extract
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.checkpoint = checkpoint
+        self.report_every = report_every
+        self.stats = dict.fromkeys(
+            ("lines", "turns", "skipped_lines", "no_facts", "low_confidence", "extract_errors",
+             "stored_turns", "nodes", "edges", "vectors", "batches"), 0
+        )
+        self.stopped_at: Optional[Dict] = None   # the turn whose extraction failed
+
+    def _extract(self, text: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """(delta, None), or (None, error) if the turn could not be extracted."""
+        try:
+            return self.extract(text), None
+        except Exception as e:
+            log_event("INGEST_EXTRACT_ERROR", error=str(e))
+            return None, f"{type(e).__name__}: {e}"
+
+    def run(self, paths: List[Path], limit: int = None) -> Dict:
+        """Ingest every file (resuming from the checkpoint); returns the run's stats."""
+        started = time.perf_counter()
+        last_report = started
+        window = deque()   # (file, (end offset, lines), turn, future) in file order
+        batch = []
+        # Enough in flight to keep every worker busy while a batch is written
+        max_inflight = self.workers * 4
+
+        def drain(keep: int):
+            nonlocal last_report
+            while len(window) > keep and self.stopped_at is None:
+                file, position, turn, future = window.popleft()
+                delta, error = future.result() if future else (None, None)
+                if error is not None:
+                    # Nothing from this turn on is written or checkpointed: a rerun retries it
+                    self.stats["extract_errors"] += 1
+                    self.stopped_at = {"file": str(file), "turn_id": turn["turn_id"], "error": error}
+                    return
+                batch.append((file, position, turn, delta))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, started)
+                    batch.clear()
+                if self.report_every and time.perf_counter() - last_report >= self.report_every:
+                    self._report(started)
+                    last_report = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as pool:
+            try:
+                for file in paths:
+                    start, lines = self.checkpoint.position(file) if self.checkpoint else (0, 0)
+                    for turn, offset, lines in read_turns(file, start, lines):
+                        if self.stopped_at is not None or (limit is not None and self.stats["lines"] >= limit):
+                            break
+                        self.stats["lines"] += 1
+                        future = pool.submit(self._extract, turn["text"]) if turn else None
+                        window.append((file, (offset, lines), turn, future))
+                        drain(max_inflight)
+                    if self.stopped_at is not None:
+                        break
+                drain(0)
+                if batch:
+                    self._flush(batch, started)
+            finally:
+                # Unwritten turns stay behind the checkpoint; don't wait for their extractions
+                for *_, future in window:
+                    if future:
+                        future.cancel()
+
+        return self._summary(started)
+
+    def _flush(self, batch: List, started: float) -> None:
+        nodes, edges, texts, metadatas, touched = {}, [], [], [], {}
+        from reasoning.confidence import compute_confidence
+
+        for _file, _position, turn, delta in batch:
+            if turn is None:
+                self.stats["skipped_lines"] += 1
+                continue
+            self.stats["turns"] += 1
+            if not delta or not delta.get("edges"):
+                self.stats["no_facts"] += 1
+                continue
+            confidence = compute_confidence(delta)
+            if confidence < MIN_CONFIDENCE_TO_STORE:
+                self.stats["low_confidence"] += 1
+                continue
+
+            self.stats["stored_turns"] += 1
+            entities = touched.setdefault(turn["user_id"], set())
+            for node in delta.get("nodes", []):
+                nodes[node["id"]] = node
+            for edge in delta.get("edges", []):
+                entities.update((edge["src"], edge["dst"]))
+                edges.append({
+                    "src": edge["src"],
+                    "dst": edge["dst"],
+                    "relation": edge["relation"],
+                    "confidence": edge.get("confidence", confidence),
+                    "turn_id": turn["turn_id"],
+                    "user_id": turn["user_id"],
+                    "source_text": turn["text"],
+                    "last_updated": turn["timestamp_ms"],
+                })
+            texts.append(turn["text"])
+            metadatas.append({
+                "user_id": turn["user_id"],
+                "turn_id": turn["turn_id"],
+                "confidence": confidence,
+                "last_updated": turn["timestamp_ms"] or int(time.time() * 1000),  # ages the chunk like its edges
+            })
+
+        if nodes:
+            self.graph_store.bulk_upsert_nodes(list(nodes.values()))
+        if edges:
+            # A batch replayed after a crash (written, not yet checkpointed) must not reinforce its edges twice
+            self.graph_store.bulk_insert_edges(edges, idempotent=True)
+        if texts:
+            self.stats["vectors"] += self.vector_store.add_memories(texts, metadatas)
+        self.stats["nodes"] += len(nodes)
+        self.stats["edges"] += len(edges)
+        self.stats["batches"] += 1
+
+        from memory.consolidation_state import consolidation_state
+        from memory.versioning import memory_versions
+        for user_id, entities in touched.items():
+            memory_versions.bump(user_id, reason="ingest")
+            consolidation_state.mark_dirty(user_id, entities)
+
+        if self.checkpoint is not None:
+            positions = {}
+            for file, position, *_ in batch:
+                positions[file] = position
+            self.checkpoint.advance(positions, self._summary(started))
+
+    def _summary(self, started: float) -> Dict:
+        elapsed = time.perf_counter() - started
+        return {
+            **self.stats,
+            "stopped_at": self.stopped_at,
+            "elapsed_s": round(elapsed, 3),
+            "turns_per_s": round(self.stats["turns"] / elapsed, 2) if elapsed else None,
+        }
+
+    def _report(self, started: float) -> None:
+        summary = self._summary(started)
+        print(
+            f"[ingest] {summary['turns']:,} turns  {summary['turns_per_s'] or 0:,.1f} turns/s  "
+            f"stored {summary['stored_turns']:,}  edges {summary['edges']:,}  errors {summary['extract_errors']:,}",
+            flush=True,
+        )
+        log_event("INGEST_PROGRESS", **summary)
+
+
+def expand_paths(inputs: List[str]) -> List[Path]:
+    """Files as given; directories expand to their *.jsonl files (sorted)."""
+    paths = []
+    for item in inputs:
+        path = Path(item)
+        paths.extend(sorted(path.glob("*.jsonl")) if path.is_dir() else [path])
+    return paths
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-ingest JSONL transcripts into memory (no generation)")
+    parser.add_argument("inputs", nargs="+", help="JSONL files or directories of them")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Parallel extraction calls")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Turns per bulk write/checkpoint")
+    parser.add_argument("--checkpoint", type=Path, default=DATA_DIR / "ingest_checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the beginning")
+    parser.add_argument("--limit", type=int, help="Stop after this many lines")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Seconds between progress lines (0 = off)")
+    parser.add_argument("--output", type=Path, help="Write the final stats as JSON")
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.inputs)
+    missing = [p for p in paths if not p.is_file()]
+    if missing:
+        parser.error(f"not a file: {missing[0]}")
+
+    if args.restart and args.checkpoint.exists():
+        args.checkpoint.unlink()
+    ingester = Ingester(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint=Checkpoint(args.checkpoint),
+        report_every=args.report_every,
+    )
+    log_event("INGEST_START", files=len(paths), workers=ingester.workers, batch_size=ingester.batch_size)
+    try:
+        summary = ingester.run(paths, limit=args.limit)
+    except KeyboardInterrupt:
+        print(f"\n[ingest] interrupted; progress is saved in {args.checkpoint}, rerun to resume")
+        return 130
+    finally:
+        ingester.graph_store.close()
+
+    from llm.accounting import usage_ledger
+    summary["llm"] = usage_ledger.snapshot()["sites"].get("extraction")
+    log_event("INGEST_DONE", **{k: v for k, v in summary.items() if k != "llm"})
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(summary, indent=2))
+    if summary["stopped_at"]:
+        stop = summary["stopped_at"]
+        print(f"[ingest] stopped: could not extract turn {stop['turn_id']} of {stop['file']} ({stop['error']}); "
+              f"progress is saved in {args.checkpoint}, rerun to resume")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# lazy_imports.py
+
+"""
+Deferred re-exports for package __init__ modules (PEP 562).
+
+chromadb, neo4j, sentence-transformers and cohere take seconds to import.
+Packages list their public names here instead of importing every submodule
+up front, so short-lived tools only pay for what they actually touch.
+Heavy third-party imports inside modules stay local to the functions that
+need them.
+"""
+
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    Build module-level `__getattr__`/`__dir__` for `package` that resolve
+    `name -> ".submodule"` on first access and then cache the attribute.
+
+        __getattr__, __dir__ = lazy_exports(__name__, {"VectorMemoryStore": ".vector_store"})
+    """
+
+    def __getattr__(name: str):
+        try:
+            submodule = exports[name]
+        except KeyError:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+        value = getattr(importlib.import_module(submodule, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
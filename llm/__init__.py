@@ -1,4 +1,8 @@
 # llm/__init__.py
 
-from .generator import generate_response
-from .verifier import verify_yes_no
+from lazy_imports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "generate_response": ".generator",
+    "verify_yes_no": ".verifier",
+})
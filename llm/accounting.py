@@ -0,0 +1,337 @@
+# llm/accounting.py
+
+import contextvars
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from config import LLM_MAX_CALLS_PER_TURN, LLM_MAX_TOKENS_PER_TURN
+from diagnostics.logger import log_event
+
+# Sites that keep one call in reserve until they have run: the user-visible
+# reply must not be starved by extraction/contradiction calls earlier in the turn.
+PRIORITY_SITES = ("generation",)
+
+_COUNTERS = ("calls", "errors", "retries", "budget_rejections", "prompt_tokens", "completion_tokens", "estimated_calls")
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """Raised by llm.client before an LLM call that would exceed the turn's budget."""
+
+    def __init__(self, site: str, reason: str, limit: int):
+        super().__init__(f"LLM budget exceeded at '{site}': {reason} limit {limit}")
+        self.site = site
+        self.reason = reason
+        self.limit = limit
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count (~4 chars/token) when the server reports no usage."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _usage_from(body: Dict, data: Optional[Dict]):
+    """(prompt_tokens, completion_tokens, estimated) from an Ollama request/response pair."""
+    data = data or {}
+    if "prompt_eval_count" in data or "eval_count" in data:
+        return int(data.get("prompt_eval_count") or 0), int(data.get("eval_count") or 0), False
+
+    prompt = body.get("prompt") or "\n".join(str(m.get("content", "")) for m in body.get("messages") or [])
+    completion = data.get("response") or (data.get("message") or {}).get("content") or ""
+    return estimate_tokens(prompt), estimate_tokens(completion), True
+
+
+def _empty_totals() -> Dict[str, float]:
+    totals = dict.fromkeys(_COUNTERS, 0)
+    totals["latency_ms"] = 0.0
+    return totals
+
+
+def _add(totals: Dict, call: Dict) -> None:
+    totals["calls"] += 1
+    totals["errors"] += int(call["error"] is not None)
+    totals["retries"] += int(call["attempt"] > 0)
+    totals["prompt_tokens"] += call["prompt_tokens"]
+    totals["completion_tokens"] += call["completion_tokens"]
+    totals["estimated_calls"] += int(call["estimated"])
+    totals["latency_ms"] = round(totals["latency_ms"] + call["latency_ms"], 3)
+
+
+class TurnUsage:
+    """
+    LLM calls made on behalf of one turn (or one dreamer run), across the fast
+    pipe and its slow pipe. Enforces the call/token budget; shared between
+    threads, so every mutation holds the lock.
+    """
+
+    def __init__(self, session_id: Optional[str], kind: str = "turn", max_calls: int = 0, max_tokens: int = 0):
+        self.session_id = session_id
+        self.kind = kind
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.totals = _empty_totals()
+        self.by_site: Dict[str, Dict] = {}
+        self.rejected: Dict[str, int] = {}
+        self._reserved = 0           # calls admitted, result not recorded yet
+        self._priority_done = set()
+        self._holders = 0
+        self._lock = threading.Lock()
+
+    def admit(self, site: str) -> None:
+        """Claim one call slot or raise LLMBudgetExceeded."""
+        with self._lock:
+            used = self.totals["calls"] + self._reserved
+            held_back = sum(1 for s in PRIORITY_SITES if s != site and s not in self._priority_done)
+            reason = limit = None
+            if self.max_calls and used >= self.max_calls - (held_back if self.kind == "turn" else 0):
+                reason, limit = "calls", self.max_calls
+            elif self.max_tokens and self.totals["prompt_tokens"] + self.totals["completion_tokens"] >= self.max_tokens:
+                reason, limit = "tokens", self.max_tokens
+            if reason is not None:
+                self.rejected[site] = self.rejected.get(site, 0) + 1
+                self.totals["budget_rejections"] += 1
+                raise LLMBudgetExceeded(site, reason, limit)
+            self._reserved += 1
+            self._priority_done.add(site)
+
+    def record(self, site: str, call: Dict) -> None:
+        with self._lock:
+            self._reserved -= 1
+            _add(self.totals, call)
+            _add(self.by_site.setdefault(site, _empty_totals()), call)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "session_id": self.session_id,
+                "kind": self.kind,
+                **self.totals,
+                "by_site": {site: dict(t) for site, t in self.by_site.items()},
+                "budget": {"max_calls": self.max_calls, "max_tokens": self.max_tokens, "rejected": dict(self.rejected)},
+            }
+
+    def _hold(self) -> None:
+        with self._lock:
+            self._holders += 1
+            started = self._holders == 1
+        if started:
+            usage_ledger.turn_started(self.kind, self.session_id)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._holders -= 1
+            finished = self._holders == 0
+        if finished:
+            summary = self.summary()
+            usage_ledger.turn_finished(self.kind, self.session_id)
+            usage_ledger.observe_turn(summary)
+            log_event(
+                "LLM_TURN_USAGE",
+                session_id=self.session_id,
+                kind=self.kind,
+                calls=summary["calls"],
+                prompt_tokens=summary["prompt_tokens"],
+                completion_tokens=summary["completion_tokens"],
+                latency_ms=summary["latency_ms"],
+                rejected=summary["budget"]["rejected"] or None,
+            )
+
+    def followup(self, fn: Callable) -> Callable:
+        """Wrap work handed to another thread (the slow pipe) so its calls count against this turn."""
+        self._hold()
+
+        def wrapper(*args, **kwargs):
+            token = _current_usage.set(self)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current_usage.reset(token)
+                self._release()
+
+        return wrapper
+
+
+class UsageLedger:
+    """
+    Process-wide totals per call site and per session (LRU-bounded), plus
+    per-turn call counts and which turns are running right now (the dream
+    scheduler waits for interactive turns to finish).
+    """
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._sites: Dict[str, Dict] = {}
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._turns = {"turns": 0, "calls": 0, "max_calls": 0, "over_budget": 0}
+        self._active: Dict[str, int] = {}                      # kind -> turns in progress
+        self._last_turn: "OrderedDict[str, float]" = OrderedDict()  # session -> monotonic time of its last turn
+        self._last_any_turn: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, site: str, session_id: Optional[str], call: Dict) -> None:
+        with self._lock:
+            _add(self._sites.setdefault(site, _empty_totals()), call)
+            if session_id is None:
+                return
+            totals = self._sessions.pop(session_id, None) or _empty_totals()
+            _add(totals, call)
+            self._sessions[session_id] = totals
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def reject(self, site: str, session_id: Optional[str]) -> None:
+        with self._lock:
+            self._sites.setdefault(site, _empty_totals())["budget_rejections"] += 1
+            if session_id is not None and session_id in self._sessions:
+                self._sessions[session_id]["budget_rejections"] += 1
+
+    def turn_started(self, kind: str, session_id: Optional[str]) -> None:
+        with self._lock:
+            self._active[kind] = self._active.get(kind, 0) + 1
+            if kind == "turn":
+                self._touch(session_id)
+
+    def turn_finished(self, kind: str, session_id: Optional[str]) -> None:
+        with self._lock:
+            self._active[kind] = max(0, self._active.get(kind, 0) - 1)
+            if kind == "turn":
+                self._touch(session_id)
+
+    def _touch(self, session_id: Optional[str]) -> None:
+        now = time.monotonic()
+        self._last_any_turn = now
+        if session_id is None:
+            return
+        self._last_turn.pop(session_id, None)
+        self._last_turn[session_id] = now
+        while len(self._last_turn) > self.max_sessions:
+            self._last_turn.popitem(last=False)
+
+    def activity(self) -> Dict:
+        """Turns in progress per kind and seconds since any interactive turn started or ended (None = never)."""
+        with self._lock:
+            last = self._last_any_turn
+            return {
+                "active": dict(self._active),
+                "quiet_seconds": None if last is None else time.monotonic() - last,
+            }
+
+    def idle_seconds(self, session_id: str) -> Optional[float]:
+        """Seconds since this session's last interactive turn (None if none seen since startup)."""
+        with self._lock:
+            last = self._last_turn.get(session_id)
+        return None if last is None else time.monotonic() - last
+
+    def observe_turn(self, summary: Dict) -> None:
+        with self._lock:
+            self._turns["turns"] += 1
+            self._turns["calls"] += summary["calls"]
+            self._turns["max_calls"] = max(self._turns["max_calls"], summary["calls"])
+            self._turns["over_budget"] += int(bool(summary["budget"]["rejected"]))
+
+    def session(self, session_id: str) -> Dict:
+        with self._lock:
+            return dict(self._sessions.get(session_id) or _empty_totals())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "sites": {site: dict(t) for site, t in self._sites.items()},
+                "turns": dict(self._turns),
+                "sessions_tracked": len(self._sessions),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+            self._sessions.clear()
+            self._turns = {"turns": 0, "calls": 0, "max_calls": 0, "over_budget": 0}
+
+    def render_prometheus(self, prefix: str = "nsm") -> str:
+        """Counters per call site, in Prometheus text format (appended to /metrics)."""
+        snap = self.snapshot()
+        lines = []
+        for counter in _COUNTERS + ("latency_ms",):
+            metric = f"{prefix}_llm_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for site, totals in sorted(snap["sites"].items()):
+                lines.append(f'{metric}{{site="{re.sub(r"[^a-zA-Z0-9_.]", "_", site)}"}} {totals[counter]}')
+        for key, value in snap["turns"].items():
+            metric = f"{prefix}_llm_turn_{key}"
+            lines.append(f"# TYPE {metric} {'gauge' if key == 'max_calls' else 'counter'}")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+usage_ledger = UsageLedger()
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("llm_usage", default=None)
+
+
+def current_usage() -> Optional[TurnUsage]:
+    return _current_usage.get()
+
+
+@contextmanager
+def start_turn(session_id: Optional[str], kind: str = "turn", max_calls: int = None, max_tokens: int = None):
+    """
+    Account every LLM call made in this context (and in work handed on via
+    TurnUsage.followup) to one turn, under the configured budget (0 = unlimited).
+    """
+    usage = TurnUsage(
+        session_id,
+        kind=kind,
+        max_calls=LLM_MAX_CALLS_PER_TURN if max_calls is None else max_calls,
+        max_tokens=LLM_MAX_TOKENS_PER_TURN if max_tokens is None else max_tokens,
+    )
+    usage._hold()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+        usage._release()
+
+
+@contextmanager
+def account_call(site: str, body: Dict, attempt: int = 0):
+    """
+    Wrap one HTTP call to the LLM server: admits it against the active budget
+    (raising LLMBudgetExceeded before any request is sent) and records tokens,
+    latency, retries and errors. The caller reports the decoded response via
+    the yielded setter.
+    """
+    usage = _current_usage.get()
+    session_id = usage.session_id if usage is not None else None
+    if usage is not None:
+        try:
+            usage.admit(site)
+        except LLMBudgetExceeded as e:
+            usage_ledger.reject(site, session_id)
+            log_event("LLM_BUDGET_EXCEEDED", site=site, session_id=session_id, reason=e.reason, limit=e.limit)
+            raise
+
+    response: Dict = {}
+    error = None
+    started = time.perf_counter()
+    try:
+        yield response.update
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        prompt_tokens, completion_tokens, estimated = _usage_from(body, response)
+        call = {
+            "model": body.get("model"),
+            "attempt": attempt,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens if error is None else 0,
+            "estimated": estimated,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "error": error,
+        }
+        usage_ledger.record(site, session_id, call)
+        if usage is not None:
+            usage.record(site, call)
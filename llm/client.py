@@ -0,0 +1,72 @@
+# llm/client.py
+
+import requests
+from typing import Dict, List, Optional
+
+from config import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+from diagnostics.tracing import span
+from llm.accounting import account_call
+
+# Shared HTTP session so every LLM call reuses the same keep-alive connection pool.
+_session = requests.Session()
+
+
+def post_ollama(path: str, payload: Dict, timeout: float, site: str = "llm", attempt: int = 0) -> Dict:
+    """
+    POST to a native Ollama endpoint and return the decoded JSON body.
+    Pins `keep_alive` so the model (and its prompt prefix cache) stays resident.
+    Each call is traced as `llm.<site>` and accounted (tokens, latency, retries
+    when attempt > 0) by llm.accounting.
+    Raises requests exceptions, or LLMBudgetExceeded before sending when the
+    turn's LLM budget is spent; callers decide how to degrade.
+    """
+    body = dict(payload)
+    body.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+    body.setdefault("stream", False)
+
+    with account_call(site, body, attempt=attempt) as report, span(f"llm.{site}"):
+        response = _session.post(f"{OLLAMA_BASE_URL}{path}", json=body, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        report(data)
+        return data
+
+
+def chat(
+    model: str,
+    messages: List[Dict],
+    timeout: float,
+    options: Optional[Dict] = None,
+    format: Optional[str] = None,
+    site: str = "chat",
+    attempt: int = 0,
+) -> str:
+    """Call /api/chat and return the assistant message content ("" if missing)."""
+    payload = {"model": model, "messages": messages}
+    if options:
+        payload["options"] = options
+    if format:
+        payload["format"] = format
+
+    data = post_ollama("/api/chat", payload, timeout=timeout, site=site, attempt=attempt)
+    return ((data or {}).get("message") or {}).get("content") or ""
+
+
+def generate(
+    model: str,
+    prompt: str,
+    timeout: float,
+    options: Optional[Dict] = None,
+    format: Optional[str] = None,
+    site: str = "generate",
+    attempt: int = 0,
+) -> str:
+    """Call /api/generate and return the raw `response` text ("" if missing)."""
+    payload = {"model": model, "prompt": prompt}
+    if options:
+        payload["options"] = options
+    if format:
+        payload["format"] = format
+
+    data = post_ollama("/api/generate", payload, timeout=timeout, site=site, attempt=attempt)
+    return (data or {}).get("response") or ""
@@ -2,7 +2,10 @@
 
 import requests
 from typing import List, Dict
-from config import OLLAMA_BASE_URL, GENERATION_MODEL, GENERATION_TEMPERATURE
+from config import GENERATION_MODEL, GENERATION_TEMPERATURE
+from llm.accounting import LLMBudgetExceeded
+from llm.client import chat
+from llm.prompt import prompt_assembler
 
 # Fallback when LLM is unavailable
 DEFAULT_FALLBACK = "I'm here. Could you rephrase or tell me a bit more?"
@@ -34,28 +37,13 @@ def generate_response(
     
     is_question = _is_question(user_input)
     has_memory = bool(memories)
-    current_year = datetime.now().year
-
-    # -------------------------
-    # SYSTEM PROMPT (STRICT) - Updated to prevent old data confusion
-    # -------------------------
-    system_prompt = f"""You are a helpful and friendly assistant. Your goal is to have a natural, flowing conversation. Today is {datetime.now().strftime('%B %d, %Y')}.
-
-RULES:
-- When answering questions, use the "Relevant facts" provided below.
-- If no relevant facts are available, answer the question based on general knowledge or ask for clarification.
-- When the user provides new information, acknowledge it naturally (e.g., "Okay, I'll remember that.").
-- Seamlessly integrate facts into your response. Do NOT say "according to my facts" or "based on my memory".
-- Keep your responses concise and conversational."""
 
     # -------------------------
     # CONVERSATION HISTORY (SHORT-TERM CONTEXT)
     # -------------------------
-    conversation_history = ""
-    if recent_turns:
-        conversation_history = "\nRecent conversation:\n"
-        for turn in recent_turns[-3:]:  # Last 3 turns for context
-            conversation_history += f"- {turn}\n"
+    # Static instructions live in prompt_assembler; history follows them so the
+    # serving engine can reuse the cached prefix across turns.
+    conversation_history = prompt_assembler.history_block(recent_turns, user_input)
 
     # -------------------------
     # MEMORY BLOCK (ONLY IF NEEDED) - Filtered and contextualized
@@ -83,55 +71,58 @@ RULES:
         memory_block += "\nRemember: Only use facts listed above. Do not invent or assume anything else. This is the most important task. You cannot invent new stuff."
 
     # -------------------------
-    # MODE SELECTION
+    # MODE SELECTION (PER-TURN TAIL) - volatile content goes last
     # -------------------------
+    today = f"Today is {datetime.now().strftime('%B %d, %Y')}.\n"
+
     if not is_question:
         # User is stating something
-        user_message = (
-            f"{conversation_history}"
-            f"{memory_block}\n"
+        turn_block = (
+            f"{today}"
             f"User statement: {user_input}\n"
             "Respond naturally and briefly."
         )
 
     elif is_question and has_memory:
         # Question + memory
-        user_message = (
-            f"{conversation_history}"
-            f"{memory_block}\n"
+        turn_block = (
+            f"{today}"
             f"User question: {user_input}\n"
             "Answer using the known facts only."
         )
 
     else:
         # Question but no memory
-        user_message = (
-            f"{conversation_history}"
+        turn_block = (
+            f"{today}"
             f"User question: {user_input}\n"
             "Respond with a relevant general answer or ask one short clarification."
         )
+        memory_block = ""
+
+    if memory_block:
+        memory_block += "\n"
+
+    messages = prompt_assembler.assemble(
+        history_block=conversation_history,
+        memory_block=memory_block,
+        turn_block=turn_block,
+        session_id=session_id,
+    )
 
     # -------------------------
     # CALL OLLAMA
     # -------------------------
     try:
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/v1/chat/completions",
-            json={
-                "model": GENERATION_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message},
-                ],
-                "temperature": GENERATION_TEMPERATURE,
-            },
+        content = chat(
+            model=GENERATION_MODEL,
+            messages=messages,
+            options={"temperature": GENERATION_TEMPERATURE},
             timeout=60,
+            site="generation",
         )
-        response.raise_for_status()
-        data = response.json()
-        content = (data.get("choices") or [{}])[0].get("message", {}).get("content")
         if content:
             return content.strip()
-    except (requests.RequestException, KeyError, IndexError, TypeError):
+    except (requests.RequestException, LLMBudgetExceeded, KeyError, IndexError, TypeError, ValueError):
         pass
     return DEFAULT_FALLBACK
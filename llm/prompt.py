@@ -0,0 +1,99 @@
+# llm/prompt.py
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from diagnostics.logger import log_event
+
+# -------------------------
+# STATIC INSTRUCTIONS - must stay byte-identical across turns.
+# Anything volatile (date, memories, user input) belongs in the per-turn tail.
+# -------------------------
+STATIC_SYSTEM_PROMPT = """You are a helpful and friendly assistant. Your goal is to have a natural, flowing conversation.
+
+RULES:
+- When answering questions, use the "Relevant facts" provided below.
+- If no relevant facts are available, answer the question based on general knowledge or ask for clarification.
+- When the user provides new information, acknowledge it naturally (e.g., "Okay, I'll remember that.").
+- Seamlessly integrate facts into your response. Do NOT say "according to my facts" or "based on my memory".
+- Keep your responses concise and conversational."""
+
+HISTORY_TURNS = 3
+
+
+class PromptAssembler:
+    """
+    Builds chat messages ordered from most to least stable:
+      1. static instructions (identical on every call)
+      2. per-session conversation history (append-mostly)
+      3. per-turn memories, date and user input
+    The serving engine can then reuse the KV cache of everything up to the
+    first byte that changed. Also tracks how much of each prompt's prefix
+    repeats the previous prompt of the same session.
+    """
+
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        self._last_prompt: "OrderedDict[str, str]" = OrderedDict()
+        self._last_stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def history_block(self, recent_turns: List[str], user_input: str) -> str:
+        """Render prior turns, excluding the current input (it lives in the tail)."""
+        turns = list(recent_turns or [])
+        if turns and turns[-1] == user_input:
+            turns = turns[:-1]
+        turns = turns[-HISTORY_TURNS:]
+        if not turns:
+            return ""
+        return "Recent conversation:\n" + "".join(f"- {t}\n" for t in turns) + "\n"
+
+    def assemble(
+        self,
+        history_block: str,
+        memory_block: str,
+        turn_block: str,
+        session_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Return chat messages and record prefix reuse for the session."""
+        user_message = f"{history_block}{memory_block}{turn_block}"
+        messages = [
+            {"role": "system", "content": STATIC_SYSTEM_PROMPT},
+            {"role": "user", "content": user_message},
+        ]
+        if session_id:
+            self._record(session_id, messages)
+        return messages
+
+    def _record(self, session_id: str, messages: List[Dict]) -> Dict:
+        rendered = "\n".join(m["content"] for m in messages)
+
+        with self._lock:
+            previous = self._last_prompt.pop(session_id, "")
+            self._last_prompt[session_id] = rendered
+            while len(self._last_prompt) > self.max_sessions:
+                evicted, _ = self._last_prompt.popitem(last=False)
+                self._last_stats.pop(evicted, None)
+
+            shared = len(os.path.commonprefix([previous, rendered])) if previous else 0
+            stats = {
+                "shared_chars": shared,
+                "total_chars": len(rendered),
+                "ratio": round(shared / len(rendered), 3) if rendered else 0.0,
+            }
+            self._last_stats[session_id] = stats
+
+        log_event("PROMPT_PREFIX_REUSE", session_id=session_id, **stats)
+        return stats
+
+    def prefix_stats(self, session_id: str) -> Optional[Dict]:
+        """Prefix reuse of the most recent prompt for this session (None if unseen)."""
+        with self._lock:
+            stats = self._last_stats.get(session_id)
+            return dict(stats) if stats else None
+
+
+# Global instance shared by the generator
+prompt_assembler = PromptAssembler()
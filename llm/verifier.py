@@ -1,7 +1,7 @@
 # llm/verifier.py
 
-import requests
-from config import OLLAMA_BASE_URL, EXTRACTION_MODEL
+from config import EXTRACTION_MODEL
+from llm.client import chat
 
 
 def extract_memory_with_llm(text: str):
@@ -34,21 +34,15 @@ Rules: No explanations, no markdown, no extra text.
 
 User statement: {text}"""
 
-    response = requests.post(
-        f"{OLLAMA_BASE_URL}/v1/chat/completions",
-        json={
-            "model": EXTRACTION_MODEL,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.0,
-        },
+    content = chat(
+        model=EXTRACTION_MODEL,
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        options={"temperature": 0.0},
         timeout=45,
-    )
-
-    response.raise_for_status()
-
-    content = response.json()["choices"][0]["message"]["content"].strip()
+        site="verifier",
+    ).strip()
 
     if content.lower() == "null":
         return None
@@ -66,19 +60,13 @@ def verify_yes_no(prompt: str) -> bool:
         f"{prompt}"
     )
 
-    response = requests.post(
-        f"{OLLAMA_BASE_URL}/v1/chat/completions",
-        json={
-            "model": EXTRACTION_MODEL,
-            "messages": [
-                {"role": "user", "content": full_prompt},
-            ],
-            "temperature": 0.0,
-        },
+    answer = chat(
+        model=EXTRACTION_MODEL,
+        messages=[
+            {"role": "user", "content": full_prompt},
+        ],
+        options={"temperature": 0.0},
         timeout=30,
-    )
-
-    response.raise_for_status()
-
-    answer = response.json()["choices"][0]["message"]["content"].strip().upper()
+        site="verifier",
+    ).strip().upper()
     return answer.startswith("YES")
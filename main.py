@@ -3,6 +3,8 @@
 from memory.ram_context import RAMContext
 from memory.reset import wipe_all_memory
 from fast_pipe import fast_pipe
+from diagnostics.profiling import parse_mode, profile
+from config import PROFILE_REQUESTS, PROFILE_SLOW_PIPE
 
 # Commands that wipe all memory (case-insensitive)
 RESET_COMMANDS = {"reset", "wipe", "clear", "clear memory", "wipe memory", "delete memory", "forget all"}
@@ -16,6 +18,8 @@ def main():
 
     session_id = "default_user"
     ram_context = RAMContext()
+    # PROFILE_REQUESTS=sample|cprofile profiles every turn into DATA_DIR/profiles
+    profile_mode = parse_mode(PROFILE_REQUESTS)
 
     while True:
         user_input = input("\nUser> ").strip()
@@ -33,12 +37,15 @@ def main():
 
         ram_context.add(session_id, user_input)
 
-        result = fast_pipe(
-            user_input=user_input,
-            session_id=session_id,
-            ram_context=ram_context,
-        )
+        with profile(f"cli_{session_id}", profile_mode, include_slow_pipe=PROFILE_SLOW_PIPE) as prof:
+            result = fast_pipe(
+                user_input=user_input,
+                session_id=session_id,
+                ram_context=ram_context,
+            )
         print(f"Assistant> {result['response']}")
+        if prof is not None:
+            print(f"[profile] {prof.path}")
 
 
 if __name__ == "__main__":
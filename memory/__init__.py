@@ -1,4 +1,17 @@
-from .ram_context import RAMContext
-from .neo4j_store import Neo4jMemoryStore
-from .vector_store import VectorMemoryStore
-from .reset import wipe_all_memory
+# memory/__init__.py
+
+from lazy_imports import lazy_exports
+
+# Submodules load on first use: vector_store pulls in chromadb, neo4j_store the neo4j driver
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "RAMContext": ".ram_context",
+    "Neo4jMemoryStore": ".neo4j_store",
+    "SQLiteMemoryStore": ".sqlite_store",
+    "get_graph_store": ".factory",
+    "get_vector_store": ".factory",
+    "NumpyVectorStore": ".numpy_vector_store",
+    "VectorMemoryStore": ".vector_store",
+    "wipe_all_memory": ".reset",
+    "save_snapshot": ".snapshot",
+    "restore_snapshot": ".snapshot",
+})
@@ -0,0 +1,139 @@
+# memory/consolidation_state.py
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from config import DREAM_STATE_PATH
+from diagnostics.logger import log_event
+
+# One row per (user, entity) the user has written to. `version` moves on every
+# write, so the dreamer only clears a dirty flag if nothing was written to the
+# entity while it was deciding (a concurrent write keeps it dirty).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entity_state (
+    user_id TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    last_degree INTEGER NOT NULL DEFAULT 0,
+    last_written_at REAL,
+    last_dreamed_at REAL,
+    PRIMARY KEY (user_id, entity)
+);
+CREATE INDEX IF NOT EXISTS idx_entity_state_dirty ON entity_state (user_id) WHERE dirty = 1;
+"""
+
+
+class ConsolidationState:
+    """
+    Dirty set and per-entity dreamer state, kept in a small SQLite file next
+    to the memory stores. The write paths mark the entities they touched; a
+    dream pass reads only the user's dirty entities, so its cost follows
+    the number of new writes instead of the size of the graph.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the pipes never touches the data directory
+        if self._conn is None:
+            path = str(self.path or DREAM_STATE_PATH)
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            if path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def mark_dirty(self, user_id: str, entities: Iterable[str]) -> None:
+        """Record a write touching these entities. Never raises (it runs on the write path)."""
+        now = time.time()
+        rows = [(user_id, entity, now) for entity in set(entities) if entity]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                self._db().executemany(
+                    """
+                    INSERT INTO entity_state (user_id, entity, dirty, version, last_written_at) VALUES (?, ?, 1, 1, ?)
+                    ON CONFLICT (user_id, entity) DO UPDATE SET
+                        dirty = 1, version = version + 1, last_written_at = excluded.last_written_at
+                    """,
+                    rows,
+                )
+        except Exception as e:
+            log_event("DIRTY_SET_ERROR", error=str(e), user_id=user_id)
+
+    def dirty(self, user_id: str) -> List[Dict]:
+        """The user's dirty entities: [{"entity", "version", "last_degree"}]."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT entity, version, last_degree FROM entity_state WHERE user_id = ? AND dirty = 1", (user_id,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def dirty_users(self) -> Dict[str, int]:
+        """user_id -> number of dirty entities, for every user with pending work."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT user_id, count(*) AS n FROM entity_state WHERE dirty = 1 GROUP BY user_id"
+            ).fetchall()
+        return {r["user_id"]: r["n"] for r in rows}
+
+    def settle(self, user_id: str, versions: Dict[str, int]) -> None:
+        """Entities looked at but not worth dreaming about: clear the flag, keep last_degree."""
+        with self._lock:
+            self._db().executemany(
+                "UPDATE entity_state SET dirty = 0 WHERE user_id = ? AND entity = ? AND version = ?",
+                [(user_id, entity, version) for entity, version in versions.items()],
+            )
+
+    def examined(self, user_id: str, entity: str, version: int, degree: int) -> None:
+        """The dreamer decided on this entity at `degree` edges; it waits for new growth now."""
+        with self._lock:
+            self._db().execute(
+                """
+                UPDATE entity_state SET
+                    dirty = CASE WHEN version = ? THEN 0 ELSE dirty END,
+                    last_degree = ?,
+                    last_dreamed_at = ?
+                WHERE user_id = ? AND entity = ?
+                """,
+                (version, degree, time.time(), user_id, entity),
+            )
+
+    def get(self, user_id: str, entity: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT * FROM entity_state WHERE user_id = ? AND entity = ?", (user_id, entity)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def forget(self, user_ids: Optional[List[str]] = None) -> None:
+        """Drop all state (or these users'): after a wipe or a snapshot restore."""
+        if self._conn is None and self.path != ":memory:" and not Path(self.path or DREAM_STATE_PATH).exists():
+            return  # nothing recorded yet; don't create the file just to empty it
+        with self._lock:
+            if user_ids is None:
+                self._db().execute("DELETE FROM entity_state")
+            else:
+                self._db().executemany("DELETE FROM entity_state WHERE user_id = ?", [(u,) for u in user_ids])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Process-wide instance used by the write paths and the dreamer
+consolidation_state = ConsolidationState()
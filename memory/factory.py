@@ -0,0 +1,28 @@
+# memory/factory.py
+
+from config import GRAPH_BACKEND, VECTOR_BACKEND
+
+GRAPH_BACKENDS = ("neo4j", "sqlite")
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+
+def get_graph_store():
+    """Open the configured graph store (GRAPH_BACKEND=neo4j|sqlite); both share one interface."""
+    if GRAPH_BACKEND == "sqlite":
+        from memory.sqlite_store import SQLiteMemoryStore
+        return SQLiteMemoryStore()
+    if GRAPH_BACKEND == "neo4j":
+        from memory.neo4j_store import Neo4jMemoryStore
+        return Neo4jMemoryStore()
+    raise ValueError(f"Unknown GRAPH_BACKEND '{GRAPH_BACKEND}' (expected one of {GRAPH_BACKENDS})")
+
+
+def get_vector_store():
+    """Open the configured vector store (VECTOR_BACKEND=chroma|numpy); both share the add_memory/search contract."""
+    if VECTOR_BACKEND == "numpy":
+        from memory.numpy_vector_store import NumpyVectorStore
+        return NumpyVectorStore()
+    if VECTOR_BACKEND == "chroma":
+        from memory.vector_store import VectorMemoryStore
+        return VectorMemoryStore()
+    raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}' (expected one of {VECTOR_BACKENDS})")
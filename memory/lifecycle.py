@@ -0,0 +1,302 @@
+# memory/lifecycle.py
+
+"""
+Memory lifecycle. A memory's confidence decays with the time since it was
+last written (halving every MEMORY_HALF_LIFE_DAYS; a repeat resets the clock
+and reinforces it), and retrieval ranks by the decayed value. A background
+collector removes each user's edges and vector chunks that have faded below
+MEMORY_MIN_CONFIDENCE, then the lowest-ranked ones beyond the user's quota
+(MEMORY_MAX_EDGES_PER_USER / MEMORY_MAX_VECTORS_PER_USER), so per-user memory,
+and with it retrieval latency, stays bounded. Deletes run MEMORY_GC_BATCH_SIZE
+rows at a time; with MEMORY_GC_MODE=archive every batch is first appended to
+a JSONL file in MEMORY_ARCHIVE_DIR. A pass ends by compacting the NumPy vector
+index when VECTOR_COMPACT_MIN_DEAD_FRACTION of its rows are deleted.
+
+    python -m memory.lifecycle [--user U] [--dry-run]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import (
+    MEMORY_ARCHIVE_DIR,
+    MEMORY_GC_BATCH_SIZE,
+    MEMORY_GC_INTERVAL_SECONDS,
+    MEMORY_GC_MODE,
+    MEMORY_HALF_LIFE_DAYS,
+    MEMORY_MAX_EDGES_PER_USER,
+    MEMORY_MAX_VECTORS_PER_USER,
+    MEMORY_MIN_CONFIDENCE,
+)
+from diagnostics.logger import log_event
+
+GC_MODES = ("archive", "delete")
+_DAY_MS = 86_400_000
+
+
+def now_ms() -> int:
+    """The epoch-ms clock ages are measured against."""
+    return int(time.time() * 1000)
+
+
+def half_life_ms() -> float:
+    """MEMORY_HALF_LIFE_DAYS in ms; 0 means confidence does not decay."""
+    return max(0.0, MEMORY_HALF_LIFE_DAYS) * _DAY_MS
+
+
+def decayed_confidence(confidence: Optional[float], last_updated: Optional[int], now: int) -> float:
+    """confidence * 0.5 ** (age / half-life); memories without a timestamp don't decay."""
+    confidence = confidence or 0.0
+    half_life = half_life_ms()
+    if not half_life or last_updated is None:
+        return confidence
+    return confidence * 0.5 ** (max(0, now - last_updated) / half_life)
+
+
+def rank_memories(rows: List[Dict], min_confidence: float, quota: int) -> List[Dict]:
+    """
+    The rows to collect, each with its `reason`: those whose `decayed` value is
+    under min_confidence ("expired"), then those ranked below the best `quota`
+    of the rest ("over_quota"; 0 = no cap), the lowest-ranked first.
+    """
+    ranked = sorted(rows, key=lambda r: (r["decayed"], r.get("last_updated") or 0), reverse=True)
+    kept = [r for r in ranked if r["decayed"] >= min_confidence]
+    expired = [dict(r, reason="expired") for r in ranked if r["decayed"] < min_confidence]
+    over_quota = [dict(r, reason="over_quota") for r in kept[quota:]] if quota > 0 else []
+    return expired[::-1] + over_quota[::-1]
+
+
+class MemoryCollector:
+    """
+    Batched garbage collector for both memory stores. `collect()` makes one
+    pass over every user (or the given ones); `start()` repeats it every
+    MEMORY_GC_INTERVAL_SECONDS from a background thread. The stores are
+    injectable for tests; by default the configured backends are opened per pass.
+    """
+
+    def __init__(
+        self,
+        graph_store=None,
+        vector_store=None,
+        min_confidence: float = MEMORY_MIN_CONFIDENCE,
+        max_edges: int = MEMORY_MAX_EDGES_PER_USER,
+        max_vectors: int = MEMORY_MAX_VECTORS_PER_USER,
+        batch_size: int = MEMORY_GC_BATCH_SIZE,
+        mode: str = MEMORY_GC_MODE,
+        archive_dir: Optional[Path] = None,
+        interval_seconds: float = MEMORY_GC_INTERVAL_SECONDS,
+    ):
+        if mode not in GC_MODES:
+            raise ValueError(f"Unknown MEMORY_GC_MODE '{mode}' (expected one of {GC_MODES})")
+        self.graph_store = graph_store
+        self.vector_store = vector_store
+        self.min_confidence = min_confidence
+        self.max_edges = max_edges
+        self.max_vectors = max_vectors
+        self.batch_size = max(1, batch_size)
+        self.mode = mode
+        self.archive_dir = Path(archive_dir or MEMORY_ARCHIVE_DIR)
+        self.interval_seconds = interval_seconds
+
+        self._recent = deque(maxlen=20)
+        self._totals = {"passes": 0, "edges": 0, "vectors": 0, "errors": 0}
+        self._running = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()        # guards the counters
+        self._pass_lock = threading.Lock()   # one pass at a time (timer and manual runs)
+
+    def _stores(self):
+        from memory.factory import get_graph_store, get_vector_store
+        graph = self.graph_store if self.graph_store is not None else get_graph_store()
+        vectors = self.vector_store if self.vector_store is not None else get_vector_store()
+        return graph, vectors
+
+    # -- one pass -----------------------------------------------------------
+
+    def collect(self, user_ids: Optional[Iterable[str]] = None, dry_run: bool = False) -> Dict:
+        """
+        Collect every user's (or these users') faded and over-quota memories.
+        With dry_run nothing is removed; the counts say what would be.
+        """
+        with self._pass_lock:
+            with self._lock:
+                self._running = True
+            started = time.perf_counter()
+            error = None
+            users = []
+            compacted = 0
+            try:
+                graph, vectors = self._stores()
+                if user_ids is None:
+                    user_ids = sorted(set(graph.user_ids()) | set(vectors.user_ids()))
+                for user_id in user_ids:
+                    if self._stop.is_set():
+                        break
+                    users.append(self._collect_user(graph, vectors, user_id, dry_run))
+                # The NumPy index only tombstones deletes; rewrite it once enough rows are dead
+                compact = getattr(vectors, "compact", None)
+                if compact is not None and not dry_run and not self._stop.is_set():
+                    compacted = compact()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            summary = {
+                "users": len(users),
+                "edges": _tally(u["edges"] for u in users),
+                "vectors": _tally(u["vectors"] for u in users),
+                "compacted_rows": compacted,
+                "dry_run": dry_run,
+                "error": error,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                "finished_at": time.time(),
+            }
+            with self._lock:
+                self._running = False
+                if not dry_run:
+                    self._recent.append(summary)
+                    self._totals["passes"] += 1
+                    self._totals["edges"] += sum(summary["edges"].values())
+                    self._totals["vectors"] += sum(summary["vectors"].values())
+                    self._totals["errors"] += int(error is not None)
+        log_event("MEMORY_GC_ERROR" if error else "MEMORY_GC", **{k: v for k, v in summary.items() if k != "finished_at"})
+        return summary
+
+    def _collect_user(self, graph, vectors, user_id: str, dry_run: bool) -> Dict:
+        now = now_ms()
+        result = {
+            "user_id": user_id,
+            "edges": self._collect_edges(graph, user_id, now, dry_run),
+            "vectors": self._collect_vectors(vectors, user_id, now, dry_run),
+        }
+        if not dry_run and (sum(result["edges"].values()) or sum(result["vectors"].values())):
+            from memory.versioning import memory_versions
+            memory_versions.bump(user_id, reason="gc")  # cached context may name removed facts
+        return result
+
+    def _collect_edges(self, graph, user_id: str, now: int, dry_run: bool) -> Dict[str, int]:
+        counts = {"expired": 0, "over_quota": 0}
+        while True:
+            # Re-ranked after every batch: each delete moves the quota boundary
+            rows = graph.collectable_edges(
+                user_id, self.min_confidence, self.max_edges, now, limit=None if dry_run else self.batch_size
+            )
+            for row in rows:
+                row["reason"] = "expired" if row["decayed"] < self.min_confidence else "over_quota"
+            if dry_run:
+                return _tally([rows], counts)
+            if not rows:
+                return counts
+            self._archive("edges", rows, now)
+            deleted = graph.delete_edges([r["edge_id"] for r in rows])
+            _tally([rows], counts)
+            if deleted == 0 or len(rows) < self.batch_size:
+                return counts
+
+    def _collect_vectors(self, vectors, user_id: str, now: int, dry_run: bool) -> Dict[str, int]:
+        found = vectors.list_memories(user_id)
+        rows = [
+            {
+                "id": doc_id,
+                "document": document,
+                "metadata": metadata,
+                "last_updated": metadata.get("last_updated"),
+                # Chunks without a confidence (dream insights) start at full strength
+                "decayed": decayed_confidence(metadata.get("confidence", 1.0), metadata.get("last_updated"), now),
+            }
+            for doc_id, document, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+        ]
+        doomed = rank_memories(rows, self.min_confidence, self.max_vectors)
+        if not dry_run:
+            for start in range(0, len(doomed), self.batch_size):
+                batch = doomed[start:start + self.batch_size]
+                self._archive("vectors", batch, now)
+                vectors.delete_memories([r["id"] for r in batch], user_id)
+        return _tally([doomed])
+
+    def _archive(self, kind: str, rows: List[Dict], now: int) -> None:
+        """Append the rows about to be deleted to <archive_dir>/<kind>.jsonl (archive mode only)."""
+        if self.mode != "archive" or not rows:
+            return
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for row in rows:
+            # Backend ids (SQLite edge ids, Neo4j element ids) mean nothing outside the store
+            record = {k: v for k, v in row.items() if k != "edge_id"}
+            record["archived_at"] = now
+            lines.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        with open(self.archive_dir / f"{kind}.jsonl", "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    # -- background timer ---------------------------------------------------
+
+    def start(self) -> "MemoryCollector":
+        """Collect every MEMORY_GC_INTERVAL_SECONDS in the background; returns immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._loop, name="memory-gc", daemon=True)
+        self._thread.start()
+        log_event("MEMORY_GC_START", interval_seconds=self.interval_seconds, mode=self.mode)
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop the timer; a running pass ends after its current user."""
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.collect()
+
+    def status(self) -> Dict:
+        """The /api/memory/gc body: settings, whether a pass is running, totals and recent passes."""
+        with self._lock:
+            return {
+                "started": self._thread is not None and not self._stop.is_set(),
+                "running": self._running,
+                "mode": self.mode,
+                "half_life_days": MEMORY_HALF_LIFE_DAYS,
+                "min_confidence": self.min_confidence,
+                "max_edges_per_user": self.max_edges,
+                "max_vectors_per_user": self.max_vectors,
+                "totals": dict(self._totals),
+                "recent": list(self._recent),
+            }
+
+
+def _tally(groups: Iterable, counts: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Sum per-reason counts: over lists of rows (each with a `reason`) or over count dicts."""
+    counts = counts if counts is not None else {"expired": 0, "over_quota": 0}
+    for group in groups:
+        if isinstance(group, dict):
+            for reason, n in group.items():
+                counts[reason] += n
+        else:
+            for row in group:
+                counts[row["reason"]] += 1
+    return counts
+
+
+# Process-wide collector; web_ui starts it when MEMORY_GC_ENABLED
+memory_collector = MemoryCollector()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Remove faded and over-quota memories (edges and vector chunks)")
+    parser.add_argument("--user", action="append", dest="users", help="Only this user (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be removed")
+    args = parser.parse_args(argv)
+    summary = memory_collector.collect(args.users, dry_run=args.dry_run)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,114 @@
 # memory/neo4j_store.py
 
-from neo4j import GraphDatabase
+import threading
+
 from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from diagnostics.tracing import traced
+from memory import lifecycle
 import time
 
+# --- Shared driver: one connection pool per process, constraints created once ---
+_driver = None
+_constraints_ready = False
+_driver_lock = threading.Lock()
+
+
+def _get_driver():
+    """Get the process-wide Neo4j driver (its pool is reused by every store instance)."""
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            from neo4j import GraphDatabase  # deferred: the driver package is slow to import
+            _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        return _driver
+
+
+def reset_driver():
+    """Close the shared driver so the next store opens a fresh one (shutdown/tests)."""
+    global _driver, _constraints_ready
+    with _driver_lock:
+        driver, _driver, _constraints_ready = _driver, None, False
+    if driver is not None:
+        driver.close()
+# ---
+
+
+def sanitize_relation(raw_rel: str) -> str:
+    """Relationship types can't be Cypher parameters: uppercase, alphanumerics/underscores only."""
+    clean_rel = "".join(c for c in raw_rel if c.isalnum() or c == "_").upper()
+    return clean_rel or "RELATED_TO"
+
+
+def _edges_by_relation(edges: list) -> dict:
+    """UNWIND rows per sanitized relation type (types can't be parameters)."""
+    by_relation = {}
+    for edge in edges:
+        by_relation.setdefault(sanitize_relation(edge["relation"]), []).append({
+            "src": edge["src"],
+            "dst": edge["dst"],
+            "confidence": edge.get("confidence", 0.75),
+            "turn_id": edge.get("turn_id"),
+            "user_id": edge.get("user_id") or "unknown",
+            "source_text": edge.get("source_text"),
+            "last_updated": edge.get("last_updated"),
+        })
+    return by_relation
+
+
+def _decayed(rel: str) -> str:
+    """memory.lifecycle.decayed_confidence in Cypher, for the relationship bound to `rel` ($now, $half_life_ms)."""
+    return f"""
+        CASE WHEN $half_life_ms > 0 AND {rel}.last_updated IS NOT NULL
+            THEN coalesce({rel}.confidence, 0.0)
+                 * 0.5 ^ (toFloat(CASE WHEN $now > {rel}.last_updated THEN $now - {rel}.last_updated ELSE 0 END) / $half_life_ms)
+            ELSE coalesce({rel}.confidence, 0.0)
+        END"""
+
+
+def _merge_edges_query(clean_rel: str, idempotent: bool = False) -> str:
+    """
+    insert_edge's MERGE for a batch of $rows, keeping a row's `last_updated` if
+    it has one. With idempotent, a match with the same turn_id is left as is.
+    """
+    replay = "row.turn_id IS NOT NULL AND r.turn_id = row.turn_id" if idempotent else "false"
+    return f"""
+        UNWIND $rows AS row
+        MERGE (s:Entity {{id: row.src}})
+        MERGE (d:Entity {{id: row.dst}})
+        MERGE (s)-[r:{clean_rel} {{user_id: row.user_id}}]->(d)
+        ON CREATE SET 
+            r.confidence = row.confidence,
+            r.turn_id = row.turn_id,
+            r.source_text = row.source_text,
+            r.first_seen = coalesce(row.last_updated, timestamp()),
+            r.last_updated = coalesce(row.last_updated, timestamp())
+        ON MATCH SET 
+            r.confidence = CASE WHEN {replay} THEN r.confidence ELSE r.confidence + (1.0 - r.confidence) * 0.2 END,
+            r.last_updated = CASE WHEN {replay} THEN r.last_updated ELSE coalesce(row.last_updated, timestamp()) END,
+            r.turn_id = row.turn_id
+    """
+
+
 class Neo4jMemoryStore:
+    @traced("neo4j.connect")
     def __init__(self):
-        self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        self.driver = _get_driver()
         self._init_constraints()
 
     def close(self):
-        self.driver.close()
+        """No-op: the driver is shared; use reset_driver() to actually close it."""
 
     def _init_constraints(self):
-        """Ensure uniqueness constraints exist for optimal performance."""
+        """Ensure uniqueness constraints exist for optimal performance (once per driver)."""
+        global _constraints_ready
+        if _constraints_ready:
+            return
         with self.driver.session() as session:
             # Constraints for uniqueness
             session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (n:Entity) REQUIRE n.id IS UNIQUE")
+        _constraints_ready = True
 
+    @traced("neo4j.upsert_node")
     def upsert_node(self, node_id: str, node_type: str):
         """Insert or update a node."""
         with self.driver.session() as session:
@@ -29,25 +120,40 @@ class Neo4jMemoryStore:
                 id=node_id, type=node_type
             )
 
+    @traced("neo4j.bulk_upsert_nodes")
+    def bulk_upsert_nodes(self, nodes: list, batch_size: int = 5000) -> int:
+        """Insert or update many {"id", "type"} nodes with one UNWIND query per batch."""
+        rows = [{"id": n["id"], "type": n.get("type", "unknown")} for n in nodes]
+        with self.driver.session() as session:
+            for start in range(0, len(rows), batch_size):
+                session.run(
+                    """
+                    UNWIND $rows AS row
+                    MERGE (n:Entity {id: row.id})
+                    SET n.type = row.type, n.last_seen = timestamp()
+                    """,
+                    rows=rows[start:start + batch_size],
+                ).consume()
+        return len(rows)
+
+    @traced("neo4j.insert_edge")
     def insert_edge(self, edge: dict):
         """Insert an edge between two nodes with dynamic relationship type."""
         # Sanitize relation type (uppercase, underscores only)
-        raw_rel = edge["relation"]
-        clean_rel = "".join(c for c in raw_rel if c.isalnum() or c == "_").upper()
-        if not clean_rel:
-            clean_rel = "RELATED_TO"
+        clean_rel = sanitize_relation(edge["relation"])
             
         with self.driver.session() as session:
             # Note: We inject clean_rel directly because Cypher params don't work for types.
             # It is sanitized above to prevent injection.
+            # user_id is part of the MERGE key: entities like "User" are shared nodes,
+            # so the same fact from two users must stay two edges.
             query = f"""
                 MERGE (s:Entity {{id: $src}})
                 MERGE (d:Entity {{id: $dst}})
-                MERGE (s)-[r:{clean_rel}]->(d)
+                MERGE (s)-[r:{clean_rel} {{user_id: $user_id}}]->(d)
                 ON CREATE SET 
                     r.confidence = $confidence,
                     r.turn_id = $turn_id,
-                    r.user_id = $user_id,
                     r.source_text = $source_text,
                     r.first_seen = timestamp(),
                     r.last_updated = timestamp()
@@ -62,28 +168,49 @@ class Neo4jMemoryStore:
                 dst=edge["dst"],
                 confidence=edge.get("confidence", 0.75),
                 turn_id=edge.get("turn_id"),
-                user_id=edge.get("user_id"),
+                user_id=edge.get("user_id") or "unknown",
                 source_text=edge.get("source_text")
             )
 
+    @traced("neo4j.bulk_insert")
+    def bulk_insert_edges(self, edges: list, batch_size: int = 5000, idempotent: bool = False) -> int:
+        """
+        Insert many edges with one UNWIND query per relation type and batch
+        (same MERGE semantics as insert_edge). An optional `last_updated`
+        (epoch ms) per edge is kept instead of the current time. With
+        idempotent, an edge already stored with the same turn_id is not
+        reinforced again (a batch replayed by a resumed ingest).
+        Returns the number of edges written.
+        """
+        with self.driver.session() as session:
+            for clean_rel, rows in _edges_by_relation(edges).items():
+                query = _merge_edges_query(clean_rel, idempotent)
+                for start in range(0, len(rows), batch_size):
+                    session.run(query, rows=rows[start:start + batch_size]).consume()
+
+        return len(edges)
+
+    @traced("neo4j.activation")
     def retrieve_context_with_activation(self, user_id: str, limit: int = 15) -> list:
         """
         Spreading Activation Retrieval (Cognitive Architecture)
         - Finds 'Anchor' nodes (Direct matches)
         - Spreads 'Energy' to 1-hop neighbors
-        Using UNION for robustness.
+        Using UNION for robustness. Scores are confidences decayed by age
+        (memory.lifecycle); the spread keeps the strongest. At most `limit`
+        rows in all, direct ones first.
         """
         with self.driver.session() as session:
             # 1. Direct Memories (High Confidence)
             # 2. Indirect Memories (Lower Confidence)
             # Changed [r:RELATION] to [r] to match ANY relationship type
-            query = """
+            query = f"""
                 MATCH (s)-[r]->(d)
                 WHERE r.user_id = $user_id
                 WITH s, r, d
                 ORDER BY r.last_updated DESC
                 LIMIT 5
-                RETURN s.id as src, type(r) as relation, d.id as dst, r.confidence as score, 0 as depth, r.turn_id as turn_id, r.last_updated as last_updated
+                RETURN s.id as src, type(r) as relation, d.id as dst, {_decayed("r")} as score, 0 as depth, r.turn_id as turn_id, r.last_updated as last_updated
                 
                 UNION
                 
@@ -95,12 +222,14 @@ class Neo4jMemoryStore:
                 WITH collect(s) + collect(d) as anchors
                 UNWIND anchors as anchor
                 MATCH (anchor)-[r2]-(neighbor)
-                WHERE NOT neighbor IN anchors
-                RETURN anchor.id as src, type(r2) as relation, neighbor.id as dst, (r2.confidence * 0.5) as score, 1 as depth, r2.turn_id as turn_id, r2.last_updated as last_updated
+                WHERE NOT neighbor IN anchors AND r2.user_id = $user_id
+                RETURN anchor.id as src, type(r2) as relation, neighbor.id as dst, ({_decayed("r2")} * 0.5) as score, 1 as depth, r2.turn_id as turn_id, r2.last_updated as last_updated
                 ORDER BY score DESC
                 LIMIT 10
             """
-            result = session.run(query, user_id=user_id)
+            result = session.run(
+                query, user_id=user_id, now=lifecycle.now_ms(), half_life_ms=lifecycle.half_life_ms()
+            )
             
             return [
                 {
@@ -113,12 +242,13 @@ class Neo4jMemoryStore:
                     "last_updated": record["last_updated"]
                 }
                 for record in result
-            ]
+            ][:limit]
 
     def retrieve_context(self, user_id: str, limit: int = 10) -> list:
         # Backward compatibility wrapper
         return self.retrieve_context_with_activation(user_id, limit)
 
+    @traced("neo4j.related_nodes")
     def get_related_nodes(self, entity_id: str) -> list:
         """Find immediate neighbors of an entity."""
         with self.driver.session() as session:
@@ -132,6 +262,229 @@ class Neo4jMemoryStore:
             )
             return [{"neighbor": record["neighbor"], "relation": record["relation"]} for record in result]
 
+    @traced("neo4j.recent_facts")
+    def get_recent_facts(self, src: str, user_id: str = None, limit: int = 3) -> list:
+        """Most recently updated facts touching `src` (owned by `user_id`, if given), newest first."""
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (s:Entity {id: $src})-[r]-(o)
+                WHERE $user_id IS NULL OR r.user_id = $user_id
+                RETURN s.id as src, type(r) as relation, o.id as dst
+                ORDER BY r.last_updated DESC
+                LIMIT $limit
+                """,
+                src=src, user_id=user_id, limit=limit
+            )
+            return [{"src": record["src"], "relation": record["relation"], "dst": record["dst"]} for record in result]
+
+    @traced("neo4j.dense_entities")
+    def find_dense_entities(self, min_degree: int = 4, limit: int = 3) -> list:
+        """Entities with the most edges (the dreamer's "cognitive load" scan), densest first."""
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (n:Entity)-[r]-(m)
+                WITH n, count(r) as degree
+                WHERE degree >= $min_degree
+                RETURN n.id as entity, degree
+                ORDER BY degree DESC
+                LIMIT $limit
+                """,
+                min_degree=min_degree, limit=limit
+            )
+            return [{"entity": record["entity"], "degree": record["degree"]} for record in result]
+
+    @traced("neo4j.entity_degrees")
+    def entity_degrees(self, user_id: str, entity_ids: list) -> dict:
+        """How many of the user's edges touch each entity (id lookups only; absent = 0)."""
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                UNWIND $ids AS id
+                MATCH (n:Entity {id: id})-[r]-()
+                WHERE r.user_id = $user_id
+                RETURN id AS entity, count(r) AS degree
+                """,
+                ids=list(entity_ids), user_id=user_id
+            )
+            return {record["entity"]: record["degree"] for record in result}
+
+    @traced("neo4j.entity_facts")
+    def get_entity_facts(self, entity_id: str, limit: int = 10, user_id: str = None) -> list:
+        """Edges touching an entity (only the user's, if given), as the dreamer consumes them (edge_id feeds delete_edges)."""
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (n:Entity {id: $id})-[r]-(m)
+                WHERE $user_id IS NULL OR r.user_id = $user_id
+                RETURN type(r) as rel, m.id as neighbor, r.source_text as text, elementId(r) as edge_id, r.user_id as user_id
+                LIMIT $limit
+                """,
+                id=entity_id, limit=limit, user_id=user_id
+            )
+            return [dict(record) for record in result]
+
+    @traced("neo4j.delete_edges")
+    def delete_edges(self, edge_ids: list) -> int:
+        """Delete edges by the ids get_entity_facts or collectable_edges returned. Returns the number deleted."""
+        if not edge_ids:
+            return 0
+        with self.driver.session() as session:
+            # elementId() needs Neo4j 5.x+
+            result = session.run(
+                """
+                MATCH ()-[r]->()
+                WHERE elementId(r) IN $edge_ids
+                DELETE r
+                RETURN count(*) as deleted
+                """,
+                edge_ids=list(edge_ids)
+            )
+            return result.single()["deleted"]
+
+    def user_ids(self) -> list:
+        """Every user owning at least one edge."""
+        with self.driver.session() as session:
+            result = session.run("MATCH ()-[r]->() RETURN DISTINCT r.user_id AS user_id")
+            return [record["user_id"] for record in result if record["user_id"] is not None]
+
+    @traced("neo4j.collectable_edges")
+    def collectable_edges(self, user_id: str, min_confidence: float, max_edges: int, now: int, limit: int = None) -> list:
+        """
+        The user's edges the memory collector should remove, as dump_graph rows
+        plus `edge_id` (for delete_edges) and `decayed`: those decayed below
+        min_confidence, then those ranked (by decayed confidence) below the
+        user's best `max_edges` (0 = no cap); the weakest first, at most `limit`.
+        """
+        query = f"""
+            MATCH (s:Entity)-[r]->(d:Entity)
+            WHERE r.user_id = $user_id
+            WITH s, r, d, {_decayed("r")} AS decayed
+            ORDER BY decayed DESC, r.last_updated DESC
+            WITH collect({{src: s.id, dst: d.id, r: r, decayed: decayed}}) AS rows
+            WITH [row IN rows WHERE row.decayed < $min_confidence] AS expired,
+                 [row IN rows WHERE row.decayed >= $min_confidence] AS kept
+            UNWIND reverse(expired) + CASE WHEN $max_edges > 0 THEN reverse(kept[$max_edges..]) ELSE [] END AS row
+            WITH row, row.r AS r
+            RETURN elementId(r) AS edge_id, row.src AS src, type(r) AS relation, row.dst AS dst, r.user_id AS user_id,
+                   r.confidence AS confidence, r.turn_id AS turn_id, r.source_text AS source_text,
+                   r.first_seen AS first_seen, r.last_updated AS last_updated, row.decayed AS decayed
+            {"LIMIT $limit" if limit is not None else ""}
+        """
+        with self.driver.session() as session:
+            result = session.run(
+                query, user_id=user_id, min_confidence=min_confidence, max_edges=max_edges,
+                now=now, half_life_ms=lifecycle.half_life_ms(), limit=limit,
+            )
+            return [dict(record) for record in result]
+
+    @traced("neo4j.apply_consolidation")
+    def apply_consolidation(self, new_edges: list, delete_edge_ids: list) -> dict:
+        """
+        Apply a dream pass in one transaction: delete the summarized edges (ids
+        from get_entity_facts), then insert the summary edges with insert_edge
+        semantics. Either all of it is written or none. Returns {"inserted", "deleted"}.
+        """
+        with self.driver.session() as session, session.begin_transaction() as tx:
+            deleted = 0
+            if delete_edge_ids:
+                deleted = tx.run(
+                    """
+                    MATCH ()-[r]->()
+                    WHERE elementId(r) IN $edge_ids
+                    DELETE r
+                    RETURN count(*) as deleted
+                    """,
+                    edge_ids=list(set(delete_edge_ids)),
+                ).single()["deleted"]
+            for clean_rel, rows in _edges_by_relation(new_edges).items():
+                tx.run(_merge_edges_query(clean_rel), rows=rows).consume()
+            tx.commit()
+        return {"inserted": len(new_edges), "deleted": deleted}
+
+    def export_graph(self) -> dict:
+        """Every node and edge, in the shape the web UI's graph view expects."""
+        # Note: In a production app with huge graphs, you'd never do "MATCH (n) RETURN n"
+        # You would fetch a subgraph or use pagination.
+        with self.driver.session() as session:
+            node_result = session.run("MATCH (n:Entity) RETURN n.id as id, n.type as type")
+            nodes = [{"id": r["id"], "group": 1} for r in node_result]
+
+            edge_result = session.run("MATCH (s:Entity)-[r]->(d:Entity) RETURN s.id as src, d.id as dst, type(r) as label")
+            links = [{"source": r["src"], "target": r["dst"], "label": r["label"]} for r in edge_result]
+        return {"nodes": nodes, "links": links}
+
+    @traced("neo4j.dump")
+    def dump_graph(self, user_ids: list = None) -> dict:
+        """
+        Every node and edge with all stored properties, read in one transaction.
+        With user_ids, only those users' edges and the nodes they touch.
+        """
+        with self.driver.session() as session, session.begin_transaction() as tx:
+            edges = [dict(r) for r in tx.run(
+                """
+                MATCH (s:Entity)-[r]->(d:Entity)
+                WHERE $user_ids IS NULL OR r.user_id IN $user_ids
+                RETURN s.id AS src, type(r) AS relation, d.id AS dst, r.user_id AS user_id,
+                       r.confidence AS confidence, r.turn_id AS turn_id, r.source_text AS source_text,
+                       r.first_seen AS first_seen, r.last_updated AS last_updated
+                """,
+                user_ids=list(user_ids) if user_ids is not None else None,
+            )]
+            node_ids = None if user_ids is None else sorted({n for e in edges for n in (e["src"], e["dst"])})
+            nodes = [dict(r) for r in tx.run(
+                """
+                MATCH (n:Entity)
+                WHERE $ids IS NULL OR n.id IN $ids
+                RETURN n.id AS id, n.type AS type, n.last_seen AS last_seen
+                """,
+                ids=node_ids,
+            )]
+        return {"nodes": nodes, "edges": edges}
+
+    @traced("neo4j.restore")
+    def restore_graph(self, nodes: list, edges: list, user_ids: list = None, batch_size: int = 5000) -> int:
+        """
+        Replace the graph (only the given users' edges when user_ids is set)
+        with exactly these rows, as dump_graph returned them: no reinforcement,
+        timestamps kept. Written with UNWIND batches, so not atomic.
+        """
+        by_relation = {}
+        for edge in edges:
+            by_relation.setdefault(sanitize_relation(edge["relation"]), []).append(edge)
+
+        with self.driver.session() as session:
+            if user_ids is None:
+                session.run("MATCH (n) DETACH DELETE n").consume()
+            else:
+                session.run("MATCH ()-[r]->() WHERE r.user_id IN $user_ids DELETE r", user_ids=list(user_ids)).consume()
+            for start in range(0, len(nodes), batch_size):
+                session.run(
+                    """
+                    UNWIND $rows AS row
+                    MERGE (n:Entity {id: row.id})
+                    SET n.type = row.type, n.last_seen = row.last_seen
+                    """,
+                    rows=nodes[start:start + batch_size],
+                ).consume()
+            for clean_rel, rows in by_relation.items():
+                query = f"""
+                    UNWIND $rows AS row
+                    MERGE (s:Entity {{id: row.src}})
+                    MERGE (d:Entity {{id: row.dst}})
+                    MERGE (s)-[r:{clean_rel} {{user_id: row.user_id}}]->(d)
+                    SET r.confidence = row.confidence,
+                        r.turn_id = row.turn_id,
+                        r.source_text = row.source_text,
+                        r.first_seen = row.first_seen,
+                        r.last_updated = row.last_updated
+                """
+                for start in range(0, len(rows), batch_size):
+                    session.run(query, rows=rows[start:start + batch_size]).consume()
+        return len(edges)
+
+    @traced("neo4j.wipe")
     def wipe_database(self):
         """Delete all nodes and relationships."""
         with self.driver.session() as session:
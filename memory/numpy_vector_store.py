@@ -0,0 +1,537 @@
+# memory/numpy_vector_store.py
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from config import (
+    VECTOR_ANN_NPROBE,
+    VECTOR_ANN_THRESHOLD,
+    VECTOR_BATCH_SIZE,
+    VECTOR_COMPACT_MIN_DEAD_FRACTION,
+    VECTOR_INDEX_DIR,
+)
+from diagnostics.tracing import traced
+from memory import lifecycle
+
+# On-disk layout (single writer process):
+#   embeddings.f32  contiguous float32 rows (capacity x dim), memory-mapped, grown by doubling
+#   records.jsonl   append-only log {id, row, user_id, document, metadata}; the last line per id wins,
+#                   {deleted_user} drops every earlier row of that user, {deleted_ids} those rows
+#   meta.json       {"dim": ..., "generation": n}; compact() writes the live rows to embeddings.<n>.f32
+#                   and records.<n>.jsonl and switches to them by replacing meta.json (generation 0
+#                   uses the plain names above)
+_EMBEDDINGS = "embeddings.f32"
+_RECORDS = "records.jsonl"
+_META = "meta.json"
+_MIN_CAPACITY = 1024
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE_PER_LIST = 64
+_COMPACT_CHUNK = 65536   # rows copied per step while compacting
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _decayed(confidence: np.ndarray, last_updated: np.ndarray, now: int) -> np.ndarray:
+    """lifecycle.decayed_confidence over arrays (NaN last_updated: no timestamp, no decay)."""
+    half_life = lifecycle.half_life_ms()
+    if not half_life:
+        return confidence
+    age = np.maximum(0.0, now - last_updated) / half_life
+    return confidence * np.where(np.isnan(last_updated), 1.0, 0.5 ** np.nan_to_num(age))
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+class _IVFList:
+    """
+    Inverted-file index over one user's rows: spherical k-means centroids and
+    the rows assigned to each. Rows added after the build are searched exactly
+    (the tail) until the next rebuild.
+    """
+
+    def __init__(self, rows: np.ndarray, vectors: np.ndarray, seed: int = 0):
+        self.size = len(rows)
+        n_lists = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(rows), min(len(rows), n_lists * _KMEANS_SAMPLE_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(_KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [rows[assign == c] for c in range(n_lists)]
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        probe = _top_k(self.centroids @ query, n_probe)
+        return np.concatenate([self.lists[c] for c in probe])
+
+
+class _VectorIndex:
+    """One index directory: the memory-mapped embeddings plus per-user row tables."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.dim: Optional[int] = None
+        self.generation = 0
+        self.count = 0
+        self.embeddings: Optional[np.memmap] = None
+        self.records: Dict[int, Dict] = {}    # row -> {"id", "document", "metadata"}
+        # Per row, from the metadata, for ranking by decayed confidence without touching the records
+        self.confidence = np.zeros(0, dtype=np.float64)
+        self.last_updated = np.zeros(0, dtype=np.float64)
+        self.ids: Dict[str, int] = {}         # doc id -> row
+        self.user_rows: Dict[Optional[str], List[int]] = {}
+        self._row_arrays: Dict[Optional[str], np.ndarray] = {}
+        self._ann: Dict[Optional[str], _IVFList] = {}
+
+    def _load(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta = self.path / _META
+        if not meta.exists():
+            return
+        meta = json.loads(meta.read_text())
+        self.dim = meta["dim"]
+        self.generation = meta.get("generation", 0)
+        self._map()
+        records = self._file(_RECORDS)
+        if records.exists():
+            with open(records, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash: the row is simply not indexed
+                    self._index(record)
+
+    def _file(self, name: str, generation: Optional[int] = None) -> Path:
+        """The data file `name` of this (or the given) generation."""
+        generation = self.generation if generation is None else generation
+        if not generation:
+            return self.path / name
+        stem, suffix = name.split(".", 1)
+        return self.path / f"{stem}.{generation}.{suffix}"
+
+    def _write_meta(self):
+        tmp = self.path / f"{_META}.tmp"
+        tmp.write_text(json.dumps({"dim": self.dim, "generation": self.generation}))
+        os.replace(tmp, self.path / _META)
+
+    def _map(self, capacity: int = 0):
+        """(Re)open the embeddings file, growing it to at least `capacity` rows."""
+        file = self._file(_EMBEDDINGS)
+        row_bytes = self.dim * 4
+        current = file.stat().st_size // row_bytes if file.exists() else 0
+        if capacity > current or current == 0:
+            if self.embeddings is not None:
+                self.embeddings.flush()
+                self.embeddings = None
+            with open(file, "ab") as f:
+                f.truncate(max(capacity, _MIN_CAPACITY) * row_bytes)
+            current = max(capacity, _MIN_CAPACITY)
+        self.embeddings = np.memmap(file, dtype=np.float32, mode="r+", shape=(current, self.dim))
+
+    def _index(self, record: Dict):
+        if "deleted_user" in record:
+            self._drop_user(record["deleted_user"])
+            return
+        if "deleted_ids" in record:
+            self._drop_ids(record["deleted_ids"])
+            return
+        row = record["row"]
+        user_id = record["user_id"]
+        if row not in self.records:
+            self.user_rows.setdefault(user_id, []).append(row)
+            self._row_arrays.pop(user_id, None)
+            self._row_arrays.pop(None, None)
+            self.count = max(self.count, row + 1)
+        self.ids[record["id"]] = row
+        self.records[row] = {"id": record["id"], "document": record["document"], "metadata": record["metadata"]}
+        self._set_decay(row, record["metadata"])
+
+    def _set_decay(self, row: int, metadata: Dict):
+        if row >= len(self.confidence):
+            grown = max(2 * len(self.confidence), row + 1, _MIN_CAPACITY)
+            self.confidence = np.concatenate([self.confidence, np.zeros(grown - len(self.confidence))])
+            self.last_updated = np.concatenate([self.last_updated, np.full(grown - len(self.last_updated), np.nan)])
+        # Chunks without a confidence start at full strength, as in the collector
+        self.confidence[row] = metadata.get("confidence", 1.0) or 0.0
+        last_updated = metadata.get("last_updated")
+        self.last_updated[row] = np.nan if last_updated is None else last_updated
+
+    def _drop_user(self, user_id: Optional[str]):
+        # Rows are not reused: compact() reclaims the space once enough of it is dead
+        for row in self.user_rows.pop(user_id, ()):
+            self.ids.pop(self.records.pop(row)["id"], None)
+        for key in (user_id, None):
+            self._row_arrays.pop(key, None)
+            self._ann.pop(key, None)
+
+    def _drop_ids(self, doc_ids: List[str]):
+        rows = {self.ids.pop(doc_id) for doc_id in doc_ids if doc_id in self.ids}
+        if not rows:
+            return
+        users = set()
+        for user_id, user_rows in self.user_rows.items():
+            if not rows.isdisjoint(user_rows):
+                self.user_rows[user_id] = [row for row in user_rows if row not in rows]
+                users.add(user_id)
+        for row in rows:
+            del self.records[row]
+        for key in users | {None}:
+            self._row_arrays.pop(key, None)
+            self._ann.pop(key, None)
+
+    def upsert(self, items: List[Dict], vectors: np.ndarray):
+        """Write (id, user_id, document, metadata) items with their normalized vectors."""
+        with self.lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._write_meta()
+                self._map()
+
+            lines = []
+            batch_rows: Dict[str, int] = {}
+            for item, vector in zip(items, vectors):
+                row = self.ids.get(item["id"], batch_rows.get(item["id"]))
+                if row is None:
+                    row = batch_rows[item["id"]] = self.count + len(batch_rows)
+                if row >= len(self.embeddings):
+                    self._map(2 * len(self.embeddings))
+                self.embeddings[row] = vector
+                lines.append({**item, "row": row})
+            self.embeddings.flush()
+
+            # Vectors first, then the log: a crash in between leaves an unreferenced row, never a dangling one
+            with open(self._file(_RECORDS), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in lines))
+            for record in lines:
+                self._index(record)
+
+    def delete_users(self, user_ids: List[str]):
+        """Drop every row of these users (logged, so it survives a reload)."""
+        with self.lock:
+            lines = [{"deleted_user": user_id} for user_id in user_ids if user_id in self.user_rows]
+            if not lines:
+                return
+            with open(self._file(_RECORDS), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in lines))
+            for record in lines:
+                self._index(record)
+
+    def delete_ids(self, doc_ids: List[str]) -> int:
+        """Drop these rows (logged, so it survives a reload). Returns how many existed."""
+        with self.lock:
+            doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id in self.ids]
+            if not doc_ids:
+                return 0
+            record = {"deleted_ids": doc_ids}
+            with open(self._file(_RECORDS), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._index(record)
+            return len(doc_ids)
+
+    def clear(self):
+        """Delete every row and the files behind them; the index stays usable (empty) in place."""
+        with self.lock:
+            self.close()
+            for file in (self._file(_EMBEDDINGS), self._file(_RECORDS), self.path / _META):
+                file.unlink(missing_ok=True)
+            self._reset()
+
+    def dead_rows(self) -> int:
+        """Rows in the embeddings file that no live record points to (deleted or never logged)."""
+        return self.count - len(self.records)
+
+    def compact(self, min_dead_fraction: float) -> int:
+        """
+        Once at least min_dead_fraction of the rows are dead, copy the live ones,
+        renumbered from 0, into the next generation's files and switch to them.
+        meta.json is replaced last: a crash before that leaves the old files in
+        use. Returns the number of rows reclaimed (0 if not needed).
+        """
+        with self.lock:
+            dead = self.dead_rows()
+            if self.embeddings is None or dead <= 0 or dead < min_dead_fraction * self.count:
+                return 0
+            generation = self.generation + 1
+            rows = self.rows(None)
+            owners = {row: user_id for user_id, user_rows in self.user_rows.items() for row in user_rows}
+
+            embeddings_file = self._file(_EMBEDDINGS, generation)
+            capacity = max(len(rows), _MIN_CAPACITY)
+            with open(embeddings_file, "wb") as f:
+                f.truncate(capacity * self.dim * 4)
+            target = np.memmap(embeddings_file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            for start in range(0, len(rows), _COMPACT_CHUNK):
+                chunk = rows[start:start + _COMPACT_CHUNK]
+                target[start:start + len(chunk)] = self.embeddings[chunk]
+            target.flush()
+            del target
+
+            with open(self._file(_RECORDS, generation), "w", encoding="utf-8") as f:
+                for new_row, row in enumerate(rows.tolist()):
+                    record = self.records[row]
+                    f.write(json.dumps({**record, "row": new_row, "user_id": owners[row]}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            old_files = (self._file(_EMBEDDINGS), self._file(_RECORDS))
+            self.close()
+            self.generation = generation
+            self._write_meta()
+            for file in old_files:
+                file.unlink(missing_ok=True)
+
+            new_rows = {row: new_row for new_row, row in enumerate(rows.tolist())}
+            self.records = {new_rows[row]: record for row, record in self.records.items()}
+            self.ids = {doc_id: new_rows[row] for doc_id, row in self.ids.items()}
+            self.user_rows = {
+                user_id: [new_rows[row] for row in user_rows] for user_id, user_rows in self.user_rows.items() if user_rows
+            }
+            self.count = len(rows)
+            self.confidence = self.confidence[rows]
+            self.last_updated = self.last_updated[rows]
+            self._row_arrays.clear()
+            self._ann.clear()
+            self._map()
+            return dead
+
+    def dump(self, user_ids: Optional[List[str]]):
+        """(records, embeddings copy) of every live row, or only these users' rows."""
+        with self.lock:
+            if self.embeddings is None:
+                return [], np.zeros((0, self.dim or 0), dtype=np.float32)
+            if user_ids is None:
+                rows = self.rows(None)
+            else:
+                rows = np.concatenate([self.rows(user_id) for user_id in user_ids] + [np.zeros(0, dtype=np.int64)])
+            return [self.records[row] for row in rows.tolist()], np.array(self.embeddings[rows])
+
+    def rows(self, user_id: Optional[str]) -> np.ndarray:
+        """The user's offset table (every live row for user_id=None)."""
+        arr = self._row_arrays.get(user_id)
+        if arr is None:
+            if user_id is None:
+                arr = np.asarray(sorted(self.records), dtype=np.int64)
+            else:
+                arr = np.asarray(self.user_rows.get(user_id, ()), dtype=np.int64)
+            self._row_arrays[user_id] = arr
+        return arr
+
+    def search(self, query: np.ndarray, k: int, user_id: Optional[str], n_probe: int, ann_threshold: int):
+        """
+        (records, cosine similarities) of the k best rows, ranked by similarity
+        times decayed confidence (memory.lifecycle), so an old chunk gives way
+        to an equally similar fresh one. The records are read under the same
+        lock as the rows: a delete or compact() in between would renumber them.
+        """
+        now = lifecycle.now_ms()
+        with self.lock:
+            if self.embeddings is None:
+                return [], []
+            rows = self.rows(user_id)
+            if ann_threshold and len(rows) >= ann_threshold:
+                ann = self._ann.get(user_id)
+                # Rebuild once the exactly-searched tail outgrows half the indexed set
+                if ann is None or len(rows) - ann.size > ann.size // 2:
+                    ann = _IVFList(rows, self.embeddings[rows])
+                    self._ann[user_id] = ann
+                rows = np.concatenate([ann.candidates(query, n_probe), rows[ann.size:]])
+            scores = self.embeddings[rows] @ query
+            best = _top_k(scores * _decayed(self.confidence[rows], self.last_updated[rows], now), k)
+            return [self.records[row] for row in rows[best].tolist()], scores[best].tolist()
+
+    def close(self):
+        with self.lock:
+            if self.embeddings is not None:
+                self.embeddings.flush()
+                self.embeddings = None
+
+
+# --- Shared indexes: one per directory per process ---
+_indexes: Dict[Path, _VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _open_index(path: Path) -> _VectorIndex:
+    path = Path(path).resolve()
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = _VectorIndex(path)
+        return index
+
+
+def reset_indexes():
+    """Close every open index so the next use reloads from disk (e.g. after wipe)."""
+    with _indexes_lock:
+        for index in _indexes.values():
+            index.close()
+        _indexes.clear()
+# ---
+
+
+class NumpyVectorStore:
+    """
+    In-process vector store with the VectorMemoryStore add_memory/search
+    contract: float32 embeddings in one memory-mapped file, per-user offset
+    tables, exact search for small users and an IVF index per user above
+    VECTOR_ANN_THRESHOLD vectors. Results are ranked by cosine similarity
+    times decayed confidence; distances are plain cosine distances.
+    Selected with VECTOR_BACKEND=numpy.
+    """
+
+    def __init__(self, index_dir: Union[str, Path, None] = None, embedding_function=None):
+        self.index = _open_index(index_dir or VECTOR_INDEX_DIR)
+        if embedding_function is None:
+            from memory.vector_store import get_embedding_function
+            embedding_function = get_embedding_function()
+        self.embedding_function = embedding_function
+        self.ann_threshold = VECTOR_ANN_THRESHOLD
+        self.n_probe = VECTOR_ANN_NPROBE
+
+    def _compute_doc_id(self, user_id: str, text: str) -> str:
+        """Generate deterministic ID for vector memory (same scheme as the Chroma store)."""
+        content = f"{user_id}:{text.strip()}"
+        return hashlib.md5(content.encode()).hexdigest()
+
+    @traced("vectors.add")
+    def add_memory(self, text: str, metadata: dict):
+        """Add a memory chunk (text) to the vector store; re-adding the same text updates it."""
+        self.add_memories([text], [metadata])
+
+    @traced("vectors.add_batch")
+    def add_memories(self, texts: List[str], metadatas: List[dict], batch_size: int = None) -> int:
+        """
+        Add many memory chunks at once: duplicates collapse to one, embeddings are
+        computed `batch_size` texts per model call and each batch is written (and
+        flushed) together. Returns the number of distinct memories.
+        """
+        from memory.vector_store import unique_memories
+
+        batch_size = batch_size or VECTOR_BATCH_SIZE
+        unique = unique_memories(texts, metadatas, self._compute_doc_id)
+        for start in range(0, len(unique), batch_size):
+            batch = unique[start:start + batch_size]
+            items = [
+                {"id": doc_id, "user_id": metadata.get("user_id", "unknown"), "document": text, "metadata": metadata}
+                for doc_id, text, metadata in batch
+            ]
+            self.index.upsert(items, _normalize(self.embedding_function([text for _, text, _ in batch])))
+        return len(unique)
+
+    def count(self) -> int:
+        return len(self.index.records)
+
+    def user_ids(self) -> List[str]:
+        """Every user with at least one stored memory."""
+        with self.index.lock:
+            return [user_id for user_id, rows in self.index.user_rows.items() if rows]
+
+    def list_memories(self, user_id: str) -> dict:
+        """The user's memories without embeddings, as {"ids", "documents", "metadatas"}."""
+        with self.index.lock:
+            records = [self.index.records[row] for row in self.index.user_rows.get(user_id, ())]
+        return {
+            "ids": [r["id"] for r in records],
+            "documents": [r["document"] for r in records],
+            "metadatas": [r["metadata"] for r in records],
+        }
+
+    @traced("vectors.delete")
+    def delete_memories(self, ids: List[str], user_id: str = None) -> int:
+        """Delete memories by id (user_id is accepted for the Chroma contract). Returns the number deleted."""
+        return self.index.delete_ids(ids)
+
+    @traced("vectors.compact")
+    def compact(self, min_dead_fraction: float = VECTOR_COMPACT_MIN_DEAD_FRACTION) -> int:
+        """Rewrite the index without its deleted rows once they reach min_dead_fraction. Returns the rows reclaimed."""
+        return self.index.compact(min_dead_fraction)
+
+    def dump_vectors(self, user_ids: List[str] = None) -> dict:
+        """
+        Every stored memory with its embedding (only the given users' when
+        user_ids is set), as {"ids", "documents", "metadatas", "embeddings"}.
+        """
+        records, embeddings = self.index.dump(user_ids)
+        return {
+            "ids": [r["id"] for r in records],
+            "documents": [r["document"] for r in records],
+            "metadatas": [r["metadata"] for r in records],
+            "embeddings": embeddings,
+        }
+
+    @traced("vectors.restore")
+    def restore_vectors(self, dump: dict, user_ids: List[str] = None, batch_size: int = 5000) -> int:
+        """
+        Replace the stored memories (only the given users' when user_ids is set)
+        with a dump_vectors() result, writing the saved embeddings as they are:
+        nothing is re-embedded.
+        """
+        embeddings = np.asarray(dump["embeddings"], dtype=np.float32)
+        if user_ids is not None and len(embeddings) and self.index.dim not in (None, embeddings.shape[1]):
+            raise ValueError(f"Snapshot embeddings have {embeddings.shape[1]} dims, index has {self.index.dim}")
+        if user_ids is None:
+            self.index.clear()
+        else:
+            self.index.delete_users(user_ids)
+
+        items = [
+            {"id": doc_id, "user_id": metadata.get("user_id", "unknown"), "document": text, "metadata": metadata}
+            for doc_id, text, metadata in zip(dump["ids"], dump["documents"], dump["metadatas"])
+        ]
+        for start in range(0, len(items), batch_size):
+            self.index.upsert(items[start:start + batch_size], embeddings[start:start + batch_size])
+        return len(items)
+
+    @traced("vectors.search")
+    def query(self, query_text: str, n_results: int = 5, user_id: str = None) -> dict:
+        """search() without the error guard (warmup uses it to prove the index works)."""
+        query = _normalize(self.embedding_function([query_text]))[0]
+        if self.index.dim is not None and len(query) != self.index.dim:
+            raise ValueError(f"Query embedding has {len(query)} dims, index has {self.index.dim}")
+        records, scores = self.index.search(query, n_results, user_id or None, self.n_probe, self.ann_threshold)
+        return {
+            "ids": [[r["id"] for r in records]],
+            "documents": [[r["document"] for r in records]],
+            "metadatas": [[r["metadata"] for r in records]],
+            "distances": [[1.0 - s for s in scores]],
+        }
+
+    def search(self, query_text: str, n_results: int = 5, user_id: str = None) -> dict:
+        """
+        Search for memory chunks similar to the query text.
+        Optionally filter by user_id for session isolation.
+        """
+        try:
+            return self.query(query_text, n_results=n_results, user_id=user_id)
+        except Exception:
+            # Return empty results on failure to prevent crashes
+            return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
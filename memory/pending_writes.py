@@ -0,0 +1,93 @@
+# memory/pending_writes.py
+
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from memory.neo4j_store import sanitize_relation
+
+
+class PendingWrites:
+    """
+    Read-your-writes overlay for the slow pipe.
+    Facts extracted at turn N are registered here before the background write
+    is queued and stay visible to retrieval and the logic bomb until the slow
+    pipe acknowledges them, so turn N+1 sees them without waiting on Neo4j/Chroma.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict] = {}  # token -> entry
+        self._cond = threading.Condition()
+
+    def add(self, session_id: str, edges: List[Dict], text: Optional[str] = None, turn_id: int = 0) -> str:
+        """Register an extracted-but-not-yet-persisted write. Returns an ack token."""
+        token = uuid.uuid4().hex
+        now_ms = int(time.time() * 1000)
+        overlay_edges = [
+            {
+                "src": e["src"],
+                "relation": sanitize_relation(e["relation"]),
+                "dst": e["dst"],
+                "score": e.get("confidence", 1.0),
+                "depth": 0,
+                "turn_id": turn_id,
+                "last_updated": now_ms,
+                "pending": True,
+            }
+            for e in edges
+        ]
+        with self._cond:
+            self._entries[token] = {
+                "session_id": session_id,
+                "edges": overlay_edges,
+                "text": text,
+                "created": now_ms,
+            }
+        return token
+
+    def ack(self, token: Optional[str]) -> None:
+        """The slow pipe finished (persisted or dropped) this write."""
+        if not token:
+            return
+        with self._cond:
+            self._entries.pop(token, None)
+            self._cond.notify_all()
+
+    def _session_entries(self, session_id: str) -> List[Dict]:
+        entries = [e for e in self._entries.values() if e["session_id"] == session_id]
+        # Newest first, matching ORDER BY last_updated DESC in the stores
+        return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+    def edges(self, session_id: str, src: Optional[str] = None) -> List[Dict]:
+        """Pending edges for a session, newest first (optionally only those from `src`)."""
+        with self._cond:
+            entries = self._session_entries(session_id)
+        edges = [dict(edge) for e in entries for edge in e["edges"]]
+        if src is not None:
+            edges = [e for e in edges if e["src"] == src]
+        return edges
+
+    def texts(self, session_id: str) -> List[str]:
+        """Pending raw texts for a session, newest first."""
+        with self._cond:
+            entries = self._session_entries(session_id)
+        return [e["text"] for e in entries if e["text"]]
+
+    def count(self, session_id: Optional[str] = None) -> int:
+        with self._cond:
+            if session_id is None:
+                return len(self._entries)
+            return sum(1 for e in self._entries.values() if e["session_id"] == session_id)
+
+    def wait_idle(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until no writes are pending (for a session, or at all). False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not any(session_id is None or e["session_id"] == session_id for e in self._entries.values()),
+                timeout=timeout,
+            )
+
+
+# Global instance shared by the pipes
+pending_writes = PendingWrites()
@@ -1,38 +1,230 @@
 # memory/ram_context.py
 
-from collections import deque
-from typing import Dict, List
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from config import (
+    RAM_CONTEXT_SIZE,
+    RAM_CONTEXT_MAX_SESSIONS,
+    RAM_CONTEXT_TTL_SECONDS,
+    RAM_CONTEXT_MAX_BYTES,
+)
+from diagnostics.logger import log_event
+
+# Turns longer than this are zlib-compressed; short chat turns stay raw (cheaper to decode)
+_COMPRESS_OVER = 512
+_RAW, _ZLIB = b"\x00", b"\x01"
+
+
+def _pack(text: str) -> bytes:
+    data = text.encode("utf-8")
+    if len(data) > _COMPRESS_OVER:
+        packed = zlib.compress(data, 1)
+        if len(packed) < len(data):
+            return _ZLIB + packed
+    return _RAW + data
+
+
+def _unpack(blob: bytes) -> str:
+    if blob[:1] == _ZLIB:
+        return zlib.decompress(blob[1:]).decode("utf-8")
+    return blob[1:].decode("utf-8")
+
+
+class RedisSessionBackend:
+    """
+    External backend for multi-process servers.
+    Works with any redis-py compatible client (rpush/ltrim/lrange/expire/delete/scan_iter);
+    the server enforces TTL and the list cap, so nothing is held in this process.
+    """
+
+    def __init__(self, client, maxlen: int, ttl_seconds: Optional[int] = None, prefix: str = "ramctx:"):
+        self.client = client
+        self.maxlen = maxlen
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def add(self, session_id: str, text: str) -> None:
+        key = self._key(session_id)
+        self.client.rpush(key, _pack(text))
+        self.client.ltrim(key, -self.maxlen, -1)
+        if self.ttl_seconds:
+            self.client.expire(key, self.ttl_seconds)
+
+    def get(self, session_id: str) -> List[str]:
+        return [_unpack(blob) for blob in self.client.lrange(self._key(session_id), 0, -1)]
+
+    def drop(self, session_id: str) -> None:
+        self.client.delete(self._key(session_id))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
 
 
 class RAMContext:
     """
     In-memory short-term context.
-    Stores last N turns per session.
+    Stores last N turns per session, for all sessions of the process:
+    - sessions are LRU-capped, expire after an idle TTL and share a byte ceiling
+    - turns are stored as compact UTF-8 bytes (zlib for long turns)
+    - an optional external backend replaces local storage entirely
     """
 
-    def __init__(self, maxlen: int = 8):
+    def __init__(
+        self,
+        maxlen: int = 8,
+        max_sessions: int = RAM_CONTEXT_MAX_SESSIONS,
+        ttl_seconds: Optional[float] = RAM_CONTEXT_TTL_SECONDS,
+        max_bytes: Optional[int] = RAM_CONTEXT_MAX_BYTES,
+        backend=None,
+    ):
         self.maxlen = maxlen
-        self._store: Dict[str, deque] = {}
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.backend = backend
+
+        # session_id -> {"turns": deque[bytes], "bytes": int, "touched": float}, in LRU order
+        self._store: "OrderedDict[str, Dict]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.metrics = {"evicted_lru": 0, "evicted_ttl": 0, "evicted_memory": 0}
 
     def add(self, session_id: str, text: str) -> None:
         """
         Add a new turn to RAM context.
         """
-        if session_id not in self._store:
-            self._store[session_id] = deque(maxlen=self.maxlen)
+        if self.backend is not None:
+            self.backend.add(session_id, text)
+            return
 
-        self._store[session_id].append(text)
+        blob = _pack(text)
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire(now)
+
+            entry = self._store.pop(session_id, None)
+            if entry is None:
+                entry = {"turns": deque(maxlen=self.maxlen), "bytes": 0, "touched": now}
+
+            if len(entry["turns"]) == self.maxlen:
+                dropped = entry["turns"][0]
+                entry["bytes"] -= len(dropped)
+                self._bytes -= len(dropped)
+
+            entry["turns"].append(blob)
+            entry["bytes"] += len(blob)
+            entry["touched"] = now
+            self._bytes += len(blob)
+            self._store[session_id] = entry  # most recently used
+
+            self._enforce_limits()
 
     def get(self, session_id: str) -> List[str]:
         """
         Get recent turns for a session.
         Returns empty list if none exist.
         """
-        if session_id not in self._store:
-            return []
+        if self.backend is not None:
+            return self.backend.get(session_id)
 
-        return list(self._store[session_id])
+        now = time.monotonic()
+        with self._lock:
+            entry = self._store.get(session_id)
+            if entry is None:
+                return []
+            if self._is_expired(entry, now):
+                self._evict(session_id, "evicted_ttl")
+                return []
+
+            entry["touched"] = now
+            self._store.move_to_end(session_id)
+            blobs = list(entry["turns"])
+
+        return [_unpack(blob) for blob in blobs]
+
+    def drop(self, session_id: str) -> None:
+        """Forget a single session."""
+        if self.backend is not None:
+            self.backend.drop(session_id)
+            return
+
+        with self._lock:
+            entry = self._store.pop(session_id, None)
+            if entry is not None:
+                self._bytes -= entry["bytes"]
 
     def clear(self) -> None:
         """Clear all in-memory turns for all sessions."""
-        self._store.clear()
+        if self.backend is not None:
+            self.backend.clear()
+            return
+
+        with self._lock:
+            self._store.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Session count, stored bytes and eviction counters."""
+        with self._lock:
+            return {
+                "sessions": len(self._store),
+                "turns": sum(len(e["turns"]) for e in self._store.values()),
+                "bytes": self._bytes,
+                "backend": type(self.backend).__name__ if self.backend is not None else "local",
+                **self.metrics,
+            }
+
+    # --- eviction (call with the lock held) ---
+
+    def _is_expired(self, entry: Dict, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry["touched"] > self.ttl_seconds
+
+    def _expire(self, now: float) -> None:
+        # LRU order == idle order, so expired sessions are all at the head
+        while self._store:
+            oldest_id, oldest = next(iter(self._store.items()))
+            if not self._is_expired(oldest, now):
+                break
+            self._evict(oldest_id, "evicted_ttl")
+
+    def _enforce_limits(self) -> None:
+        while self.max_sessions and len(self._store) > self.max_sessions:
+            self._evict(next(iter(self._store)), "evicted_lru")
+        # Never evict the session that was just written
+        while self.max_bytes and self._bytes > self.max_bytes and len(self._store) > 1:
+            self._evict(next(iter(self._store)), "evicted_memory")
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        entry = self._store.pop(session_id)
+        self._bytes -= entry["bytes"]
+        self.metrics[reason] += 1
+        log_event("RAM_CONTEXT_EVICT", session_id=session_id, reason=reason)
+
+
+def build_ram_context() -> RAMContext:
+    """Shared session context for servers, using Redis when RAM_CONTEXT_REDIS_URL is set."""
+    from config import RAM_CONTEXT_REDIS_URL
+
+    backend = None
+    if RAM_CONTEXT_REDIS_URL:
+        try:
+            import redis  # optional dependency
+        except ImportError:
+            raise RuntimeError("RAM_CONTEXT_REDIS_URL is set but the 'redis' package is not installed.")
+        backend = RedisSessionBackend(
+            redis.Redis.from_url(RAM_CONTEXT_REDIS_URL),
+            maxlen=RAM_CONTEXT_SIZE,
+            ttl_seconds=RAM_CONTEXT_TTL_SECONDS,
+        )
+
+    return RAMContext(maxlen=RAM_CONTEXT_SIZE, backend=backend)
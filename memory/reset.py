@@ -7,7 +7,7 @@ import time
 from typing import Optional, Dict, Any
 from pathlib import Path
 
-from config import SQLITE_DB_PATH, CHROMA_DIR, DATA_DIR
+from config import SQLITE_DB_PATH, CHROMA_DIR, DATA_DIR, VECTOR_INDEX_DIR
 
 # region agent log
 _DEBUG_LOG_PATH = r"e:\NEUROHACK PROJECT\.cursor\debug.log"
@@ -94,7 +94,9 @@ def _wipe_chroma_best_effort(hypothesis_run: str) -> bool:
     try:
         import chromadb  # type: ignore
         client = chromadb.PersistentClient(path=str(CHROMA_DIR))
-        for name in ("neuro_symbolic_memory", "memories"):
+        # Per-user partitions (neuro_symbolic_memory__<hash>) as well as the shared collections
+        names = {getattr(c, "name", c) for c in client.list_collections()} | {"neuro_symbolic_memory", "memories"}
+        for name in sorted(names):
             try:
                 client.delete_collection(name=name)
                 _dbg("H2", "memory/reset.py:_wipe_chroma_best_effort", "chroma_delete_collection_ok", {"collection": name, "mode": hypothesis_run})
@@ -119,19 +121,36 @@ def _wipe_chroma_best_effort(hypothesis_run: str) -> bool:
         return False
 
 
-def _wipe_neo4j() -> bool:
+def _wipe_vector_index() -> bool:
     """
-    Connects to Neo4j and deletes all nodes and relationships.
+    Deletes the NumPy vector index directory (VECTOR_BACKEND=numpy) after
+    unmapping it in this process. Returns True if successful.
+    """
+    try:
+        from memory.numpy_vector_store import reset_indexes
+        reset_indexes()
+        if VECTOR_INDEX_DIR.exists():
+            shutil.rmtree(VECTOR_INDEX_DIR)
+        return True
+    except Exception as e:
+        _dbg("H2", "memory/reset.py:_wipe_vector_index", "vector_index_wipe_failed", {"dir": str(VECTOR_INDEX_DIR), "error": repr(e)})
+        return False
+
+
+def _wipe_graph() -> bool:
+    """
+    Deletes all nodes and relationships from the configured graph store
+    (Neo4j, or the SQLite file when GRAPH_BACKEND=sqlite).
     Returns True if successful.
     """
     try:
-        from memory.neo4j_store import Neo4jMemoryStore
-        store = Neo4jMemoryStore()
+        from memory.factory import get_graph_store
+        store = get_graph_store()
         store.wipe_database()
         store.close()
         return True
     except Exception as e:
-        _dbg("H3", "memory/reset.py:_wipe_neo4j", "neo4j_wipe_failed", {"error": repr(e)})
+        _dbg("H3", "memory/reset.py:_wipe_graph", "graph_wipe_failed", {"error": repr(e)})
         return False
 
 
@@ -152,11 +171,17 @@ def wipe_all_memory(ram_context=None) -> dict:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
     # --- SQLite wipe ---
+    # Pooled connections would keep writing to the unlinked file: close them first
+    from memory.sqlite_store import reset_connections
+    reset_connections()
     sqlite_wiped = False
     if SQLITE_DB_PATH.exists():
         # Try unlink first (fast), but fall back to in-place wipe if locked
         try:
             SQLITE_DB_PATH.unlink()
+            # WAL sidecar files belong to the old database
+            for suffix in ("-wal", "-shm"):
+                Path(f"{SQLITE_DB_PATH}{suffix}").unlink(missing_ok=True)
             sqlite_wiped = True
             _dbg("H1", "memory/reset.py:wipe_all_memory", "sqlite_unlink_ok", {"db": str(SQLITE_DB_PATH), "mode": hypothesis_run})
         except OSError as e:
@@ -165,11 +190,21 @@ def wipe_all_memory(ram_context=None) -> dict:
     else:
         sqlite_wiped = True # Nothing to wipe
 
-    # --- Neo4j wipe ---
-    neo4j_wiped = _wipe_neo4j()
+    # --- Graph store wipe (Neo4j, or a fresh SQLite file) ---
+    graph_wiped = _wipe_graph()
 
     # --- Chroma wipe (best effort; returns bool) ---
     chroma_wiped = _wipe_chroma_best_effort("cli_reset")
+    vectors_wiped = _wipe_vector_index()
+
+    # --- Derived caches: every user's memory version moves; no entity is dirty any more ---
+    from memory.versioning import memory_versions
+    memory_versions.bump_all()
+    try:
+        from memory.consolidation_state import consolidation_state
+        consolidation_state.forget()
+    except Exception as e:
+        _dbg("H3", "memory/reset.py:wipe_all_memory", "dream_state_forget_failed", {"error": repr(e)})
 
     # --- RAM Context ---
     # In a real app this might need an API call if running in separate process
@@ -177,12 +212,15 @@ def wipe_all_memory(ram_context=None) -> dict:
     if __name__ == "__main__":
         pass
 
-    _dbg("H3", "memory/reset.py:wipe_all_memory", "exit", {"neo4j_wiped": neo4j_wiped, "chroma_wiped": chroma_wiped})
+    _dbg("H3", "memory/reset.py:wipe_all_memory", "exit", {"graph_wiped": graph_wiped, "chroma_wiped": chroma_wiped})
 
-    if not neo4j_wiped:
-        print("WARNING: Neo4j Connected Failed. Is the database running?")
+    if not graph_wiped:
+        print("WARNING: Graph store wipe failed. Is Neo4j running (or GRAPH_BACKEND=sqlite intended)?")
 
     if not chroma_wiped:
         print("WARNING: ChromaDB wipe failed (likely locked). Close other running processes and retry.")
 
-    return {"sqlite_wiped": sqlite_wiped, "chroma_wiped": chroma_wiped}
+    if not vectors_wiped:
+        print("WARNING: Vector index wipe failed. Close other running processes and retry.")
+
+    return {"sqlite_wiped": sqlite_wiped, "chroma_wiped": chroma_wiped, "vectors_wiped": vectors_wiped}
@@ -0,0 +1,154 @@
+# memory/response_cache.py
+
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from diagnostics.logger import log_event
+from config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_SIMILARITY
+from memory.versioning import memory_versions
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace ("What's my name?" -> "whats my name")."""
+    text = _PUNCTUATION.sub("", text.lower().replace("’", "'"))
+    return " ".join(text.split())
+
+
+def _digest(context: str) -> str:
+    return hashlib.md5(context.encode()).hexdigest() if context else ""
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class ResponseCache:
+    """
+    Per-user cache of answered questions.
+    - Exact match on the normalized question, then embedding near-match
+    - Every entry is tagged with the user's memory version; an entry is only
+      served while that version is still current
+    - An entry is also tagged with a digest of the conversation the answer was
+      generated in (`context`); it is only served for the same conversation
+    - LRU-bounded per user
+    """
+
+    def __init__(
+        self,
+        max_entries_per_user: int = 64,
+        similarity_threshold: float = 0.95,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    ):
+        self.max_entries_per_user = max_entries_per_user
+        self.similarity_threshold = similarity_threshold
+        self._embed_fn = embed_fn
+        self._near_match_enabled = similarity_threshold < 1.0
+        self._entries: Dict[str, "OrderedDict[str, Dict]"] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """Embed a normalized question. Disables near-matching if the model is unavailable."""
+        if not self._near_match_enabled:
+            return None
+        try:
+            if self._embed_fn is None:
+                from memory.vector_store import get_embedding_function
+                self._embed_fn = get_embedding_function()
+            return [float(x) for x in self._embed_fn([text])[0]]
+        except Exception as e:
+            log_event("RESPONSE_CACHE_EMBED_DISABLED", error=str(e))
+            self._near_match_enabled = False
+            return None
+
+    def get(self, user_id: str, question: str, version: int, context: str = "") -> Optional[Dict]:
+        """Return the cached result for this question if it was computed at `version` within `context`."""
+        key = normalize_question(question)
+        if not key:
+            return None
+        context = _digest(context)
+
+        with self._lock:
+            entries = self._entries.get(user_id)
+            if not entries:
+                return None
+
+            # Drop anything computed against an older memory state
+            for stale in [k for k, e in entries.items() if e["version"] != version]:
+                del entries[stale]
+
+            hit = entries.get(key)
+            if hit is not None and hit["context"] == context:
+                entries.move_to_end(key)
+                log_event("RESPONSE_CACHE_HIT", user_id=user_id, match="exact")
+                return copy.deepcopy(hit["result"])
+
+            candidates = [
+                (k, e["embedding"]) for k, e in entries.items() if e["embedding"] is not None and e["context"] == context
+            ]
+
+        if not candidates:
+            return None
+
+        query_embedding = self._embed(key)
+        if query_embedding is None:
+            return None
+
+        best_key, best_score = None, 0.0
+        for cand_key, cand_embedding in candidates:
+            score = _cosine(query_embedding, cand_embedding)
+            if score > best_score:
+                best_key, best_score = cand_key, score
+
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+
+        with self._lock:
+            entry = (self._entries.get(user_id) or {}).get(best_key)
+            if entry is None or entry["version"] != version or entry["context"] != context:
+                return None
+            self._entries[user_id].move_to_end(best_key)
+            log_event("RESPONSE_CACHE_HIT", user_id=user_id, match="semantic", score=round(best_score, 3))
+            return copy.deepcopy(entry["result"])
+
+    def put(self, user_id: str, question: str, version: int, result: Dict, context: str = "") -> None:
+        """Store a result computed while the user's memory was at `version`, with `context` in the prompt."""
+        key = normalize_question(question)
+        if not key:
+            return
+
+        embedding = self._embed(key)
+
+        with self._lock:
+            entries = self._entries.setdefault(user_id, OrderedDict())
+            entries[key] = {"version": version, "context": _digest(context), "result": copy.deepcopy(result), "embedding": embedding}
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries_per_user:
+                entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Forget cached answers for one user, or for everyone when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+# Global instance shared by the fast pipe
+response_cache = ResponseCache(
+    max_entries_per_user=RESPONSE_CACHE_SIZE,
+    similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+)
+# Drop a user's answers as soon as their memory epoch moves (None = everyone)
+memory_versions.subscribe(lambda user_id, epoch, reason: response_cache.invalidate(user_id))
@@ -0,0 +1,253 @@
+# memory/snapshot.py
+
+"""
+Point-in-time snapshots of memory: graph nodes and edges plus the vector
+store's documents and embeddings in one compact file, restored with bulk
+loads and without re-embedding anything.
+
+    python -m memory.snapshot save baseline                  # -> data/snapshots/baseline.zip
+    python -m memory.snapshot save alice --user alice        # one user's memory only
+    python -m memory.snapshot restore baseline               # replaces all memory
+    python -m memory.snapshot restore baseline --user alice  # replaces only alice's memory
+    python -m memory.snapshot info baseline
+
+File layout (zip archive):
+    manifest.json   format version, scope (users or null = everything), backends,
+                    embedding model, counts
+    nodes.json      columnar: {"id": [...], "type": [...], "last_seen": [...]}
+    edges.json      columnar: one list per edge property
+    vectors.json    columnar: {"id": [...], "document": [...], "metadata": [...]}
+    embeddings.npy  float32 (n_vectors x dim), row i belongs to vectors.json entry i
+
+Graph and vectors are each read consistently, but not atomically with each
+other: take snapshots while nothing is writing (no server, or slow pipe idle).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, GRAPH_BACKEND, SNAPSHOT_DIR, VECTOR_BACKEND
+from diagnostics.logger import log_event
+from diagnostics.tracing import traced
+
+FORMAT = "nsm-snapshot"
+VERSION = 1
+_NODE_FIELDS = ("id", "type", "last_seen")
+_EDGE_FIELDS = ("src", "relation", "dst", "user_id", "confidence", "turn_id", "source_text", "first_seen", "last_updated")
+
+
+def snapshot_path(name: Union[str, Path]) -> Path:
+    """A bare name ("baseline") lives in SNAPSHOT_DIR as baseline.zip; anything else is used as given."""
+    path = Path(name)
+    if path.parent == Path(".") and not path.suffix:
+        return SNAPSHOT_DIR / f"{path.name}.zip"
+    return path
+
+
+def _columns(rows: List[Dict], fields) -> Dict[str, list]:
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+
+def _rows(columns: Dict[str, list]) -> List[Dict]:
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _open_stores(graph_store, vector_store):
+    if graph_store is None:
+        from memory.factory import get_graph_store
+        graph_store = get_graph_store()
+    if vector_store is None:
+        from memory.factory import get_vector_store
+        vector_store = get_vector_store()
+    return graph_store, vector_store
+
+
+@traced("snapshot.save")
+def save_snapshot(
+    path: Union[str, Path],
+    user_ids: Optional[List[str]] = None,
+    graph_store=None,
+    vector_store=None,
+) -> Dict:
+    """
+    Write all memory (or only these users') to `path`, replacing it atomically.
+    Returns the manifest.
+    """
+    started = time.perf_counter()
+    path = snapshot_path(path)
+    graph_store, vector_store = _open_stores(graph_store, vector_store)
+    graph = graph_store.dump_graph(user_ids)
+    vectors = vector_store.dump_vectors(user_ids)
+
+    embeddings = np.asarray(vectors["embeddings"], dtype=np.float32)
+    if not len(embeddings):
+        embeddings = embeddings.reshape(0, 0)
+    manifest = {
+        "format": FORMAT,
+        "version": VERSION,
+        "created_at": time.time(),
+        "users": sorted(user_ids) if user_ids is not None else None,
+        "graph_backend": GRAPH_BACKEND,
+        "vector_backend": VECTOR_BACKEND,
+        "embedding_model": EMBEDDING_MODEL,
+        "dim": int(embeddings.shape[1]),
+        "counts": {"nodes": len(graph["nodes"]), "edges": len(graph["edges"]), "vectors": len(vectors["ids"])},
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+        zf.writestr("nodes.json", json.dumps(_columns(graph["nodes"], _NODE_FIELDS), ensure_ascii=False))
+        zf.writestr("edges.json", json.dumps(_columns(graph["edges"], _EDGE_FIELDS), ensure_ascii=False))
+        zf.writestr("vectors.json", json.dumps(
+            {"id": vectors["ids"], "document": vectors["documents"], "metadata": vectors["metadatas"]},
+            ensure_ascii=False,
+        ))
+        # Float noise doesn't deflate: store the matrix as is so loading is a plain read
+        with zf.open(zipfile.ZipInfo("embeddings.npy"), "w", force_zip64=True) as f:
+            np.save(f, embeddings)
+    os.replace(tmp, path)
+
+    log_event("SNAPSHOT_SAVED", path=str(path), users=manifest["users"], **manifest["counts"],
+              bytes=path.stat().st_size, elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+    return manifest
+
+
+def read_manifest(path: Union[str, Path]) -> Dict:
+    with zipfile.ZipFile(snapshot_path(path)) as zf:
+        return json.loads(zf.read("manifest.json"))
+
+
+def load_snapshot(path: Union[str, Path]) -> Dict:
+    """{"manifest", "nodes", "edges", "vectors"} with row lists and the embeddings matrix."""
+    with zipfile.ZipFile(snapshot_path(path)) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        if manifest.get("format") != FORMAT or manifest.get("version", 0) > VERSION:
+            raise ValueError(f"{path} is not a version <= {VERSION} {FORMAT} file")
+        vectors = json.loads(zf.read("vectors.json"))
+        with zf.open("embeddings.npy") as f:
+            embeddings = np.load(f)
+        return {
+            "manifest": manifest,
+            "nodes": _rows(json.loads(zf.read("nodes.json"))),
+            "edges": _rows(json.loads(zf.read("edges.json"))),
+            "vectors": {
+                "ids": vectors["id"],
+                "documents": vectors["document"],
+                "metadatas": vectors["metadata"],
+                "embeddings": embeddings,
+            },
+        }
+
+
+def _select_users(snapshot: Dict, user_ids: List[str]) -> None:
+    """Narrow a loaded snapshot to these users' edges, the nodes they touch and their vectors."""
+    users = set(user_ids)
+    edges = [e for e in snapshot["edges"] if e["user_id"] in users]
+    touched = {n for e in edges for n in (e["src"], e["dst"])}
+    vectors = snapshot["vectors"]
+    keep = [i for i, m in enumerate(vectors["metadatas"]) if m.get("user_id", "unknown") in users]
+    snapshot["edges"] = edges
+    snapshot["nodes"] = [n for n in snapshot["nodes"] if n["id"] in touched]
+    snapshot["vectors"] = {
+        "ids": [vectors["ids"][i] for i in keep],
+        "documents": [vectors["documents"][i] for i in keep],
+        "metadatas": [vectors["metadatas"][i] for i in keep],
+        "embeddings": vectors["embeddings"][keep] if keep else vectors["embeddings"][:0],
+    }
+
+
+@traced("snapshot.restore")
+def restore_snapshot(
+    path: Union[str, Path],
+    user_ids: Optional[List[str]] = None,
+    graph_store=None,
+    vector_store=None,
+    force: bool = False,
+) -> Dict:
+    """
+    Make memory match the snapshot. A full snapshot replaces everything; a
+    per-user snapshot (or `user_ids`) replaces only those users' edges and
+    vectors, leaving everyone else untouched. Embeddings are loaded as saved,
+    so the snapshot must come from the same EMBEDDING_MODEL unless `force`.
+    """
+    started = time.perf_counter()
+    snapshot = load_snapshot(path)
+    manifest = snapshot["manifest"]
+    if manifest["embedding_model"] != EMBEDDING_MODEL and not force:
+        raise ValueError(
+            f"Snapshot embeddings come from {manifest['embedding_model']}, this store uses {EMBEDDING_MODEL}"
+        )
+    if user_ids is not None:
+        missing = set(user_ids) - set(manifest["users"]) if manifest["users"] is not None else set()
+        if missing:
+            raise ValueError(f"Snapshot does not contain users {sorted(missing)}")
+        _select_users(snapshot, user_ids)
+    scope = list(user_ids) if user_ids is not None else manifest["users"]
+
+    graph_store, vector_store = _open_stores(graph_store, vector_store)
+    edges = graph_store.restore_graph(snapshot["nodes"], snapshot["edges"], user_ids=scope)
+    vectors = vector_store.restore_vectors(snapshot["vectors"], user_ids=scope)
+
+    # Everything derived from the replaced memory is stale now; the dreamer re-checks the restored entities
+    from memory.consolidation_state import consolidation_state
+    from memory.versioning import memory_versions
+    consolidation_state.forget(scope)
+    if scope is None:
+        memory_versions.bump_all(reason="restore")
+    else:
+        for user_id in scope:
+            memory_versions.bump(user_id, reason="restore")
+    touched = {}
+    for edge in snapshot["edges"]:
+        touched.setdefault(edge["user_id"], set()).update((edge["src"], edge["dst"]))
+    for user_id, entities in touched.items():
+        consolidation_state.mark_dirty(user_id, entities)
+
+    stats = {
+        "path": str(snapshot_path(path)),
+        "users": scope,
+        "nodes": len(snapshot["nodes"]),
+        "edges": edges,
+        "vectors": vectors,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    log_event("SNAPSHOT_RESTORED", **stats)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Save or restore a point-in-time copy of memory")
+    parser.add_argument("action", choices=("save", "restore", "info"))
+    parser.add_argument("snapshot", help=f"File path, or a bare name stored in {SNAPSHOT_DIR}")
+    parser.add_argument("--user", action="append", dest="users", help="Only this user (repeatable)")
+    parser.add_argument("--force", action="store_true", help="Restore even if the embedding model differs")
+    args = parser.parse_args(argv)
+
+    if args.action == "info":
+        print(json.dumps(read_manifest(args.snapshot), indent=2))
+        return 0
+
+    graph_store, vector_store = _open_stores(None, None)
+    try:
+        if args.action == "save":
+            result = save_snapshot(args.snapshot, args.users, graph_store, vector_store)
+        else:
+            result = restore_snapshot(args.snapshot, args.users, graph_store, vector_store, force=args.force)
+    finally:
+        graph_store.close()
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
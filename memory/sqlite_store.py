@@ -0,0 +1,532 @@
+# memory/sqlite_store.py
+
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from config import SQLITE_DB_PATH
+from diagnostics.tracing import traced
+from memory import lifecycle
+from memory.neo4j_store import sanitize_relation
+
+# Same graph model as Neo4j: an edge is unique per (src, relation, dst, user_id);
+# nodes are shared across users. Indexes cover the hot paths: per-user recency
+# (activation anchors), per-user src/dst (spreading, logic bomb) and relation scans.
+# Edges are deleted by `id` (the dreamer, the collector): AUTOINCREMENT ids are
+# never reused, unlike rowids, which deletes free up and VACUUM renumbers.
+_EDGES_TABLE = """
+CREATE TABLE IF NOT EXISTS edges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    src TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    confidence REAL,
+    turn_id INTEGER,
+    source_text TEXT,
+    first_seen INTEGER,
+    last_updated INTEGER,
+    UNIQUE (src, relation, dst, user_id)
+)"""
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    type TEXT,
+    last_seen INTEGER
+);
+{_EDGES_TABLE};
+CREATE INDEX IF NOT EXISTS idx_edges_user_src ON edges (user_id, src);
+CREATE INDEX IF NOT EXISTS idx_edges_user_updated ON edges (user_id, last_updated);
+CREATE INDEX IF NOT EXISTS idx_edges_relation ON edges (relation);
+CREATE INDEX IF NOT EXISTS idx_edges_dst ON edges (dst, user_id);
+"""
+
+_UPSERT_EDGE = """
+    INSERT INTO edges (src, relation, dst, user_id, confidence, turn_id, source_text, first_seen, last_updated)
+    VALUES (:src, :relation, :dst, :user_id, :confidence, :turn_id, :source_text, :last_updated, :last_updated)
+    ON CONFLICT (src, relation, dst, user_id) DO UPDATE SET
+        confidence = confidence + (1.0 - confidence) * 0.2,
+        last_updated = excluded.last_updated,
+        turn_id = excluded.turn_id
+"""
+# bulk_insert_edges(idempotent=True): the same edge again with the same turn_id is a replayed write, left as is
+_REPLAY_SAFE_UPSERT_EDGE = _UPSERT_EDGE + "    WHERE excluded.turn_id IS NULL OR edges.turn_id IS NOT excluded.turn_id\n"
+_INSERT_NODE = "INSERT OR IGNORE INTO nodes (id) VALUES (?)"
+_EDGE_COLUMNS = ("src", "relation", "dst", "user_id", "confidence", "turn_id", "source_text", "first_seen", "last_updated")
+
+# --- Shared connections: one per thread and database file, schema created once per file ---
+_local = threading.local()
+_initialized = set()
+_generation = 0
+_conn_lock = threading.Lock()
+
+
+def _close_all(connections: Dict[str, sqlite3.Connection]) -> None:
+    for conn in list(connections.values()):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+class _ThreadConnections:
+    """One thread's connections by file; closed when the thread ends and its locals are dropped."""
+
+    def __init__(self):
+        self.by_path: Dict[str, sqlite3.Connection] = {}
+        self.generation = _generation
+        weakref.finalize(self, _close_all, self.by_path)
+
+
+_pools: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()   # every live thread's, for reset_connections()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    pool = getattr(_local, "pool", None)
+    if pool is None or pool.generation != _generation:
+        pool = _local.pool = _ThreadConnections()
+        with _conn_lock:
+            _pools.add(pool)
+    cache = pool.by_path
+
+    key = str(path)
+    conn = cache.get(key)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; multi-statement writes open explicit transactions
+        conn = sqlite3.connect(key, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")      # readers don't block the slow-pipe writer
+        conn.execute("PRAGMA synchronous=NORMAL")    # durable at checkpoints; safe with WAL
+        conn.execute("PRAGMA foreign_keys=OFF")
+        conn.create_function("decayed_confidence", 3, lifecycle.decayed_confidence)
+        with _conn_lock:
+            if key not in _initialized:
+                _add_edge_ids(conn)
+                conn.executescript(SCHEMA)
+                _initialized.add(key)
+        cache[key] = conn
+    return conn
+
+
+def _add_edge_ids(conn: sqlite3.Connection) -> None:
+    """Migrate a file from before edges had an `id` column: copy them into a new table, in rowid order."""
+    columns = [r["name"] for r in conn.execute("PRAGMA table_info(edges)")]
+    if not columns or "id" in columns:
+        return
+    edge_columns = ", ".join(_EDGE_COLUMNS)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if "id" in [r["name"] for r in conn.execute("PRAGMA table_info(edges)")]:
+            return  # another process migrated it first
+        conn.execute("ALTER TABLE edges RENAME TO edges_without_ids")
+        conn.execute(_EDGES_TABLE)
+        conn.execute(
+            f"INSERT INTO edges ({edge_columns}) SELECT {edge_columns} FROM edges_without_ids ORDER BY rowid"
+        )
+        conn.execute("DROP TABLE edges_without_ids")  # and its indexes; SCHEMA recreates them
+
+
+def reset_connections():
+    """Close every pooled connection (before the database file is deleted, or on shutdown)."""
+    global _generation
+    with _conn_lock:
+        pools = list(_pools)
+        _pools.clear()
+        _initialized.clear()
+        _generation += 1
+    for pool in pools:
+        _close_all(pool.by_path)
+# ---
+
+_clock_lock = threading.Lock()
+_last_ms = 0
+
+
+def _now_ms() -> int:
+    """Epoch ms, strictly increasing within the process so recency order is never a tie."""
+    global _last_ms
+    with _clock_lock:
+        _last_ms = max(int(time.time() * 1000), _last_ms + 1)
+        return _last_ms
+
+
+class SQLiteMemoryStore:
+    """
+    In-process graph store on SQLite (WAL), with the Neo4jMemoryStore
+    interface and result shapes. Selected with GRAPH_BACKEND=sqlite for
+    single-node deployments and server-less tests.
+    """
+
+    def __init__(self, db_path: Union[str, Path, None] = None):
+        self.db_path = Path(db_path) if db_path else SQLITE_DB_PATH
+        _connect(self.db_path)  # creates the file and schema up front
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's pooled connection, so a store can be shared across threads."""
+        return _connect(self.db_path)
+
+    def close(self):
+        """No-op: connections are pooled per thread; use reset_connections() to close them."""
+
+    @traced("sqlite.upsert_node")
+    def upsert_node(self, node_id: str, node_type: str):
+        """Insert or update a node."""
+        self.conn.execute(
+            """
+            INSERT INTO nodes (id, type, last_seen) VALUES (?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET type = excluded.type, last_seen = excluded.last_seen
+            """,
+            (node_id, node_type, _now_ms()),
+        )
+
+    @traced("sqlite.bulk_upsert_nodes")
+    def bulk_upsert_nodes(self, nodes: list, batch_size: int = 5000) -> int:
+        """Insert or update many {"id", "type"} nodes, one transaction per batch."""
+        now = _now_ms()
+        rows = [(n["id"], n.get("type", "unknown"), now) for n in nodes]
+        for start in range(0, len(rows), batch_size):
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(
+                    """
+                    INSERT INTO nodes (id, type, last_seen) VALUES (?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET type = excluded.type, last_seen = excluded.last_seen
+                    """,
+                    rows[start:start + batch_size],
+                )
+        return len(rows)
+
+    @staticmethod
+    def _edge_row(edge: dict, last_updated: Optional[int] = None) -> Dict:
+        return {
+            "src": edge["src"],
+            "relation": sanitize_relation(edge["relation"]),
+            "dst": edge["dst"],
+            "user_id": edge.get("user_id") or "unknown",
+            "confidence": edge.get("confidence", 0.75),
+            "turn_id": edge.get("turn_id"),
+            "source_text": edge.get("source_text"),
+            "last_updated": edge.get("last_updated") or last_updated or _now_ms(),
+        }
+
+    @traced("sqlite.insert_edge")
+    def insert_edge(self, edge: dict):
+        """Insert an edge (creating both nodes); a repeated fact reinforces its confidence."""
+        row = self._edge_row(edge)
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(_INSERT_NODE, ((row["src"],), (row["dst"],)))
+            self.conn.execute(_UPSERT_EDGE, row)
+
+    @traced("sqlite.bulk_insert")
+    def bulk_insert_edges(self, edges: list, batch_size: int = 5000, idempotent: bool = False) -> int:
+        """
+        Insert many edges, one transaction per batch (same upsert semantics as
+        insert_edge). An optional `last_updated` (epoch ms) per edge is kept.
+        With idempotent, an edge already stored with the same turn_id is not
+        reinforced again (a batch replayed by a resumed ingest).
+        Returns the number of edges written.
+        """
+        upsert = _REPLAY_SAFE_UPSERT_EDGE if idempotent else _UPSERT_EDGE
+        for start in range(0, len(edges), batch_size):
+            now = _now_ms()
+            rows = [self._edge_row(edge, now) for edge in edges[start:start + batch_size]]
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(_INSERT_NODE, ((n,) for row in rows for n in (row["src"], row["dst"])))
+                self.conn.executemany(upsert, rows)
+        return len(edges)
+
+    @traced("sqlite.activation")
+    def retrieve_context_with_activation(self, user_id: str, limit: int = 15) -> list:
+        """
+        Spreading Activation Retrieval (same result shape as Neo4j):
+        the user's 5 most recent facts (depth 0), then up to 10 of the user's
+        edges reaching a new node from one of their endpoints (depth 1, half score).
+        Scores are confidences decayed by age (memory.lifecycle); the spread
+        keeps the strongest. At most `limit` rows in all, direct ones first.
+        """
+        now = lifecycle.now_ms()
+        direct = self.conn.execute(
+            """
+            SELECT src, relation, dst, decayed_confidence(confidence, last_updated, ?) AS decayed,
+                   turn_id, last_updated FROM edges
+            WHERE user_id = ? ORDER BY last_updated DESC LIMIT ?
+            """,
+            (now, user_id, max(0, min(5, limit))),
+        ).fetchall()
+        results = [self._activation_row(r["src"], r["dst"], r, r["decayed"], 0) for r in direct]
+
+        anchors = sorted({r["src"] for r in direct} | {r["dst"] for r in direct})
+        spread_limit = min(10, limit - len(results))
+        if not anchors or spread_limit <= 0:
+            return results
+
+        marks = ",".join("?" * len(anchors))
+        spread_rows = self.conn.execute(
+            f"""
+            SELECT anchor, neighbor, relation, decayed_confidence(confidence, last_updated, ?) AS decayed,
+                   turn_id, last_updated FROM (
+                SELECT src AS anchor, dst AS neighbor, relation, confidence, turn_id, last_updated FROM edges
+                WHERE user_id = ? AND src IN ({marks}) AND dst NOT IN ({marks})
+                UNION ALL
+                SELECT dst AS anchor, src AS neighbor, relation, confidence, turn_id, last_updated FROM edges
+                WHERE user_id = ? AND dst IN ({marks}) AND src NOT IN ({marks})
+            )
+            ORDER BY decayed DESC
+            LIMIT ?
+            """,
+            (now, user_id, *anchors, *anchors, user_id, *anchors, *anchors, spread_limit),
+        ).fetchall()
+        results.extend(
+            self._activation_row(r["anchor"], r["neighbor"], r, r["decayed"] * 0.5, 1) for r in spread_rows
+        )
+        return results
+
+    @staticmethod
+    def _activation_row(src: str, dst: str, row: sqlite3.Row, score: float, depth: int) -> Dict:
+        return {
+            "src": src,
+            "relation": row["relation"],
+            "dst": dst,
+            "score": score,
+            "depth": depth,
+            "turn_id": row["turn_id"],
+            "last_updated": row["last_updated"],
+        }
+
+    def retrieve_context(self, user_id: str, limit: int = 10) -> list:
+        # Backward compatibility wrapper
+        return self.retrieve_context_with_activation(user_id, limit)
+
+    @traced("sqlite.related_nodes")
+    def get_related_nodes(self, entity_id: str) -> list:
+        """Find immediate neighbors of an entity."""
+        rows = self.conn.execute(
+            """
+            SELECT dst AS neighbor, relation FROM edges WHERE src = ?
+            UNION ALL
+            SELECT src AS neighbor, relation FROM edges WHERE dst = ?
+            LIMIT 20
+            """,
+            (entity_id, entity_id),
+        ).fetchall()
+        return [{"neighbor": r["neighbor"], "relation": r["relation"]} for r in rows]
+
+    @traced("sqlite.recent_facts")
+    def get_recent_facts(self, src: str, user_id: str = None, limit: int = 3) -> list:
+        """Most recently updated facts touching `src` (owned by `user_id`, if given), newest first."""
+        user_filter = "" if user_id is None else "AND user_id = :user_id"
+        rows = self.conn.execute(
+            f"""
+            SELECT relation, dst AS other, last_updated FROM edges WHERE src = :src {user_filter}
+            UNION ALL
+            SELECT relation, src AS other, last_updated FROM edges WHERE dst = :src {user_filter}
+            ORDER BY last_updated DESC
+            LIMIT :limit
+            """,
+            {"src": src, "user_id": user_id, "limit": limit},
+        ).fetchall()
+        return [{"src": src, "relation": r["relation"], "dst": r["other"]} for r in rows]
+
+    @traced("sqlite.dense_entities")
+    def find_dense_entities(self, min_degree: int = 4, limit: int = 3) -> list:
+        """Entities with the most edges (the dreamer's "cognitive load" scan), densest first."""
+        rows = self.conn.execute(
+            """
+            SELECT entity, COUNT(*) AS degree
+            FROM (SELECT src AS entity FROM edges UNION ALL SELECT dst AS entity FROM edges)
+            GROUP BY entity
+            HAVING degree >= ?
+            ORDER BY degree DESC
+            LIMIT ?
+            """,
+            (min_degree, limit),
+        ).fetchall()
+        return [{"entity": r["entity"], "degree": r["degree"]} for r in rows]
+
+    @traced("sqlite.entity_degrees")
+    def entity_degrees(self, user_id: str, entity_ids: list) -> Dict[str, int]:
+        """How many of the user's edges touch each entity (index lookups only; absent = 0)."""
+        degrees = {}
+        entity_ids = list(entity_ids)
+        for start in range(0, len(entity_ids), 500):
+            chunk = entity_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"""
+                SELECT entity, count(*) AS degree FROM (
+                    SELECT src AS entity FROM edges WHERE user_id = ? AND src IN ({marks})
+                    UNION ALL
+                    SELECT dst AS entity FROM edges WHERE user_id = ? AND dst IN ({marks})
+                ) GROUP BY entity
+                """,
+                [user_id, *chunk, user_id, *chunk],
+            ).fetchall()
+            degrees.update((r["entity"], r["degree"]) for r in rows)
+        return degrees
+
+    @traced("sqlite.entity_facts")
+    def get_entity_facts(self, entity_id: str, limit: int = 10, user_id: str = None) -> list:
+        """Edges touching an entity (only the user's, if given), as the dreamer consumes them (edge_id feeds delete_edges)."""
+        rows = self.conn.execute(
+            """
+            SELECT id AS edge_id, relation AS rel, dst AS neighbor, source_text AS text, user_id FROM edges
+            WHERE src = :id AND (:user_id IS NULL OR user_id = :user_id)
+            UNION ALL
+            SELECT id AS edge_id, relation AS rel, src AS neighbor, source_text AS text, user_id FROM edges
+            WHERE dst = :id AND (:user_id IS NULL OR user_id = :user_id)
+            LIMIT :limit
+            """,
+            {"id": entity_id, "user_id": user_id, "limit": limit},
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    @traced("sqlite.delete_edges")
+    def delete_edges(self, edge_ids: list) -> int:
+        """Delete edges by the ids get_entity_facts or collectable_edges returned. Returns the number deleted."""
+        if not edge_ids:
+            return 0
+        with self.conn:
+            cursor = self.conn.execute(
+                f"DELETE FROM edges WHERE id IN ({','.join('?' * len(edge_ids))})", list(edge_ids)
+            )
+        return cursor.rowcount
+
+    def user_ids(self) -> List[str]:
+        """Every user owning at least one edge."""
+        return [r[0] for r in self.conn.execute("SELECT DISTINCT user_id FROM edges").fetchall()]
+
+    @traced("sqlite.collectable_edges")
+    def collectable_edges(
+        self, user_id: str, min_confidence: float, max_edges: int, now: int, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        The user's edges the memory collector should remove, as dump_graph rows
+        plus `edge_id` (for delete_edges) and `decayed`: those decayed below
+        min_confidence, then those ranked (by decayed confidence) below the
+        user's best `max_edges` (0 = no cap); the weakest first, at most `limit`.
+        """
+        columns = ", ".join(_EDGE_COLUMNS)
+        rows = self.conn.execute(
+            f"""
+            WITH scored AS (
+                SELECT id AS edge_id, {columns}, decayed_confidence(confidence, last_updated, :now) AS decayed
+                FROM edges WHERE user_id = :user_id
+            ), ranked AS (
+                SELECT *, decayed < :min_confidence AS expired, ROW_NUMBER() OVER (
+                    PARTITION BY decayed < :min_confidence ORDER BY decayed DESC, last_updated DESC
+                ) AS ranking
+                FROM scored
+            )
+            SELECT edge_id, {columns}, decayed FROM ranked
+            WHERE expired OR (:max_edges > 0 AND ranking > :max_edges)
+            ORDER BY expired DESC, decayed, last_updated
+            LIMIT :limit
+            """,
+            {
+                "user_id": user_id, "now": now, "min_confidence": min_confidence,
+                "max_edges": max_edges, "limit": -1 if limit is None else limit,
+            },
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    @traced("sqlite.apply_consolidation")
+    def apply_consolidation(self, new_edges: list, delete_edge_ids: list) -> Dict[str, int]:
+        """
+        Apply a dream pass in one transaction: delete the summarized edges (ids
+        from get_entity_facts), then insert the summary edges with insert_edge
+        semantics. Either all of it is written or none. Returns {"inserted", "deleted"}.
+        """
+        ids = list(dict.fromkeys(delete_edge_ids))
+        rows = [self._edge_row(edge) for edge in new_edges]
+        deleted = 0
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                deleted += self.conn.execute(
+                    f"DELETE FROM edges WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).rowcount
+            self.conn.executemany(_INSERT_NODE, ((n,) for row in rows for n in (row["src"], row["dst"])))
+            self.conn.executemany(_UPSERT_EDGE, rows)
+        return {"inserted": len(rows), "deleted": deleted}
+
+    def export_graph(self) -> Dict[str, list]:
+        """Every node and edge, in the shape the web UI's graph view expects."""
+        nodes = [{"id": r["id"], "group": 1} for r in self.conn.execute("SELECT id FROM nodes")]
+        links = [
+            {"source": r["src"], "target": r["dst"], "label": r["relation"]}
+            for r in self.conn.execute("SELECT src, dst, relation FROM edges")
+        ]
+        return {"nodes": nodes, "links": links}
+
+    @traced("sqlite.dump")
+    def dump_graph(self, user_ids: list = None) -> Dict[str, list]:
+        """
+        Every node and edge with all stored properties, read in one transaction
+        (a consistent point-in-time copy). With user_ids, only those users'
+        edges and the nodes they touch.
+        """
+        columns = ", ".join(_EDGE_COLUMNS)
+        with self.conn:
+            self.conn.execute("BEGIN")
+            if user_ids is None:
+                edges = self.conn.execute(f"SELECT {columns} FROM edges").fetchall()
+                nodes = self.conn.execute("SELECT id, type, last_seen FROM nodes").fetchall()
+            else:
+                marks = ",".join("?" * len(user_ids))
+                edges = self.conn.execute(f"SELECT {columns} FROM edges WHERE user_id IN ({marks})", list(user_ids)).fetchall()
+                nodes = self.conn.execute(
+                    f"""
+                    SELECT id, type, last_seen FROM nodes WHERE id IN (
+                        SELECT src FROM edges WHERE user_id IN ({marks})
+                        UNION SELECT dst FROM edges WHERE user_id IN ({marks})
+                    )
+                    """,
+                    list(user_ids) * 2,
+                ).fetchall()
+        return {"nodes": [dict(r) for r in nodes], "edges": [dict(r) for r in edges]}
+
+    @traced("sqlite.restore")
+    def restore_graph(self, nodes: list, edges: list, user_ids: list = None, batch_size: int = 5000) -> int:
+        """
+        Replace the graph (only the given users' edges when user_ids is set)
+        with exactly these rows, as dump_graph returned them: no reinforcement,
+        timestamps kept. One transaction, so readers see the old or the new state.
+        """
+        columns = ", ".join(_EDGE_COLUMNS)
+        placeholders = ", ".join(f":{c}" for c in _EDGE_COLUMNS)
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if user_ids is None:
+                self.conn.execute("DELETE FROM edges")
+                self.conn.execute("DELETE FROM nodes")
+            else:
+                marks = ",".join("?" * len(user_ids))
+                self.conn.execute(f"DELETE FROM edges WHERE user_id IN ({marks})", list(user_ids))
+            for start in range(0, max(len(nodes), len(edges)), batch_size):
+                self.conn.executemany(
+                    """
+                    INSERT INTO nodes (id, type, last_seen) VALUES (:id, :type, :last_seen)
+                    ON CONFLICT (id) DO UPDATE SET type = excluded.type, last_seen = excluded.last_seen
+                    """,
+                    nodes[start:start + batch_size],
+                )
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO edges ({columns}) VALUES ({placeholders})", edges[start:start + batch_size]
+                )
+        return len(edges)
+
+    @traced("sqlite.wipe")
+    def wipe_database(self):
+        """Delete all nodes and relationships."""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM edges")
+            self.conn.execute("DELETE FROM nodes")
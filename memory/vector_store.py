@@ -1,8 +1,14 @@
 # memory/vector_store.py
 
-import chromadb
-import chromadb.utils.embedding_functions as embedding_functions
-from config import CHROMA_DIR, EMBEDDING_MODEL
+import hashlib
+import threading
+from collections import OrderedDict
+
+from typing import Callable, Iterable, List, Tuple
+
+from config import CHROMA_DIR, EMBEDDING_MODEL, VECTOR_BATCH_SIZE, VECTOR_PARTITION_HANDLES, VECTOR_PARTITIONING
+from diagnostics.tracing import traced
+from memory import lifecycle
 
 # --- Singleton pattern for Chroma client ---
 _client = None
@@ -11,6 +17,7 @@ def _get_client():
     """Get a singleton ChromaDB client."""
     global _client
     if _client is None:
+        import chromadb  # deferred: ~1s import, only needed once memory is touched
         CHROMA_DIR.mkdir(parents=True, exist_ok=True)
         _client = chromadb.PersistentClient(path=str(CHROMA_DIR))
     return _client
@@ -20,62 +27,349 @@ def reset_client():
     """Drop the Chroma client so the next use creates a fresh one (e.g. after wipe)."""
     global _client
     _client = None
+    with _partitions_lock:
+        _partitions.clear()
+        _legacy_drained.clear()
+# ---
+
+# --- Open per-user collections (LRU-bounded), shared by every store instance ---
+_partitions: "OrderedDict[tuple, object]" = OrderedDict()
+_partitions_lock = threading.Lock()
+_legacy_drained = set()   # shared collections known to hold no un-partitioned memories
+
+
+def partition_name(collection_name: str, user_id: str) -> str:
+    """Collection holding one user's memories (Chroma names allow only [a-zA-Z0-9._-])."""
+    return f"{collection_name}__{hashlib.md5(user_id.encode()).hexdigest()[:16]}"
+
+
+def _forget_partitions(client, collection_name: str, user_ids: List[str] = None):
+    """Drop cached handles (all of the collection's, or just these users') after their collections were deleted."""
+    with _partitions_lock:
+        for key in list(_partitions):
+            if key[:2] == (id(client), collection_name) and (user_ids is None or key[2] in user_ids):
+                del _partitions[key]
+        _legacy_drained.discard((id(client), collection_name))
+# ---
+
+# --- Singleton pattern for the embedding model ---
+_embedding_function = None
+_embedding_lock = threading.Lock()
+
+def get_embedding_function():
+    """
+    Get a singleton SentenceTransformer embedding function.
+    Loading bge-small is expensive, so every store and cache shares one instance
+    (the lock keeps server warmup and an early request from loading it twice).
+    """
+    global _embedding_function
+    with _embedding_lock:
+        if _embedding_function is None:
+            import chromadb.utils.embedding_functions as embedding_functions
+            # Explicitly specify device='cpu' to avoid torch meta tensor errors
+            _embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=EMBEDDING_MODEL,
+                device='cpu'
+            )
+        return _embedding_function
 # ---
 
+def unique_memories(texts: List[str], metadatas: List[dict], doc_id: Callable[[str, str], str]) -> List[Tuple[str, str, dict]]:
+    """(doc_id, text, metadata) per distinct memory, in first-seen order; a repeat's metadata wins (as upsert would)."""
+    if len(texts) != len(metadatas):
+        raise ValueError(f"{len(texts)} texts but {len(metadatas)} metadatas")
+    unique = {}
+    for text, metadata in zip(texts, metadatas):
+        key = doc_id(metadata.get("user_id", "unknown"), text)
+        unique[key] = (key, text, metadata)
+    return list(unique.values())
+
+
+# search() asks Chroma for this many times n_results, then re-ranks them by decayed confidence
+_DECAY_CANDIDATES = 4
+
+
+def _rank_by_decay(hits: Iterable[tuple], n_results: int) -> dict:
+    """
+    The n_results best (distance, document, metadata) hits as a search result,
+    ranked by similarity, 1 / (1 + distance) whatever the collection's metric,
+    times the chunk's decayed confidence (memory.lifecycle; chunks without a
+    confidence start at full strength, as in the collector).
+    """
+    now = lifecycle.now_ms()
+
+    def strength(hit):
+        distance, _, metadata = hit
+        metadata = metadata or {}
+        decayed = lifecycle.decayed_confidence(metadata.get("confidence", 1.0), metadata.get("last_updated"), now)
+        return decayed / (1.0 + max(0.0, distance))
+
+    hits = sorted(hits, key=strength, reverse=True)[:n_results]
+    return {
+        "documents": [[h[1] for h in hits]],
+        "metadatas": [[h[2] for h in hits]],
+        "distances": [[h[0] for h in hits]],
+    }
+
+
 class VectorMemoryStore:
     """
-    A wrapper around a ChromaDB collection for vector-based memory storage and retrieval.
+    A wrapper around ChromaDB for vector-based memory storage and retrieval.
+    With VECTOR_PARTITIONING each user gets their own collection, created on
+    first use, so a search only touches the caller's memories.
     """
-    def __init__(self, collection_name: str = "neuro_symbolic_memory"):
+    @traced("chroma.open")
+    def __init__(self, collection_name: str = "neuro_symbolic_memory", embedding_function=None):
         self.client = _get_client()
-        
-        # Use the SentenceTransformer embedding function from chromadb utils
+        self.collection_name = collection_name
+        self.partitioned = VECTOR_PARTITIONING
+
+        # Use the shared SentenceTransformer embedding function from chromadb utils
         # This will handle downloading and using the model specified in config.
-        # Explicitly specify device='cpu' to avoid torch meta tensor errors
-        st_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBEDDING_MODEL,
-            device='cpu'
-        )
+        self.embedding_function = embedding_function or get_embedding_function()
+        self._collection = None
+
+    @property
+    def collection(self):
+        """The shared collection (every memory when unpartitioned; pre-partitioning data otherwise)."""
+        if self._collection is None:
+            self._collection = self.client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
+        return self._collection
 
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            embedding_function=st_ef
+    def partition(self, user_id: str):
+        """The user's collection, opened through the LRU of handles."""
+        key = (id(self.client), self.collection_name, user_id)
+        with _partitions_lock:
+            collection = _partitions.get(key)
+            if collection is not None:
+                _partitions.move_to_end(key)
+                return collection
+
+        collection = self.client.get_or_create_collection(
+            name=partition_name(self.collection_name, user_id),
+            metadata={"user_id": user_id, "partition_of": self.collection_name},
+            embedding_function=self.embedding_function,
         )
+        self._adopt_legacy(user_id, collection)
+        with _partitions_lock:
+            _partitions[key] = collection
+            while len(_partitions) > VECTOR_PARTITION_HANDLES:
+                _partitions.popitem(last=False)
+        return collection
+
+    def _adopt_legacy(self, user_id: str, collection):
+        """Move the user's memories from the shared collection into their partition (once)."""
+        if (id(self.client), self.collection_name) in _legacy_drained:
+            return
+        try:
+            legacy = self.client.get_collection(self.collection_name, embedding_function=self.embedding_function)
+        except Exception:
+            _legacy_drained.add((id(self.client), self.collection_name))  # never existed
+            return
+        if legacy.count() == 0:
+            _legacy_drained.add((id(self.client), self.collection_name))
+            return
+        found = legacy.get(where={"user_id": user_id}, include=["embeddings", "documents", "metadatas"])
+        if found["ids"]:
+            collection.upsert(
+                ids=found["ids"],
+                embeddings=found["embeddings"],
+                documents=found["documents"],
+                metadatas=found["metadatas"],
+            )
+            legacy.delete(ids=found["ids"])
+
+    def _collection_for(self, user_id: str):
+        return self.partition(user_id) if self.partitioned else self.collection
 
     def _compute_doc_id(self, user_id: str, text: str) -> str:
         """Generate deterministic ID for vector memory."""
-        import hashlib
         content = f"{user_id}:{text.strip()}"
         return hashlib.md5(content.encode()).hexdigest()
 
+    @traced("chroma.add")
     def add_memory(self, text: str, metadata: dict):
         """Add a memory chunk (text) to the vector store."""
-        
-        user_id = metadata.get("user_id", "unknown")
-        doc_id = self._compute_doc_id(user_id, text)
-        
-        # Use upsert to handle duplicates (ChromaDB supports upsert)
-        self.collection.upsert(
-            documents=[text],
-            metadatas=[metadata],
-            ids=[doc_id]
-        )
+        self.add_memories([text], [metadata])
+
+    @traced("chroma.add_batch")
+    def add_memories(self, texts: List[str], metadatas: List[dict], batch_size: int = None) -> int:
+        """
+        Add many memory chunks at once: duplicates (same user and text) collapse
+        to one, embeddings are computed `batch_size` texts per model call and
+        each batch is upserted per collection. Returns the number of distinct memories.
+        """
+        batch_size = batch_size or VECTOR_BATCH_SIZE
+        unique = unique_memories(texts, metadatas, self._compute_doc_id)
+        for start in range(0, len(unique), batch_size):
+            batch = unique[start:start + batch_size]
+            embeddings = self.embedding_function([text for _, text, _ in batch])
+
+            groups = {}
+            for (doc_id, text, metadata), embedding in zip(batch, embeddings):
+                user_id = metadata.get("user_id", "unknown") if self.partitioned else None
+                group = groups.setdefault(user_id, {"ids": [], "embeddings": [], "documents": [], "metadatas": []})
+                group["ids"].append(doc_id)
+                group["embeddings"].append(embedding)
+                group["documents"].append(text)
+                group["metadatas"].append(metadata)
+
+            # Use upsert to handle duplicates (ChromaDB supports upsert)
+            for user_id, group in groups.items():
+                collection = self.partition(user_id) if user_id is not None else self.collection
+                collection.upsert(**group)
+        return len(unique)
+
+    def _owned_collections(self) -> List[str]:
+        """Names of the shared collection and every user partition of it that exist."""
+        prefix = f"{self.collection_name}__"
+        return [
+            c.name for c in self.client.list_collections()
+            if c.name == self.collection_name or c.name.startswith(prefix)
+        ]
+
+    @staticmethod
+    def _get_all(collection, where: dict = None, page_size: int = 5000, include: Tuple[str, ...] = None) -> dict:
+        include = list(include or ("embeddings", "documents", "metadatas"))
+        found = {key: [] for key in ["ids", *include]}
+        offset = 0
+        while True:
+            page = collection.get(where=where, limit=page_size, offset=offset, include=include)
+            for key in found:
+                found[key].extend(page[key])
+            if len(page["ids"]) < page_size:
+                return found
+            offset += page_size
 
+    @traced("chroma.dump")
+    def dump_vectors(self, user_ids: List[str] = None) -> dict:
+        """
+        Every stored memory with its embedding (only the given users' when
+        user_ids is set), as {"ids", "documents", "metadatas", "embeddings"}.
+        """
+        if user_ids is not None and self.partitioned:
+            collections = [(self.partition(user_id), None) for user_id in user_ids]
+        elif user_ids is not None:
+            collections = [(self.collection, {"user_id": {"$in": list(user_ids)}})]
+        else:
+            collections = [
+                (self.client.get_collection(name, embedding_function=self.embedding_function), None)
+                for name in self._owned_collections()
+            ]
+
+        dump = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        for collection, where in collections:
+            found = self._get_all(collection, where)
+            for key in dump:
+                dump[key].extend(found[key])
+        return dump
+
+    def user_ids(self) -> List[str]:
+        """Every user with stored memories (partitions record their owner in the collection metadata)."""
+        users = set()
+        for name in self._owned_collections():
+            if name == self.collection_name:
+                found = self._get_all(self.collection, include=("metadatas",))
+                users.update(m.get("user_id", "unknown") for m in found["metadatas"])
+            else:
+                collection = self.client.get_collection(name, embedding_function=self.embedding_function)
+                if collection.count():
+                    users.add((collection.metadata or {}).get("user_id", "unknown"))
+        return sorted(users)
+
+    def list_memories(self, user_id: str) -> dict:
+        """The user's memories without embeddings, as {"ids", "documents", "metadatas"}."""
+        where = None if self.partitioned else {"user_id": user_id}
+        return self._get_all(self._collection_for(user_id), where, include=("documents", "metadatas"))
+
+    @traced("chroma.delete")
+    def delete_memories(self, ids: List[str], user_id: str, batch_size: int = 5000) -> int:
+        """Delete the user's memories by id, in chunks. Returns the number of ids asked for."""
+        collection = self._collection_for(user_id)
+        batch_size = min(batch_size, self.client.get_max_batch_size())
+        for start in range(0, len(ids), batch_size):
+            collection.delete(ids=list(ids[start:start + batch_size]))
+        return len(ids)
+
+    @traced("chroma.restore")
+    def restore_vectors(self, dump: dict, user_ids: List[str] = None, batch_size: int = 5000) -> int:
+        """
+        Replace the stored memories (only the given users' when user_ids is set)
+        with a dump_vectors() result, writing the saved embeddings as they are:
+        nothing is re-embedded.
+        """
+        if user_ids is None:
+            for name in self._owned_collections():
+                self.client.delete_collection(name)
+            self._collection = None
+        else:
+            for user_id in user_ids:
+                try:
+                    self.client.delete_collection(partition_name(self.collection_name, user_id))
+                except Exception:
+                    pass  # the user had no partition yet
+            if self.collection_name in self._owned_collections():
+                self.collection.delete(where={"user_id": {"$in": list(user_ids)}})
+        _forget_partitions(self.client, self.collection_name, user_ids)
+
+        groups = {}
+        for row in zip(dump["ids"], dump["documents"], dump["metadatas"], dump["embeddings"]):
+            user_id = row[2].get("user_id", "unknown") if self.partitioned else None
+            groups.setdefault(user_id, []).append(row)
+        batch_size = min(batch_size, self.client.get_max_batch_size())
+        for user_id, rows in groups.items():
+            collection = self.partition(user_id) if user_id is not None else self.collection
+            for start in range(0, len(rows), batch_size):
+                ids, documents, metadatas, embeddings = zip(*rows[start:start + batch_size])
+                collection.upsert(
+                    ids=list(ids), documents=list(documents), metadatas=list(metadatas), embeddings=list(embeddings)
+                )
+        return len(dump["ids"])
+
+    @traced("chroma.search")
     def search(self, query_text: str, n_results: int = 5, user_id: str = None) -> dict:
         """
         Search for memory chunks similar to the query text.
         Optionally filter by user_id for session isolation.
+        Ranked by similarity times decayed confidence (see _rank_by_decay).
         """
         try:
-            where = None
-            if user_id:
-                where = {"user_id": user_id}
-            
-            return self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results,
-                where=where,
+            candidates = n_results * _DECAY_CANDIDATES
+            if user_id and self.partitioned:
+                # The partition holds only this user's memories: no filter, no fleet-wide index
+                result = self.partition(user_id).query(query_texts=[query_text], n_results=candidates)
+            elif self.partitioned:
+                return self._search_all(query_text, n_results)
+            else:
+                where = None
+                if user_id:
+                    where = {"user_id": user_id}
+
+                result = self.collection.query(
+                    query_texts=[query_text],
+                    n_results=candidates,
+                    where=where,
+                )
+            return _rank_by_decay(
+                zip(result["distances"][0], result["documents"][0], result["metadatas"][0]), n_results
             )
         except Exception:
             # Return empty results on failure to prevent crashes
-            return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
\ No newline at end of file
+            return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+    def _search_all(self, query_text: str, n_results: int) -> dict:
+        """Unscoped search (admin/debug only): fans out to every partition and merges the candidates."""
+        embedding = self.embedding_function([query_text])
+        prefix = f"{self.collection_name}__"
+        hits = []
+        for info in self.client.list_collections():
+            if info.name != self.collection_name and not info.name.startswith(prefix):
+                continue
+            result = self.client.get_collection(info.name, embedding_function=self.embedding_function).query(
+                query_embeddings=embedding, n_results=n_results * _DECAY_CANDIDATES
+            )
+            hits.extend(zip(result["distances"][0], result["documents"][0], result["metadatas"][0]))
+        return _rank_by_decay(hits, n_results)
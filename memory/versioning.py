@@ -0,0 +1,123 @@
+# memory/versioning.py
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from diagnostics.logger import log_event
+
+# Invalidation listener: (user_id or None for "everyone", new epoch, reason)
+Listener = Callable[[Optional[str], int, str], None]
+
+
+class MemoryVersions:
+    """
+    Per-user memory epoch counter and in-process invalidation bus.
+    Every persisted write bumps the user's epoch, so anything derived from
+    that user's memory can be tagged with the epoch it was computed at and
+    treated as stale as soon as the number moves. Caches that prefer to be
+    told can subscribe() and drop entries eagerly.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._generation = 0  # bumped by wipes; folded into every version
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> int:
+        """Current epoch for a user (0 if the user never wrote anything)."""
+        with self._lock:
+            return (self._generation << 32) + self._versions.get(user_id, 0)
+
+    def bump(self, user_id: str, reason: str = "write") -> int:
+        """Record a write for a user, notify listeners and return the new epoch."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            epoch = (self._generation << 32) + self._versions[user_id]
+        self._publish(user_id, epoch, reason)
+        return epoch
+
+    def bump_all(self, reason: str = "wipe") -> None:
+        """Invalidate every user at once (e.g. after a full wipe)."""
+        with self._lock:
+            self._generation += 1
+            self._versions.clear()
+            epoch = self._generation << 32
+        self._publish(None, epoch, reason)
+
+    def subscribe(self, listener: Listener) -> None:
+        """Register a callback fired after every bump (never under the lock)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _publish(self, user_id: Optional[str], epoch: int, reason: str) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(user_id, epoch, reason)
+            except Exception as e:
+                # A broken cache must never break a write
+                log_event("EPOCH_LISTENER_ERROR", error=str(e), reason=reason)
+
+
+class EpochCache:
+    """
+    Single-value-per-user cache that is correct by construction:
+    values are stored with the epoch they were computed at and are
+    dropped as soon as the bus reports a newer epoch for that user.
+    With ttl_seconds a value is also recomputed once it is that old, for
+    values that change with time alone (e.g. decayed confidences).
+    """
+
+    def __init__(self, name: str, versions: "MemoryVersions" = None, max_users: int = 1024, ttl_seconds: float = 0):
+        self.name = name
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._versions = versions or memory_versions
+        self._values: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._versions.subscribe(self._on_bump)
+
+    def _on_bump(self, user_id: Optional[str], epoch: int, reason: str) -> None:
+        with self._lock:
+            if user_id is None:
+                self._values.clear()
+            else:
+                self._values.pop(user_id, None)
+
+    def get_or_compute(self, user_id: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for the current epoch, computing it on a miss."""
+        epoch = self._versions.get(user_id)
+        with self._lock:
+            cached = self._values.get(user_id)
+            if cached is not None and cached[0] == epoch and not self._expired(cached[2]):
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        computed_at = time.monotonic()
+        value = compute()
+
+        with self._lock:
+            # Only store if no write landed while we were computing
+            if self._versions.get(user_id) == epoch:
+                if len(self._values) >= self.max_users and user_id not in self._values:
+                    self._values.pop(next(iter(self._values)))
+                self._values[user_id] = (epoch, value, computed_at)
+        return value
+
+    def _expired(self, computed_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - computed_at >= self.ttl_seconds
+
+
+# Global instance shared by the pipes
+memory_versions = MemoryVersions()
@@ -1,8 +1,12 @@
 # reasoning/__init__.py
 
-from .coref import resolve_coreference
-from .extractor import extract_graph_delta
+from lazy_imports import lazy_exports
 
-from .confidence import compute_confidence
-from .conflict import has_hard_conflict
-from .reranker import rerank_memories
+# Submodules load on first use (the reranker brings in cohere/sentence-transformers)
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "resolve_coreference": ".coref",
+    "extract_graph_delta": ".extractor",
+    "compute_confidence": ".confidence",
+    "has_hard_conflict": ".conflict",
+    "rerank_memories": ".reranker",
+})
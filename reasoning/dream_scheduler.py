@@ -0,0 +1,243 @@
+# reasoning/dream_scheduler.py
+
+"""
+Background scheduler for memory consolidation. Every DREAM_POLL_SECONDS it
+checks whether the LLM server is free (no interactive turn running or
+finished within DREAM_QUIET_SECONDS, CPU load under DREAM_MAX_LOAD, not
+paused) and, if so, starts a dream pass for users with dirty entities who
+have been idle for DREAM_IDLE_SECONDS or have DREAM_BACKLOG_ENTITIES
+pending. At most DREAM_MAX_CONCURRENT passes run at once, each limited to
+DREAM_RUN_BUDGET_SECONDS; a pass yields between clusters as soon as an
+interactive turn starts or the scheduler is paused, leaving the rest dirty.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import (
+    DREAM_BACKLOG_ENTITIES,
+    DREAM_IDLE_SECONDS,
+    DREAM_MAX_CONCURRENT,
+    DREAM_MAX_LOAD,
+    DREAM_POLL_SECONDS,
+    DREAM_QUIET_SECONDS,
+    DREAM_RUN_BUDGET_SECONDS,
+    DREAM_USER_COOLDOWN_SECONDS,
+)
+from diagnostics.logger import log_event
+from diagnostics.tracing import metrics
+from llm.accounting import usage_ledger
+from memory.consolidation_state import consolidation_state
+
+
+def load_per_cpu() -> Optional[float]:
+    """1-minute load average per CPU, or None where the OS doesn't report one (Windows)."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def _consolidate(user_id: str, **kwargs) -> Dict:
+    from reasoning.dreamer import consolidate_memories
+    return consolidate_memories(user_id, **kwargs)
+
+
+class DreamScheduler:
+    """
+    Starts dream passes on a small thread pool when the LLM is not serving
+    users. `tick()` makes one scheduling decision; `start()` calls it from a
+    background thread. The collaborators are injectable for tests.
+    """
+
+    def __init__(
+        self,
+        dream: Callable[..., Dict] = _consolidate,
+        state=None,
+        ledger=None,
+        load: Callable[[], Optional[float]] = load_per_cpu,
+        max_concurrent: int = DREAM_MAX_CONCURRENT,
+        poll_seconds: float = DREAM_POLL_SECONDS,
+        idle_seconds: float = DREAM_IDLE_SECONDS,
+        backlog_entities: int = DREAM_BACKLOG_ENTITIES,
+        quiet_seconds: float = DREAM_QUIET_SECONDS,
+        max_load: float = DREAM_MAX_LOAD,
+        budget_seconds: float = DREAM_RUN_BUDGET_SECONDS,
+        cooldown_seconds: float = DREAM_USER_COOLDOWN_SECONDS,
+    ):
+        self.dream = dream
+        self.state = state if state is not None else consolidation_state
+        self.ledger = ledger if ledger is not None else usage_ledger
+        self.load = load
+        self.max_concurrent = max(1, max_concurrent)
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.backlog_entities = backlog_entities
+        self.quiet_seconds = quiet_seconds
+        self.max_load = max_load
+        self.budget_seconds = budget_seconds
+        self.cooldown_seconds = cooldown_seconds
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="dream")
+        self._running: Dict[str, Dict] = {}      # user_id -> {"trigger", "started_at"}
+        self._last_run: Dict[str, float] = {}    # user_id -> monotonic end of its last pass (cooldown)
+        self._recent = deque(maxlen=20)
+        self._totals = {"runs": 0, "examined": 0, "interrupted": 0, "errors": 0}
+        self._blocked: Optional[str] = None
+        self._paused = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # -- controls ---------------------------------------------------------
+
+    def start(self) -> "DreamScheduler":
+        """Poll in the background; returns immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._loop, name="dream-scheduler", daemon=True)
+        self._thread.start()
+        log_event("DREAM_SCHEDULER_START", max_concurrent=self.max_concurrent, budget_seconds=self.budget_seconds)
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop polling; running passes end at their next cluster."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=wait)
+
+    def pause(self) -> None:
+        """No new passes; running ones end at their next cluster."""
+        with self._lock:
+            self._paused = True
+        log_event("DREAM_SCHEDULER_PAUSED")
+
+    def resume(self) -> None:
+        with self._lock:
+            self._paused = False
+        log_event("DREAM_SCHEDULER_RESUMED")
+
+    @property
+    def paused(self) -> bool:
+        with self._lock:
+            return self._paused
+
+    # -- scheduling -------------------------------------------------------
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.tick()
+            except Exception as e:
+                log_event("DREAM_SCHEDULER_ERROR", error=str(e))
+
+    def _window(self) -> Optional[str]:
+        """Why no pass may start now, or None if the LLM/CPU window is free."""
+        if self._paused or self._stop.is_set():
+            return "paused"
+        activity = self.ledger.activity()
+        if activity["active"].get("turn"):
+            return "interactive_turn"
+        if activity["quiet_seconds"] is not None and activity["quiet_seconds"] < self.quiet_seconds:
+            return "recent_turn"
+        if self.max_load:
+            load = self.load()
+            if load is not None and load > self.max_load:
+                return "cpu_load"
+        return None
+
+    def _should_stop(self) -> bool:
+        # Checked by a running pass between clusters: users come first
+        return self._paused or self._stop.is_set() or bool(self.ledger.activity()["active"].get("turn"))
+
+    def _eligible(self, pending: Dict[str, int]) -> List[Tuple[str, str]]:
+        """(user_id, trigger) for users with dirty entities who may dream now, largest backlog first."""
+        now = time.monotonic()
+        eligible = []
+        for user_id, dirty in sorted(pending.items(), key=lambda item: item[1], reverse=True):
+            if user_id in self._running:
+                continue
+            last = self._last_run.get(user_id)
+            if last is not None and now - last < self.cooldown_seconds:
+                continue
+            idle = self.ledger.idle_seconds(user_id)
+            if idle is None or idle >= self.idle_seconds:
+                eligible.append((user_id, "idle"))
+            elif dirty >= self.backlog_entities:
+                eligible.append((user_id, "backlog"))
+        return eligible
+
+    def tick(self) -> List[str]:
+        """Start passes for as many eligible users as there are free slots; returns their ids."""
+        with self._lock:
+            slots = self.max_concurrent - len(self._running)
+            self._blocked = self._window() if slots > 0 else "max_concurrent"
+            if self._blocked is not None:
+                return []
+            now = time.monotonic()
+            for user_id in [u for u, t in self._last_run.items() if now - t >= self.cooldown_seconds]:
+                del self._last_run[user_id]
+            chosen = self._eligible(self.state.dirty_users())[:slots]
+            for user_id, trigger in chosen:
+                self._running[user_id] = {"trigger": trigger, "started_at": time.time()}
+        for user_id, trigger in chosen:
+            self._pool.submit(self._run, user_id, trigger)
+        return [user_id for user_id, _ in chosen]
+
+    def _run(self, user_id: str, trigger: str) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            result = self.dream(user_id, budget_seconds=self.budget_seconds, should_stop=self._should_stop) or {}
+        except Exception as e:
+            result, error = {}, f"{type(e).__name__}: {e}"
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        run = {
+            "user_id": user_id,
+            "trigger": trigger,
+            "examined": result.get("examined", 0),
+            "candidates": result.get("candidates", 0),
+            "stopped": result.get("stopped"),
+            "error": error,
+            "elapsed_ms": elapsed_ms,
+            "finished_at": time.time(),
+        }
+        with self._lock:
+            self._running.pop(user_id, None)
+            self._last_run[user_id] = time.monotonic()
+            self._recent.append(run)
+            self._totals["runs"] += 1
+            self._totals["examined"] += run["examined"]
+            self._totals["interrupted"] += int(run["stopped"] is not None)
+            self._totals["errors"] += int(error is not None)
+        log_event("DREAM_ERROR" if error else "DREAM_RUN", **run)
+
+    def status(self) -> Dict:
+        """The /api/dream body: controls, what blocks a pass right now, pending work and recent runs."""
+        pending = self.state.dirty_users()
+        with self._lock:
+            return {
+                "started": self._thread is not None and not self._stop.is_set(),
+                "paused": self._paused,
+                "blocked": self._blocked,
+                "running": {user_id: dict(run) for user_id, run in self._running.items()},
+                "pending_users": len(pending),
+                "pending_entities": sum(pending.values()),
+                "totals": dict(self._totals),
+                "recent": list(self._recent),
+            }
+
+    def running(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+
+# Process-wide scheduler; web_ui starts it when DREAM_SCHEDULER_ENABLED
+dream_scheduler = DreamScheduler()
+metrics.register_gauge("dreams_running", dream_scheduler.running)
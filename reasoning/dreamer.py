@@ -1,143 +1,341 @@
 # reasoning/dreamer.py
+import argparse
+import sys
+import threading
 import time
-from memory.neo4j_store import Neo4jMemoryStore
-from config import OLLAMA_BASE_URL, GENERATION_MODEL
-import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+from memory.consolidation_state import consolidation_state
+from memory.factory import get_graph_store, get_vector_store
+from config import (
+    DREAM_BATCH_CLUSTERS,
+    DREAM_CONCURRENCY,
+    DREAM_MIN_DEGREE,
+    DREAM_MIN_NEW_EDGES,
+    GENERATION_MODEL,
+    LLM_MAX_CALLS_PER_DREAM,
+)
+from llm.accounting import LLMBudgetExceeded, current_usage, start_turn
+from llm.client import generate
+from memory.versioning import memory_versions
+from diagnostics.tracing import traced
 import json
 
-def consolidate_memories(user_id: str):
+# Longest single LLM call of a pass; a time budget shortens it further
+CLUSTER_TIMEOUT = 120
+
+# Dream LLM requests in flight across every pass in the process (scheduler, nightly run)
+_llm_slots = threading.BoundedSemaphore(max(1, DREAM_CONCURRENCY))
+
+@traced("dreamer.consolidate")
+def consolidate_memories(
+    user_id: str,
+    full_scan: bool = False,
+    budget_seconds: Optional[float] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict:
     """
-    Sleep Mode: Scans the graph for dense clusters and compresses them.
+    Sleep Mode: compresses dense clusters in one user's memory.
     Simulates human memory consolidation during sleep.
+
+    Only entities the user wrote to since the last pass (the dirty set the
+    write paths keep) are looked at, so a pass costs O(new writes), not
+    O(graph). full_scan=True first marks every entity of the user dirty
+    (memory written before dirty tracking existed, or a forced re-dream).
+
+    Clusters go to the LLM DREAM_BATCH_CLUSTERS per prompt, up to
+    DREAM_CONCURRENCY prompts at once; every resulting insert and prune is
+    applied in one graph transaction at the end of the pass.
+
+    No new batch starts once `budget_seconds` is spent or `should_stop()`
+    returns True; clusters not reached stay dirty.
+    Returns {"user_id", "candidates", "examined", "stopped"}.
     """
     print(f"[Dreamer] Entering REM sleep for user {user_id}...")
-    store = Neo4jMemoryStore()
-    
+    deadline = time.monotonic() + budget_seconds if budget_seconds else None
+    store = get_graph_store()
+    insights = []  # (text, metadata) for the vector store, written in one batch
+    result = {"user_id": user_id, "candidates": 0, "examined": 0, "stopped": None}
+
     try:
-        # 1. Find entities with too many edges (Clutter)
-        # "Cognitive Load" check
-        with store.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (n:Entity)-[r]-(m)
-                WITH n, count(r) as degree
-                WHERE degree > 3
-                RETURN n.id as entity, degree
-                ORDER BY degree DESC
-                LIMIT 3
-                """
-            )
-            candidates = [record["entity"] for record in result]
-            
-        print(f"[Dreamer] Found candidate concepts for consolidation: {candidates}")
-        
-        for entity_id in candidates:
-            _process_cluster(store, user_id, entity_id)
-            
+        if full_scan:
+            edges = store.dump_graph([user_id])["edges"]
+            consolidation_state.mark_dirty(user_id, {n for e in edges for n in (e["src"], e["dst"])})
+
+        # 1. Which dirty entities grew into clusters ("cognitive load" check)
+        candidates = _select_candidates(store, user_id)
+        result["candidates"] = len(candidates)
+        print(f"[Dreamer] Found candidate concepts for consolidation: {[c['entity'] for c in candidates]}")
+
+        # 2. This user's facts per cluster; too few to summarize is a decision too
+        clusters, decided = [], []
+        for candidate in candidates:
+            facts = store.get_entity_facts(candidate["entity"], limit=10, user_id=user_id)
+            if len(facts) < 3:
+                decided.append((candidate, {"consolidated": False}))
+            else:
+                clusters.append({**candidate, "facts": facts})
+
+        # 3. Ask the LLM. Every call of this run is accounted to one "dream" turn with its own budget
+        with start_turn(user_id, kind="dream", max_calls=LLM_MAX_CALLS_PER_DREAM):
+            decided += _dream_batches(user_id, clusters, deadline, should_stop, result)
+
+        # 4. Apply every decision at once, then let the entities wait for new growth
+        if _apply_decisions(store, user_id, decided, insights):
+            examined = [cluster for cluster, _ in decided]
+        else:
+            examined = [cluster for cluster, decision in decided if not decision.get("consolidated")]
+        degrees = store.entity_degrees(user_id, [c["entity"] for c in examined]) if examined else {}
+        for cluster in examined:
+            consolidation_state.examined(user_id, cluster["entity"], cluster["version"], degrees.get(cluster["entity"], 0))
+        result["examined"] = len(examined)
     finally:
         store.close()
+        _store_insights(insights)
+    return result
 
-def _process_cluster(store, user_id, entity_id):
-    # Get all facts about this entity
-    with store.driver.session() as session:
-        result = session.run(
-            """
-            MATCH (n:Entity {id: $id})-[r]-(m)
-            RETURN type(r) as rel, m.id as neighbor, r.source_text as text, elementId(r) as edge_id
-            LIMIT 10
-            """,
-            id=entity_id
-        )
-        facts = [dict(record) for record in result]
-        
-    if len(facts) < 3:
+def _select_candidates(store, user_id):
+    """
+    Dirty entities whose degree (the user's edges) is at least DREAM_MIN_DEGREE
+    and grew by DREAM_MIN_NEW_EDGES since the dreamer last examined them,
+    densest first. The rest are settled until their next write.
+    """
+    dirty = consolidation_state.dirty(user_id)
+    if not dirty:
+        return []
+    degrees = store.entity_degrees(user_id, [d["entity"] for d in dirty])
+
+    candidates, settled = [], {}
+    for entry in dirty:
+        degree = degrees.get(entry["entity"], 0)
+        if degree >= DREAM_MIN_DEGREE and degree - entry["last_degree"] >= DREAM_MIN_NEW_EDGES:
+            candidates.append({**entry, "degree": degree})
+        else:
+            settled[entry["entity"]] = entry["version"]
+    consolidation_state.settle(user_id, settled)
+    candidates.sort(key=lambda c: c["degree"], reverse=True)
+    return candidates
+
+def _dream_batches(user_id, clusters, deadline, should_stop, result) -> List:
+    """
+    Send the clusters DREAM_BATCH_CLUSTERS per prompt, DREAM_CONCURRENCY at a
+    time, densest first. Returns (cluster, decision) for every cluster the LLM
+    answered; unanswered ones (errors, budget, stop) are left out.
+    """
+    queue = deque(clusters[i:i + DREAM_BATCH_CLUSTERS] for i in range(0, len(clusters), max(1, DREAM_BATCH_CLUSTERS)))
+    usage = current_usage()
+    decided = []
+    with ThreadPoolExecutor(max_workers=max(1, DREAM_CONCURRENCY), thread_name_prefix="dream") as pool:
+        running = set()
+        while queue or running:
+            while queue and len(running) < max(1, DREAM_CONCURRENCY) and result["stopped"] is None:
+                timeout = CLUSTER_TIMEOUT
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout < 1:  # not enough left for an LLM call
+                        result["stopped"] = "time_budget"
+                        break
+                if should_stop is not None and should_stop():
+                    result["stopped"] = "interrupted"
+                    break
+                # The batch's LLM call counts against this run's budget
+                running.add(pool.submit(usage.followup(_dream_batch), user_id, queue.popleft(), timeout))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    decided += future.result()
+                except LLMBudgetExceeded as e:
+                    # Clusters not reached yet stay dirty for the next run
+                    print(f"[Dreamer] LLM budget spent ({e}); stopping early.")
+                    result["stopped"] = "llm_budget"
+    return decided
+
+def _store_insights(insights):
+    """Make consolidated insights retrievable by meaning too (one bulk vector write per run)."""
+    if not insights:
         return
+    try:
+        texts, metadatas = zip(*insights)
+        get_vector_store().add_memories(list(texts), list(metadatas))
+    except Exception as e:
+        print(f"[Dreamer] Failed to store insights: {e}")
+
+def _batch_prompt(batch) -> str:
+    blocks = []
+    for number, cluster in enumerate(batch, 1):
+        fact_blob = "\n".join(f"- {f['neighbor']} ({f['rel']})" for f in cluster["facts"])
+        blocks.append(f"Cluster {number}: '{cluster['entity']}'\n{fact_blob}")
+    clusters_blob = "\n\n".join(blocks)
 
-    # Prepare for LLM
-    fact_texts = [f"- {f['neighbor']} ({f['rel']})" for f in facts]
-    fact_blob = "\n".join(fact_texts)
-    
-    print(f"[Dreamer] Dreaming about '{entity_id}'...\n{fact_blob}")
-    
-    prompt = f"""
+    return f"""
     You are a Memory Consolidation System.
-    The user has the following disjointed memories about '{entity_id}':
-    {fact_blob}
-    
-    Can these be summarized into 1 or 2 high-level insights?
-    If yes, provide a strict JSON summary.
-    If they are unrelated, return strictly {{"consolidated": false}}.
-    
+    Each numbered cluster below lists the user's disjointed memories about one entity:
+
+    {clusters_blob}
+
+    For each cluster independently: can these be summarized into 1 or 2 high-level insights?
+    If yes, give the new facts. If they are unrelated, mark the cluster "consolidated": false.
+
     Example Input:
-    - User (LIKES) Pizza
-    - User (LIKES) Burgers
-    - User (LIKES) Fries
-    
+    Cluster 1: 'User'
+    - Pizza (LIKES)
+    - Burgers (LIKES)
+    - Fries (LIKES)
+
     Example Output:
     {{
-        "consolidated": true,
-        "new_facts": [
-            {{"relation": "LIKES", "target": "Junk Food", "confidence": 0.9}}
-        ],
-        "explanation": "Summarized specific fast foods into category 'Junk Food'"
+        "clusters": [
+            {{
+                "cluster": 1,
+                "consolidated": true,
+                "new_facts": [
+                    {{"relation": "LIKES", "target": "Junk Food", "confidence": 0.9}}
+                ],
+                "explanation": "Summarized specific fast foods into category 'Junk Food'"
+            }}
+        ]
     }}
-    
-    Return ONLY VALID JSON.
+
+    Return one entry per cluster. Return ONLY VALID JSON.
     """
-    
+
+def _parse_batch(raw: str, batch) -> List:
+    """(cluster, decision) for each cluster the response answers, matched by number (or entity name)."""
+    data = json.loads(raw)
+    entries = data.get("clusters") if isinstance(data, dict) else None
+    if entries is None and isinstance(data, dict) and "consolidated" in data and len(batch) == 1:
+        entries = [dict(data, cluster=1)]  # single-cluster answer without the wrapper
+    by_entity = {c["entity"]: c for c in batch}
+    decided = {}
+    for entry in entries or []:
+        if not isinstance(entry, dict) or "consolidated" not in entry:
+            continue
+        cluster = None
+        try:
+            number = int(entry.get("cluster"))
+            if 1 <= number <= len(batch):
+                cluster = batch[number - 1]
+        except (TypeError, ValueError):
+            cluster = by_entity.get(entry.get("entity"))
+        if cluster is not None:
+            decided[cluster["entity"]] = (cluster, entry)
+    return list(decided.values())
+
+@traced("dreamer.batch")
+def _dream_batch(user_id, batch, timeout) -> List:
+    """One LLM call for a batch of clusters. Returns the decisions it got; [] on a bad or failed call."""
+    print(f"[Dreamer] Dreaming about {[c['entity'] for c in batch]}...")
     try:
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": GENERATION_MODEL, # Uses the smart model for complex reasoning
-                "prompt": prompt,
-                "stream": False,
-                "format": "json"
-            },
-            timeout=120
-        )
-        response.raise_for_status()
-        data = json.loads(response.json()['response'])
-        
-        if data.get("consolidated"):
-            print(f"[Dreamer] Insight: {data['explanation']}")
-            # Apply changes
-            for new_fact in data['new_facts']:
-                store.insert_edge({
-                    "src": entity_id,
-                    "dst": new_fact['target'],
-                    "relation": new_fact['relation'],
-                    "confidence": new_fact.get('confidence', 0.9),
-                    "user_id": user_id,
-                    "source_text": f"Dream consolidation: {data['explanation']}"
-                })
-            
-            # Prune old edges (optional, or just mark archived)
-            # For hackathon safety, we won't delete yet, just reinforce the new one.
-            # But "Crazy" idea says strict pruning. 
-            # Let's delete them to prove the point.
-            _prune_old_edges(store, facts)
-            
+        with _llm_slots:
+            raw = generate(
+                model=GENERATION_MODEL, # Uses the smart model for complex reasoning
+                prompt=_batch_prompt(batch),
+                format="json",
+                timeout=timeout,
+                site="dream"
+            )
+        return _parse_batch(raw, batch)
+    except LLMBudgetExceeded:
+        raise
     except Exception as e:
         print(f"[Dreamer] Nightmare (Error): {e}")
+        return []
 
-def _prune_old_edges(store, facts):
-    edge_ids = [f["edge_id"] for f in facts]
-    with store.driver.session() as session:
-        if not edge_ids:
-            return
+def _apply_decisions(store, user_id, decided, insights) -> bool:
+    """
+    Write every consolidated cluster's new facts and prune the facts they
+    replace, in one transaction. Returns False if the write failed.
+    """
+    new_edges, pruned = [], []
+    for cluster, decision in decided:
+        if not decision.get("consolidated"):
+            continue
+        entity_id = cluster["entity"]
+        explanation = decision.get("explanation") or ""
+        facts = [
+            {
+                "src": entity_id,
+                "dst": str(fact["target"]),
+                "relation": str(fact["relation"]),
+                "confidence": fact.get("confidence", 0.9),
+                "user_id": user_id,
+                "source_text": f"Dream consolidation: {explanation}",
+            }
+            for fact in decision.get("new_facts") or []
+            if isinstance(fact, dict) and fact.get("target") and fact.get("relation")
+        ]
+        if not facts:
+            continue  # nothing to replace them with: keep the originals
+        print(f"[Dreamer] Insight: {explanation}")
+        new_edges += facts
+        # Stable ids: an edge the collector or a restore removed meanwhile is skipped, never a newer one
+        pruned += [f["edge_id"] for f in cluster["facts"]]
+        insights.append((
+            f"{entity_id}: {explanation}",
+            {"user_id": user_id, "type": "dream_consolidation", "entity": entity_id, "last_updated": int(time.time() * 1000)},
+        ))
+    if not new_edges:
+        return True
 
+    try:
+        stats = store.apply_consolidation(new_edges, pruned)
+    except Exception as e:
+        print(f"[Dreamer] Failed to apply consolidation: {e}")
+        insights.clear()
+        return False
+    print(f"[Dreamer] ✂️ Pruned {stats['deleted']} redundant edges, wrote {stats['inserted']} insights.")
+    memory_versions.bump(user_id, reason="dream_consolidation")
+    return True
+
+def consolidate_all(
+    user_ids: Optional[List[str]] = None,
+    budget_seconds: Optional[float] = None,
+    full_scan: bool = False,
+) -> Dict:
+    """
+    Maintenance pass: consolidate every user with pending work (or these
+    users), DREAM_CONCURRENCY users at a time, all inside one time budget.
+    Users not reached keep their dirty entities for the next run.
+    """
+    started = time.monotonic()
+    if user_ids is None:
+        pending = consolidation_state.dirty_users()
+        user_ids = sorted(pending, key=pending.get, reverse=True)
+    deadline = started + budget_seconds if budget_seconds else None
+
+    def run(user_id):
+        remaining = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining < 1:
+                return {"user_id": user_id, "candidates": 0, "examined": 0, "stopped": "time_budget"}
         try:
-            # Cypher to delete by elementId (Neo4j 5.x+)
-            # Fallback to ID() if elementId fails, but for now we assume modern Neo4j
-            session.run(
-                """
-                MATCH ()-[r]-()
-                WHERE elementId(r) IN $edge_ids
-                DELETE r
-                """,
-                edge_ids=edge_ids
-            )
-            print(f"[Dreamer] ✂️ Pruned {len(edge_ids)} redundant edges to save space.")
+            return consolidate_memories(user_id, full_scan=full_scan, budget_seconds=remaining)
         except Exception as e:
-            print(f"[Dreamer] Failed to prune edges: {e}")
+            print(f"[Dreamer] Pass for {user_id} failed: {e}")
+            return {"user_id": user_id, "candidates": 0, "examined": 0, "stopped": "error"}
+
+    with ThreadPoolExecutor(max_workers=max(1, DREAM_CONCURRENCY), thread_name_prefix="dream-user") as pool:
+        results = list(pool.map(run, user_ids))
+    return {
+        "users": len(results),
+        "examined": sum(r["examined"] for r in results),
+        "incomplete": [r["user_id"] for r in results if r["stopped"]],
+        "elapsed_s": round(time.monotonic() - started, 1),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Consolidate memory for every user with new writes (nightly pass)")
+    parser.add_argument("--user", action="append", dest="users", help="Only this user (repeatable)")
+    parser.add_argument("--budget-seconds", type=float, help="Stop starting new work after this long")
+    parser.add_argument("--full-scan", action="store_true", help="Consider all of each user's memory, not just new writes")
+    args = parser.parse_args(argv)
+    summary = consolidate_all(args.users, budget_seconds=args.budget_seconds, full_scan=args.full_scan)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,9 @@ import re
 import requests
 from typing import Optional, Dict, Any
 from diagnostics.logger import log_event
-from config import OLLAMA_BASE_URL, EXTRACTION_MODEL, EXTRACTION_TEMPERATURE, EXTRACTION_MAX_TOKENS
+from config import EXTRACTION_MODEL, EXTRACTION_TEMPERATURE, EXTRACTION_MAX_TOKENS
+from llm.accounting import LLMBudgetExceeded
+from llm.client import chat
 
 
 # Improved prompt with explicit location examples
@@ -89,10 +91,13 @@ def _extract_json_from_content(content: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-def extract_graph_delta(text: str, max_retries: int = 2) -> Optional[Dict[str, Any]]:
+def extract_graph_delta(text: str, max_retries: int = 2, raise_on_error: bool = False) -> Optional[Dict[str, Any]]:
     """
     Extract knowledge graph delta from user input.
     Uses retry logic and multiple parsing strategies for reliability.
+    With raise_on_error, a call that could not be made (server down or failing
+    after the retries, LLM budget spent) raises instead of returning None, so
+    the caller can tell "no facts" from "not extracted" (bulk ingestion).
     """
     if not text or not text.strip():
         return None
@@ -106,27 +111,22 @@ def extract_graph_delta(text: str, max_retries: int = 2) -> Optional[Dict[str, A
     
     for attempt in range(max_retries + 1):
         try:
-            payload = {
-                "model": EXTRACTION_MODEL,
-                "messages": [
+            content = chat(
+                model=EXTRACTION_MODEL,
+                messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": text},
                 ],
-                "temperature": EXTRACTION_TEMPERATURE,
-                "max_tokens": EXTRACTION_MAX_TOKENS,
-                # Ask the OpenAI-compatible endpoint to enforce JSON if supported.
-                "response_format": {"type": "json_object"},
-            }
-            
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/v1/chat/completions",
-                json=payload,
+                options={
+                    "temperature": EXTRACTION_TEMPERATURE,
+                    "num_predict": EXTRACTION_MAX_TOKENS,
+                },
+                # Ask Ollama to constrain decoding to valid JSON.
+                format="json",
                 timeout=45,
+                site="extraction",
+                attempt=attempt,
             )
-            response.raise_for_status()
-            
-            data = response.json()
-            content = (data.get("choices") or [{}])[0].get("message", {}).get("content") or ""
             
             if not content:
                 if attempt < max_retries:
@@ -195,11 +195,19 @@ def extract_graph_delta(text: str, max_retries: int = 2) -> Optional[Dict[str, A
             
             return graph
             
+        except LLMBudgetExceeded as e:
+            # Degrade: nothing is extracted (or stored) for this turn
+            log_event("EXTRACTOR_FAIL", reason="llm_budget", attempt=attempt+1, error=str(e))
+            if raise_on_error:
+                raise
+            return None
         except requests.exceptions.RequestException as e:
             if attempt < max_retries:
                 log_event("EXTRACTOR_RETRY", reason="network_error", attempt=attempt+1, error=str(e))
                 continue
             log_event("EXTRACTOR_FAIL", reason="network_error", error=str(e))
+            if raise_on_error:
+                raise
             return None
         except Exception as e:
             log_event("EXTRACTOR_FAIL", reason="unexpected_error", error=str(e))
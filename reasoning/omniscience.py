@@ -1,7 +1,8 @@
 # reasoning/omniscience.py
-import requests
 import json
-from config import OLLAMA_BASE_URL, EXTRACTION_MODEL
+from config import EXTRACTION_MODEL
+from llm.accounting import LLMBudgetExceeded
+from llm.client import generate
 from diagnostics.logger import log_event
 
 def detect_contradiction(new_fact: dict, existing_fact: dict) -> bool:
@@ -36,22 +37,20 @@ def detect_contradiction(new_fact: dict, existing_fact: dict) -> bool:
     
     try:
         # Uses smaller model for speed
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": EXTRACTION_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "format": "json"
-            },
-            timeout=30
+        raw = generate(
+            model=EXTRACTION_MODEL,
+            prompt=prompt,
+            format="json",
+            timeout=30,
+            site="contradiction"
         )
-        response.raise_for_status()
-        result = response.json()
-        # Removed verbose OMNISCIENCE_RAW logging
-        data = json.loads(result['response'])
+        data = json.loads(raw)
         return data.get("contradiction", False)
-        
+
+    except LLMBudgetExceeded:
+        # Degrade: an unchecked fact is treated as consistent
+        log_event("OMNISCIENCE_SKIP", reason="llm_budget")
+        return False
     except Exception as e:
         log_event("OMNISCIENCE_ERROR", error=str(e))
         return False
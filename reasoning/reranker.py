@@ -1,9 +1,5 @@
+import threading
 from typing import Dict, List, Optional
-import numpy as np
-try:
-    import cohere
-except ImportError:
-    cohere = None
 from config import RERANKER_MODEL, COHERE_API_KEY
 
 class Reranker:
@@ -13,6 +9,7 @@ class Reranker:
         
         if COHERE_API_KEY:
             try:
+                import cohere  # optional dependency, only imported when a key is configured
                 self.cohere_client = cohere.Client(COHERE_API_KEY)
             except Exception as e:
                 print(f"[Reranker] Failed to init Cohere: {e}")
@@ -84,8 +81,22 @@ class Reranker:
         scored_candidates.sort(key=lambda x: x["score"], reverse=True)
         return scored_candidates[:top_k]
 
+    def warmup(self) -> None:
+        """Run one dummy inference so the first real query doesn't pay for lazy init."""
+        if self.local_model is not None:
+            self.local_model.predict([["warmup", "warmup"]])
+
 # Global instance
 _reranker_instance = None
+_reranker_lock = threading.Lock()
+
+def get_reranker() -> Reranker:
+    """Get the shared Reranker (loads the cross-encoder on first use; warmup and requests may race)."""
+    global _reranker_instance
+    with _reranker_lock:
+        if _reranker_instance is None:
+            _reranker_instance = Reranker()
+        return _reranker_instance
 
 def rerank_memories(
     query: str,
@@ -96,12 +107,8 @@ def rerank_memories(
     """
     Unified entry point for reranking.
     """
-    global _reranker_instance
-    if _reranker_instance is None:
-        _reranker_instance = Reranker()
-
     # Combine candidates (Hybrid Fusion Strategy: Simple Concatenation for now)
     # The Reranker itself acts as the fusion mechanism by scoring both types on the same scale.
     all_candidates = symbolic_memories + neural_memories
     
-    return _reranker_instance.rerank(query, all_candidates, top_k=top_k)
+    return get_reranker().rerank(query, all_candidates, top_k=top_k)
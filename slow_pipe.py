@@ -1,12 +1,16 @@
 # slow_pipe.py
 
+import time
 import uuid
 from diagnostics.logger import log_event
+from diagnostics.tracing import span, metrics
 from config import MIN_CONFIDENCE_TO_STORE, TRIVIAL_RELATIONS
 from reasoning.confidence import compute_confidence
 
-from memory.neo4j_store import Neo4jMemoryStore
-from memory.vector_store import VectorMemoryStore
+from memory.consolidation_state import consolidation_state
+from memory.factory import get_graph_store, get_vector_store
+from memory.pending_writes import pending_writes
+from memory.versioning import memory_versions
 
 
 def slow_pipe(
@@ -14,14 +18,25 @@ def slow_pipe(
     session_id: str,
     ram_context,
     graph_delta: dict = None,
+    pending_token: str = None,
+    enqueued_at: float = None,
 ):
     """
     SLOW PIPE (WRITE PATH)
     - Extracts graph deltas using Phi
-    - Writes nodes + edges to Neo4j
+    - Writes nodes + edges to the graph store (Neo4j or SQLite)
+    - Acknowledges the fast pipe's pending-writes overlay entry when done
     - NEVER raises
     """
+    if enqueued_at is not None:
+        # Time spent queued behind earlier turns (slow-pipe lag)
+        metrics.observe("slow_pipe.queue_wait", (time.perf_counter() - enqueued_at) * 1000)
 
+    with span("slow_pipe"):
+        _slow_pipe(user_input, session_id, ram_context, graph_delta, pending_token)
+
+
+def _slow_pipe(user_input, session_id, ram_context, graph_delta, pending_token):
     try:
         # -------------------------
         # Step 1: Extraction (moved from fast pipe)
@@ -29,7 +44,8 @@ def slow_pipe(
         from reasoning.extractor import extract_graph_delta
         
         if graph_delta is None:
-            graph_delta = extract_graph_delta(user_input)
+            with span("slow_pipe.extract"):
+                graph_delta = extract_graph_delta(user_input)
 
         # -------------------------
         # Step 2: Check for graph delta
@@ -55,46 +71,56 @@ def slow_pipe(
 
 
         # -------------------------
-        # Step 4: Persist graph (Neo4j)
+        # Step 4: Persist graph (GRAPH_BACKEND)
         # -------------------------
-        store = Neo4jMemoryStore()
-
-        # ---- Nodes ----
-        for node in graph_delta.get("nodes", []):
-            store.upsert_node(
-                node_id=node["id"],
-                node_type=node.get("type", "unknown"),
-            )
-
-        # ---- Edges ----
-        turn_id = len(ram_context.get(session_id) or [])
+        with span("slow_pipe.graph_write"):
+            store = get_graph_store()
+
+            # ---- Nodes ----
+            for node in graph_delta.get("nodes", []):
+                store.upsert_node(
+                    node_id=node["id"],
+                    node_type=node.get("type", "unknown"),
+                )
+
+            # ---- Edges ----
+            turn_id = len(ram_context.get(session_id) or [])
         
-        for idx, edge in enumerate(graph_delta.get("edges", [])):
-            # Use specific edge confidence if available, else fallback to global score
-            edge_confidence = edge.get("confidence", confidence)
+            for idx, edge in enumerate(graph_delta.get("edges", [])):
+                # Use specific edge confidence if available, else fallback to global score
+                edge_confidence = edge.get("confidence", confidence)
             
-            store.insert_edge({
-                "src": edge["src"],
-                "dst": edge["dst"],
-                "relation": edge["relation"],
-                "confidence": edge_confidence,
-                "turn_id": turn_id,
-                "user_id": session_id,
-                "source_text": user_input,
-            })
+                store.insert_edge({
+                    "src": edge["src"],
+                    "dst": edge["dst"],
+                    "relation": edge["relation"],
+                    "confidence": edge_confidence,
+                    "turn_id": turn_id,
+                    "user_id": session_id,
+                    "source_text": user_input,
+                })
             
-        store.close()
+            store.close()
 
         # ---- Vector Store (Neural) ----
         # Store the raw text chunk for semantic retrieval
-        vector_store = VectorMemoryStore()
-        vector_store.add_memory(
-            text=user_input,
-            metadata={
-                "user_id": session_id,
-                "turn_id": turn_id,
-                "confidence": confidence
-            }
+        with span("slow_pipe.vector_write"):
+            vector_store = get_vector_store()
+            vector_store.add_memories(
+                [user_input],
+                [{
+                    "user_id": session_id,
+                    "turn_id": turn_id,
+                    "confidence": confidence,
+                    "last_updated": int(time.time() * 1000),  # age for memory.lifecycle decay
+                }]
+            )
+
+        # Anything derived from this user's memory is now stale
+        memory_versions.bump(session_id)
+        # The dreamer only revisits entities written since its last pass
+        consolidation_state.mark_dirty(
+            session_id, {n for edge in graph_delta.get("edges", []) for n in (edge["src"], edge["dst"])}
         )
 
         log_event(
@@ -110,3 +136,6 @@ def slow_pipe(
         traceback.print_exc()
         log_event("SLOW_PIPE_ERROR", error=str(e))
         return
+    finally:
+        # Persisted (epoch already bumped) or dropped: stop overlaying it either way
+        pending_writes.ack(pending_token)
@@ -10,6 +10,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from fast_pipe import fast_pipe
 from slow_pipe import slow_pipe
 from memory.neo4j_store import Neo4jMemoryStore
+from memory.ram_context import RAMContext
 
 def benchmark():
     print("[FAST] Starting Latency Benchmark...")
@@ -21,8 +22,8 @@ def benchmark():
     
     # 1. Warmup (to load models)
     print("Heating up the engines (Warmup)...")
-    # Mock RAM context
-    ram_context = {session_id: ["Previous turn context"]}
+    ram_context = RAMContext()
+    ram_context.add(session_id, "Previous turn context")
     
     try:
         fast_pipe(sample_query, session_id, ram_context)
@@ -0,0 +1,134 @@
+# tests/test_dream_scheduler.py
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm.accounting import UsageLedger
+from memory.consolidation_state import ConsolidationState
+from reasoning.dream_scheduler import DreamScheduler
+
+
+class TestDreamScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.state = ConsolidationState(":memory:")
+        self.ledger = UsageLedger()
+        self.load = 0.1
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.stop()
+
+    def _dream(self, user_id, budget_seconds, should_stop):
+        self.calls.append((user_id, budget_seconds))
+        self.release.wait(5)
+        stopped = "interrupted" if should_stop() else None
+        return {"user_id": user_id, "candidates": 1, "examined": 0 if stopped else 1, "stopped": stopped}
+
+    def _scheduler(self, **kwargs):
+        kwargs.setdefault("idle_seconds", 60)
+        kwargs.setdefault("quiet_seconds", 0)
+        self.scheduler = DreamScheduler(
+            dream=self._dream, state=self.state, ledger=self.ledger, load=lambda: self.load,
+            budget_seconds=30, cooldown_seconds=300, **kwargs,
+        )
+        return self.scheduler
+
+    def _wait(self, runs=1):
+        # Until the pass has finished and been recorded
+        deadline = time.monotonic() + 5
+        while self.scheduler.status()["totals"]["runs"] < runs:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_idle_users_dream_and_active_users_wait_for_backlog(self):
+        scheduler = self._scheduler(max_concurrent=2, backlog_entities=3)
+        self.state.mark_dirty("idle", ["A", "B"])
+        self.state.mark_dirty("chatty", ["A", "B"])
+        self.ledger.turn_started("turn", "chatty")
+        self.ledger.turn_finished("turn", "chatty")
+
+        self.assertEqual(scheduler.tick(), ["idle"])
+        self._wait()
+        self.assertEqual(self.calls, [("idle", 30)])
+        self.assertEqual(scheduler.tick(), [])  # idle is cooling down, chatty spoke just now
+
+        self.state.mark_dirty("chatty", ["C"])
+        self.assertEqual(scheduler.tick(), ["chatty"])
+        self._wait(2)
+        self.assertEqual(scheduler.status()["recent"][-1]["trigger"], "backlog")
+
+    def test_no_pass_starts_while_the_llm_or_cpu_is_busy(self):
+        scheduler = self._scheduler(quiet_seconds=60, max_load=0.8)
+        self.state.mark_dirty("u", ["A"])
+
+        self.ledger.turn_started("turn", "other")
+        self.assertEqual(scheduler.tick(), [])
+        self.assertEqual(scheduler.status()["blocked"], "interactive_turn")
+        self.ledger.turn_finished("turn", "other")
+        self.assertEqual(scheduler.tick(), [])
+        self.assertEqual(scheduler.status()["blocked"], "recent_turn")
+
+        scheduler.quiet_seconds = 0
+        self.load = 3.0
+        self.assertEqual(scheduler.tick(), [])
+        self.assertEqual(scheduler.status()["blocked"], "cpu_load")
+        self.load = None  # no load average on this OS
+        self.assertEqual(scheduler.tick(), ["u"])
+        self._wait()
+
+    def test_concurrency_limit_and_interrupt_on_user_turn(self):
+        scheduler = self._scheduler(max_concurrent=1)
+        for user_id in ("a", "b"):
+            self.state.mark_dirty(user_id, ["A"])
+        self.release.clear()
+
+        self.assertEqual(len(scheduler.tick()), 1)
+        self.assertEqual(scheduler.tick(), [])
+        self.assertEqual(scheduler.status()["blocked"], "max_concurrent")
+
+        self.ledger.turn_started("turn", "someone")  # the running pass yields to it
+        self.release.set()
+        self._wait()
+        self.ledger.turn_finished("turn", "someone")
+        run = scheduler.status()["recent"][-1]
+        self.assertEqual(run["stopped"], "interrupted")
+        self.assertEqual(scheduler.status()["totals"]["interrupted"], 1)
+
+    def test_pause_and_resume(self):
+        scheduler = self._scheduler()
+        self.state.mark_dirty("u", ["A"])
+
+        scheduler.pause()
+        self.assertEqual(scheduler.tick(), [])
+        self.assertEqual(scheduler.status()["blocked"], "paused")
+        scheduler.resume()
+        self.assertEqual(scheduler.tick(), ["u"])
+        self._wait()
+
+    def test_failed_pass_is_recorded(self):
+        scheduler = self._scheduler()
+        self.state.mark_dirty("u", ["A"])
+
+        def boom(user_id, **kwargs):
+            raise ConnectionError("graph went away")
+
+        scheduler.dream = boom
+        scheduler.tick()
+        self._wait()
+        status = scheduler.status()
+        self.assertEqual(status["totals"]["errors"], 1)
+        self.assertIn("ConnectionError", status["recent"][-1]["error"])
+        self.assertEqual(status["running"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+# tests/test_dreamer.py
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import reasoning.dreamer as dreamer
+from benchmarks.stubs import FakeEmbedder, InMemoryGraph, InMemoryGraphStore, InMemoryVectorStore
+from memory.consolidation_state import ConsolidationState
+
+CONSOLIDATED = json.dumps({
+    "consolidated": True,
+    "new_facts": [{"relation": "LIKES", "target": "Junk Food", "confidence": 0.9}],
+    "explanation": "Summarized specific fast foods into category 'Junk Food'",
+})
+
+
+class TestDreamer(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = InMemoryGraph()
+        self.vectors = InMemoryVectorStore(FakeEmbedder())
+        self.state = ConsolidationState(":memory:")
+        self.prompts = []
+        for food in ("Pizza", "Burgers", "Fries", "Tacos"):
+            self._write("User", food)
+
+    def _write(self, src, dst, user_id="dreamer_user"):
+        # What the slow pipe does: persist the edge, mark both ends dirty
+        InMemoryGraphStore(self.graph).insert_edge({"src": src, "relation": "LIKES", "dst": dst, "user_id": user_id})
+        self.state.mark_dirty(user_id, [src, dst])
+
+    def _generate(self, raw):
+        def generate(**kwargs):
+            self.prompts.append(kwargs["prompt"])
+            return raw
+        return generate
+
+    def _dream(self, raw=CONSOLIDATED, **kwargs):
+        with patch.object(dreamer, "get_graph_store", lambda: InMemoryGraphStore(self.graph)), \
+                patch.object(dreamer, "get_vector_store", lambda: self.vectors), \
+                patch.object(dreamer, "consolidation_state", self.state), \
+                patch.object(dreamer, "generate", self._generate(raw)):
+            dreamer.consolidate_memories("dreamer_user", **kwargs)
+
+    def test_consolidation_replaces_cluster(self):
+        self._dream()
+
+        self.assertEqual([e["dst"] for e in self.graph.edges.values()], ["Junk Food"])
+        docs = [d["text"] for d in self.vectors.docs.values()]
+        self.assertEqual(docs, ["User: Summarized specific fast foods into category 'Junk Food'"])
+        self.assertEqual(next(iter(self.vectors.docs.values()))["metadata"]["type"], "dream_consolidation")
+
+    def test_unrelated_cluster_is_left_alone(self):
+        self._dream(raw=json.dumps({"consolidated": False}))
+
+        self.assertEqual(len(self.graph.edges), 4)
+        self.assertEqual(self.vectors.docs, {})
+
+    def test_pass_without_new_writes_costs_nothing(self):
+        self._dream(raw=json.dumps({"consolidated": False}))
+        self.assertEqual(len(self.prompts), 1)
+        self.assertEqual(self.state.dirty("dreamer_user"), [])
+
+        self._dream()
+        self.assertEqual(len(self.prompts), 1)
+
+    def test_only_dirty_entities_are_degree_checked(self):
+        store = InMemoryGraphStore(self.graph)
+        store.bulk_insert_edges([
+            {"src": f"Hub{i}", "relation": "KNOWS", "dst": f"Leaf{j}", "user_id": "dreamer_user"}
+            for i in range(20) for j in range(5)
+        ])  # dense, but written without marking: already consolidated history
+        looked_up = []
+        original = InMemoryGraphStore.entity_degrees
+
+        def entity_degrees(store, user_id, entity_ids):
+            looked_up.extend(entity_ids)
+            return original(store, user_id, entity_ids)
+
+        with patch.object(InMemoryGraphStore, "entity_degrees", entity_degrees):
+            self._dream(raw=json.dumps({"consolidated": False}))
+
+        self.assertEqual(set(looked_up), {"User", "Pizza", "Burgers", "Fries", "Tacos"})
+        self.assertEqual(len(self.prompts), 1)
+
+    def test_examined_cluster_waits_for_new_growth(self):
+        self._dream(raw=json.dumps({"consolidated": False}))
+        self.assertEqual(self.state.get("dreamer_user", "User")["last_degree"], 4)
+
+        self._write("User", "Sushi")
+        self._dream(raw=json.dumps({"consolidated": False}))
+        self.assertEqual(len(self.prompts), 1)  # 5 edges: one new edge is not enough
+
+        self._write("User", "Ramen")
+        self._dream(raw=json.dumps({"consolidated": False}))
+        self.assertEqual(len(self.prompts), 2)
+        self.assertIn("Ramen", self.prompts[-1])
+
+    def test_other_users_edges_are_not_pruned(self):
+        for food in ("Salad", "Soup", "Tea"):
+            self._write("User", food, user_id="someone_else")
+
+        self._dream()
+
+        remaining = sorted((e["user_id"], e["dst"]) for e in self.graph.edges.values())
+        self.assertEqual(remaining, [("dreamer_user", "Junk Food"), ("someone_else", "Salad"),
+                                     ("someone_else", "Soup"), ("someone_else", "Tea")])
+        self.assertNotIn("Salad", self.prompts[0])
+
+    def test_full_scan_picks_up_untracked_memory(self):
+        self.state.forget()
+        self._dream()
+        self.assertEqual(self.prompts, [])
+
+        self._dream(full_scan=True)
+        self.assertEqual([e["dst"] for e in self.graph.edges.values()], ["Junk Food"])
+
+    def _lunch(self):
+        for food in ("Salad", "Soup", "Tea", "Bread", "Rice"):
+            self._write("Lunch", food)  # the denser cluster goes first
+
+    def test_pass_yields_between_batches(self):
+        self._lunch()
+        checks = []
+
+        def should_stop():
+            checks.append(True)
+            return len(checks) > 1  # a chat turn arrives after the first batch
+
+        with patch.object(dreamer, "DREAM_BATCH_CLUSTERS", 1), patch.object(dreamer, "DREAM_CONCURRENCY", 1), \
+                patch.object(dreamer, "get_graph_store", lambda: InMemoryGraphStore(self.graph)), \
+                patch.object(dreamer, "get_vector_store", lambda: self.vectors), \
+                patch.object(dreamer, "consolidation_state", self.state), \
+                patch.object(dreamer, "generate", self._generate(json.dumps({"consolidated": False}))):
+            result = dreamer.consolidate_memories("dreamer_user", should_stop=should_stop)
+            self.assertEqual((result["candidates"], result["examined"], result["stopped"]), (2, 1, "interrupted"))
+            self.assertIn("User", [d["entity"] for d in self.state.dirty("dreamer_user")])
+
+            result = dreamer.consolidate_memories("dreamer_user", budget_seconds=0.5)
+            self.assertEqual((result["examined"], result["stopped"]), (0, "time_budget"))
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn("Rice", self.prompts[0])
+
+    def test_clusters_share_one_prompt_and_one_write(self):
+        self._lunch()
+        self._write("Work", "Acme")  # too small to be a candidate
+        answer = json.dumps({"clusters": [
+            {"cluster": 1, "consolidated": True, "new_facts": [{"relation": "EATS", "target": "Light Meals"}],
+             "explanation": "Lunch is light"},
+            {"cluster": 2, "consolidated": True, "new_facts": [{"relation": "LIKES", "target": "Junk Food"}],
+             "explanation": "Fast food"},
+        ]})
+        writes = []
+        original = InMemoryGraphStore.apply_consolidation
+
+        def apply_consolidation(store, new_edges, delete_edge_ids):
+            writes.append(len(new_edges))
+            return original(store, new_edges, delete_edge_ids)
+
+        with patch.object(InMemoryGraphStore, "apply_consolidation", apply_consolidation):
+            self._dream(raw=answer)
+
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn("Cluster 2: 'User'", self.prompts[0])
+        self.assertEqual(writes, [2])
+        remaining = sorted((e["src"], e["dst"]) for e in self.graph.edges.values())
+        self.assertEqual(remaining, [("Lunch", "Light Meals"), ("User", "Junk Food"), ("Work", "Acme")])
+        self.assertEqual(len(self.vectors.docs), 2)
+
+    def test_unanswered_or_unwritten_clusters_stay_dirty(self):
+        self._lunch()
+        answer = json.dumps({"clusters": [{"cluster": 2, "consolidated": False}]})  # Lunch missing
+
+        self._dream(raw=answer)
+        self.assertEqual([d["entity"] for d in self.state.dirty("dreamer_user")], ["Lunch"])
+
+        def broken(store, new_edges, delete_edge_ids):
+            raise ConnectionError("graph went away")
+
+        with patch.object(InMemoryGraphStore, "apply_consolidation", broken):
+            self._dream(full_scan=True)
+        self.assertEqual(len(self.graph.edges), 9)
+        self.assertEqual(self.vectors.docs, {})
+        self.assertEqual([d["entity"] for d in self.state.dirty("dreamer_user")], ["Lunch"])
+
+    def test_consolidate_all_covers_every_pending_user(self):
+        for food in ("Salad", "Soup", "Tea", "Bread"):
+            self._write("User", food, user_id="second_user")
+        with patch.object(dreamer, "get_graph_store", lambda: InMemoryGraphStore(self.graph)), \
+                patch.object(dreamer, "get_vector_store", lambda: self.vectors), \
+                patch.object(dreamer, "consolidation_state", self.state), \
+                patch.object(dreamer, "generate", self._generate(CONSOLIDATED)):
+            summary = dreamer.consolidate_all()
+
+        self.assertEqual((summary["users"], summary["examined"], summary["incomplete"]), (2, 2, []))
+        self.assertEqual(sorted(e["user_id"] for e in self.graph.edges.values()), ["dreamer_user", "second_user"])
+        self.assertEqual(self.state.dirty_users(), {})
+
+
+class TestConsolidationState(unittest.TestCase):
+
+    def test_write_during_a_pass_keeps_the_entity_dirty(self):
+        state = ConsolidationState(":memory:")
+        state.mark_dirty("u", ["User", "Jazz"])
+        seen = {d["entity"]: d["version"] for d in state.dirty("u")}
+        state.mark_dirty("u", ["Jazz"])  # lands while the dreamer is deciding
+
+        state.settle("u", seen)
+        self.assertEqual([d["entity"] for d in state.dirty("u")], ["Jazz"])
+        state.examined("u", "Jazz", seen["Jazz"], degree=5)
+        self.assertEqual(state.get("u", "Jazz")["dirty"], 1)
+        self.assertEqual(state.dirty_users(), {"u": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
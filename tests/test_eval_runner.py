@@ -0,0 +1,51 @@
+# tests/test_eval_runner.py
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.pipeline_bench import offline_pipeline
+from evaluation.runner import run_evaluation
+
+DATASET = [
+    {
+        "conversation_id": f"convo_{i}",
+        "turns": [
+            {"turn_id": 1, "user_input": f"I live in {city}.", "eval": {"type": "none"}},
+            {"turn_id": 2, "user_input": "Where do I live?", "eval": {"type": "retrieve", "expected_response_contains": []}},
+        ],
+    }
+    for i, city in enumerate(["Berlin", "Osaka", "Lisbon"])
+]
+
+
+class TestEvalRunner(unittest.TestCase):
+
+    def test_parallel_run_is_isolated_and_writes_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset_path = Path(tmp) / "dataset.json"
+            dataset_path.write_text(json.dumps(DATASET))
+            output_path = Path(tmp) / "results.json"
+
+            with offline_pipeline(latency_ms=1.0) as (_ollama, graph, _vectors):
+                results = run_evaluation(workers=3, dataset_path=dataset_path, output_path=output_path)
+
+            self.assertEqual(json.loads(output_path.read_text())["run_id"], results["run_id"])
+
+        self.assertEqual(results["total_turns"], 6)
+        self.assertEqual([c["conversation_id"] for c in results["conversations"]], ["convo_0", "convo_1", "convo_2"])
+        for convo in results["conversations"]:
+            self.assertTrue(all(t["slow_pipe_settled"] for t in convo["turns"]))
+            self.assertIn(results["run_id"], convo["session_id"])
+
+        # Same subject ("User") in every conversation, but one edge per session
+        owners = {edge["user_id"] for edge in graph.edges.values()}
+        self.assertEqual(owners, {c["session_id"] for c in results["conversations"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
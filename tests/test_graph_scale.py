@@ -0,0 +1,59 @@
+# tests/test_graph_scale.py
+import sys
+import unittest
+from collections import Counter
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.graph_scale import PATHS, run_scale
+from benchmarks.stubs import InMemoryGraph, InMemoryGraphStore
+from benchmarks.synthetic_graph import generate_edges
+
+
+class TestSyntheticGraph(unittest.TestCase):
+
+    def test_deterministic_batches(self):
+        first = [e for batch in generate_edges(500, seed=3, batch_size=128) for e in batch]
+        second = [e for batch in generate_edges(500, seed=3, batch_size=128) for e in batch]
+        self.assertEqual(len(first), 500)
+        self.assertEqual(first, second)
+
+    def test_power_law_degree(self):
+        edges = [e for batch in generate_edges(5000, users=50, shared_entities=500, seed=1) for e in batch]
+        shared_degree = Counter(e["dst"] for e in edges if e["dst"].startswith("entity_"))
+        degrees = sorted(shared_degree.values(), reverse=True)
+
+        # A handful of shared entities carry far more edges than the median one
+        self.assertGreater(degrees[0], 10 * degrees[len(degrees) // 2])
+        hub_share = sum(1 for e in edges if e["src"] == "User") / len(edges)
+        self.assertAlmostEqual(hub_share, 0.5, delta=0.05)
+
+
+class TestGraphScale(unittest.TestCase):
+
+    def test_curve_over_sizes(self):
+        graph = InMemoryGraph()
+        results = run_scale(InMemoryGraphStore(graph), [200, 800], users=10, repeats=3)
+
+        self.assertEqual([p["edges"] for p in results["curve"]], [200, 800])
+        for point in results["curve"]:
+            self.assertEqual(set(point["paths"]), set(PATHS))
+        self.assertLessEqual(len(graph.edges), 800)  # re-inserted facts merge
+        self.assertEqual(set(results["growth_exponent_p50"]), set(PATHS))
+
+    def test_store_paths_are_user_scoped(self):
+        store = InMemoryGraphStore(InMemoryGraph())
+        store.bulk_insert_edges([
+            {"src": "User", "relation": "LIKES", "dst": "Jazz", "user_id": "a", "last_updated": 1},
+            {"src": "User", "relation": "LIKES", "dst": "Jazz", "user_id": "b", "last_updated": 2},
+            {"src": "User", "relation": "LIVES_IN", "dst": "Berlin", "user_id": "a", "last_updated": 3},
+        ])
+
+        self.assertEqual([f["dst"] for f in store.get_recent_facts("User", user_id="a")], ["Berlin", "Jazz"])
+        self.assertEqual(store.find_dense_entities(min_degree=3, limit=1), [{"entity": "User", "degree": 3}])
+
+
+if __name__ == "__main__":
+    unittest.main()
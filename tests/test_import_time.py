@@ -0,0 +1,80 @@
+# tests/test_import_time.py
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Add project root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Cold-import budget per entry point in ms (fresh interpreter, best of RUNS).
+# Roughly 3x the measured time, so only real regressions (an eager heavy import) fail.
+# Scale for slow machines with IMPORT_TIME_BUDGET_SCALE=2.
+BUDGET_MS = {
+    "config": 150,
+    "memory": 100,
+    "reasoning": 100,
+    "llm": 100,
+    "slow_pipe": 300,
+    "fast_pipe": 600,
+    "main": 700,
+    "warmup": 300,
+    "web_ui": 3000,   # fastapi/uvicorn/jinja2 are needed to serve at all
+}
+RUNS = 3
+
+# Must only load when a store/model is first used, never at import
+HEAVY_MODULES = ("chromadb", "neo4j", "sentence_transformers", "torch", "cohere", "transformers")
+
+
+def _import_ms(module: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    for line in reversed(out.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise AssertionError(f"no importtime entry for {module}:\n{out[-2000:]}")
+
+
+def _heavy_loaded(module: str) -> list:
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return [m for m in out.strip().split(",") if m]
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_entry_points_stay_within_budget(self):
+        scale = float(os.getenv("IMPORT_TIME_BUDGET_SCALE", "1"))
+        for module, budget in BUDGET_MS.items():
+            with self.subTest(module=module):
+                best = min(_import_ms(module) for _ in range(RUNS))
+                self.assertLess(best, budget * scale, f"import {module} took {best:.0f}ms (budget {budget * scale:.0f}ms)")
+
+    def test_heavy_dependencies_are_deferred(self):
+        for module in ("main", "fast_pipe", "slow_pipe", "web_ui", "memory", "reasoning", "llm"):
+            with self.subTest(module=module):
+                self.assertEqual(_heavy_loaded(module), [])
+
+    def test_lazy_exports_resolve_on_access(self):
+        import memory
+        import reasoning
+
+        self.assertIn("VectorMemoryStore", dir(memory))
+        from memory import RAMContext
+        self.assertIs(RAMContext, sys.modules["memory.ram_context"].RAMContext)
+        self.assertTrue(callable(reasoning.compute_confidence))
+        with self.assertRaises(AttributeError):
+            memory.does_not_exist
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+# tests/test_ingest.py
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stubs import FakeEmbedder, InMemoryGraph, InMemoryGraphStore, InMemoryVectorStore, fake_extract
+from ingest import Checkpoint, Ingester, parse_turn, read_turns
+from memory.consolidation_state import ConsolidationState
+
+
+class FlakyGraphStore(InMemoryGraphStore):
+    """Fails the n-th bulk edge write, like a database dropping mid-run."""
+
+    def __init__(self, graph, fail_on: int):
+        super().__init__(graph)
+        self.fail_on = fail_on
+        self.writes = 0
+
+    def bulk_insert_edges(self, edges, batch_size=5000, idempotent=False):
+        self.writes += 1
+        if self.writes == self.fail_on:
+            raise ConnectionError("graph went away")
+        return super().bulk_insert_edges(edges, batch_size, idempotent)
+
+
+class CrashingCheckpoint(Checkpoint):
+    """Dies on the n-th save: that batch is written but not checkpointed."""
+
+    def __init__(self, path, fail_on: int):
+        super().__init__(path)
+        self.fail_on = fail_on
+        self.saves = 0
+
+    def advance(self, positions, totals):
+        self.saves += 1
+        if self.saves == self.fail_on:
+            raise OSError("disk full")
+        super().advance(positions, totals)
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.graph = InMemoryGraph()
+        self.vectors = InMemoryVectorStore(FakeEmbedder())
+        self.extracted = []
+        self.lock = threading.Lock()
+        self.state = ConsolidationState(":memory:")
+        self.patch = patch("memory.consolidation_state.consolidation_state", self.state)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def _extract(self, text):
+        with self.lock:
+            self.extracted.append(text)
+        return fake_extract(text)
+
+    def _write(self, name, records, tail=""):
+        path = self.dir / name
+        path.write_text("".join(json.dumps(r) + "\n" for r in records) + tail)
+        return path
+
+    def _ingester(self, graph_store=None, **kwargs):
+        kwargs.setdefault("checkpoint", Checkpoint(self.dir / "checkpoint.json"))
+        return Ingester(
+            graph_store=graph_store or InMemoryGraphStore(self.graph),
+            vector_store=self.vectors,
+            extract=self._extract,
+            report_every=0,
+            **kwargs,
+        )
+
+    def test_parse_turn_accepts_aliases_and_skips_other_roles(self):
+        turn = parse_turn(b'{"user_id": 7, "user_input": " I live in Paris. ", "timestamp": "2024-06-10T00:00:00Z"}', 3)
+        self.assertEqual(turn, {"user_id": "7", "text": "I live in Paris.", "turn_id": 3, "timestamp_ms": 1717977600000})
+        self.assertIsNone(parse_turn(b'{"session_id": "a", "role": "assistant", "text": "Hi"}', 0))
+        self.assertIsNone(parse_turn(b'{"session_id": "a"}', 0))
+        self.assertIsNone(parse_turn(b"not json", 0))
+
+    def test_partial_last_line_is_left_for_later(self):
+        path = self._write("t.jsonl", [{"session_id": "a", "text": "I love jazz"}], tail='{"session_id": "a", "te')
+
+        lines = list(read_turns(path))
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0][1:], (len(path.read_bytes().split(b"\n")[0]) + 1, 1))
+        self.assertEqual([t["turn_id"] for t, *_ in read_turns(path, 0)], [0])
+
+    def test_parallel_run_writes_every_fact_in_order(self):
+        records = [{"session_id": f"u{i % 3}", "text": f"I love thing {i}", "timestamp": 1700000000 + i} for i in range(50)]
+        records.insert(10, {"session_id": "u0", "role": "assistant", "text": "Nice!"})
+        records.insert(20, {"session_id": "u1", "text": "Hello there"})
+        path = self._write("t.jsonl", records)
+
+        stats = self._ingester(workers=4, batch_size=8).run([path])
+
+        self.assertEqual(stats["lines"], 52)
+        self.assertEqual(stats["skipped_lines"], 1)
+        self.assertEqual(stats["no_facts"], 1)
+        self.assertEqual(stats["stored_turns"], 50)
+        self.assertEqual(stats["batches"], 7)
+        self.assertEqual(len(self.graph.edges), 50)
+        edge = self.graph.edges[("User", "LIKES", "Thing 4", "u1")]
+        self.assertEqual((edge["turn_id"], edge["last_updated"]), (4, 1700000004000))
+        self.assertEqual(len(self.vectors.docs), 50)
+        self.assertEqual(self.state.dirty_users(), {"u0": 18, "u1": 18, "u2": 17})  # "User" + one entity per turn
+
+    def test_resume_after_crash_skips_written_batches(self):
+        records = [{"session_id": "a", "text": f"I love thing {i}", "turn_id": i} for i in range(20)]
+        path = self._write("t.jsonl", records)
+
+        with self.assertRaises(ConnectionError):
+            self._ingester(FlakyGraphStore(self.graph, fail_on=2), workers=2, batch_size=5).run([path])
+        self.assertEqual(len(self.graph.edges), 5)
+        state = json.loads((self.dir / "checkpoint.json").read_text())
+        offset = next(iter(state["files"].values()))["offset"]
+        self.assertEqual(offset, len(b"".join(path.read_bytes().split(b"\n", 5)[:5])) + 5)
+
+        self.extracted.clear()
+        stats = self._ingester(workers=2, batch_size=5).run([path])
+        self.assertEqual(stats["turns"], 15)
+        self.assertNotIn("I love thing 4", self.extracted)
+        self.assertEqual(len(self.graph.edges), 20)
+        self.assertEqual({e["confidence"] for e in self.graph.edges.values()}, {1.0})
+
+    def test_replayed_batch_does_not_reinforce_again(self):
+        path = self._write("t.jsonl", [{"session_id": "a", "text": f"I love thing {i}"} for i in range(10)])
+
+        def extract(text):
+            delta = fake_extract(text)
+            delta["edges"][0]["confidence"] = 0.5
+            return delta
+
+        ingester = self._ingester(checkpoint=CrashingCheckpoint(self.dir / "checkpoint.json", fail_on=2), batch_size=5)
+        ingester.extract = extract
+        with self.assertRaises(OSError):
+            ingester.run([path])
+        self.assertEqual(len(self.graph.edges), 10)   # the second batch was written, not checkpointed
+
+        ingester = self._ingester(batch_size=5)
+        ingester.extract = extract
+        self.assertEqual(ingester.run([path])["turns"], 5)
+        self.assertEqual({e["confidence"] for e in self.graph.edges.values()}, {0.5})
+
+    def test_appended_lines_are_picked_up_and_limit_stops_early(self):
+        path = self._write("t.jsonl", [{"session_id": "a", "text": f"I love thing {i}"} for i in range(6)])
+
+        self.assertEqual(self._ingester(batch_size=2).run([path], limit=3)["turns"], 3)
+        self.assertEqual(self._ingester(batch_size=2).run([path])["turns"], 3)
+        with open(path, "a") as f:
+            f.write(json.dumps({"session_id": "a", "text": "I live in Rome"}) + "\n")
+        stats = self._ingester(batch_size=2).run([path])
+
+        self.assertEqual(stats["turns"], 1)
+        self.assertEqual(self.graph.edges[("User", "LIVES_IN", "Rome", "a")]["turn_id"], 6)
+
+        # A checkpoint from before line counts were kept: the lines are counted from the file
+        state = json.loads((self.dir / "checkpoint.json").read_text())
+        for entry in state["files"].values():
+            self.assertEqual(entry.pop("lines"), 7)
+        (self.dir / "checkpoint.json").write_text(json.dumps(state))
+        with open(path, "a") as f:
+            f.write(json.dumps({"session_id": "a", "text": "I live in Oslo"}) + "\n")
+        self._ingester(batch_size=2).run([path])
+        self.assertEqual(self.graph.edges[("User", "LIVES_IN", "Oslo", "a")]["turn_id"], 7)
+
+    def _offset(self):
+        state = json.loads((self.dir / "checkpoint.json").read_text())
+        return next(iter(state["files"].values()))["offset"]
+
+    def test_extraction_error_stops_the_run_before_that_turn(self):
+        records = [{"session_id": "a", "text": t} for t in ("I love jazz", "I love tea", "boom", "I love rock")]
+        path = self._write("t.jsonl", records)
+
+        def extract(text):
+            if text == "boom":
+                raise TimeoutError("llm timed out")
+            return fake_extract(text)
+
+        ingester = self._ingester(workers=4, batch_size=10)
+        ingester.extract = extract
+        stats = ingester.run([path])
+        self.assertEqual((stats["stored_turns"], stats["extract_errors"]), (2, 1))
+        self.assertEqual(stats["stopped_at"], {"file": str(path), "turn_id": 2, "error": "TimeoutError: llm timed out"})
+        self.assertNotIn(("User", "LIKES", "Rock", "a"), self.graph.edges)
+        self.assertEqual(self._offset(), len(b"".join(path.read_bytes().split(b"\n", 2)[:2])) + 2)
+
+        # The server is back: the rerun starts at the failed turn
+        self.extracted.clear()
+        stats = self._ingester().run([path])
+        self.assertEqual(self.extracted, ["boom", "I love rock"])
+        self.assertIsNone(stats["stopped_at"])
+        self.assertEqual(self._offset(), path.stat().st_size)
+
+    def test_llm_server_down_writes_and_checkpoints_nothing(self):
+        path = self._write("t.jsonl", [{"session_id": "a", "text": f"I love thing {i}"} for i in range(3)])
+        ingester = Ingester(
+            graph_store=InMemoryGraphStore(self.graph),
+            vector_store=self.vectors,
+            checkpoint=Checkpoint(self.dir / "checkpoint.json"),
+            report_every=0,
+        )
+
+        with patch("llm.client.OLLAMA_BASE_URL", "http://127.0.0.1:9"):   # the real extractor, nothing listening
+            stats = ingester.run([path])
+
+        self.assertEqual((stats["turns"], stats["no_facts"], stats["extract_errors"]), (0, 0, 1))
+        self.assertEqual(stats["stopped_at"]["turn_id"], 0)
+        self.assertIn("ConnectionError", stats["stopped_at"]["error"])
+        self.assertEqual(self.graph.edges, {})
+        self.assertFalse((self.dir / "checkpoint.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
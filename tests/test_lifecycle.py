@@ -0,0 +1,159 @@
+# tests/test_lifecycle.py
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stubs import FakeEmbedder
+from memory import vector_store
+from memory.lifecycle import MemoryCollector, decayed_confidence, now_ms
+from memory.numpy_vector_store import NumpyVectorStore, reset_indexes
+from memory.sqlite_store import SQLiteMemoryStore, reset_connections
+from memory.versioning import memory_versions
+
+DAY_MS = 86_400_000
+
+
+def _edge(dst, user_id, confidence, age_days, now):
+    return {"src": "User", "relation": "LIKES", "dst": dst, "user_id": user_id, "confidence": confidence,
+            "source_text": f"I like {dst}", "last_updated": now - int(age_days * DAY_MS)}
+
+
+@patch("memory.lifecycle.MEMORY_HALF_LIFE_DAYS", 30)
+class TestMemoryLifecycle(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.graph = SQLiteMemoryStore(self.dir / "graph.db")
+        self.vectors = NumpyVectorStore(self.dir / "vectors", embedding_function=FakeEmbedder())
+        self.now = now_ms()
+
+        self.graph.bulk_insert_edges([
+            _edge("Jazz", "alice", 0.9, 0, self.now),
+            _edge("Rock", "alice", 0.8, 1, self.now),
+            _edge("Tea", "alice", 0.6, 20, self.now),
+            _edge("Polka", "alice", 0.75, 150, self.now),   # ~0.02: faded
+            _edge("Opera", "alice", 0.5, 40, self.now),
+            _edge("Polka", "bob", 0.75, 150, self.now),
+        ])
+        texts = ["I like jazz", "I like rock", "I liked polka once", "The dream insight"]
+        metadatas = [
+            {"user_id": "alice", "confidence": 0.9, "last_updated": self.now},
+            {"user_id": "alice", "confidence": 0.7, "last_updated": self.now - 10 * DAY_MS},
+            {"user_id": "alice", "confidence": 0.7, "last_updated": self.now - 200 * DAY_MS},
+            {"user_id": "alice", "type": "dream_consolidation"},  # no confidence or timestamp: never fades
+        ]
+        self.vectors.add_memories(texts, metadatas)
+
+    def tearDown(self):
+        reset_connections()
+        reset_indexes()
+        self.tmp.cleanup()
+
+    def _collector(self, **kwargs):
+        kwargs.setdefault("min_confidence", 0.1)
+        kwargs.setdefault("max_edges", 3)
+        kwargs.setdefault("max_vectors", 2)
+        return MemoryCollector(graph_store=self.graph, vector_store=self.vectors,
+                               archive_dir=self.dir / "archive", **kwargs)
+
+    def _likes(self, user_id):
+        return sorted(e["dst"] for e in self.graph.dump_graph([user_id])["edges"])
+
+    def test_decay_halves_per_half_life_and_can_be_disabled(self):
+        self.assertAlmostEqual(decayed_confidence(0.8, self.now - 30 * DAY_MS, self.now), 0.4)
+        self.assertAlmostEqual(decayed_confidence(0.8, self.now - 60 * DAY_MS, self.now), 0.2)
+        self.assertEqual(decayed_confidence(0.8, self.now + DAY_MS, self.now), 0.8)  # clock skew: never grows
+        self.assertEqual(decayed_confidence(0.8, None, self.now), 0.8)
+        with patch("memory.lifecycle.MEMORY_HALF_LIFE_DAYS", 0):
+            self.assertEqual(decayed_confidence(0.8, 0, self.now), 0.8)
+
+    def test_dry_run_counts_without_removing(self):
+        summary = self._collector().collect(dry_run=True)
+
+        self.assertEqual(summary["users"], 2)
+        self.assertEqual(summary["edges"], {"expired": 2, "over_quota": 1})
+        self.assertEqual(summary["vectors"], {"expired": 1, "over_quota": 1})
+        self.assertEqual(summary["compacted_rows"], 0)
+        self.assertEqual(len(self._likes("alice")), 5)
+        self.assertEqual(self.vectors.count(), 4)
+        self.assertFalse((self.dir / "archive").exists())
+
+    def test_collect_expires_caps_and_archives_in_batches(self):
+        epoch = memory_versions.get("alice")
+        summary = self._collector(batch_size=1).collect(["alice"])
+
+        self.assertIsNone(summary["error"])
+        self.assertEqual(summary["edges"], {"expired": 1, "over_quota": 1})
+        self.assertEqual(self._likes("alice"), ["Jazz", "Rock", "Tea"])
+        self.assertEqual(self._likes("bob"), ["Polka"])  # not in this pass
+        self.assertGreater(memory_versions.get("alice"), epoch)
+
+        memories = self.vectors.list_memories("alice")
+        self.assertEqual(sorted(memories["documents"]), ["I like jazz", "The dream insight"])
+
+        archived = [json.loads(line) for line in (self.dir / "archive" / "edges.jsonl").read_text().splitlines()]
+        self.assertEqual([(r["dst"], r["reason"]) for r in archived], [("Polka", "expired"), ("Opera", "over_quota")])
+        self.assertNotIn("edge_id", archived[0])
+        vectors = (self.dir / "archive" / "vectors.jsonl").read_text().splitlines()
+        self.assertEqual(json.loads(vectors[0])["document"], "I liked polka once")
+
+        # Half the index rows are now dead: the pass rewrote it without them
+        self.assertEqual(summary["compacted_rows"], 2)
+        self.assertEqual(self.vectors.index.count, 2)
+
+        # The vector deletes are logged: they stay deleted after a reload
+        reset_indexes()
+        reopened = NumpyVectorStore(self.dir / "vectors", embedding_function=FakeEmbedder())
+        self.assertEqual(reopened.count(), 2)
+        self.assertEqual(reopened.search("polka", user_id="alice")["documents"][0].count("I liked polka once"), 0)
+
+    def test_delete_mode_writes_no_archive_and_a_second_pass_is_a_no_op(self):
+        collector = self._collector(mode="delete")
+        collector.collect()
+        self.assertEqual(self._likes("bob"), [])
+        self.assertFalse((self.dir / "archive").exists())
+
+        epoch = memory_versions.get("alice")
+        summary = collector.collect()
+        self.assertEqual(summary["edges"], {"expired": 0, "over_quota": 0})
+        self.assertEqual(memory_versions.get("alice"), epoch)
+        self.assertEqual(collector.status()["totals"]["passes"], 2)
+
+    def test_vector_search_ranks_by_decayed_confidence(self):
+        # Same words, so the same similarity to any query: only age tells them apart
+        texts = ["I play chess", "Chess I play"]
+        metadatas = [
+            {"user_id": "carol", "confidence": 0.8, "last_updated": self.now - 90 * DAY_MS},
+            {"user_id": "carol", "confidence": 0.8, "last_updated": self.now},
+        ]
+        self.vectors.add_memories(texts, metadatas)
+        self.assertEqual(self.vectors.search("chess", n_results=1, user_id="carol")["documents"], [["Chess I play"]])
+
+        # Compaction renumbers carol's rows: their decay has to move with them
+        self.vectors.delete_memories(self.vectors.list_memories("alice")["ids"], "alice")
+        self.assertGreater(self.vectors.compact(0.1), 0)
+        self.assertEqual(self.vectors.search("chess", n_results=2, user_id="carol")["documents"], [["Chess I play", "I play chess"]])
+
+        with patch.object(vector_store, "CHROMA_DIR", self.dir / "chroma"):
+            vector_store.reset_client()
+            try:
+                chroma = vector_store.VectorMemoryStore(embedding_function=FakeEmbedder())
+                chroma.add_memories(texts, metadatas)
+                self.assertEqual(chroma.search("chess", n_results=1, user_id="carol")["documents"], [["Chess I play"]])
+            finally:
+                vector_store.reset_client()
+
+    def test_unknown_mode_is_refused(self):
+        with self.assertRaises(ValueError):
+            self._collector(mode="compress")
+
+
+if __name__ == "__main__":
+    unittest.main()
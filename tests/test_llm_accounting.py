@@ -0,0 +1,127 @@
+# tests/test_llm_accounting.py
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import llm.client
+from benchmarks.stubs import MockOllamaServer
+from llm.accounting import LLMBudgetExceeded, _usage_from, start_turn, usage_ledger
+from llm.generator import DEFAULT_FALLBACK, generate_response
+from reasoning.extractor import extract_graph_delta
+from reasoning.omniscience import detect_contradiction
+
+MESSAGES = [{"role": "user", "content": "I live in Berlin."}]
+
+
+class TestLLMAccounting(unittest.TestCase):
+
+    def setUp(self):
+        self.ollama = MockOllamaServer(latency_ms=1.0).start()
+        self.url_patch = patch.object(llm.client, "OLLAMA_BASE_URL", self.ollama.base_url)
+        self.url_patch.start()
+        usage_ledger.reset()
+
+    def tearDown(self):
+        self.url_patch.stop()
+        self.ollama.stop()
+
+    def test_records_tokens_latency_and_retries_per_site(self):
+        with start_turn("acct_s1", max_calls=0) as usage:
+            llm.client.chat("phi3:mini", MESSAGES, timeout=5, format="json", site="extraction")
+            llm.client.chat("phi3:mini", MESSAGES, timeout=5, format="json", site="extraction", attempt=1)
+            llm.client.generate("phi3:mini", 'Statement A (Old): "a"', timeout=5, site="contradiction")
+
+        summary = usage.summary()
+        self.assertEqual(summary["calls"], 3)
+        self.assertEqual(summary["retries"], 1)
+        self.assertEqual(summary["estimated_calls"], 0)
+        self.assertGreater(summary["prompt_tokens"], 0)
+        self.assertGreater(summary["completion_tokens"], 0)
+        self.assertEqual(summary["by_site"]["extraction"]["calls"], 2)
+        self.assertGreater(summary["by_site"]["contradiction"]["latency_ms"], 0)
+
+        self.assertEqual(usage_ledger.session("acct_s1")["calls"], 3)
+        snapshot = usage_ledger.snapshot()
+        self.assertEqual(snapshot["sites"]["extraction"]["retries"], 1)
+        self.assertEqual(snapshot["turns"]["turns"], 1)
+        self.assertIn('nsm_llm_calls_total{site="extraction"} 2', usage_ledger.render_prometheus())
+
+    def test_call_budget_keeps_a_slot_for_generation(self):
+        with start_turn("acct_s2", max_calls=2) as usage:
+            llm.client.chat("phi3:mini", MESSAGES, timeout=5, site="extraction")
+            with self.assertRaises(LLMBudgetExceeded):
+                llm.client.chat("phi3:mini", MESSAGES, timeout=5, site="extraction")
+            llm.client.chat("llama3:8b", MESSAGES, timeout=5, site="generation")
+            with self.assertRaises(LLMBudgetExceeded):
+                llm.client.chat("llama3:8b", MESSAGES, timeout=5, site="generation")
+
+        self.assertEqual(sum(self.ollama.calls.values()), 2)
+        self.assertEqual(usage.summary()["budget"]["rejected"], {"extraction": 1, "generation": 1})
+        self.assertEqual(usage_ledger.snapshot()["turns"]["over_budget"], 1)
+
+    def test_token_budget(self):
+        with start_turn("acct_s3", max_calls=0, max_tokens=1):
+            llm.client.chat("phi3:mini", MESSAGES, timeout=5, site="extraction")
+            with self.assertRaises(LLMBudgetExceeded) as ctx:
+                llm.client.chat("phi3:mini", MESSAGES, timeout=5, site="extraction")
+        self.assertEqual(ctx.exception.reason, "tokens")
+
+    def test_call_sites_degrade_when_over_budget(self):
+        with start_turn("acct_s4", max_calls=1):
+            self.assertIsNone(extract_graph_delta("I live in Berlin."))
+            self.assertFalse(detect_contradiction(
+                {"src": "User", "relation": "LIVES_IN", "dst": "Paris"},
+                {"src": "User", "relation": "LIVES_IN", "dst": "Berlin"},
+            ))
+            self.assertNotEqual(generate_response("hello", [], []), DEFAULT_FALLBACK)
+            self.assertEqual(generate_response("hello again", [], []), DEFAULT_FALLBACK)
+
+        self.assertEqual(self.ollama.calls, {"/api/chat": 1})
+
+    def test_followup_counts_against_the_same_turn(self):
+        with start_turn("acct_s5", max_calls=0) as usage:
+            work = usage.followup(lambda: llm.client.chat("phi3:mini", MESSAGES, timeout=5, site="extraction"))
+        # The turn is still open until its background work has run
+        self.assertEqual(usage_ledger.snapshot()["turns"]["turns"], 0)
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+
+        self.assertEqual(usage.summary()["calls"], 1)
+        self.assertEqual(usage_ledger.snapshot()["turns"], {"turns": 1, "calls": 1, "max_calls": 1, "over_budget": 0})
+
+    def test_turn_is_active_until_its_background_work_finishes(self):
+        with start_turn("acct_s8", max_calls=0) as usage:
+            work = usage.followup(lambda: None)
+        with start_turn("acct_dream", kind="dream"):
+            self.assertEqual(usage_ledger.activity()["active"], {"turn": 1, "dream": 1})
+        self.assertIsNone(usage_ledger.idle_seconds("acct_dream"))  # dreams are not user activity
+
+        work()
+        self.assertEqual(usage_ledger.activity()["active"].get("turn"), 0)
+        self.assertLess(usage_ledger.idle_seconds("acct_s8"), 5)
+
+    def test_failed_calls_are_counted_as_errors(self):
+        with patch.object(llm.client, "OLLAMA_BASE_URL", "http://127.0.0.1:9"):
+            with self.assertRaises(requests.RequestException):
+                llm.client.chat("phi3:mini", MESSAGES, timeout=1, site="extraction")
+        totals = usage_ledger.snapshot()["sites"]["extraction"]
+        self.assertEqual((totals["calls"], totals["errors"], totals["completion_tokens"]), (1, 1, 0))
+
+    def test_estimates_tokens_without_server_usage(self):
+        prompt_tokens, completion_tokens, estimated = _usage_from(
+            {"prompt": "x" * 400}, {"response": "y" * 40}
+        )
+        self.assertEqual((prompt_tokens, completion_tokens, estimated), (100, 10, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# tests/test_load_test.py
+import json
+import random
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from evaluation.load_test import _FACTS, LoadTest, MetricsSampler, SyntheticSession, parse_prometheus
+
+
+class _MockAgentHandler(BaseHTTPRequestHandler):
+    """/api/chat answers after a short delay (500 for jokes); /metrics reports a fixed backlog."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(0.005)
+        status = 500 if "joke" in body.get("user_input", "") else 200
+        self._reply(status, "application/json", json.dumps({"response": "ok"}))
+
+    def do_GET(self):
+        text = (
+            'nsm_stage_latency_ms{stage="slow_pipe.queue_wait",quantile="0.95"} 42.0\n'
+            "# TYPE nsm_slow_pipe_inflight gauge\n"
+            "nsm_slow_pipe_inflight 2.0\n"
+        )
+        self._reply(200, "text/plain", text)
+
+    def _reply(self, status, content_type, text):
+        payload = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLoadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _MockAgentHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _load_test(self, mix):
+        return LoadTest(self.base_url, sessions=4, source="synthetic", mix=mix, seed=1, timeout=5)
+
+    def test_synthetic_contradictions_change_a_stated_fact(self):
+        session = SyntheticSession(random.Random(3), {"statement": 0.5, "contradiction": 0.5})
+        contradictions = 0
+        for _ in range(20):
+            stated = {template.format(value) for template, value in (
+                (_FACTS[rel][0], val) for rel, val in session.facts.items()
+            )}
+            turn = session.next_turn()
+            if turn["kind"] == "contradiction":
+                contradictions += 1
+                self.assertNotIn(turn["text"], stated)
+        self.assertGreater(contradictions, 0)
+
+    def test_closed_loop_counts_errors_by_kind(self):
+        test = self._load_test({"statement": 0.5, "chitchat": 0.5})
+        elapsed = test.run_closed(concurrency=2, duration=0.3, think_time=0.0)
+        summary = test.summary(elapsed)
+
+        self.assertGreater(summary["requests"], 0)
+        self.assertGreater(summary["throughput_rps"], 0)
+        joke_errors = sum(1 for r in test.results if r["error"] == "http_500")
+        self.assertEqual(summary["errors"].get("http_500", 0), joke_errors)
+
+    def test_open_loop_measures_from_schedule(self):
+        test = self._load_test({"statement": 1.0})
+        elapsed = test.run_open(rate=50, duration=0.3, max_outstanding=8, seed=2)
+        summary = test.summary(elapsed)
+
+        self.assertGreater(summary["requests"], 0)
+        self.assertEqual(summary["error_rate"], 0)
+        for r in test.results:
+            self.assertGreaterEqual(r["latency_ms"], r["service_ms"])
+
+    def test_metrics_sampler_reads_slow_pipe_lag(self):
+        sampler = MetricsSampler(self.base_url)
+        self.assertEqual(sampler.backlog(), 2.0)
+        self.assertEqual(sampler.queue_wait()["p95"], 42.0)
+
+    def test_parse_prometheus(self):
+        samples = parse_prometheus('a_b{stage="x",quantile="0.5"} 1.5\n# HELP a\nc 3\n')
+        self.assertEqual(samples, {'a_b{stage="x",quantile="0.5"}': 1.5, "c": 3.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_logger.py
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import diagnostics.logger as logger
+
+
+class TestStructuredLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "events.jsonl"
+        self.writer = logger._LogWriter(str(self.path), maxsize=100)
+        self.patches = [
+            patch.object(logger, "_writer", self.writer),
+            patch.object(logger, "LOG_FORMAT", "json"),
+            patch.object(logger, "LOG_ASYNC", True),
+            patch.object(logger, "_min_level", logger.LEVELS["info"]),
+            patch.object(logger, "_sampling", {}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def _records(self):
+        self.writer.flush()
+        if not self.path.exists():
+            return []
+        # Background slow pipes left over from other tests may log into the same writer
+        records = [json.loads(line) for line in self.path.read_text(encoding="utf-8").splitlines()]
+        return [r for r in records if r.get("probe") == self.id()]
+
+    def test_json_lines_with_levels(self):
+        logger.log_event("FAST_PIPE_OK", latency_ms=12, probe=self.id())
+        logger.log_event("EXTRACTOR_FAIL", reason="network_error", probe=self.id())
+
+        records = self._records()
+        self.assertEqual([r["event"] for r in records], ["FAST_PIPE_OK", "EXTRACTOR_FAIL"])
+        self.assertEqual(records[0]["latency_ms"], 12)
+        self.assertEqual(records[1]["level"], "error")
+
+    def test_disabled_events_never_evaluate_fields(self):
+        def expensive():
+            raise AssertionError("should not be evaluated")
+
+        logger.log_event("LOGIC_BOMB_COMPARING", new_fact=expensive, probe=self.id())
+        self.assertEqual(self._records(), [])
+
+    def test_lazy_fields_evaluated_when_emitted(self):
+        logger.log_event("FAST_PIPE_OK", memories=lambda: 3, probe=self.id())
+        self.assertEqual(self._records()[0]["memories"], 3)
+
+    def test_sampling(self):
+        with patch.object(logger, "_sampling", {"PROMPT_PREFIX_REUSE": 0.0}):
+            for _ in range(5):
+                logger.log_event("PROMPT_PREFIX_REUSE", ratio=0.9, probe=self.id())
+        self.assertEqual(self._records(), [])
+
+    def test_never_raises(self):
+        logger.log_event("FAST_PIPE_OK", broken=lambda: 1 / 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# tests/test_memory_epochs.py
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.versioning import MemoryVersions, EpochCache
+
+
+class TestMemoryEpochs(unittest.TestCase):
+
+    def setUp(self):
+        self.versions = MemoryVersions()
+
+    def test_bump_notifies_subscribers(self):
+        events = []
+        self.versions.subscribe(lambda user_id, epoch, reason: events.append((user_id, reason)))
+
+        self.versions.bump("alex", reason="write")
+        self.versions.bump_all()
+
+        self.assertEqual(events, [("alex", "write"), (None, "wipe")])
+
+    def test_broken_listener_does_not_break_writes(self):
+        def broken(*_):
+            raise RuntimeError("boom")
+        self.versions.subscribe(broken)
+
+        self.assertEqual(self.versions.bump("alex"), 1)
+
+    def test_epoch_cache_recomputes_only_after_bump(self):
+        cache = EpochCache("test", versions=self.versions)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache.get_or_compute("alex", compute), 1)
+        self.assertEqual(cache.get_or_compute("alex", compute), 1)
+        self.versions.bump("sam")
+        self.assertEqual(cache.get_or_compute("alex", compute), 1)
+        self.versions.bump("alex")
+        self.assertEqual(cache.get_or_compute("alex", compute), 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_epoch_cache_ttl_recomputes_without_a_bump(self):
+        cache = EpochCache("test", versions=self.versions, ttl_seconds=60)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        with patch("memory.versioning.time.monotonic", return_value=1000.0):
+            self.assertEqual(cache.get_or_compute("alex", compute), 1)
+        with patch("memory.versioning.time.monotonic", return_value=1059.0):
+            self.assertEqual(cache.get_or_compute("alex", compute), 1)
+        with patch("memory.versioning.time.monotonic", return_value=1060.0):
+            self.assertEqual(cache.get_or_compute("alex", compute), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# tests/test_numpy_vector_store.py
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stubs import FakeEmbedder
+from memory import factory, numpy_vector_store
+from memory.numpy_vector_store import NumpyVectorStore, reset_indexes
+
+
+class TestNumpyVectorStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "vectors"
+        self.embedder = FakeEmbedder()
+        self.store = NumpyVectorStore(self.path, embedding_function=self.embedder)
+
+    def tearDown(self):
+        reset_indexes()
+        self.tmp.cleanup()
+
+    def test_search_is_user_scoped_and_chroma_shaped(self):
+        self.store.add_memory("I love jazz music", {"user_id": "a", "turn_id": 1})
+        self.store.add_memory("I live in Berlin", {"user_id": "a", "turn_id": 2})
+        self.store.add_memory("I love jazz music", {"user_id": "b", "turn_id": 1})
+
+        result = self.store.search("jazz music", n_results=5, user_id="a")
+        self.assertEqual(result["documents"][0][0], "I love jazz music")
+        self.assertEqual(result["metadatas"][0][0], {"user_id": "a", "turn_id": 1})
+        self.assertEqual(len(result["documents"][0]), 2)
+        self.assertLess(result["distances"][0][0], result["distances"][0][1])
+        self.assertEqual(len(self.store.search("jazz", n_results=5)["documents"][0]), 3)
+        self.assertEqual(self.store.search("jazz", user_id="nobody")["documents"], [[]])
+
+    def test_same_text_upserts(self):
+        self.store.add_memory("I love jazz", {"user_id": "a", "turn_id": 1})
+        self.store.add_memory("I love jazz", {"user_id": "a", "turn_id": 7})
+
+        self.assertEqual(self.store.count(), 1)
+        self.assertEqual(self.store.search("jazz", user_id="a")["metadatas"][0], [{"user_id": "a", "turn_id": 7}])
+
+    def test_bulk_add_dedupes_and_batches(self):
+        calls = []
+        self.store.embedding_function = lambda texts: calls.append(len(texts)) or self.embedder(texts)
+        texts = [f"memory {i}" for i in range(10)] + ["memory 3"]
+        metadatas = [{"user_id": "a", "turn_id": i} for i in range(11)]
+
+        self.assertEqual(self.store.add_memories(texts, metadatas, batch_size=4), 10)
+        self.assertEqual(calls, [4, 4, 2])
+        self.assertEqual(self.store.count(), 10)
+        self.assertEqual(self.store.search("memory 3", n_results=1, user_id="a")["metadatas"][0][0]["turn_id"], 10)
+
+    def test_reload_from_disk_and_growth(self):
+        items = [{"id": f"doc{i}", "user_id": f"u{i % 3}", "document": f"memory {i}", "metadata": {"i": i}} for i in range(1500)]
+        vectors = np.random.default_rng(0).standard_normal((1500, 64)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.store.index.upsert(items, vectors)
+        self.store.add_memory("I live in Berlin", {"user_id": "u1"})
+
+        reset_indexes()
+        reopened = NumpyVectorStore(self.path, embedding_function=self.embedder)
+        self.assertEqual(reopened.count(), 1501)
+        self.assertEqual(len(reopened.index.rows("u1")), 501)
+        self.assertEqual(reopened.search("I live in Berlin", n_results=1, user_id="u1")["documents"], [["I live in Berlin"]])
+
+    def test_torn_record_is_skipped(self):
+        self.store.add_memory("I love jazz", {"user_id": "a"})
+        with open(self.path / "records.jsonl", "a") as f:
+            f.write('{"id": "half')
+
+        reset_indexes()
+        reopened = NumpyVectorStore(self.path, embedding_function=self.embedder)
+        self.assertEqual(reopened.count(), 1)
+        reopened.add_memory("I live in Berlin", {"user_id": "a"})
+        self.assertEqual(reopened.count(), 2)
+
+    def test_compaction_reclaims_deleted_rows(self):
+        items = [{"id": f"doc{i}", "user_id": "ab"[i % 2], "document": f"memory {i}", "metadata": {"i": i}} for i in range(100)]
+        vectors = np.random.default_rng(0).standard_normal((100, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.store.index.upsert(items, vectors)
+
+        self.store.delete_memories([f"doc{i}" for i in range(0, 40, 2)])   # 20% dead: left alone
+        self.assertEqual(self.store.compact(0.3), 0)
+        self.store.index.delete_users(["b"])                                # 70% dead
+        self.store.embedding_function = lambda texts: [vectors[98]]
+        before = self.store.query("q", n_results=5, user_id="a")
+
+        self.assertEqual(self.store.compact(0.3), 70)
+        self.assertEqual(self.store.index.count, 30)
+        self.assertEqual(sorted(p.name for p in self.path.iterdir()), ["embeddings.1.f32", "meta.json", "records.1.jsonl"])
+        self.assertEqual(self.store.query("q", n_results=5, user_id="a"), before)
+        self.store.add_memory("I live in Berlin", {"user_id": "b"})
+        self.assertEqual(self.store.index.ids[self.store._compute_doc_id("b", "I live in Berlin")], 30)
+
+        reset_indexes()
+        reopened = NumpyVectorStore(self.path, embedding_function=lambda texts: [vectors[98]])
+        self.assertEqual(reopened.count(), 31)
+        self.assertEqual(reopened.query("q", n_results=5, user_id="a"), before)
+        self.assertEqual(reopened.list_memories("b")["documents"], ["I live in Berlin"])
+
+    def test_compaction_during_a_search_never_returns_other_users_rows(self):
+        # Rows: b 0-49, a 50-59, b 60-99. Dropping b's first 50 moves a to 0-9 and b's rest onto a's old rows
+        owners = ["b"] * 50 + ["a"] * 10 + ["b"] * 40
+        items = [{"id": f"doc{i}", "user_id": u, "document": f"{u} memory {i}", "metadata": {}} for i, u in enumerate(owners)]
+        vectors = np.random.default_rng(1).standard_normal((100, 16)).astype(np.float32)
+        self.store.index.upsert(items, numpy_vector_store._normalize(vectors))
+        self.store.delete_memories([f"doc{i}" for i in range(50)])
+        self.store.embedding_function = lambda texts: [vectors[55]]
+
+        top_k = numpy_vector_store._top_k
+        compactors = []
+
+        def top_k_then_compact(scores, k):
+            # Ranking is done: give a compaction every chance to run before the rows are resolved
+            compactor = threading.Thread(target=self.store.compact, args=(0.3,))
+            compactor.start()
+            compactor.join(0.2)
+            compactors.append(compactor)
+            return top_k(scores, k)
+
+        with patch.object(numpy_vector_store, "_top_k", top_k_then_compact):
+            documents = self.store.search("q", n_results=5, user_id="a")["documents"][0]
+        compactors[0].join()
+
+        self.assertEqual(len(documents), 5)
+        self.assertTrue(all(d.startswith("a ") for d in documents), documents)
+        self.assertEqual(documents[0], "a memory 55")
+        self.assertEqual(self.store.index.count, 50)  # the compaction did run, after the search
+
+    def test_ann_index_keeps_recall(self):
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((16, 32)).astype(np.float32)
+        vectors = centers[rng.integers(16, size=3000)] + 0.3 * rng.standard_normal((3000, 32)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.store.index.upsert(
+            [{"id": str(i), "user_id": "a", "document": str(i), "metadata": {}} for i in range(3000)], vectors
+        )
+        self.store.ann_threshold = 1000
+
+        hits = 0
+        for q in rng.integers(3000, size=20):
+            self.store.embedding_function = lambda texts, v=vectors[q]: [v]
+            found = self.store.query("q", n_results=10, user_id="a")["documents"][0]
+            exact = {str(i) for i in np.argsort(-(vectors @ vectors[q]))[:10]}
+            hits += len(exact & set(found))
+        self.assertIn("a", self.store.index._ann)
+        self.assertGreaterEqual(hits / 200, 0.9)
+
+    def test_dimension_mismatch_degrades_to_empty(self):
+        self.store.add_memory("I love jazz", {"user_id": "a"})
+        self.store.embedding_function = FakeEmbedder(dim=8)
+
+        with self.assertRaises(ValueError):
+            self.store.query("jazz")
+        self.assertEqual(self.store.search("jazz")["documents"], [[]])
+
+
+class TestVectorBackendSelection(unittest.TestCase):
+
+    def test_factory_selects_backend(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.object(factory, "VECTOR_BACKEND", "numpy"), \
+                patch("memory.numpy_vector_store.VECTOR_INDEX_DIR", Path(tmp)), \
+                patch("memory.vector_store.get_embedding_function", FakeEmbedder):
+            self.assertIsInstance(factory.get_vector_store(), NumpyVectorStore)
+            reset_indexes()
+
+        with patch.object(factory, "VECTOR_BACKEND", "faiss"), self.assertRaises(ValueError):
+            factory.get_vector_store()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+# tests/test_pending_writes.py
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.pending_writes import PendingWrites
+
+
+class TestPendingWrites(unittest.TestCase):
+
+    def setUp(self):
+        self.pending = PendingWrites()
+        self.edge = {"src": "User", "relation": "lives in", "dst": "Berlin", "confidence": 0.9}
+
+    def test_overlay_visible_until_ack(self):
+        token = self.pending.add("alex", [self.edge], text="I live in Berlin.")
+
+        edges = self.pending.edges("alex")
+        self.assertEqual(edges[0]["relation"], "LIVESIN")
+        self.assertTrue(edges[0]["pending"])
+        self.assertEqual(self.pending.texts("alex"), ["I live in Berlin."])
+        self.assertEqual(self.pending.edges("sam"), [])
+
+        self.pending.ack(token)
+        self.assertEqual(self.pending.edges("alex"), [])
+        self.assertEqual(self.pending.count(), 0)
+
+    def test_filter_by_source_entity(self):
+        self.pending.add("alex", [self.edge, {"src": "Berlin", "relation": "IN", "dst": "Germany"}])
+
+        self.assertEqual([e["dst"] for e in self.pending.edges("alex", src="User")], ["Berlin"])
+
+    def test_wait_idle(self):
+        token = self.pending.add("alex", [self.edge])
+        self.assertFalse(self.pending.wait_idle("alex", timeout=0.01))
+        self.assertTrue(self.pending.wait_idle("sam", timeout=0.01))
+
+        threading.Timer(0.05, self.pending.ack, args=(token,)).start()
+        self.assertTrue(self.pending.wait_idle("alex", timeout=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# tests/test_pipeline_bench.py
+import copy
+import sys
+import unittest
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.pipeline_bench import build_script, compare, run_benchmark
+from benchmarks.stubs import InMemoryGraph, InMemoryGraphStore, fake_contradiction, fake_extract
+
+
+class TestStubs(unittest.TestCase):
+
+    def test_fake_extract_and_contradiction(self):
+        delta = fake_extract("I live in Berlin.")
+        self.assertEqual(delta["edges"][0]["relation"], "LIVES_IN")
+        self.assertEqual(fake_extract("how is the weather")["edges"], [])
+
+        prompt = 'Statement A (Old Knowledge): "User LIVES_IN Berlin"\nStatement B (New Input): "User LIVES_IN Osaka"'
+        self.assertTrue(fake_contradiction(prompt))
+        self.assertFalse(fake_contradiction(prompt.replace("Osaka", "Berlin")))
+
+    def test_graph_store_recent_facts_newest_first(self):
+        store = InMemoryGraphStore(InMemoryGraph())
+        store.insert_edge({"src": "User", "relation": "LIKES", "dst": "Jazz", "user_id": "u"})
+        store.insert_edge({"src": "User", "relation": "LIVES_IN", "dst": "Berlin", "user_id": "u"})
+
+        facts = store.get_recent_facts("User", limit=3)
+        self.assertEqual([f["dst"] for f in facts], ["Berlin", "Jazz"])
+        self.assertEqual(store.retrieve_context("u")[0]["dst"], "Berlin")
+
+
+class TestPipelineBench(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = run_benchmark(workload="mixed", users=2, turns=16, latency_ms=1.0)
+
+    def test_script_is_deterministic(self):
+        self.assertEqual(build_script("mixed", 3, 20, seed=1), build_script("mixed", 3, 20, seed=1))
+
+    def test_reports_stages_and_drains_slow_pipe(self):
+        stages = self.results["stages"]
+        self.assertEqual(stages["fast_pipe"]["count"], 16)
+        for stage in ("fast_pipe.extract", "fast_pipe.generate", "slow_pipe", "llm.generation"):
+            self.assertIn(stage, stages)
+        self.assertGreater(self.results["graph_edges"], 0)
+        self.assertGreater(self.results["throughput"]["fast_pipe_turns_per_s"], 0)
+
+    def test_compare_flags_regressions(self):
+        self.assertEqual(compare(self.results, self.results), [])
+
+        faster = copy.deepcopy(self.results)
+        faster["stages"]["fast_pipe"]["p95"] = 0.0
+        faster["throughput"]["fast_pipe_turns_per_s"] *= 10
+        regressions = compare(self.results, faster, tolerance=0.1, slack_ms=0.0)
+        self.assertTrue(any(r.startswith("fast_pipe p95") for r in regressions))
+        self.assertTrue(any(r.startswith("fast_pipe_turns_per_s") for r in regressions))
+
+
+if __name__ == "__main__":
+    unittest.main()
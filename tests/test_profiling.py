@@ -0,0 +1,127 @@
+# tests/test_profiling.py
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import diagnostics.profiling as profiling
+
+
+def _busy_loop(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.patches = [
+            patch.object(profiling, "PROFILE_DIR", self.dir),
+            patch.object(profiling, "PROFILE_SAMPLE_INTERVAL_MS", 1.0),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_disabled_is_a_no_op(self):
+        with profiling.profile("turn", None) as prof:
+            self.assertIsNone(profiling.current_profile())
+        self.assertIsNone(prof)
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+    def test_sampling_writes_folded_stacks(self):
+        with profiling.profile("turn", "sample") as prof:
+            _busy_loop(0.1)
+
+        self.assertEqual(prof.path.suffix, ".folded")
+        lines = prof.path.read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any("_busy_loop (test_profiling.py" in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+
+    def test_cprofile_writes_pstats(self):
+        with profiling.profile("turn", "cprofile") as prof:
+            _busy_loop(0.01)
+
+        stats = pstats.Stats(str(prof.path))
+        self.assertTrue(any(func[2] == "_busy_loop" for func in stats.stats))
+
+    def test_followup_profiles_other_thread(self):
+        with profiling.profile("turn", "sample", include_slow_pipe=True) as prof:
+            work = profiling.current_profile().followup(_busy_loop)
+        worker = threading.Thread(target=work, args=(0.05,))
+        worker.start()
+        worker.join()
+
+        names = sorted(p.name for p in self.dir.iterdir())
+        self.assertEqual(len(names), 2)
+        self.assertTrue(any(name.endswith("turn._busy_loop.folded") for name in names))
+        self.assertIn(prof.path.name, names)
+
+    def test_old_profiles_are_pruned(self):
+        with patch.object(profiling, "PROFILE_MAX_FILES", 2):
+            for _ in range(4):
+                with profiling.profile("turn", "cprofile"):
+                    pass
+                time.sleep(0.01)
+        self.assertEqual(len(list(self.dir.iterdir())), 2)
+
+    def test_parse_mode(self):
+        self.assertEqual(profiling.parse_mode("1"), "sample")
+        self.assertEqual(profiling.parse_mode("cProfile"), "cprofile")
+        self.assertIsNone(profiling.parse_mode(None))
+        self.assertIsNone(profiling.parse_mode("flame"))
+
+
+class TestChatEndpointProfiling(unittest.TestCase):
+
+    def _chat(self, http_enabled: bool):
+        from fastapi.testclient import TestClient
+        from benchmarks.pipeline_bench import offline_pipeline
+        import web_ui
+
+        client = TestClient(web_ui.app)
+        with patch.object(web_ui, "PROFILE_HTTP_ENABLED", http_enabled), offline_pipeline(latency_ms=1.0):
+            plain = client.post("/api/chat", json={"session_id": "prof_a", "user_input": "hi"}).json()
+            profiled = client.post(
+                "/api/chat",
+                json={"session_id": "prof_a", "user_input": "I live in Berlin."},
+                headers={"X-Profile": "sample"},
+            ).json()
+        return plain, profiled
+
+    def test_header_profiles_one_turn(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.object(profiling, "PROFILE_DIR", Path(tmp)):
+            plain, profiled = self._chat(http_enabled=True)
+
+            self.assertNotIn("profile", plain)
+            self.assertEqual(Path(profiled["profile"]).name, profiled["profile"])  # no server path
+            self.assertTrue((Path(tmp) / profiled["profile"]).exists())
+
+    def test_header_is_ignored_unless_enabled(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.object(profiling, "PROFILE_DIR", Path(tmp)):
+            _, profiled = self._chat(http_enabled=False)
+
+            self.assertNotIn("profile", profiled)
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
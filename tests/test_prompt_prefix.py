@@ -0,0 +1,106 @@
+# tests/test_prompt_prefix.py
+import json
+import sys
+import threading
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import llm.client
+from llm.generator import generate_response
+from llm.prompt import STATIC_SYSTEM_PROMPT, prompt_assembler
+
+
+class _MockOllamaHandler(BaseHTTPRequestHandler):
+    """Records every request body and answers like Ollama's /api/chat."""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append((self.path, body))
+
+        payload = json.dumps({"message": {"role": "assistant", "content": "ok"}, "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPromptPrefixStability(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _MockOllamaHandler)
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.url_patch = patch.object(llm.client, "OLLAMA_BASE_URL", self.base_url)
+        self.url_patch.start()
+
+    def tearDown(self):
+        self.url_patch.stop()
+
+    def _run_conversation(self, session_id, turns):
+        history = []
+        for text in turns:
+            history.append(text)
+            response = generate_response(text, list(history), ["- User LIVES_IN Berlin"], session_id=session_id)
+            self.assertEqual(response, "ok")
+        return [body for _, body in self.server.requests]
+
+    def test_static_prefix_is_identical_across_turns(self):
+        bodies = self._run_conversation("prefix_a", ["I live in Berlin.", "Where do I live?", "What is my name?"])
+
+        self.assertEqual(len(bodies), 3)
+        system_prompts = {b["messages"][0]["content"] for b in bodies}
+        self.assertEqual(system_prompts, {STATIC_SYSTEM_PROMPT})
+
+        # Volatile content must not leak into the static prefix
+        today = datetime.now().strftime("%B %d, %Y")
+        self.assertNotIn(today, STATIC_SYSTEM_PROMPT)
+        self.assertIn(today, bodies[-1]["messages"][1]["content"])
+
+    def test_user_input_is_in_the_tail(self):
+        bodies = self._run_conversation("prefix_b", ["I like tea.", "What do I like?"])
+
+        user_message = bodies[-1]["messages"][1]["content"]
+        self.assertTrue(user_message.startswith("Recent conversation:\n- I like tea.\n"))
+        self.assertGreater(user_message.index("What do I like?"), user_message.index("Relevant facts"))
+
+    def test_history_prefix_repeats_between_turns(self):
+        self._run_conversation("prefix_c", ["I like tea.", "I live in Berlin.", "Where do I live?"])
+
+        stats = prompt_assembler.prefix_stats("prefix_c")
+        rendered_prefix = STATIC_SYSTEM_PROMPT + "\nRecent conversation:\n- I like tea.\n"
+        self.assertGreaterEqual(stats["shared_chars"], len(rendered_prefix))
+        self.assertGreater(stats["ratio"], 0.5)
+
+    def test_keep_alive_is_pinned(self):
+        bodies = self._run_conversation("prefix_d", ["hello there"])
+
+        path, _ = self.server.requests[0]
+        self.assertEqual(path, "/api/chat")
+        self.assertIn("keep_alive", bodies[0])
+        self.assertFalse(bodies[0]["stream"])
+
+
+if __name__ == "__main__":
+    unittest.main()
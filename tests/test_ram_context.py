@@ -0,0 +1,101 @@
+# tests/test_ram_context.py
+import fnmatch
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.ram_context import RAMContext, RedisSessionBackend
+
+
+class _InProcessRedis:
+    """Local stand-in for the subset of redis-py the session backend uses."""
+
+    def __init__(self):
+        self.lists = {}
+        self.ttls = {}
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def ltrim(self, key, start, end):
+        items = self.lists.get(key, [])
+        self.lists[key] = items[start:] if end == -1 else items[start:end + 1]
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def delete(self, *keys):
+        for key in keys:
+            self.lists.pop(key, None)
+
+    def scan_iter(self, match="*"):
+        return [k for k in list(self.lists) if fnmatch.fnmatch(k, match)]
+
+
+class TestRAMContext(unittest.TestCase):
+
+    def test_keeps_last_n_turns(self):
+        ctx = RAMContext(maxlen=3)
+        for i in range(5):
+            ctx.add("s1", f"turn {i}")
+        self.assertEqual(ctx.get("s1"), ["turn 2", "turn 3", "turn 4"])
+        self.assertEqual(ctx.get("missing"), [])
+
+    def test_long_turns_round_trip_compressed(self):
+        ctx = RAMContext()
+        long_turn = "I really love spicy ramen with extra egg. " * 50
+        ctx.add("s1", long_turn)
+        self.assertEqual(ctx.get("s1"), [long_turn])
+        self.assertLess(ctx.stats()["bytes"], len(long_turn))
+
+    def test_lru_session_cap(self):
+        ctx = RAMContext(max_sessions=2)
+        ctx.add("a", "hi")
+        ctx.add("b", "hi")
+        ctx.get("a")  # touch a, so b is least recently used
+        ctx.add("c", "hi")
+
+        self.assertEqual(ctx.get("b"), [])
+        self.assertEqual(ctx.get("a"), ["hi"])
+        self.assertEqual(ctx.stats()["evicted_lru"], 1)
+
+    def test_ttl_expiry(self):
+        ctx = RAMContext(ttl_seconds=0.01)
+        ctx.add("a", "hi")
+        time.sleep(0.03)
+        self.assertEqual(ctx.get("a"), [])
+        self.assertEqual(ctx.stats()["evicted_ttl"], 1)
+
+    def test_memory_ceiling(self):
+        ctx = RAMContext(max_bytes=100, max_sessions=0, ttl_seconds=0)
+        for i in range(10):
+            ctx.add(f"s{i}", "x" * 30)
+
+        stats = ctx.stats()
+        self.assertLessEqual(stats["bytes"], 100)
+        self.assertGreater(stats["evicted_memory"], 0)
+        self.assertEqual(ctx.get("s9"), ["x" * 30])
+
+    def test_external_backend(self):
+        redis = _InProcessRedis()
+        ctx = RAMContext(backend=RedisSessionBackend(redis, maxlen=2, ttl_seconds=60))
+        for text in ["one", "two", "drei ✓"]:
+            ctx.add("s1", text)
+
+        self.assertEqual(ctx.get("s1"), ["two", "drei ✓"])
+        self.assertEqual(redis.ttls["ramctx:s1"], 60)
+
+        ctx.clear()
+        self.assertEqual(ctx.get("s1"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_response_cache.py
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.pipeline_bench import offline_pipeline
+import fast_pipe as fast_pipe_module
+from fast_pipe import fast_pipe
+from memory.ram_context import RAMContext
+from memory.response_cache import ResponseCache, normalize_question
+from memory.versioning import MemoryVersions
+
+
+def _bag_of_words_embed(texts):
+    """Deterministic stand-in for the sentence embedder."""
+    vocab = ["what", "is", "my", "name", "whats", "where", "am", "i", "from"]
+    return [[float(t.split().count(w)) for w in vocab] for t in texts]
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.versions = MemoryVersions()
+        self.cache = ResponseCache(similarity_threshold=0.7, embed_fn=_bag_of_words_embed)
+        self.result = {"response": "Your name is Alex.", "memories_used": []}
+
+    def test_normalization(self):
+        self.assertEqual(normalize_question("  What's   my NAME? "), "whats my name")
+
+    def test_exact_hit_while_version_unchanged(self):
+        version = self.versions.get("alex")
+        self.cache.put("alex", "What is my name?", version, self.result)
+
+        hit = self.cache.get("alex", "what is my name", self.versions.get("alex"))
+        self.assertEqual(hit["response"], "Your name is Alex.")
+
+    def test_write_invalidates(self):
+        self.cache.put("alex", "What is my name?", self.versions.get("alex"), self.result)
+        self.versions.bump("alex")
+
+        self.assertIsNone(self.cache.get("alex", "What is my name?", self.versions.get("alex")))
+
+    def test_semantic_near_match(self):
+        self.cache.put("alex", "What is my name?", self.versions.get("alex"), self.result)
+
+        self.assertIsNotNone(self.cache.get("alex", "my name is what?", self.versions.get("alex")))
+        self.assertIsNone(self.cache.get("alex", "Where am I from?", self.versions.get("alex")))
+
+    def test_users_are_isolated(self):
+        self.cache.put("alex", "What is my name?", self.versions.get("alex"), self.result)
+
+        self.assertIsNone(self.cache.get("sam", "What is my name?", self.versions.get("sam")))
+
+    def test_answer_is_only_reused_in_the_same_conversation(self):
+        version = self.versions.get("alex")
+        self.cache.put("alex", "Why?", version, self.result, context="- I like jazz\n")
+
+        self.assertIsNotNone(self.cache.get("alex", "why", version, context="- I like jazz\n"))
+        self.assertIsNone(self.cache.get("alex", "why", version, context="- I moved to Berlin\n"))
+        self.assertIsNone(self.cache.get("alex", "why", version))
+
+    def test_callers_cannot_change_a_cached_answer(self):
+        version = self.versions.get("alex")
+        result = {"response": "Your name is Alex.", "memories_used": ["- NAME_IS Alex"]}
+        self.cache.put("alex", "What is my name?", version, result)
+        result["memories_used"].append("- added after put")
+
+        hit = self.cache.get("alex", "What is my name?", version)
+        hit["memories_used"].clear()
+        self.assertEqual(self.cache.get("alex", "What is my name?", version)["memories_used"], ["- NAME_IS Alex"])
+
+    def test_wipe_moves_every_version(self):
+        before = self.versions.get("alex")
+        self.versions.bump_all()
+        self.assertNotEqual(before, self.versions.get("alex"))
+
+
+class TestFastPipeResponseCache(unittest.TestCase):
+
+    def test_history_change_misses_the_cache(self):
+        session_id = "cache_history_user"
+        ram_context = RAMContext()
+        with offline_pipeline(latency_ms=1) as (ollama, _, _):
+            ram_context.add(session_id, "What did I just say?")
+            fast_pipe("What did I just say?", session_id, ram_context)
+            fast_pipe_module.wait_for_slow_pipe(session_id, timeout=30)
+            calls = ollama.calls
+
+            fast_pipe("What did I just say?", session_id, ram_context)  # same conversation: served from cache
+            self.assertEqual(ollama.calls, calls)
+
+            ram_context.add(session_id, "Thanks, that helps")
+            ram_context.add(session_id, "What did I just say?")
+            fast_pipe("What did I just say?", session_id, ram_context)
+            self.assertGreater(sum(ollama.calls.values()), sum(calls.values()))
+
+    def test_queued_slow_pipe_bypasses_the_cache(self):
+        session_id = "cache_inflight_user"
+        ram_context = RAMContext()
+        with offline_pipeline(latency_ms=1) as (ollama, _, _):
+            ram_context.add(session_id, "What is my name?")
+            fast_pipe("What is my name?", session_id, ram_context)
+            fast_pipe_module.wait_for_slow_pipe(session_id, timeout=30)
+            calls = sum(ollama.calls.values())
+
+            # A slow pipe still running for the session may store facts the cached answer lacks
+            release = threading.Event()
+            with patch.object(fast_pipe_module, "slow_pipe", lambda *args, **kwargs: release.wait(10)):
+                fast_pipe_module._submit_slow_pipe("My name is Alex.", session_id)
+                try:
+                    fast_pipe("What is my name?", session_id, ram_context)
+                finally:
+                    release.set()
+                    fast_pipe_module.wait_for_slow_pipe(session_id, timeout=30)
+            self.assertGreater(sum(ollama.calls.values()), calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# tests/test_slow_pipe_order.py
+import concurrent.futures
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fast_pipe
+
+
+class TestSlowPipeOrder(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self.done = []
+        self.lock = threading.Lock()
+        self.release_b = threading.Event()
+
+    def tearDown(self):
+        self.release_b.set()
+        self.executor.shutdown(wait=True)
+
+    def _slow_pipe(self, user_input, session_id, enqueued_at=None):
+        if session_id == "order_b":
+            self.release_b.wait(5)
+        else:
+            # Earlier turns take longer: with several workers they would finish last
+            time.sleep(0.05 * (5 - int(user_input)))
+        with self.lock:
+            self.done.append((session_id, user_input))
+
+    def test_one_session_in_order_other_sessions_in_parallel(self):
+        with patch.object(fast_pipe, "_executor", self.executor), \
+                patch.object(fast_pipe, "slow_pipe", self._slow_pipe):
+            fast_pipe._submit_slow_pipe("0", "order_b")   # blocks one worker until released
+            for turn in range(5):
+                fast_pipe._submit_slow_pipe(str(turn), "order_a")
+
+            self.assertTrue(fast_pipe.wait_for_slow_pipe("order_a", timeout=10))
+            self.assertFalse(fast_pipe.wait_for_slow_pipe("order_b", timeout=0.01))
+            self.release_b.set()
+            self.assertTrue(fast_pipe.wait_for_slow_pipe(timeout=10))
+
+        self.assertEqual(self.done, [("order_a", str(t)) for t in range(5)] + [("order_b", "0")])
+        self.assertEqual(fast_pipe._session_backlog, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# tests/test_snapshot.py
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import memory.snapshot as snapshot
+import memory.vector_store as vector_store
+from benchmarks.stubs import FakeEmbedder
+from memory.consolidation_state import ConsolidationState
+from memory.numpy_vector_store import NumpyVectorStore, reset_indexes
+from memory.snapshot import read_manifest, restore_snapshot, save_snapshot
+from memory.sqlite_store import SQLiteMemoryStore, reset_connections
+from memory.versioning import memory_versions
+
+
+class CountingEmbedder(FakeEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        return super().__call__(input)
+
+
+def _edge(src, relation, dst, user_id, turn_id=1):
+    return {"src": src, "relation": relation, "dst": dst, "user_id": user_id, "confidence": 0.6,
+            "turn_id": turn_id, "source_text": f"{src} {relation} {dst}"}
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.embedder = CountingEmbedder()
+        self.graph = SQLiteMemoryStore(self.dir / "graph.db")
+        self.vectors = NumpyVectorStore(self.dir / "vectors", embedding_function=self.embedder)
+        for user_id, city in (("alice", "Berlin"), ("bob", "Paris")):
+            self.graph.bulk_insert_edges([_edge("User", "LIVES_IN", city, user_id), _edge("User", "LIKES", "Jazz", user_id)])
+            self.vectors.add_memories([f"I live in {city}", "I like jazz"], [{"user_id": user_id}] * 2)
+        self.path = self.dir / "baseline.zip"
+        self.state = ConsolidationState(":memory:")
+        self.patch = patch("memory.consolidation_state.consolidation_state", self.state)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        reset_connections()
+        reset_indexes()
+        self.tmp.cleanup()
+
+    def _state(self, user_ids=None):
+        graph = self.graph.dump_graph(user_ids)
+        vectors = self.vectors.dump_vectors(user_ids)
+        return (
+            sorted(tuple(sorted(e.items())) for e in graph["edges"]),
+            sorted((m["user_id"], d) for m, d in zip(vectors["metadatas"], vectors["documents"])),
+        )
+
+    def _mutate(self):
+        self.graph.bulk_insert_edges([_edge("User", "LIVES_IN", "Berlin", "alice", 9), _edge("User", "LIVES_IN", "Rome", "bob", 9)])
+        self.vectors.add_memories(["I moved to Rome", "alice again"], [{"user_id": "bob"}, {"user_id": "alice"}])
+
+    def test_full_round_trip_is_exact_and_skips_embedding(self):
+        before = self._state()
+        manifest = save_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+        self.assertEqual(manifest["counts"], {"nodes": 4, "edges": 4, "vectors": 4})
+        self.assertEqual(read_manifest(self.path)["dim"], 64)
+        self._mutate()
+
+        calls = self.embedder.calls
+        stats = restore_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+
+        self.assertEqual(self.embedder.calls, calls)
+        self.assertEqual((stats["edges"], stats["vectors"]), (4, 4))
+        self.assertEqual(self._state(), before)
+        result = self.vectors.search("I live in Berlin", n_results=1, user_id="alice")
+        self.assertEqual(result["documents"], [["I live in Berlin"]])
+        self.assertAlmostEqual(result["distances"][0][0], 0.0, places=5)
+
+    def test_user_restore_leaves_other_users_alone(self):
+        alice = self._state(["alice"])
+        save_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+        self._mutate()
+        bob = self._state(["bob"])
+
+        restore_snapshot(self.path, user_ids=["alice"], graph_store=self.graph, vector_store=self.vectors)
+
+        self.assertEqual(self._state(["alice"]), alice)
+        self.assertEqual(self._state(["bob"]), bob)
+        self.assertEqual(self.state.dirty_users(), {"alice": 3})  # restored entities get a dream pass
+        reset_indexes()
+        reopened = NumpyVectorStore(self.dir / "vectors", embedding_function=self.embedder)
+        self.assertEqual(reopened.count(), 5)  # the dropped rows stay dropped after a reload
+
+    def test_user_snapshot_restores_only_that_user(self):
+        save_snapshot(self.path, user_ids=["bob"], graph_store=self.graph, vector_store=self.vectors)
+        self.assertEqual(read_manifest(self.path)["users"], ["bob"])
+        self._mutate()
+        alice = self._state(["alice"])
+        bob_epoch = memory_versions.get("bob")
+
+        restore_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+
+        self.assertEqual(self._state(["alice"]), alice)
+        self.assertNotIn("Rome", [e["dst"] for e in self.graph.dump_graph(["bob"])["edges"]])
+        self.assertGreater(memory_versions.get("bob"), bob_epoch)
+        with self.assertRaises(ValueError):
+            restore_snapshot(self.path, user_ids=["alice"], graph_store=self.graph, vector_store=self.vectors)
+
+    def test_embedding_model_mismatch_is_refused(self):
+        save_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+        with patch.object(snapshot, "EMBEDDING_MODEL", "other-model"), self.assertRaises(ValueError):
+            restore_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+
+    def test_chroma_partitions_restore_from_numpy_snapshot(self):
+        save_snapshot(self.path, graph_store=self.graph, vector_store=self.vectors)
+        with patch.object(vector_store, "CHROMA_DIR", self.dir / "chroma"):
+            vector_store.reset_client()
+            try:
+                chroma = vector_store.VectorMemoryStore(embedding_function=self.embedder)
+                chroma.add_memory("stale memory", {"user_id": "carol"})
+                calls = self.embedder.calls
+
+                restore_snapshot(self.path, graph_store=self.graph, vector_store=chroma)
+
+                self.assertEqual(self.embedder.calls, calls)
+                dump = chroma.dump_vectors()
+                self.assertEqual(sorted(dump["documents"]), sorted(self.vectors.dump_vectors()["documents"]))
+                self.assertEqual(chroma.search("Paris", user_id="bob")["documents"][0][0], "I live in Paris")
+            finally:
+                vector_store.reset_client()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,282 @@
+# tests/test_sqlite_store.py
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stubs import InMemoryGraph, InMemoryGraphStore
+from memory import factory, lifecycle
+from memory.sqlite_store import SQLiteMemoryStore, reset_connections
+
+DAY_MS = 86_400_000
+
+
+def _edge(src, relation, dst, user_id="u1", **extra):
+    return {"src": src, "relation": relation, "dst": dst, "user_id": user_id, "confidence": 0.5, **extra}
+
+
+class TestSQLiteMemoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SQLiteMemoryStore(Path(self.tmp.name) / "graph.db")
+
+    def tearDown(self):
+        reset_connections()
+        self.tmp.cleanup()
+
+    def test_repeated_fact_reinforces(self):
+        self.store.insert_edge(_edge("User", "likes", "Jazz"))
+        self.store.insert_edge(_edge("User", "LIKES", "Jazz"))
+
+        rows = self.store.conn.execute("SELECT relation, confidence FROM edges").fetchall()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["relation"], "LIKES")
+        self.assertAlmostEqual(rows[0]["confidence"], 0.6)
+
+    def test_activation_is_user_scoped(self):
+        self.store.insert_edge(_edge("User", "LIVES_IN", "Berlin"))
+        self.store.insert_edge(_edge("Berlin", "LOCATED_IN", "Germany"))
+        self.store.insert_edge(_edge("User", "LIKES", "Tea", user_id="u2"))
+
+        rows = self.store.retrieve_context_with_activation("u1")
+        self.assertEqual({(r["src"], r["dst"]) for r in rows}, {("User", "Berlin"), ("Berlin", "Germany")})
+        self.assertTrue(all(r["depth"] == 0 for r in rows))
+        self.assertEqual(self.store.retrieve_context_with_activation("nobody"), [])
+
+    def test_spreading_activation_halves_score(self):
+        # Six recent facts push the oldest out of the direct set; it comes back one hop away
+        self.store.insert_edge(_edge("Berlin", "LOCATED_IN", "Germany", confidence=0.8))
+        for i in range(5):
+            self.store.insert_edge(_edge("User", "VISITED", f"City{i}" if i else "Berlin"))
+
+        spread = [r for r in self.store.retrieve_context_with_activation("u1") if r["depth"] == 1]
+        self.assertEqual([(r["src"], r["dst"]) for r in spread], [("Berlin", "Germany")])
+        self.assertAlmostEqual(spread[0]["score"], 0.4)
+
+    def test_limit_caps_direct_and_spread_rows_together(self):
+        edges = [_edge("Berlin", "HAS", f"Sight{i}", last_updated=i + 1) for i in range(12)]
+        edges += [_edge("User", "VISITED", f"City{i}" if i else "Berlin", last_updated=100 + i) for i in range(5)]
+        reference = InMemoryGraphStore(InMemoryGraph())
+        reference.bulk_insert_edges(edges)
+        self.store.bulk_insert_edges(edges)
+
+        for store in (self.store, reference):
+            self.assertEqual(len(store.retrieve_context_with_activation("u1")), 15)
+            self.assertEqual(len(store.retrieve_context("u1")), 10)
+            self.assertEqual([r["depth"] for r in store.retrieve_context_with_activation("u1", limit=6)], [0] * 5 + [1])
+            self.assertEqual([r["depth"] for r in store.retrieve_context_with_activation("u1", limit=3)], [0] * 3)
+
+    @patch("memory.lifecycle.MEMORY_HALF_LIFE_DAYS", 30)
+    def test_spread_ranks_by_decayed_confidence(self):
+        now = lifecycle.now_ms()
+        self.store.bulk_insert_edges([
+            _edge("Berlin", "LOCATED_IN", "Germany", confidence=0.9, last_updated=now - 60 * DAY_MS),
+            _edge("Berlin", "HAS", "Museums", confidence=0.5, last_updated=now - DAY_MS),
+        ])
+        for i in range(5):
+            self.store.insert_edge(_edge("User", "VISITED", f"City{i}" if i else "Berlin", confidence=1.0))
+
+        rows = self.store.retrieve_context_with_activation("u1")
+        self.assertAlmostEqual(rows[0]["score"], 1.0, places=6)  # just written: no decay yet
+        spread = [(r["dst"], round(r["score"], 2)) for r in rows if r["depth"] == 1]
+        self.assertEqual(spread, [("Museums", 0.24), ("Germany", 0.11)])  # the stronger fact has faded more
+
+    def test_recent_facts_and_neighbors(self):
+        self.store.bulk_insert_edges([
+            _edge("User", "LIKES", "Jazz", last_updated=1),
+            _edge("User", "LIVES_IN", "Berlin", last_updated=3),
+            _edge("User", "LIKES", "Jazz", user_id="u2", last_updated=2),
+        ])
+
+        self.assertEqual([f["dst"] for f in self.store.get_recent_facts("User", user_id="u1")], ["Berlin", "Jazz"])
+        self.assertEqual([f["dst"] for f in self.store.get_recent_facts("User")], ["Berlin", "Jazz", "Jazz"])
+        self.assertEqual(self.store.get_related_nodes("Berlin"), [{"neighbor": "User", "relation": "LIVES_IN"}])
+        self.assertEqual(self.store.find_dense_entities(min_degree=3, limit=1), [{"entity": "User", "degree": 3}])
+
+    def test_entity_facts_delete_and_wipe(self):
+        for dst in ("Pizza", "Burgers", "Fries"):
+            self.store.insert_edge(_edge("User", "LIKES", dst))
+
+        facts = self.store.get_entity_facts("User")
+        self.assertEqual(sorted(f["neighbor"] for f in facts), ["Burgers", "Fries", "Pizza"])
+        self.assertEqual(self.store.delete_edges([f["edge_id"] for f in facts[:2]]), 2)
+        self.assertEqual(len(self.store.export_graph()["links"]), 1)
+
+        self.store.wipe_database()
+        self.assertEqual(self.store.export_graph(), {"nodes": [], "links": []})
+
+    def test_apply_consolidation_is_one_transaction(self):
+        for dst in ("Pizza", "Burgers", "Fries", "Junk Food"):
+            self.store.insert_edge(_edge("User", "LIKES", dst))
+        ids = [f["edge_id"] for f in self.store.get_entity_facts("User")]
+
+        with self.assertRaises(Exception):
+            self.store.apply_consolidation([_edge(None, "LIKES", "Junk Food")], ids)  # insert fails after the delete
+        self.assertEqual(len(self.store.export_graph()["links"]), 4)
+
+        stats = self.store.apply_consolidation([_edge("User", "LIKES", "Junk Food")], ids + ids[:1])
+        self.assertEqual(stats, {"inserted": 1, "deleted": 4})
+        rows = self.store.conn.execute("SELECT dst, confidence FROM edges").fetchall()
+        self.assertEqual([(r["dst"], r["confidence"]) for r in rows], [("Junk Food", 0.5)])  # replaced, not reinforced
+
+    def test_idempotent_bulk_insert_skips_replayed_turns(self):
+        self.store.bulk_insert_edges([_edge("User", "LIKES", "Jazz", turn_id=3), _edge("User", "LIKES", "Tea")])
+        self.store.bulk_insert_edges([_edge("User", "LIKES", "Jazz", turn_id=3), _edge("User", "LIKES", "Tea")], idempotent=True)
+
+        rows = self.store.conn.execute("SELECT dst, confidence FROM edges ORDER BY dst").fetchall()
+        self.assertEqual([(r["dst"], round(r["confidence"], 2)) for r in rows], [("Jazz", 0.5), ("Tea", 0.6)])  # no turn_id: a repeat
+        self.store.bulk_insert_edges([_edge("User", "LIKES", "Jazz", turn_id=4)], idempotent=True)
+        self.assertAlmostEqual(self.store.conn.execute("SELECT confidence FROM edges WHERE dst = 'Jazz'").fetchone()[0], 0.6)
+
+    def test_stale_edge_ids_never_match_a_newer_edge(self):
+        for dst in ("Pizza", "Burgers"):
+            self.store.insert_edge(_edge("User", "LIKES", dst))
+        stale = sorted(f["edge_id"] for f in self.store.get_entity_facts("User"))
+
+        # A rowid would be handed out again here: the deleted row was the last one
+        self.store.delete_edges(stale[-1:])
+        self.store.conn.execute("VACUUM")
+        self.store.insert_edge(_edge("User", "LIKES", "Fries"))
+
+        stats = self.store.apply_consolidation([], stale)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual([f["neighbor"] for f in self.store.get_entity_facts("User")], ["Fries"])
+        self.assertEqual(self.store.delete_edges(stale), 0)
+
+    def test_file_without_edge_ids_is_migrated(self):
+        import sqlite3
+        reset_connections()
+        path = Path(self.tmp.name) / "legacy.db"
+        legacy = sqlite3.connect(path)
+        legacy.executescript(
+            """
+            CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, last_seen INTEGER);
+            CREATE TABLE edges (
+                src TEXT NOT NULL, relation TEXT NOT NULL, dst TEXT NOT NULL, user_id TEXT NOT NULL,
+                confidence REAL, turn_id INTEGER, source_text TEXT, first_seen INTEGER, last_updated INTEGER,
+                PRIMARY KEY (src, relation, dst, user_id)
+            );
+            CREATE INDEX idx_edges_user_src ON edges (user_id, src);
+            INSERT INTO edges VALUES ('User', 'LIKES', 'Jazz', 'u1', 0.5, 1, 'I like jazz', 5, 5);
+            INSERT INTO edges VALUES ('User', 'LIKES', 'Tea', 'u1', 0.5, 2, 'I like tea', 6, 6);
+            """
+        )
+        legacy.close()
+
+        store = SQLiteMemoryStore(path)
+        self.assertEqual([(f["edge_id"], f["neighbor"]) for f in store.get_entity_facts("User")], [(1, "Jazz"), (2, "Tea")])
+        store.insert_edge(_edge("User", "LIKES", "Jazz"))  # still one row per fact: reinforced
+        rows = store.conn.execute("SELECT dst, confidence, first_seen FROM edges ORDER BY id").fetchall()
+        self.assertEqual([(r["dst"], round(r["confidence"], 2), r["first_seen"]) for r in rows], [("Jazz", 0.6, 5), ("Tea", 0.5, 6)])
+        indexes = {r["name"] for r in store.conn.execute("PRAGMA index_list(edges)")}
+        self.assertIn("idx_edges_dst", indexes)
+
+    def test_connection_is_closed_when_its_thread_ends(self):
+        import gc
+        import sqlite3
+        import threading
+        opened = []
+        worker = threading.Thread(target=lambda: opened.append(self.store.conn))
+        worker.start()
+        worker.join()
+        gc.collect()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+        self.assertIsNot(self.store.conn, opened[0])
+        self.store.insert_edge(_edge("User", "LIKES", "Jazz"))  # this thread's connection is untouched
+        self.assertEqual(len(self.store.export_graph()["links"]), 1)
+
+    def test_schema_is_indexed_and_wal(self):
+        self.assertEqual(self.store.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        indexes = {r["name"] for r in self.store.conn.execute("PRAGMA index_list(edges)")}
+        self.assertTrue({"idx_edges_user_src", "idx_edges_user_updated", "idx_edges_relation", "idx_edges_dst"} <= indexes)
+
+    def test_matches_in_memory_stand_in(self):
+        edges = [
+            _edge("User", "LIVES_IN", "Berlin", last_updated=1),
+            _edge("Berlin", "LOCATED_IN", "Germany", last_updated=2),
+            _edge("User", "LIKES", "Jazz", last_updated=3),
+            _edge("Jazz", "GENRE_OF", "Music", user_id="u2", last_updated=4),
+        ]
+        reference = InMemoryGraphStore(InMemoryGraph())
+        reference.bulk_insert_edges(edges)
+        self.store.bulk_insert_edges(edges)
+
+        with patch("memory.lifecycle.now_ms", return_value=10):  # same decay clock for both
+            for user_id in ("u1", "u2"):
+                self.assertEqual(
+                    self.store.retrieve_context_with_activation(user_id),
+                    reference.retrieve_context_with_activation(user_id),
+                )
+        self.assertEqual(self.store.get_recent_facts("User", user_id="u1"), reference.get_recent_facts("User", user_id="u1"))
+
+    @patch("memory.lifecycle.MEMORY_HALF_LIFE_DAYS", 30)
+    def test_collectable_edges_match_in_memory_stand_in(self):
+        now = 1000 * DAY_MS
+        edges = [
+            _edge("User", "LIKES", "Jazz", confidence=0.8, last_updated=now),
+            _edge("User", "LIKES", "Polka", confidence=0.8, last_updated=now - 120 * DAY_MS),  # 0.05: expired
+            _edge("User", "LIKES", "Tea", confidence=0.5, last_updated=now - 30 * DAY_MS),    # 0.25
+            _edge("User", "LIKES", "Rock", confidence=0.9, last_updated=now),
+            _edge("User", "LIKES", "Opera", confidence=0.5, last_updated=now - 60 * DAY_MS),  # 0.125
+            _edge("User", "LIKES", "Polka", user_id="u2", confidence=0.8, last_updated=now - 120 * DAY_MS),
+        ]
+        reference = InMemoryGraphStore(InMemoryGraph())
+        reference.bulk_insert_edges(edges)
+        self.store.bulk_insert_edges(edges)
+
+        for store in (self.store, reference):
+            doomed = store.collectable_edges("u1", 0.1, 2, now)
+            self.assertEqual([r["dst"] for r in doomed], ["Polka", "Opera", "Tea"])  # expired, then weakest over quota
+            self.assertEqual([round(r["decayed"], 3) for r in doomed], [0.05, 0.125, 0.25])
+            self.assertEqual([r["dst"] for r in store.collectable_edges("u1", 0.1, 2, now, limit=2)], ["Polka", "Opera"])
+            self.assertEqual([r["dst"] for r in store.collectable_edges("u1", 0.1, 0, now)], ["Polka"])  # no cap
+
+        self.assertEqual(self.store.delete_edges([r["edge_id"] for r in self.store.collectable_edges("u1", 0.1, 2, now)]), 3)
+        self.assertEqual(sorted(self.store.user_ids()), ["u1", "u2"])
+        self.assertEqual(self.store.collectable_edges("u1", 0.1, 2, now), [])
+
+
+class TestGraphBackendSelection(unittest.TestCase):
+
+    def tearDown(self):
+        reset_connections()
+
+    def test_factory_selects_backend(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.object(factory, "GRAPH_BACKEND", "sqlite"), \
+                patch("memory.sqlite_store.SQLITE_DB_PATH", Path(tmp) / "graph.db"):
+            store = factory.get_graph_store()
+            self.assertIsInstance(store, SQLiteMemoryStore)
+            reset_connections()
+
+        with patch.object(factory, "GRAPH_BACKEND", "redis"), self.assertRaises(ValueError):
+            factory.get_graph_store()
+
+    def test_pipeline_persists_to_sqlite(self):
+        import fast_pipe as fast_pipe_module
+        import slow_pipe as slow_pipe_module
+        from benchmarks.pipeline_bench import offline_pipeline
+        from memory.ram_context import RAMContext
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "graph.db"
+            sqlite_store = lambda: SQLiteMemoryStore(path)
+            with offline_pipeline(latency_ms=1.0), \
+                    patch.object(fast_pipe_module, "get_graph_store", sqlite_store), \
+                    patch.object(slow_pipe_module, "get_graph_store", sqlite_store):
+                fast_pipe_module.fast_pipe("I live in Berlin.", "sqlite_user", RAMContext())
+                fast_pipe_module.wait_for_slow_pipe(timeout=60)
+
+            reset_connections()
+            facts = SQLiteMemoryStore(path).retrieve_context_with_activation("sqlite_user")
+            self.assertIn("Berlin", {f["dst"] for f in facts})
+
+
+if __name__ == "__main__":
+    unittest.main()
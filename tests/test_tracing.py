@@ -0,0 +1,69 @@
+# tests/test_tracing.py
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnostics.tracing import MetricsRegistry, metrics, span, start_trace, current_trace, traced
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_spans_feed_trace_and_histogram(self):
+        with start_trace() as trace:
+            with span("stage.a"):
+                pass
+            with span("stage.a"):
+                pass
+            with span("stage.b"):
+                pass
+
+        self.assertIsNone(current_trace())
+        self.assertEqual(set(trace.breakdown()), {"stage.a", "stage.b"})
+        self.assertEqual(len(trace.spans), 3)
+        self.assertEqual(metrics.snapshot()["stage.a"]["count"], 2)
+
+    def test_span_outside_trace_still_observed(self):
+        @traced("stage.decorated")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        self.assertEqual(metrics.snapshot()["stage.decorated"]["count"], 1)
+
+    def test_span_records_on_exception(self):
+        with self.assertRaises(ValueError):
+            with span("stage.error"):
+                raise ValueError("boom")
+        self.assertEqual(metrics.snapshot()["stage.error"]["count"], 1)
+
+    def test_quantiles_and_reservoir(self):
+        registry = MetricsRegistry(reservoir_size=100)
+        for ms in range(1, 201):
+            registry.observe("s", float(ms))
+
+        stats = registry.snapshot()["s"]
+        self.assertEqual(stats["count"], 200)  # exact, not bounded by the reservoir
+        self.assertEqual(stats["sum_ms"], sum(range(1, 201)))
+        self.assertGreaterEqual(stats["p50"], 101)  # reservoir only holds the last 100
+        self.assertLessEqual(stats["p50"], stats["p95"])
+        self.assertLessEqual(stats["p95"], stats["p99"])
+
+    def test_prometheus_rendering(self):
+        registry = MetricsRegistry()
+        registry.observe("fast_pipe.generate", 12.5)
+        registry.register_gauge("slow_pipe_inflight", lambda: 3)
+        registry.register_gauge("broken", lambda: 1 / 0)
+
+        text = registry.render_prometheus()
+        self.assertIn('nsm_stage_latency_ms{stage="fast_pipe.generate",quantile="0.95"} 12.5', text)
+        self.assertIn('nsm_stage_latency_ms_count{stage="fast_pipe.generate"} 1', text)
+        self.assertIn("nsm_slow_pipe_inflight 3.0", text)
+        self.assertNotIn("nsm_broken", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_vector_partitions.py
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import memory.vector_store as vector_store
+from benchmarks.stubs import FakeEmbedder
+from memory.vector_store import VectorMemoryStore, partition_name
+
+
+class CountingEmbedder(FakeEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(len(input))
+        return super().__call__(input)
+
+
+class TestPartitionedChromaStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patch = patch.object(vector_store, "CHROMA_DIR", Path(self.tmp.name) / "chroma")
+        self.patch.start()
+        vector_store.reset_client()
+        self.embedder = FakeEmbedder()
+
+    def tearDown(self):
+        vector_store.reset_client()
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def _store(self, partitioned=True):
+        store = VectorMemoryStore(embedding_function=self.embedder)
+        store.partitioned = partitioned
+        return store
+
+    def test_search_stays_in_callers_partition(self):
+        store = self._store()
+        store.add_memory("I love jazz music", {"user_id": "a"})
+        store.add_memory("I love jazz music", {"user_id": "b"})
+        store.add_memory("I live in Berlin", {"user_id": "b"})
+
+        result = store.search("jazz", n_results=5, user_id="a")
+        self.assertEqual(result["documents"], [["I love jazz music"]])
+        self.assertEqual(result["metadatas"][0][0]["user_id"], "a")
+        names = {c.name for c in store.client.list_collections()}
+        self.assertTrue({partition_name(store.collection_name, u) for u in ("a", "b")} <= names)
+
+    def test_small_user_gets_full_results_next_to_large_user(self):
+        store = self._store()
+        for i in range(200):
+            store.add_memory(f"I love jazz record {i}", {"user_id": "big"})
+        for i in range(3):
+            store.add_memory(f"jazz note {i}", {"user_id": "small"})
+
+        self.assertEqual(len(store.search("jazz", n_results=3, user_id="small")["documents"][0]), 3)
+
+    def test_legacy_memories_move_into_partitions(self):
+        shared = self._store(partitioned=False)
+        shared.add_memory("I love jazz", {"user_id": "a"})
+        shared.add_memory("I live in Berlin", {"user_id": "b"})
+
+        store = self._store()
+        self.assertEqual(store.search("jazz", n_results=5, user_id="a")["documents"], [["I love jazz"]])
+        self.assertEqual(store.collection.count(), 1)  # b's memory waits for b's first use
+        self.assertEqual(store.search("Berlin", n_results=5, user_id="b")["documents"], [["I live in Berlin"]])
+        self.assertEqual(store.collection.count(), 0)
+
+    def test_bulk_add_routes_batches_to_partitions(self):
+        self.embedder = CountingEmbedder()
+        store = self._store()
+        texts = ["I love jazz", "I live in Berlin", "I love jazz", "I drink tea"]
+        metadatas = [{"user_id": "a"}, {"user_id": "b"}, {"user_id": "a"}, {"user_id": "a"}]
+
+        self.assertEqual(store.add_memories(texts, metadatas, batch_size=2), 3)
+        self.assertEqual(self.embedder.calls, [2, 1])
+        self.assertEqual(store.partition("a").count(), 2)
+        self.assertEqual(store.search("Berlin", n_results=5, user_id="b")["documents"], [["I live in Berlin"]])
+
+    def test_open_handles_are_lru_bounded(self):
+        store = self._store()
+        with patch.object(vector_store, "VECTOR_PARTITION_HANDLES", 2):
+            for user_id in ("a", "b", "a", "c"):
+                store.add_memory("hello", {"user_id": user_id})
+
+        self.assertEqual([key[2] for key in vector_store._partitions], ["a", "c"])
+        self.assertEqual(store.search("hello", user_id="b")["documents"], [["hello"]])  # reopened on demand
+
+    def test_unscoped_search_fans_out(self):
+        store = self._store()
+        store.add_memory("I love jazz", {"user_id": "a"})
+        store.add_memory("jazz is great", {"user_id": "b"})
+
+        result = store.search("jazz", n_results=5)
+        self.assertEqual(sorted(m["user_id"] for m in result["metadatas"][0]), ["a", "b"])
+        self.assertEqual(result["distances"][0], sorted(result["distances"][0]))
+
+    def test_list_and_delete_for_the_memory_collector(self):
+        for partitioned in (True, False):
+            store = self._store(partitioned)
+            store.add_memories(["I love jazz", "I hate polka"], [{"user_id": "a"}, {"user_id": "a"}])
+            store.add_memory("I hate polka", {"user_id": "b"})
+
+            self.assertEqual(store.user_ids(), ["a", "b"])
+            found = store.list_memories("a")
+            self.assertEqual(sorted(found["documents"]), ["I hate polka", "I love jazz"])
+            polka = found["ids"][found["documents"].index("I hate polka")]
+            store.delete_memories([polka], "a")
+
+            self.assertEqual(store.list_memories("a")["documents"], ["I love jazz"])
+            self.assertEqual(store.list_memories("b")["documents"], ["I hate polka"])
+            vector_store.reset_client()
+
+
+if __name__ == "__main__":
+    unittest.main()
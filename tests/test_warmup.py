@@ -0,0 +1,107 @@
+# tests/test_warmup.py
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Add project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import memory.neo4j_store as neo4j_store
+from config import EXTRACTION_MODEL, GENERATION_MODEL
+from warmup import Warmup, default_components
+
+
+class TestWarmup(unittest.TestCase):
+
+    def test_components_warm_in_parallel(self):
+        sleep = lambda: time.sleep(0.2)
+        warm = Warmup({"a": sleep, "b": sleep, "c": sleep})
+        self.assertFalse(warm.ready)
+        self.assertEqual(warm.report()["components"]["a"]["status"], "pending")
+
+        started = time.perf_counter()
+        self.assertTrue(warm.run())
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        report = warm.report()
+        self.assertTrue(report["ready"])
+        self.assertIsNotNone(report["warmup_ms"])
+        self.assertGreaterEqual(report["components"]["b"]["ms"], 200)
+
+    def test_failed_component_is_reported_and_retried(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError("neo4j down")
+
+        single_pass = Warmup({"ok": lambda: None, "neo4j": flaky})
+        self.assertFalse(single_pass.run())
+        status = single_pass.report()["components"]["neo4j"]
+        self.assertEqual(status["status"], "failed")
+        self.assertIn("neo4j down", status["error"])
+
+        attempts.clear()
+        retrying = Warmup({"ok": lambda: None, "neo4j": flaky}, retry_seconds=0.01).start()
+        self.assertTrue(retrying.wait(timeout=5))
+        components = retrying.report()["components"]
+        self.assertEqual(components["neo4j"]["attempts"], 2)
+        self.assertEqual(components["ok"]["attempts"], 1)
+
+    def test_component_selection(self):
+        self.assertEqual(list(default_components(["embedder", "graph"])), ["embedder", "graph"])
+        self.assertEqual(list(default_components(["neo4j"])), ["graph"])
+        self.assertEqual(list(default_components(["chroma"])), ["vectors"])
+        self.assertEqual(
+            sorted(default_components(["ollama"])),
+            sorted({f"ollama:{GENERATION_MODEL}", f"ollama:{EXTRACTION_MODEL}"}),
+        )
+        with self.assertRaises(ValueError):
+            default_components(["gpu"])
+
+    def test_ready_endpoint(self):
+        from fastapi.testclient import TestClient
+        import web_ui
+
+        client = TestClient(web_ui.app)
+        blocked = Warmup({"vectors": lambda: None})
+        with patch.object(web_ui, "warmup", blocked):
+            response = client.get("/ready")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()["components"]["vectors"]["status"], "pending")
+
+            blocked.run()
+            response = client.get("/ready")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()["ready"])
+
+
+class TestSharedNeo4jDriver(unittest.TestCase):
+
+    def tearDown(self):
+        neo4j_store._driver = None
+        neo4j_store._constraints_ready = False
+
+    def test_stores_share_one_driver_and_create_constraints_once(self):
+        neo4j_store._driver = None
+        neo4j_store._constraints_ready = False
+        driver = MagicMock()
+        with patch("neo4j.GraphDatabase.driver", return_value=driver) as factory:
+            first = neo4j_store.Neo4jMemoryStore()
+            first.close()
+            second = neo4j_store.Neo4jMemoryStore()
+
+        self.assertIs(first.driver, second.driver)
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(driver.session.call_count, 1)
+        driver.close.assert_not_called()
+
+        neo4j_store.reset_driver()
+        driver.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,7 +20,7 @@ def test_dream_consolidation():
     
     # 2. Trigger Sleep
     print("  Triggering consolidation...")
-    consolidate_memories(user_id)
+    consolidate_memories(user_id, full_scan=True)  # seeded directly, not through the slow pipe
     
     # 3. Verify Result
     # We look for a new summarized node. Since LLM is non-deterministic, we check logs mostly,
@@ -4,7 +4,6 @@ import time
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from memory.neo4j_store import Neo4jMemoryStore # type: ignore
-from reasoning.dreamer import _prune_old_edges # type: ignore
 
 def verify_pruning():
     store = Neo4jMemoryStore()
@@ -46,10 +45,10 @@ def verify_pruning():
         print("[-] Setup failed. Edges not created.")
         return
 
-    # 4. Run the PRUNE function
-    print("\n[CUT] Executing _prune_old_edges()...")
+    # 4. Run the PRUNE step (the dreamer applies it together with the new insights)
+    print("\n[CUT] Executing apply_consolidation()...")
     try:
-        _prune_old_edges(store, edge_data)
+        store.apply_consolidation([], [e["edge_id"] for e in edge_data])
     except Exception as e:
         print(f"[-] Pruning function crashed: {e}")
         return
@@ -0,0 +1,197 @@
+# warmup.py
+
+"""
+Server warmup: loads every model and connection pool the first request would
+otherwise pay for (sentence-transformers + bge-small, the cross-encoder,
+the vector store, the graph store, both Ollama models), in parallel, each followed by
+one dummy inference. Tracks per-dependency readiness and timing for /ready.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config import (
+    EXTRACTION_MODEL,
+    GENERATION_MODEL,
+    WARMUP_COMPONENTS,
+    WARMUP_ENABLED,
+    WARMUP_LLM_TIMEOUT,
+    WARMUP_RETRY_SECONDS,
+)
+from diagnostics.logger import log_event
+from diagnostics.tracing import span
+
+
+def _warm_embedder():
+    from memory.vector_store import get_embedding_function
+    get_embedding_function()(["warmup"])
+
+
+def _warm_reranker():
+    from reasoning.reranker import get_reranker
+    get_reranker().warmup()
+
+
+def _warm_vectors():
+    from memory.factory import get_vector_store
+    store = get_vector_store()
+    # Not store.search(): it swallows errors, and a broken store must not report ready
+    if hasattr(store, "collection"):
+        store.collection.count()
+        store.collection.query(query_texts=["warmup"], n_results=1)
+    else:
+        store.query("warmup", n_results=1)  # maps the index file
+
+
+def _warm_graph():
+    from memory.factory import get_graph_store
+    store = get_graph_store()  # opens the shared driver/connection and ensures the schema
+    if hasattr(store, "driver"):
+        store.driver.verify_connectivity()
+    # Fills the pool and the plan cache for the fast-pipe query
+    store.retrieve_context_with_activation("__warmup__", limit=1)
+
+
+def _warm_generation_model():
+    from llm.client import chat
+    from llm.prompt import STATIC_SYSTEM_PROMPT
+    # Same static system prompt as real turns, so its KV prefix is cached too
+    chat(
+        GENERATION_MODEL,
+        [{"role": "system", "content": STATIC_SYSTEM_PROMPT}, {"role": "user", "content": "hi"}],
+        timeout=WARMUP_LLM_TIMEOUT,
+        options={"num_predict": 1},
+        site="warmup",
+    )
+
+
+def _warm_extraction_model():
+    from llm.client import chat
+    from reasoning.extractor import SYSTEM_PROMPT
+    chat(
+        EXTRACTION_MODEL,
+        [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": "hi"}],
+        timeout=WARMUP_LLM_TIMEOUT,
+        options={"num_predict": 1},
+        format="json",
+        site="warmup",
+    )
+
+
+def default_components(names: List[str] = None) -> Dict[str, Callable[[], None]]:
+    """Warmup steps for the configured dependency names ("ollama" covers both models, "neo4j" = "graph", "chroma" = "vectors")."""
+    names = WARMUP_COMPONENTS if names is None else names
+    available = {
+        "embedder": {"embedder": _warm_embedder},
+        "reranker": {"reranker": _warm_reranker},
+        "vectors": {"vectors": _warm_vectors},
+        "chroma": {"vectors": _warm_vectors},
+        "graph": {"graph": _warm_graph},
+        "neo4j": {"graph": _warm_graph},
+        "ollama": {
+            f"ollama:{GENERATION_MODEL}": _warm_generation_model,
+            f"ollama:{EXTRACTION_MODEL}": _warm_extraction_model,
+        },
+    }
+    components = {}
+    for name in names:
+        if name not in available:
+            raise ValueError(f"Unknown warmup component '{name}' (expected one of {sorted(available)})")
+        components.update(available[name])
+    return components
+
+
+class Warmup:
+    """
+    Runs every component's warmup concurrently on a background thread and
+    retries failed ones every `retry_seconds` (0 = single pass) until all are
+    ready. `ready` is what a load balancer should gate on.
+    """
+
+    def __init__(self, components: Dict[str, Callable[[], None]], retry_seconds: float = 0.0):
+        self.components = components
+        self.retry_seconds = retry_seconds
+        self._status = {
+            name: {"status": "pending", "attempts": 0, "ms": None, "error": None}
+            for name in components
+        }
+        self._started_at: Optional[float] = None
+        self._ready_ms: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(s["status"] == "ready" for s in self._status.values())
+
+    def start(self) -> "Warmup":
+        """Warm up in the background; returns immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the background warmup pass finishes; returns `ready`."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def run(self) -> bool:
+        """Warm every component (in parallel), retrying failures; returns `ready`."""
+        self._started_at = time.perf_counter()
+        log_event("WARMUP_START", components=list(self.components))
+        while True:
+            todo = [name for name, s in self._snapshot().items() if s["status"] != "ready"]
+            if todo:
+                with ThreadPoolExecutor(max_workers=len(todo), thread_name_prefix="warmup") as pool:
+                    list(pool.map(self._warm_one, todo))
+            if self.ready:
+                self._ready_ms = round((time.perf_counter() - self._started_at) * 1000, 1)
+                log_event("WARMUP_READY", warmup_ms=self._ready_ms)
+                return True
+            if not self.retry_seconds:
+                return False
+            time.sleep(self.retry_seconds)
+
+    def _warm_one(self, name: str) -> None:
+        with self._lock:
+            status = self._status[name]
+            status["status"] = "warming"
+            status["attempts"] += 1
+        started = time.perf_counter()
+        try:
+            with span(f"warmup.{name}"):
+                self.components[name]()
+            state, error = "ready", None
+        except Exception as e:
+            state, error = "failed", f"{type(e).__name__}: {e}"
+            log_event("WARMUP_FAILED", component=name, error=error)
+        with self._lock:
+            status.update(status=state, error=error, ms=round((time.perf_counter() - started) * 1000, 1))
+
+    def _snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(s) for name, s in self._status.items()}
+
+    def report(self) -> Dict:
+        """Per-dependency readiness and timing (the /ready body)."""
+        components = self._snapshot()
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = round((time.perf_counter() - self._started_at) * 1000, 1)
+        return {
+            "ready": all(s["status"] == "ready" for s in components.values()),
+            "warmup_ms": self._ready_ms,
+            "elapsed_ms": elapsed if self._ready_ms is None else self._ready_ms,
+            "components": components,
+        }
+
+
+# With warmup disabled there is nothing to wait for: /ready reports ready at once
+warmup = Warmup(default_components() if WARMUP_ENABLED else {}, retry_seconds=WARMUP_RETRY_SECONDS)
@@ -1,9 +1,10 @@
 # web_ui.py
 import uvicorn
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import sys
 from pathlib import Path
@@ -15,8 +16,15 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 from config import SQLITE_DB_PATH as DB_PATH
 from fast_pipe import fast_pipe
-from memory.ram_context import RAMContext
+from diagnostics.tracing import metrics
+from llm.accounting import usage_ledger
+from diagnostics.profiling import parse_mode, profile
+from config import DREAM_SCHEDULER_ENABLED, MEMORY_GC_ENABLED, PROFILE_HTTP_ENABLED
+from memory.lifecycle import memory_collector
+from memory.ram_context import build_ram_context
 from memory.reset import wipe_all_memory
+from reasoning.dream_scheduler import dream_scheduler
+from warmup import warmup
 
 
 # --- Setup UI directories and check for files ---
@@ -40,8 +48,11 @@ app = FastAPI(title="Neuro-Symbolic Memory Agent")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
-# In-memory store for RAM context. In a real multi-user app, use Redis or similar.
-ram_context_store = {}
+# One shared, bounded RAM context for every session (LRU/TTL/byte ceiling).
+# Set RAM_CONTEXT_REDIS_URL to keep it outside the process.
+ram_context = build_ram_context()
+metrics.register_gauge("ram_context_sessions", lambda: ram_context.stats().get("sessions", 0))
+metrics.register_gauge("ram_context_bytes", lambda: ram_context.stats().get("bytes", 0))
 
 class ChatRequest(BaseModel):
     user_input: str
@@ -49,10 +60,30 @@ class ChatRequest(BaseModel):
 
 @app.on_event("startup")
 async def startup_event():
-    """Wipe memory from previous runs to start fresh."""
+    """Wipe memory from previous runs to start fresh, then warm up models and pools in the background."""
     print("Wiping all memory on startup...")
     wipe_all_memory()
-    print("Memory wiped. UI is ready.")
+    print("Memory wiped. Warming up models and connections (see /ready)...")
+    warmup.start()
+    if DREAM_SCHEDULER_ENABLED:
+        # Consolidates idle users' memory whenever no chat turn is using the LLM (see /api/dream)
+        dream_scheduler.start()
+    if MEMORY_GC_ENABLED:
+        # Removes faded and over-quota memories on a timer (see /api/memory/gc)
+        memory_collector.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    dream_scheduler.stop(wait=False)
+    memory_collector.stop(wait=False)
+
+
+@app.get("/ready")
+async def readiness():
+    """200 once every dependency is loaded and warm, 503 before; per-dependency status and timing."""
+    report = warmup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
@@ -83,58 +114,117 @@ neuro_symbolic_memory/
         """
         return HTMLResponse(content=error_message, status_code=500)
 
+def _run_chat(user_input: str, session_id: str, profile_mode: str = None, profile_slow_pipe: bool = False):
+    with profile(f"chat_{session_id}", profile_mode, include_slow_pipe=profile_slow_pipe) as prof:
+        result = fast_pipe(
+            user_input=user_input,
+            session_id=session_id,
+            ram_context=ram_context,
+        )
+    if prof is not None:
+        result["profile"] = prof.path.name  # the file name only: no server paths in responses
+    return result
+
+
 @app.post("/api/chat")
-async def chat_endpoint(chat_request: ChatRequest):
-    """Handles a user's chat message and returns the agent's response."""
+async def chat_endpoint(chat_request: ChatRequest, request: Request):
+    """
+    Handles a user's chat message and returns the agent's response.
+    Profile a single turn with `X-Profile: sample|cprofile` (or `?profile=`),
+    plus `X-Profile-Slow-Pipe: 1` (or `?profile_slow_pipe=1`) for its background write.
+    """
     session_id = chat_request.session_id
     user_input = chat_request.user_input
 
-    if session_id not in ram_context_store:
-        ram_context_store[session_id] = RAMContext()
-    ram_context = ram_context_store[session_id]
-    
+    profile_mode = None
+    profile_slow_pipe = False
+    if PROFILE_HTTP_ENABLED:
+        profile_mode = parse_mode(request.headers.get("x-profile") or request.query_params.get("profile"))
+        profile_slow_pipe = parse_mode(
+            request.headers.get("x-profile-slow-pipe") or request.query_params.get("profile_slow_pipe")
+        ) is not None
+
     ram_context.add(session_id, user_input)
 
-    result = fast_pipe(
-        user_input=user_input,
-        session_id=session_id,
-        ram_context=ram_context,
-    )
+    # fast_pipe blocks on Neo4j/Ollama: run it on the threadpool so one slow
+    # turn doesn't stall every other session on the event loop
+    result = await run_in_threadpool(_run_chat, user_input, session_id, profile_mode, profile_slow_pipe)
     return result
 
 @app.get("/api/graph")
 async def get_graph():
-    """Returns the entire knowledge graph for visualization (Neo4j)."""
+    """Returns the entire knowledge graph for visualization (configured graph store)."""
     try:
-        from memory.neo4j_store import Neo4jMemoryStore
-        store = Neo4jMemoryStore()
-        
-        # Fetch all nodes and edges
-        # Note: In a production app with huge graphs, you'd never do "MATCH (n) RETURN n"
-        # You would fetch a subgraph or use pagination.
-        with store.driver.session() as session:
-            # Get nodes
-            node_result = session.run("MATCH (n:Entity) RETURN n.id as id, n.type as type")
-            nodes = [{"id": r["id"], "group": 1} for r in node_result]
-            
-            # Get edges
-            edge_result = session.run("MATCH (s:Entity)-[r]->(d:Entity) RETURN s.id as src, d.id as dst, type(r) as label")
-            links = [{"source": r["src"], "target": r["dst"], "label": r["label"]} for r in edge_result]
-            
-        store.close()
-        return {"nodes": nodes, "links": links}
+        from memory.factory import get_graph_store
+        store = get_graph_store()
+        try:
+            return store.export_graph()
+        finally:
+            store.close()
 
     except Exception as e:
         print(f"Graph retrieval error: {e}")
         return {"nodes": [], "links": []}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency summaries (p50/p95/p99), gauges and LLM usage counters in Prometheus text format."""
+    body = metrics.render_prometheus() + usage_ledger.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/llm_usage")
+async def llm_usage(session_id: str = None):
+    """LLM calls/tokens/latency per call site, or the totals of one session."""
+    if session_id:
+        return {"session_id": session_id, **usage_ledger.session(session_id)}
+    return usage_ledger.snapshot()
+
+
+@app.get("/api/sessions")
+async def session_stats():
+    """Session context usage and eviction counters."""
+    return ram_context.stats()
+
+
+@app.get("/api/dream")
+async def dream_status():
+    """Background consolidation: paused or not, what is blocking a pass, pending work and recent runs."""
+    return dream_scheduler.status()
+
+
+@app.post("/api/dream/pause")
+async def pause_dreaming():
+    """Stop starting dream passes; a running pass ends after its current cluster."""
+    dream_scheduler.pause()
+    return dream_scheduler.status()
+
+
+@app.post("/api/dream/resume")
+async def resume_dreaming():
+    dream_scheduler.resume()
+    return dream_scheduler.status()
+
+
+@app.get("/api/memory/gc")
+async def memory_gc_status():
+    """Memory lifecycle: decay and quota settings, totals and recent collector passes."""
+    return memory_collector.status()
+
+
+@app.post("/api/memory/gc")
+async def run_memory_gc(dry_run: bool = False):
+    """Run a collector pass now (dry_run only counts what would be removed)."""
+    return await run_in_threadpool(memory_collector.collect, None, dry_run)
+
+
 @app.post("/api/reset")
 async def reset_memory():
     """Wipes all memory (RAM, SQLite, Chroma, Neo4j)."""
     wipe_all_memory()
     # Clear RAM contexts
-    ram_context_store.clear()
+    ram_context.clear()
     return {"status": "ok", "message": "All memories wiped successfully."}
 
 